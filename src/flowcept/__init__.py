@@ -56,6 +56,11 @@ def __getattr__(name):
 
         return FlowceptLightweightLoop
 
+    elif name == "FlowceptStreamingLoop":
+        from flowcept.instrumentation.flowcept_loop import FlowceptStreamingLoop
+
+        return FlowceptStreamingLoop
+
     elif name == "telemetry_flowcept_task":
         from flowcept.instrumentation.flowcept_task import telemetry_flowcept_task
 
@@ -85,6 +90,7 @@ __all__ = [
     "flowcept_task",
     "FlowceptLoop",
     "FlowceptLightweightLoop",
+    "FlowceptStreamingLoop",
     "FlowceptTask",
     "telemetry_flowcept_task",
     "lightweight_flowcept_task",
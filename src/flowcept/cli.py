@@ -319,7 +319,7 @@ def stream_messages(messages_file_path: Optional[str] = None, keys_to_show: List
     # Local imports to avoid changing module-level deps
     from flowcept.configs import MQ_TYPE
 
-    if MQ_TYPE != "redis":
+    if MQ_TYPE not in ("redis", "redis_streams"):
         print("This is currently only available for Redis. Other MQ impls coming soon.")
         return
 
@@ -564,6 +564,28 @@ def get_task(task_id: str):
     print(json.dumps(Flowcept.db.query(_query), indent=2, default=str))
 
 
+def migrate_lmdb_codec(codec: str = "msgpack"):
+    """
+    Rewrite the values of the configured LMDB database with another value codec.
+
+    Parameters
+    ----------
+    codec : str, optional
+        Target codec: msgpack (default), orjson, or json. Values already in this codec are skipped.
+    """
+    from flowcept.commons.daos.docdb_dao.lmdb_dao import LMDBDAO
+
+    print(f"Migrating LMDB database at {configs.LMDB_SETTINGS.get('path', 'flowcept_lmdb')} to '{codec}'...")
+    dao = LMDBDAO()
+    try:
+        migrated = dao.migrate_value_codec(codec)
+    finally:
+        dao.close()
+    print(json.dumps(migrated, indent=2))
+    if configs.LMDB_VALUE_CODEC != codec:
+        print(f"Set `databases.lmdb.value_codec: {codec}` in {configs.SETTINGS_PATH} so new writes use it too.")
+
+
 def _start_agent():  # TODO: start with gui
     """Start Flowcept agent."""
     from flowcept.agents.mcp.mcp_server import main
@@ -929,7 +951,7 @@ def start_redis() -> None:
     settings = getattr(configs, "settings", {}) or {}
     mq = settings.get("mq") or {}
 
-    if mq.get("type", "redis") != "redis":
+    if mq.get("type", "redis") not in ("redis", "redis_streams"):
         print("Your settings file needs to specify redis as the MQ type. Please fix it.")
         return
 
@@ -1211,7 +1233,7 @@ def generate_report(
 COMMAND_GROUPS = [
     ("Basic Commands", [version, check_services, show_settings, init_settings, start, start_services, stop_services]),
     ("Consumption Commands", [start_consumption_services, stop_consumption_services, stream_messages]),
-    ("Database Commands", [workflow_count, query, get_task]),
+    ("Database Commands", [workflow_count, query, get_task, migrate_lmdb_codec]),
     ("Report Commands", [generate_report]),
     ("Agent Commands", [agent_client]),
     ("External Services", [start_mongo, start_redis, stop_redis]),
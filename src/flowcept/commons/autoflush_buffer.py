@@ -1,11 +1,92 @@
 """Autoflush module."""
 
-from typing import Callable
-from threading import Thread, Event
+import os
+import pickle
+import tempfile
+from collections import deque
+from queue import Queue
+from collections.abc import Sequence
+from threading import Condition, Event, Lock, Thread
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Union
+
+from flowcept.commons.flowcept_logger import FlowceptLogger
+
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_SPILL = "spill"
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_SPILL)
+
+
+class BufferView(Sequence):
+    """Live, read-only view of the items waiting in an ``AutoflushBuffer``."""
+
+    def __init__(self, queue: deque, prepare_function: Callable = None):
+        self._queue = queue
+        self._prepare_function = prepare_function
+
+    def _items(self) -> List:
+        # Copying first keeps reads safe while producers keep appending.
+        items = list(self._queue)
+        return self._prepare_function(items) if self._prepare_function else items
+
+    def __len__(self):
+        return len(self._queue)
+
+    def __getitem__(self, index):
+        return self._items()[index]
+
+    def __iter__(self) -> Iterator:
+        return iter(self._items())
+
+    def __repr__(self):
+        return repr(self._items())
 
 
 class AutoflushBuffer:
-    """Autoflush class."""
+    """Bounded buffer that hands batches of items to a flush function.
+
+    Items are flushed when ``max_size`` items are pending or every ``flush_interval`` seconds.
+    Producers append to a deque without taking a lock; a single flush thread drains it.
+    When ``capacity`` items are pending, ``overflow_policy`` decides what happens:
+
+    - ``block``: the producer waits until the flush thread frees space (no message is lost);
+    - ``drop_oldest``: the oldest pending item is discarded and counted in ``stats()``;
+    - ``spill``: new items are appended to a file on disk and flushed, in order, once the
+      in-memory items are out.
+
+    With ``flush_workers`` > 1, the flush thread only cuts batches and hands them to a pool
+    of worker threads through an in-flight queue of at most ``max_in_flight`` batches, so
+    slow flush functions (network, database writes) run concurrently. If ``ordering_key``
+    is given, items are partitioned by that key and each partition always goes to the same
+    worker, which keeps items sharing a key in append order.
+
+    Parameters
+    ----------
+    flush_function : callable
+        Called with a list of items, followed by ``flush_function_args`` and ``flush_function_kwargs``.
+    max_size : int, optional
+        Number of pending items that triggers a flush.
+    flush_interval : float, optional
+        Seconds between time-based flushes.
+    capacity : int, optional
+        Maximum number of items kept in memory. ``None`` or 0 means unbounded.
+    overflow_policy : str, optional
+        ``block`` (default), ``drop_oldest``, or ``spill``.
+    spill_dir : str, optional
+        Directory of the spill file. Defaults to the system temporary directory.
+    flush_workers : int, optional
+        Number of threads calling ``flush_function``. Default is 1 (flush in the flush thread).
+    max_in_flight : int, optional
+        Maximum number of batches waiting for a worker; the flush thread blocks beyond that.
+        Defaults to twice ``flush_workers``.
+    ordering_key : str or callable, optional
+        Dict key (or function of an item) whose items must be flushed in order.
+    prepare_function : callable, optional
+        Called with each batch (a list) right before ``flush_function``, in the thread that
+        flushes it, and returning the batch to flush. It is also applied to the items read
+        through ``current_buffer``. Use it to move per-item work out of the producers.
+    """
 
     def __init__(
         self,
@@ -14,77 +95,275 @@ class AutoflushBuffer:
         flush_interval=None,
         flush_function_args=[],
         flush_function_kwargs={},
+        capacity=None,
+        overflow_policy=OVERFLOW_BLOCK,
+        spill_dir=None,
+        flush_workers=1,
+        max_in_flight=None,
+        ordering_key: Union[str, Callable, None] = None,
+        prepare_function: Callable = None,
     ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow_policy}'. Use one of {OVERFLOW_POLICIES}.")
+        self.logger = FlowceptLogger()
         self._max_size = max_size or float("inf")
-        self._flush_interval = flush_interval or float("inf")
         self._flush_interval = flush_interval
-        self._buffers = [[], []]
-        self._current_buffer_index = 0
+        self._capacity = capacity or float("inf")
+        if self._capacity < self._max_size:
+            self._max_size = self._capacity
+        self._overflow_policy = overflow_policy
+        self._spill_dir = spill_dir
+
+        self._queue = deque()
+        self._not_full = Condition()
         self._swap_event = Event()
         self._stop_event = Event()
 
-        self._timer_thread = Thread(target=self.time_based_flush)
-        self._timer_thread.start()
+        self._spill_lock = Lock()
+        self._spill_path = None
+        self._spill_file = None
+        self._spilling = False
 
-        self._flush_thread = Thread(target=self._flush_buffers)
-        self._flush_thread.start()
+        self._stats_lock = Lock()
+        self._stats = {
+            "flushes": 0,
+            "flushed_items": 0,
+            "flush_errors": 0,
+            "dropped": 0,
+            "spilled": 0,
+            "blocked": 0,
+            "flush_latency_last": None,
+            "flush_latency_max": None,
+            "flush_latency_total": 0.0,
+        }
 
         self._flush_function = flush_function
         self._flush_function_args = flush_function_args
         self._flush_function_kwargs = flush_function_kwargs
+        self._prepare_function = prepare_function
+
+        self._timer_thread = None
+        if flush_interval:
+            self._timer_thread = Thread(target=self.time_based_flush, daemon=True)
+            self._timer_thread.start()
+
+        self._flush_workers = max(1, flush_workers or 1)
+        self._ordering_key = ordering_key
+        self._in_flight: List[Queue] = []
+        self._worker_threads: List[Thread] = []
+        if self._flush_workers > 1:
+            max_in_flight = max_in_flight or 2 * self._flush_workers
+            if ordering_key is None:
+                # A shared queue balances batches across workers.
+                self._in_flight = [Queue(maxsize=max_in_flight)]
+            else:
+                depth = max(1, -(-max_in_flight // self._flush_workers))
+                self._in_flight = [Queue(maxsize=depth) for _ in range(self._flush_workers)]
+            for i in range(self._flush_workers):
+                queue = self._in_flight[i % len(self._in_flight)]
+                worker = Thread(target=self._flush_worker, args=(queue,), daemon=True)
+                worker.start()
+                self._worker_threads.append(worker)
+
+        self._flush_thread = Thread(target=self._flush_buffers)
+        self._flush_thread.start()
 
     def append(self, item):
         """Append it."""
-        buffer = self._buffers[self._current_buffer_index]
-        buffer.append(item)
-        if len(buffer) >= self._max_size:
+        if self._spilling or len(self._queue) >= self._capacity:
+            if self._handle_overflow(item):
+                return
+        self._queue.append(item)
+        if len(self._queue) >= self._max_size:
             self._swap_event.set()
 
     def extend(self, items):
         """Extend it."""
-        buffer = self._buffers[self._current_buffer_index]
-        buffer.extend(items)
-        if len(buffer) >= self._max_size:
-            self._swap_event.set()
+        for item in items:
+            self.append(item)
 
     @property
-    def current_buffer(self):
-        """Return the currently active buffer (read-only)."""
-        return self._buffers[self._current_buffer_index]
+    def current_buffer(self) -> BufferView:
+        """Return a live, read-only view of the items waiting in memory to be flushed."""
+        return BufferView(self._queue, self._prepare_function)
+
+    def stats(self) -> Dict:
+        """Return counters for flushes, flushed items, dropped/spilled/blocked appends, and flush latency (s)."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        latency_total = stats.pop("flush_latency_total")
+        stats["flush_latency_avg"] = latency_total / stats["flushes"] if stats["flushes"] else None
+        stats["pending"] = len(self._queue)
+        stats["in_flight"] = sum(queue.qsize() for queue in self._in_flight)
+        return stats
+
+    def _count(self, name: str, increment: int = 1):
+        with self._stats_lock:
+            self._stats[name] += increment
+
+    def _handle_overflow(self, item) -> bool:
+        """Apply the overflow policy. Returns True if the item was stored elsewhere."""
+        self._swap_event.set()
+        if self._stop_event.is_set():
+            return False
+        if self._overflow_policy == OVERFLOW_DROP_OLDEST:
+            try:
+                self._queue.popleft()
+                self._count("dropped")
+            except IndexError:
+                pass  # The flush thread drained the queue meanwhile.
+            return False
+        if self._overflow_policy == OVERFLOW_SPILL:
+            return self._spill(item)
+
+        self._count("blocked")
+        with self._not_full:
+            while len(self._queue) >= self._capacity and not self._stop_event.is_set():
+                self._swap_event.set()
+                self._not_full.wait(0.1)
+        return False
+
+    def _spill(self, item) -> bool:
+        with self._spill_lock:
+            try:
+                if self._spill_file is None:
+                    fd, self._spill_path = tempfile.mkstemp(prefix="flowcept_spill_", dir=self._spill_dir)
+                    self._spill_file = os.fdopen(fd, "wb")
+                    self.logger.warning(f"Buffer is full; spilling new items to {self._spill_path}.")
+                pickle.dump(item, self._spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                # Keep the item in memory rather than losing it.
+                self.logger.exception(e)
+                return False
+            self._spilling = True
+            self._count("spilled")
+            return True
+
+    def _take_spill(self):
+        """Detach the current spill file so producers can go back to the in-memory queue."""
+        with self._spill_lock:
+            if self._spill_file is None:
+                self._spilling = False
+                return None
+            self._spill_file.close()
+            path = self._spill_path
+            self._spill_file = self._spill_path = None
+            self._spilling = False
+            return path
+
+    def _read_spill(self, path: str) -> Iterator[List]:
+        batch_size = self._max_size if self._max_size != float("inf") else 10_000
+        batch = []
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    batch.append(pickle.load(f))
+                except EOFError:
+                    break
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
 
     def time_based_flush(self):
         """Time flush."""
-        while not self._stop_event.is_set():
-            self._swap_event.wait(self._flush_interval)
-            if not self._stop_event.is_set():
-                self._swap_event.set()
+        while not self._stop_event.wait(self._flush_interval):
+            self._swap_event.set()
 
-    def _do_flush(self):
-        old_buffer_index = self._current_buffer_index
-        self._current_buffer_index = 1 - self._current_buffer_index
-        old_buffer = self._buffers[old_buffer_index]
-        if old_buffer:
+    def _drain(self) -> List:
+        queue, batch = self._queue, []
+        try:
+            for _ in range(len(queue)):
+                batch.append(queue.popleft())
+        except IndexError:
+            pass  # A drop_oldest producer took an item meanwhile.
+        with self._not_full:
+            self._not_full.notify_all()
+        return batch
+
+    def _flush_batch(self, batch: List):
+        start = perf_counter()
+        try:
+            if self._prepare_function is not None:
+                batch = self._prepare_function(batch)
             self._flush_function(
-                old_buffer[:],
+                batch,
                 *self._flush_function_args,
                 **self._flush_function_kwargs,
             )
-            self._buffers[old_buffer_index] = []
+        except Exception as e:
+            self.logger.exception(e)
+            self._count("flush_errors")
+        latency = perf_counter() - start
+        with self._stats_lock:
+            stats = self._stats
+            stats["flushes"] += 1
+            stats["flushed_items"] += len(batch)
+            stats["flush_latency_last"] = latency
+            stats["flush_latency_total"] += latency
+            stats["flush_latency_max"] = max(stats["flush_latency_max"] or 0.0, latency)
+
+    def _flush_worker(self, queue: Queue):
+        while True:
+            batch = queue.get()
+            if batch is None:
+                return
+            self._flush_batch(batch)
+
+    def _partition_key(self, item):
+        key = self._ordering_key
+        if callable(key):
+            return key(item)
+        return item.get(key) if hasattr(item, "get") else None
+
+    def _dispatch(self, batch: List):
+        """Flush a batch here, or hand it to the flush workers (partitioned by ``ordering_key``)."""
+        if not self._in_flight:
+            self._flush_batch(batch)
+        elif len(self._in_flight) == 1:
+            self._in_flight[0].put(batch)
+        else:
+            parts = [[] for _ in self._in_flight]
+            for item in batch:
+                parts[hash(self._partition_key(item)) % len(parts)].append(item)
+            for queue, part in zip(self._in_flight, parts):
+                if part:
+                    queue.put(part)
+
+    def _do_flush(self):
+        batch = self._drain()
+        if batch:
+            self._dispatch(batch)
+        if self._spilling:
+            # Items queued before spilling started go out before the spilled ones.
+            batch = self._drain()
+            if batch:
+                self._dispatch(batch)
+            path = self._take_spill()
+            if path is not None:
+                for spilled in self._read_spill(path):
+                    self._dispatch(spilled)
+                os.remove(path)
 
     def _flush_buffers(self):
-        while not self._stop_event.is_set() or any(self._buffers):
+        while not self._stop_event.is_set():
             self._swap_event.wait()
             self._swap_event.clear()
 
             self._do_flush()
 
-            if self._stop_event.is_set():
-                break
-
     def stop(self):
         """Stop it."""
         self._stop_event.set()
         self._swap_event.set()
         self._flush_thread.join()
-        self._timer_thread.join()
+        if self._timer_thread is not None:
+            self._timer_thread.join()
         self._do_flush()
+        for queue in self._in_flight:
+            for _ in range(self._flush_workers // len(self._in_flight)):
+                queue.put(None)
+        for worker in self._worker_threads:
+            worker.join()
+        self.logger.debug(f"Autoflush buffer stopped. Stats: {self.stats()}")
@@ -4,13 +4,16 @@ This module provides an abstract base class `DocumentDBDAO` for document-based d
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, Iterator, List
 
 import pandas as pd
 
 
+from flowcept.commons.daos.docdb_dao.docdb_export import export_documents, export_format_from_path
+from flowcept.commons.daos.docdb_dao.lineage_index import match_postings, postings_by_workflow
 from flowcept.commons.flowcept_dataclasses.workflow_object import WorkflowObject
 from flowcept.commons.flowcept_dataclasses.agent_object import AgentObject
+from flowcept.commons.vocabulary import Status
 from flowcept.configs import MONGO_ENABLED, LMDB_ENABLED
 
 
@@ -22,6 +25,8 @@ class DocumentDBDAO(ABC):
     """
 
     _instance: "DocumentDBDAO" = None
+    # Maximum number of parent task IDs per children query of the recursive task traversal.
+    RECURSIVE_BATCH_SIZE = 10_000
 
     @staticmethod
     def get_instance(*args, **kwargs) -> "DocumentDBDAO":
@@ -321,7 +326,7 @@ class DocumentDBDAO(ABC):
         output_file : str
             Path to the output file.
         export_format : str
-            Format of the exported file (e.g., JSON, CSV).
+            Format of the exported file: ``json``, ``jsonl``, ``csv``, or ``parquet``.
         should_zip : bool
             Whether to compress the output file into a ZIP archive.
 
@@ -333,7 +338,7 @@ class DocumentDBDAO(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def get_tasks_recursive(self, workflow_id, max_depth=999):
+    def get_tasks_recursive(self, workflow_id, max_depth=999, mapping=None):
         """
         Retrieve all tasks recursively for a given workflow ID.
 
@@ -348,6 +353,9 @@ class DocumentDBDAO(ABC):
         max_depth : int, optional
             The maximum depth to traverse in the task hierarchy (default is 999).
             Helps avoid excessive recursion for workflows with deeply nested tasks.
+        mapping : dict, optional
+            Custom characterization rules, per ``activity_id`` and ``subtype``, added to the
+            tasks as ``custom_characterization``.
 
         Returns
         -------
@@ -367,12 +375,17 @@ class DocumentDBDAO(ABC):
         raise NotImplementedError
 
     @abstractmethod
+    def _iter_tasks_recursive(self, workflow_id, max_depth=999, mapping=None) -> Iterator[List[Dict]]:
+        """Yield the tasks of ``get_tasks_recursive`` in batches, each task after its parent."""
+        raise NotImplementedError
+
     def dump_tasks_to_file_recursive(self, workflow_id, output_file="tasks.parquet", max_depth=999, mapping=None):
         """
         Dump tasks recursively for a given workflow ID to a file.
 
         This method retrieves all tasks (parent and children) for the given workflow ID
-        up to a specified recursion depth and saves them to a file in Parquet format.
+        up to a specified recursion depth and saves them to a file in Parquet format, or in
+        JSON, JSONL, or CSV format if ``output_file`` has one of these extensions.
 
         Parameters
         ----------
@@ -383,6 +396,8 @@ class DocumentDBDAO(ABC):
         max_depth : int, optional
             The maximum depth to traverse in the task hierarchy (default is 999).
             Helps avoid excessive recursion for workflows with deeply nested tasks.
+        mapping : dict, optional
+            Custom characterization rules, as in ``get_tasks_recursive``.
 
         Returns
         -------
@@ -395,10 +410,270 @@ class DocumentDBDAO(ABC):
 
         Notes
         -----
-        The method delegates the task retrieval and saving operation to the DAO implementation.
+        The tasks are written as the traversal finds them, without building the whole list.
+        """
+        try:
+            batches = self._iter_tasks_recursive(workflow_id, max_depth=max_depth, mapping=mapping)
+            tasks = (task for batch in batches for task in batch)
+            export_documents(tasks, output_file, export_format_from_path(output_file))
+        except Exception as e:
+            self.logger.exception(e)
+            raise e
+
+    def _traverse_task_tree(
+        self,
+        roots: Iterable[Dict],
+        fetch_children: Callable[[List[str]], Iterable[Dict]],
+        max_depth: int = 999,
+        mapping: Dict = None,
+    ) -> Iterator[List[Dict]]:
+        """
+        Walk task trees breadth-first, one level at a time, and annotate their tasks.
+
+        Only the tasks of the last level are kept, as the parents of the next one. The ancestors
+        of the tasks, which the mapping rules may refer to, are kept only when there is a mapping.
+
+        Parameters
+        ----------
+        roots : iterable of dict
+            The root tasks.
+        fetch_children : callable
+            Returns the children of a list of task IDs (at most ``RECURSIVE_BATCH_SIZE``), in
+            one query; it is called once per batch of each level.
+        max_depth : int, optional
+            Depth of the deepest tasks returned; the roots have depth 0.
+        mapping : dict, optional
+            Custom characterization rules applied with ``_resolve_mapping``.
+
+        Yields
+        ------
+        list of dict
+            The roots, then the new tasks of each children query, level by level, each with its
+            ``depth`` and its ``ancestor_ids`` (``[{activity_id: task_id}, ...]`` from the root).
+        """
+        level = []
+        for task in roots:
+            DocumentDBDAO._fix_finished_status(task)
+            task["ancestor_ids"] = []
+            task["depth"] = 0
+            level.append(task)
+        if level:
+            yield level
+        seen = {task["task_id"] for task in level}
+        tasks_ancestors = {task_id: [] for task_id in seen} if mapping is not None else None
+        depth = 0
+        while level and depth < max_depth:
+            depth += 1
+            parents = {parent["task_id"]: parent for parent in level}
+            parent_ids = list(parents)
+            level = []
+            level_ancestors = {} if mapping is not None else None
+            for i in range(0, len(parent_ids), DocumentDBDAO.RECURSIVE_BATCH_SIZE):
+                batch = []
+                for task in fetch_children(parent_ids[i : i + DocumentDBDAO.RECURSIVE_BATCH_SIZE]):
+                    if task["task_id"] in seen:
+                        continue
+                    seen.add(task["task_id"])
+                    parent = parents[task["parent_task_id"]]
+                    DocumentDBDAO._fix_finished_status(task)
+                    task["ancestor_ids"] = parent["ancestor_ids"] + [{parent["activity_id"]: parent["task_id"]}]
+                    task["depth"] = depth
+                    if mapping is not None:
+                        level_ancestors[task["task_id"]] = tasks_ancestors[parent["task_id"]] + [parent]
+                        self._resolve_mapping(task, mapping, level_ancestors)
+                    batch.append(task)
+                if batch:
+                    level.extend(batch)
+                    yield batch
+            tasks_ancestors = level_ancestors
+
+    def update_lineage_index(self, tasks: List[Dict]):
+        """
+        Add the postings and producer→consumer edges of task messages to the lineage index.
+
+        Called by the document inserter after each flush. See
+        :mod:`flowcept.commons.daos.docdb_dao.lineage_index` for how edges are derived.
+
+        Parameters
+        ----------
+        tasks : list of dict
+            Task messages, possibly partial; only their ``used``, ``generated``,
+            ``started_at``, and ``ended_at`` fields are read.
+        """
+        for workflow_id, postings in postings_by_workflow(tasks).items():
+            if not postings:
+                continue
+            stored = self._save_lineage_postings(workflow_id, postings)
+            edges = match_postings(postings, stored)
+            if edges:
+                self._save_lineage_edges(workflow_id, edges)
+
+    def rebuild_lineage_index(self, workflow_id: str):
+        """
+        Rebuild the lineage index of a workflow from its stored tasks.
+
+        Use it for workflows stored before the index existed or while it was disabled.
+
+        Parameters
+        ----------
+        workflow_id : str
+            The workflow whose postings and edges are replaced.
+        """
+        self._delete_lineage_index(workflow_id)
+        tasks = self.task_query(
+            filter={"workflow_id": workflow_id},
+            projection=["task_id", "workflow_id", "used", "generated", "started_at", "ended_at"],
+        )
+        tasks = tasks or []
+        for i in range(0, len(tasks), DocumentDBDAO.RECURSIVE_BATCH_SIZE):
+            self.update_lineage_index(tasks[i : i + DocumentDBDAO.RECURSIVE_BATCH_SIZE])
+
+    def get_lineage(self, workflow_id: str, task_ids: List[str], direction: str = "both", max_depth: int = None):
+        """
+        Walk the lineage index from some tasks of a workflow.
+
+        Parameters
+        ----------
+        workflow_id : str
+            The workflow of the tasks.
+        task_ids : list of str
+            The tasks to start from.
+        direction : str, optional
+            ``upstream`` (the tasks they derive from), ``downstream`` (the tasks derived from
+            them), or ``both`` (default).
+        max_depth : int, optional
+            Number of edges to follow from the seeds; unlimited by default.
+
+        Returns
+        -------
+        list of str
+            The seeds followed by the tasks reached, level by level.
+
+        Notes
+        -----
+        A workflow without postings, e.g. stored before the index existed or not through the
+        document inserter, is indexed first with ``rebuild_lineage_index``.
+        """
+        if direction not in ("upstream", "downstream", "both"):
+            raise ValueError(f"Unknown lineage direction '{direction}'. Use upstream, downstream, or both.")
+        if not self._has_lineage_postings(workflow_id):
+            self.rebuild_lineage_index(workflow_id)
+        result = list(dict.fromkeys(task_ids))
+        included = set(result)
+        for upstream in (True, False):
+            if direction == ("downstream" if upstream else "upstream"):
+                continue
+            seen = set(task_ids)
+            level = list(dict.fromkeys(task_ids))
+            depth = 0
+            while level and (max_depth is None or depth < max_depth):
+                depth += 1
+                next_level = []
+                for i in range(0, len(level), DocumentDBDAO.RECURSIVE_BATCH_SIZE):
+                    batch = level[i : i + DocumentDBDAO.RECURSIVE_BATCH_SIZE]
+                    for task_id in self._lineage_neighbors(workflow_id, batch, upstream):
+                        if task_id not in seen:
+                            seen.add(task_id)
+                            next_level.append(task_id)
+                result.extend(t for t in next_level if t not in included)
+                included.update(next_level)
+                level = next_level
+        return result
+
+    @abstractmethod
+    def _save_lineage_postings(self, workflow_id: str, postings: List[tuple]) -> List[tuple]:
+        """
+        Store lineage postings, keeping a posting's ``at`` when the new one has none.
+
+        Returns
+        -------
+        list of tuple
+            All the stored postings, of both roles, with the fingerprints of ``postings``.
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def _save_lineage_edges(self, workflow_id: str, edges: Iterable[tuple]):
+        """Store ``(producer_task_id, consumer_task_id)`` edges; existing edges are left as they are."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _lineage_neighbors(self, workflow_id: str, task_ids: List[str], upstream: bool) -> Iterable[str]:
+        """Return the producers (``upstream``) or the consumers of the given tasks."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _has_lineage_postings(self, workflow_id: str) -> bool:
+        """Return whether the lineage index has postings for a workflow."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _delete_lineage_index(self, workflow_id: str):
+        """Remove the lineage postings and edges of a workflow."""
+        raise NotImplementedError
+
+    @staticmethod
+    def _fix_finished_status(task: Dict):
+        if "finished" in task and task["status"] != Status.FINISHED.value:
+            task["status"] = Status.FINISHED.value
+
+    def _resolve_mapping(self, task, mapping, ancestors):
+        def do_eval(x, task, ancestors):
+            for word in ["task", "ancestors"]:
+                if word in x:
+                    return eval(x)
+            return x
+
+        custom_characterization = {}
+        for mapping_type in {"activity_id", "subtype"}:
+            if mapping_type in task and task[mapping_type] in mapping[mapping_type]:
+                rules = mapping[mapping_type].get(task[mapping_type])
+                rules_str = str(rules)
+                if "grandparent" in rules_str:
+                    rules_str = rules_str.replace("grandparent", "ancestors[task['task_id']][-2]")
+                if "parent" in rules_str:
+                    rules_str = rules_str.replace("parent", "ancestors[task['task_id']][-1]")
+                if "primogenitor" in rules_str:
+                    rules_str = rules_str.replace("primogenitor", "ancestors[task['task_id']][0]")
+                rules = eval(rules_str)
+                for k, v in rules.items():
+                    k = do_eval(k, task, ancestors)
+                    v = do_eval(v, task, ancestors)
+                    if k == "extend":
+                        if isinstance(v, list):
+                            for _ in v:
+                                custom_characterization.update(_)
+                        elif isinstance(v, dict):
+                            custom_characterization.update(v)
+                    elif k == "query":
+                        query = v
+                        new_filter = {}
+                        for fk, fv in query["filter"].items():
+                            new_filter[fk] = do_eval(fv, task, ancestors)
+                        try:
+                            docs = self.query(
+                                filter=new_filter,
+                                collection=query.get("collection", None),
+                                projection=query.get("projection"),
+                                remove_json_unserializables=True,
+                            )
+                            if docs is not None:
+                                if len(docs) == 1:
+                                    query_result = docs[0]
+                                    for dict_field in {"used", "generated", "custom_metadata"}:
+                                        if dict_field in query_result:
+                                            dict_value = query_result.pop(dict_field)
+                                            custom_characterization.update(dict_value)
+                                    custom_characterization.update(query_result)
+                                elif len(docs) > 1:
+                                    custom_characterization["query_result"] = docs
+                        except Exception as e:
+                            self.logger.exception(e)
+                            continue
+                    else:
+                        custom_characterization[k] = v
+                task["custom_characterization"] = custom_characterization
+
     @abstractmethod
     def save_or_update_object(
         self,
@@ -0,0 +1,207 @@
+"""Streaming export of database documents to JSON, JSONL, CSV, and Parquet files.
+
+Documents are written batch by batch, so the memory used by an export is bounded by the
+batch size rather than by the number of documents. CSV and Parquet files need the set of
+columns (and, for Parquet, their types) before their first row: documents are first
+spilled, flattened, to a temporary JSONL file while the schema grows to the superset of
+the columns seen, then the spill file is read back batch by batch into a single
+``csv.DictWriter`` or ``pyarrow.parquet.ParquetWriter``.
+
+In CSV and Parquet files, nested values (dicts and lists) are JSON-encoded strings,
+datetimes are ISO 8601 strings, and other values that are neither numbers, booleans, nor
+strings (e.g., ObjectIds) are converted with ``str``.
+"""
+
+import csv
+import os
+import tempfile
+import zipfile
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+
+import orjson
+
+EXPORT_FORMATS = ("json", "jsonl", "csv", "parquet")
+_PRIMITIVES = (str, int, float, bool, type(None))
+
+
+def export_format_from_path(path: str, default: str = "parquet") -> str:
+    """Return the export format matching the extension of ``path``, or ``default``."""
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    return extension if extension in EXPORT_FORMATS else default
+
+
+def export_documents(
+    docs: Iterable[Dict],
+    output_file: str,
+    export_format: str = "jsonl",
+    should_zip: bool = False,
+    batch_size: int = 10_000,
+) -> str:
+    """
+    Write documents to a file without holding them all in memory.
+
+    Parameters
+    ----------
+    docs : iterable of dict
+        The documents, e.g., a database cursor.
+    output_file : str
+        Path of the file to write. With ``should_zip``, path of the ZIP archive if it ends
+        with ``.zip``, otherwise the archive is ``output_file + ".zip"``.
+    export_format : str, optional
+        ``json`` (one JSON array), ``jsonl`` (one document per line), ``csv``, or ``parquet``.
+    should_zip : bool, optional
+        Whether to compress the file into a ZIP archive.
+    batch_size : int, optional
+        Number of documents held in memory at once.
+
+    Returns
+    -------
+    str
+        Path of the written file.
+
+    Raises
+    ------
+    ValueError
+        If ``export_format`` is not supported.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format '{export_format}'. Use one of {', '.join(EXPORT_FORMATS)}.")
+    if not should_zip:
+        _write(docs, output_file, export_format, batch_size)
+        return output_file
+
+    zip_path = output_file if output_file.endswith(".zip") else output_file + ".zip"
+    arcname = os.path.basename(zip_path[: -len(".zip")])
+    if not arcname.endswith(f".{export_format}"):
+        arcname += f".{export_format}"
+    fd, tmp_path = tempfile.mkstemp(suffix=f".{export_format}", dir=os.path.dirname(os.path.abspath(zip_path)))
+    os.close(fd)
+    try:
+        _write(docs, tmp_path, export_format, batch_size)
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.write(tmp_path, arcname=arcname)
+    finally:
+        os.remove(tmp_path)
+    return zip_path
+
+
+def _write(docs, path, export_format, batch_size):
+    if export_format == "jsonl":
+        with open(path, "wb") as f:
+            for doc in docs:
+                f.write(_dumps(doc))
+                f.write(b"\n")
+    elif export_format == "json":
+        with open(path, "wb") as f:
+            f.write(b"[")
+            for i, doc in enumerate(docs):
+                if i:
+                    f.write(b",")
+                f.write(_dumps(doc))
+            f.write(b"]")
+    else:
+        with _Spill(os.path.dirname(os.path.abspath(path))) as spill:
+            for doc in docs:
+                spill.add(doc)
+            if export_format == "csv":
+                _write_csv(spill, path, batch_size)
+            else:
+                _write_parquet(spill, path, batch_size)
+
+
+def _dumps(doc: Dict) -> bytes:
+    return orjson.dumps(doc, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _flatten_value(value):
+    # Nested values are JSON-encoded, other unknown types become strings.
+    if isinstance(value, _PRIMITIVES):
+        return value
+    if isinstance(value, (dict, list, tuple)):
+        return _dumps(value).decode()
+    if hasattr(value, "isoformat"):  # datetimes, as in JSON files
+        return value.isoformat()
+    return str(value)
+
+
+class _Spill:
+    """Temporary JSONL file of flattened documents, with the superset of their columns."""
+
+    def __init__(self, directory: str):
+        self._file = tempfile.NamedTemporaryFile(mode="w+b", suffix=".jsonl", dir=directory, delete=False)
+        self.columns: Dict[str, type] = {}  # Column -> Python type of its values, in order of appearance.
+
+    def __enter__(self) -> "_Spill":
+        return self
+
+    def __exit__(self, *exc):
+        self._file.close()
+        os.remove(self._file.name)
+
+    def add(self, doc: Dict):
+        row = {}
+        columns = self.columns
+        for key, value in doc.items():
+            key = str(key)
+            value = row[key] = _flatten_value(value)
+            if value is None:
+                columns.setdefault(key, type(None))
+                continue
+            known = columns.get(key)
+            if known is None or known is type(None):
+                columns[key] = type(value)
+            elif known is not type(value):
+                columns[key] = _merge_types(known, type(value))
+        self._file.write(_dumps(row))
+        self._file.write(b"\n")
+
+    def batches(self, batch_size: int) -> Iterator[List[Dict]]:
+        self._file.flush()
+        self._file.seek(0)
+        lines = iter(self._file)
+        while True:
+            batch = [orjson.loads(line) for line in islice(lines, batch_size)]
+            if not batch:
+                return
+            yield batch
+
+
+def _merge_types(a: type, b: type) -> type:
+    """Promote two value types: numbers to float, any other conflict to str."""
+    numbers = (int, float)
+    if a in numbers and b in numbers:
+        return float
+    return str
+
+
+def _cell(value, column_type):
+    if value is None or column_type is not str or isinstance(value, str):
+        return value
+    return _dumps(value).decode() if isinstance(value, bool) else str(value)
+
+
+def _write_csv(spill: _Spill, path: str, batch_size: int):
+    columns = spill.columns
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(columns))
+        writer.writeheader()
+        for batch in spill.batches(batch_size):
+            writer.writerows(batch)
+
+
+def _write_parquet(spill: _Spill, path: str, batch_size: int):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {str: pa.string(), int: pa.int64(), float: pa.float64(), bool: pa.bool_(), type(None): pa.null()}
+    columns = spill.columns
+    schema = pa.schema([(name, arrow_types[t]) for name, t in columns.items()])
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in spill.batches(batch_size):
+            arrays = [
+                pa.array([_cell(doc.get(name), t) for doc in batch], type=arrow_types[t]) for name, t in columns.items()
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        if not columns:
+            writer.write_table(schema.empty_table())
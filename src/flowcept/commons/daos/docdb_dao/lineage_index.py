@@ -0,0 +1,119 @@
+"""Lineage index: producer→consumer edges between the tasks of a workflow.
+
+A task *produces* the (key, value) pairs of its ``generated`` dict and *consumes* those of its
+``used`` dict; nested dicts and lists are flattened to their leaves and trivial values (None,
+booleans, 0, ±1, one-character strings) are skipped. Each pair is reduced to a fingerprint. A
+task A is upstream of a task B when B consumes a fingerprint that A produces, A ≠ B, and A did
+not end after B started -- the rule behind the derived edges of the dataflow graph.
+
+For each workflow, the index stores the postings ``(fingerprint, role, task_id, at)``, where
+``at`` is the producer's ``ended_at`` or the consumer's ``started_at`` in epoch seconds, and the
+edges found so far. It is maintained incrementally as task messages are stored: their postings
+are saved first, then matched against the stored postings of the other role with the same
+fingerprints. Since every writer saves before it reads, two messages stored concurrently on
+both ends of an edge cannot both miss it.
+"""
+
+from collections import defaultdict
+from hashlib import blake2b
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from flowcept.commons.utils import to_epoch
+
+PRODUCED = "p"
+CONSUMED = "c"
+FINGERPRINT_SIZE = 12  # Bytes of the blake2b digest.
+_ROLE_FIELDS = ((PRODUCED, "generated", "ended_at"), (CONSUMED, "used", "started_at"))
+
+# (fingerprint, role, task_id, at)
+Posting = Tuple[str, str, str, Any]
+
+
+def is_trivial(value: Any) -> bool:
+    """Return whether a value is too common to imply a real producer→consumer link."""
+    if value is None or isinstance(value, bool):
+        return True
+    if isinstance(value, str) and len(value) <= 1:
+        return True
+    if isinstance(value, (int, float)) and value in (0, 1, -1):
+        return True
+    return False
+
+
+def flatten_payload(payload: Any) -> List[Tuple[str, Any]]:
+    """Recursively extract flat key-value pairs from a nested structure."""
+    results = []
+    if isinstance(payload, dict):
+        for k, v in payload.items():
+            if isinstance(v, (dict, list)):
+                results.extend(flatten_payload(v))
+            else:
+                results.append((k, v))
+    elif isinstance(payload, list):
+        for item in payload:
+            results.extend(flatten_payload(item))
+    return results
+
+
+def value_fingerprint(key: str, value: Any) -> str:
+    """Return the hex fingerprint of a flattened (key, value) pair."""
+    return blake2b(f"{key}\x00{value!r}".encode(), digest_size=FINGERPRINT_SIZE).hexdigest()
+
+
+def task_postings(task: Dict[str, Any]) -> List[Posting]:
+    """Return the postings of a task message, one per distinct non-trivial fingerprint and role."""
+    task_id = task.get("task_id")
+    if not task_id:
+        return []
+    postings = []
+    for role, field, time_field in _ROLE_FIELDS:
+        payload = task.get(field)
+        if not payload or not isinstance(payload, dict):
+            continue
+        at = to_epoch(task.get(time_field))
+        fingerprints = {value_fingerprint(k, v) for k, v in flatten_payload(payload) if not is_trivial(v)}
+        postings.extend((fingerprint, role, task_id, at) for fingerprint in fingerprints)
+    return postings
+
+
+def postings_by_workflow(tasks: Iterable[Dict[str, Any]]) -> Dict[str, List[Posting]]:
+    """Group the postings of task messages by workflow; tasks without ``workflow_id`` are skipped."""
+    grouped = defaultdict(list)
+    for task in tasks:
+        workflow_id = task.get("workflow_id")
+        if workflow_id:
+            grouped[workflow_id].extend(task_postings(task))
+    return grouped
+
+
+def match_postings(new: List[Posting], stored: List[Posting]) -> Set[Tuple[str, str]]:
+    """
+    Return the ``(producer_task_id, consumer_task_id)`` edges involving at least one new posting.
+
+    Parameters
+    ----------
+    new : list of tuple
+        Postings just saved.
+    stored : list of tuple
+        Stored postings with the fingerprints of ``new``, which may include ``new`` itself.
+    """
+    new_keys = {posting[:3] for posting in new}
+    by_fingerprint: Dict[str, Tuple[Dict, Dict]] = defaultdict(lambda: ({}, {}))
+    for fingerprint, role, task_id, at in list(stored) + list(new):
+        postings = by_fingerprint[fingerprint][0 if role == PRODUCED else 1]
+        if at is not None or task_id not in postings:
+            postings[task_id] = at
+    edges = set()
+    for fingerprint in {posting[0] for posting in new}:
+        producers, consumers = by_fingerprint[fingerprint]
+        for producer, ended_at in producers.items():
+            is_new_producer = (fingerprint, PRODUCED, producer) in new_keys
+            for consumer, started_at in consumers.items():
+                if producer == consumer or (producer, consumer) in edges:
+                    continue
+                if not is_new_producer and (fingerprint, CONSUMED, consumer) not in new_keys:
+                    continue
+                if ended_at is not None and started_at is not None and ended_at > started_at:
+                    continue
+                edges.add((producer, consumer))
+    return edges
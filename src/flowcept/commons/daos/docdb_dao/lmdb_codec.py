@@ -0,0 +1,98 @@
+"""Value codecs for the LMDB document store.
+
+Values written by a binary codec start with a three-byte header: a magic byte,
+the format version, and the codec id. Values without the header are plain JSON,
+which is how every value was stored before codecs existed, so old databases
+remain readable whichever codec is configured for new writes.
+"""
+
+import json
+from typing import Dict
+
+import msgpack
+import orjson
+
+FORMAT_MAGIC = 0xFC  # Never the first byte of a UTF-8 JSON document.
+FORMAT_VERSION = 1
+
+JSON_CODEC = "json"
+ORJSON_CODEC = "orjson"
+MSGPACK_CODEC = "msgpack"
+
+_CODEC_IDS = {ORJSON_CODEC: 1, MSGPACK_CODEC: 2}
+_CODEC_NAMES = {codec_id: name for name, codec_id in _CODEC_IDS.items()}
+
+
+def _json_dumps(doc: Dict) -> bytes:
+    return json.dumps(doc).encode()
+
+
+def _json_loads(raw: bytes) -> Dict:
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        # Stdlib json writes NaN/Infinity literals, which orjson rejects.
+        return json.loads(raw)
+
+
+def _orjson_dumps(doc: Dict) -> bytes:
+    return orjson.dumps(doc, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _msgpack_dumps(doc: Dict) -> bytes:
+    return msgpack.packb(doc, use_bin_type=True)
+
+
+def _msgpack_loads(raw: bytes) -> Dict:
+    return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+
+
+_ENCODERS = {JSON_CODEC: _json_dumps, ORJSON_CODEC: _orjson_dumps, MSGPACK_CODEC: _msgpack_dumps}
+_DECODERS = {ORJSON_CODEC: orjson.loads, MSGPACK_CODEC: _msgpack_loads}
+
+
+class LMDBValueCodec:
+    """Encode LMDB values with a configurable codec and decode values of any codec.
+
+    Parameters
+    ----------
+    name : str, optional
+        ``json`` (header-less JSON, the historical format), ``orjson``, or ``msgpack``.
+    """
+
+    def __init__(self, name: str = JSON_CODEC):
+        if name not in _ENCODERS:
+            raise ValueError(f"Unsupported LMDB value codec '{name}'. Use one of {sorted(_ENCODERS)}.")
+        self.name = name
+        self._dumps = _ENCODERS[name]
+        self._header = b"" if name == JSON_CODEC else bytes([FORMAT_MAGIC, FORMAT_VERSION, _CODEC_IDS[name]])
+
+    def encode(self, doc: Dict) -> bytes:
+        """Serialize a document, falling back to plain JSON if the codec cannot represent it."""
+        if not self._header:
+            return _json_dumps(doc)
+        try:
+            return self._header + self._dumps(doc)
+        except (TypeError, OverflowError, ValueError):
+            # E.g., integers wider than 64 bits; plain JSON can still store them.
+            return _json_dumps(doc)
+
+    def is_encoded(self, raw: bytes) -> bool:
+        """Return True if ``raw`` was written by this codec."""
+        return LMDBValueCodec.codec_name(raw) == self.name
+
+    @staticmethod
+    def codec_name(raw: bytes) -> str:
+        """Return the name of the codec that wrote ``raw``."""
+        if raw[:1] == bytes([FORMAT_MAGIC]):
+            return _CODEC_NAMES.get(raw[2], "unknown") if len(raw) > 2 else "unknown"
+        return JSON_CODEC
+
+    @staticmethod
+    def decode(raw: bytes) -> Dict:
+        """Deserialize a value written by any supported codec."""
+        if raw[:1] != bytes([FORMAT_MAGIC]):
+            return _json_loads(raw)
+        if len(raw) < 3 or raw[1] != FORMAT_VERSION or raw[2] not in _CODEC_NAMES:
+            raise ValueError("Unsupported LMDB value format. Was it written by a newer Flowcept version?")
+        return _DECODERS[_CODEC_NAMES[raw[2]]](raw[3:])
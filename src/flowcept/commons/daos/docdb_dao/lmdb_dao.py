@@ -3,33 +3,72 @@
 This module provides the `LMDBDAO` class for interacting with an LMDB-backed database.
 """
 
+import math
+import struct
+from itertools import islice
 from time import time
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import lmdb
-import json
+import numpy as np
 import pandas as pd
 
 from flowcept import WorkflowObject, AgentObject
 from flowcept.commons.daos.docdb_dao.docdb_dao_base import DocumentDBDAO
+from flowcept.commons.daos.docdb_dao.docdb_export import export_documents
+from flowcept.commons.daos.docdb_dao import lmdb_scan
+from flowcept.commons.daos.docdb_dao.lmdb_codec import LMDBValueCodec
 from flowcept.commons.flowcept_logger import FlowceptLogger
-from flowcept.configs import PERF_LOG, LMDB_SETTINGS
-from flowcept.flowceptor.consumers.consumer_utils import curate_dict_task_messages
+from flowcept.configs import (
+    PERF_LOG,
+    LMDB_SETTINGS,
+    LMDB_VALUE_CODEC,
+    LMDB_SCAN_WORKERS,
+    LMDB_PARALLEL_SCAN_MIN_RECORDS,
+)
+from flowcept.flowceptor.consumers.consumer_utils import curate_dict_task_messages, merge_task_docs
 
 
 class LMDBDAO(DocumentDBDAO):
     """DocumentDBDAO implementation for interacting with LMDB.
 
     Provides methods for storing and retrieving task and workflow data.
+
+    Task documents are keyed by ``task_id``. Selected task fields are also kept in
+    secondary index sub-databases (``dupsort`` DBs mapping an encoded field value to
+    the ``task_id``s holding it), maintained in the same write transaction as the
+    task documents. ``query`` uses them to avoid full scans for equality, ``$in``,
+    and numeric range filters.
+
+    The lineage index is kept in two more ``dupsort`` sub-databases: ``lineage_postings``,
+    mapping ``workflow_id`` + fingerprint to role + ``at`` + ``task_id`` values, and
+    ``lineage_edges``, mapping ``d``/``u`` + ``workflow_id`` + ``task_id`` to the task's
+    consumers (downstream) and producers (upstream).
     """
 
     _shared_handles = {}
 
+    TASK_INDEX_FIELDS = (
+        "workflow_id",
+        "campaign_id",
+        "parent_task_id",
+        "activity_id",
+        "agent_id",
+        "status",
+        "started_at",
+    )
+    _PRIMARY_KEYS = {"tasks": "task_id", "workflows": "workflow_id", "agents": "agent_id"}
+    _INDEX_VERSION = b"1"
+    _MAX_INDEX_KEY_BYTES = 400
+    # An extra index is only intersected if it is not much larger than the current candidate set.
+    _INDEX_INTERSECT_RATIO = 32
+
     def __init__(self):
         # Avoid reopening LMDB for every DAO instance: lmdb can reject
         # opening the same environment path more than once per process.
         self._initialized = False
         self._path = None
+        self._codec = LMDBValueCodec(LMDB_VALUE_CODEC)
         self._open()
         self._initialized = True
         self.logger = FlowceptLogger()
@@ -39,16 +78,24 @@ class LMDBDAO(DocumentDBDAO):
         path = LMDB_SETTINGS.get("path", "flowcept_lmdb")
         handle = LMDBDAO._shared_handles.get(path)
         if handle is None:
-            env = lmdb.open(path, map_size=10**12, max_dbs=5)
+            env = lmdb.open(path, map_size=10**12, max_dbs=32)
             handle = {
                 "env": env,
                 "tasks_db": env.open_db(b"tasks"),
                 "workflows_db": env.open_db(b"workflows"),
                 "agents_db": env.open_db(b"agents"),
                 "dashboards_db": env.open_db(b"dashboards"),
+                "meta_db": env.open_db(b"meta"),
+                "task_index_dbs": {
+                    field: env.open_db(f"tasks_by_{field}".encode(), dupsort=True)
+                    for field in LMDBDAO.TASK_INDEX_FIELDS
+                },
+                "lineage_postings_db": env.open_db(b"lineage_postings", dupsort=True),
+                "lineage_edges_db": env.open_db(b"lineage_edges", dupsort=True),
                 "ref_count": 0,
             }
             LMDBDAO._shared_handles[path] = handle
+            LMDBDAO._ensure_task_indexes(handle)
 
         handle["ref_count"] += 1
         self._path = path
@@ -57,12 +104,82 @@ class LMDBDAO(DocumentDBDAO):
         self._workflows_db = handle["workflows_db"]
         self._agents_db = handle["agents_db"]
         self._dashboards_db = handle["dashboards_db"]
+        self._meta_db = handle["meta_db"]
+        self._task_index_dbs = handle["task_index_dbs"]
+        self._lineage_postings_db = handle["lineage_postings_db"]
+        self._lineage_edges_db = handle["lineage_edges_db"]
         self._initialized = True
         self._is_closed = False
 
+    @staticmethod
+    def _ensure_task_indexes(handle):
+        """Build the task secondary indexes if this environment predates them."""
+        env, meta_db, tasks_db = handle["env"], handle["meta_db"], handle["tasks_db"]
+        with env.begin(db=meta_db) as txn:
+            if txn.get(b"tasks_index_version") == LMDBDAO._INDEX_VERSION:
+                return
+        with env.begin(write=True) as txn:
+            for index_db in handle["task_index_dbs"].values():
+                txn.drop(index_db, delete=False)
+            for key, value in txn.cursor(db=tasks_db):
+                LMDBDAO._update_task_index(txn, handle["task_index_dbs"], key, None, LMDBValueCodec.decode(value))
+            txn.put(b"tasks_index_version", LMDBDAO._INDEX_VERSION, db=meta_db)
+
+    @staticmethod
+    def _index_key(value) -> Optional[bytes]:
+        """Encode a scalar field value as an order-preserving index key.
+
+        Numbers (and booleans, which compare equal to 0/1) are encoded as big-endian
+        IEEE doubles with the sign bit flipped, so byte order matches numeric order.
+        Strings are truncated to ``_MAX_INDEX_KEY_BYTES``; an index lookup may therefore
+        return a superset of the matching documents, which ``_match_filter`` then trims.
+        Returns None for values that are not indexed (None, containers, NaN, ...).
+        """
+        if isinstance(value, (bool, int, float)):
+            try:
+                number = float(value) + 0.0  # normalizes -0.0 to 0.0
+            except OverflowError:
+                return None
+            if number != number:
+                return None
+            packed = struct.pack(">d", number)
+            if packed[0] & 0x80:
+                packed = bytes(b ^ 0xFF for b in packed)
+            else:
+                packed = bytes([packed[0] | 0x80]) + packed[1:]
+            return b"n" + packed
+        if isinstance(value, str):
+            return b"s" + value.encode()[: LMDBDAO._MAX_INDEX_KEY_BYTES]
+        return None
+
+    @staticmethod
+    def _index_entries(doc: Optional[Dict]) -> set:
+        """Return the ``(field, index_key)`` pairs a task document contributes to the indexes."""
+        if not doc:
+            return set()
+        entries = set()
+        for field in LMDBDAO.TASK_INDEX_FIELDS:
+            index_key = LMDBDAO._index_key(doc.get(field))
+            if index_key is not None:
+                entries.add((field, index_key))
+        return entries
+
+    @staticmethod
+    def _update_task_index(txn, index_dbs, task_key: bytes, old_doc: Optional[Dict], new_doc: Optional[Dict]):
+        """Apply the index delta between ``old_doc`` and ``new_doc`` inside ``txn``."""
+        old_entries, new_entries = LMDBDAO._index_entries(old_doc), LMDBDAO._index_entries(new_doc)
+        for field, index_key in old_entries - new_entries:
+            txn.delete(index_key, task_key, db=index_dbs[field])
+        for field, index_key in new_entries - old_entries:
+            txn.put(index_key, task_key, db=index_dbs[field])
+
     def insert_and_update_many_tasks(self, docs: List[Dict], indexing_key=None):
         """Insert or update multiple task documents in the LMDB database.
 
+        Tasks already stored are read back in the same write transaction (one batched
+        ``getmulti``) and merged with ``merge_task_docs``, so messages of the same task
+        that land in different flushes update the record instead of replacing it.
+
         Parameters
         ----------
         docs : list of dict
@@ -84,9 +201,15 @@ class LMDBDAO(DocumentDBDAO):
             )
 
             with self._env.begin(write=True, db=self._tasks_db) as txn:
+                keys = sorted(key.encode() for key in indexed_buffer)
+                stored = {k: LMDBValueCodec.decode(v) for k, v in txn.cursor().getmulti(keys)}
                 for key, value in indexed_buffer.items():
-                    k, v = key.encode(), json.dumps(value).encode()
-                    txn.put(k, v)
+                    k = key.encode()
+                    old_value = stored.get(k)
+                    if old_value is not None:
+                        value = merge_task_docs(old_value, value)
+                    txn.put(k, self._codec.encode(value))
+                    LMDBDAO._update_task_index(txn, self._task_index_dbs, k, old_value, value)
             return True
         except Exception as e:
             self.logger.exception(e)
@@ -107,8 +230,11 @@ class LMDBDAO(DocumentDBDAO):
         """
         try:
             with self._env.begin(write=True, db=self._tasks_db) as txn:
-                k, v = task_dict.get("task_id").encode(), json.dumps(task_dict).encode()
+                k, v = task_dict.get("task_id").encode(), self._codec.encode(task_dict)
+                existing = txn.get(k)
+                old_value = LMDBValueCodec.decode(existing) if existing else None
                 txn.put(k, v)
+                LMDBDAO._update_task_index(txn, self._task_index_dbs, k, old_value, task_dict)
             return True
         except Exception as e:
             self.logger.exception(e)
@@ -131,7 +257,7 @@ class LMDBDAO(DocumentDBDAO):
             _dict = wf_obj.to_dict()
             with self._env.begin(write=True, db=self._workflows_db) as txn:
                 key = _dict.get("workflow_id").encode()
-                value = json.dumps(_dict).encode()
+                value = self._codec.encode(_dict)
                 txn.put(key, value)
             return True
         except Exception as e:
@@ -144,9 +270,9 @@ class LMDBDAO(DocumentDBDAO):
             with self._env.begin(write=True, db=self._workflows_db) as txn:
                 key = workflow_id.encode()
                 existing = txn.get(key)
-                doc = json.loads(existing.decode()) if existing else {"workflow_id": workflow_id, "type": "workflow"}
+                doc = LMDBValueCodec.decode(existing) if existing else {"workflow_id": workflow_id, "type": "workflow"}
                 doc.update(fields)
-                txn.put(key, json.dumps(doc).encode())
+                txn.put(key, self._codec.encode(doc))
             return True
         except Exception as e:
             self.logger.exception(e)
@@ -169,7 +295,7 @@ class LMDBDAO(DocumentDBDAO):
             _dict = agent_obj.to_dict()
             with self._env.begin(write=True, db=self._agents_db) as txn:
                 key = _dict.get("agent_id").encode()
-                value = json.dumps(_dict).encode()
+                value = self._codec.encode(_dict)
                 txn.put(key, value)
             return True
         except Exception as e:
@@ -207,12 +333,18 @@ class LMDBDAO(DocumentDBDAO):
                     for key in keys_list:
                         if key is None:
                             continue
-                        txn.delete(str(key).encode())
+                        k = str(key).encode()
+                        existing = txn.get(k)
+                        if existing is None:
+                            continue
+                        LMDBDAO._update_task_index(txn, self._task_index_dbs, k, LMDBValueCodec.decode(existing), None)
+                        txn.delete(k)
                 else:
                     cursor = txn.cursor()
                     for key, value in cursor:
-                        entry = json.loads(value.decode())
+                        entry = LMDBValueCodec.decode(value)
                         if entry.get(key_name) in keys_list:
+                            LMDBDAO._update_task_index(txn, self._task_index_dbs, key, entry, None)
                             cursor.delete()
             return True
         except Exception as e:
@@ -227,7 +359,7 @@ class LMDBDAO(DocumentDBDAO):
             with self._env.begin(write=True, db=self._agents_db) as txn:
                 cursor = txn.cursor()
                 for key, value in cursor:
-                    entry = json.loads(value.decode())
+                    entry = LMDBValueCodec.decode(value)
                     if LMDBDAO._match_filter(entry, filter):
                         cursor.delete()
             return True
@@ -257,11 +389,61 @@ class LMDBDAO(DocumentDBDAO):
             self.logger.exception(e)
             return -1
 
+    def migrate_value_codec(self, codec: str, batch_size: int = 10_000) -> Dict[str, int]:
+        """Rewrite stored values of every collection with the given codec.
+
+        Values already written by ``codec`` are left untouched, so the migration can be
+        interrupted and re-run. Each batch is committed in its own write transaction.
+
+        Parameters
+        ----------
+        codec : str
+            Target codec name (``json``, ``orjson``, or ``msgpack``).
+        batch_size : int, optional
+            Number of values rewritten per write transaction.
+
+        Returns
+        -------
+        dict
+            Number of rewritten values per collection.
+        """
+        if self._is_closed:
+            self._open()
+        target = LMDBValueCodec(codec)
+        collections = {
+            "tasks": self._tasks_db,
+            "workflows": self._workflows_db,
+            "agents": self._agents_db,
+            "dashboards": self._dashboards_db,
+        }
+        migrated = {}
+        for name, db in collections.items():
+            count, last_key = 0, None
+            while True:
+                with self._env.begin(write=True, db=db) as txn:
+                    cursor = txn.cursor()
+                    positioned = cursor.first() if last_key is None else cursor.set_range(last_key)
+                    if positioned and last_key is not None and cursor.key() == last_key:
+                        positioned = cursor.next()
+                    seen = 0
+                    while positioned and seen < batch_size:
+                        key, value = cursor.item()
+                        if not target.is_encoded(value):
+                            cursor.put(key, target.encode(LMDBValueCodec.decode(value)))
+                            count += 1
+                        last_key, seen = key, seen + 1
+                        positioned = cursor.next()
+                if not positioned:
+                    break
+            migrated[name] = count
+        self._codec = target
+        return migrated
+
     @staticmethod
     def _match_filter(entry, filter):
         """Check if an entry matches a Mongo-style filter dict.
 
-        Supports: ``$and``, ``$or``, ``$eq``, ``$ne``, ``$gt``, ``$gte``,
+        Supports: ``$and``, ``$or``, ``$exists``, ``$eq``, ``$ne``, ``$gt``, ``$gte``,
         ``$lt``, ``$lte``, ``$in``, ``$nin``, and plain equality.
         """
         from flowcept.commons.daos.docdb_dao.docdb_dao_utils import ALLOWED_FILTER_OPERATORS
@@ -293,6 +475,10 @@ class LMDBDAO(DocumentDBDAO):
             elif isinstance(value, dict):
                 entry_val = entry.get(key)
                 for op, op_val in value.items():
+                    if op == "$exists":
+                        if (key in entry) != bool(op_val):
+                            return False
+                        continue
                     fn = _field_ops.get(op)
                     if fn is None or not fn(entry_val, op_val):
                         return False
@@ -349,33 +535,356 @@ class LMDBDAO(DocumentDBDAO):
         -------
         list of dict
             A list of queried documents.
+
+        Notes
+        -----
+        Filters on the collection's primary key and on ``TASK_INDEX_FIELDS`` are resolved
+        through the indexes (equality, ``$in``, numeric ranges, and ``$and``/``$or`` of
+        those); every fetched document is still checked with ``_match_filter``. A task
+        query with a ``limit`` whose first sort field is indexed walks that index in sort
+        order and stops once the limit is reached (see ``_sorted_walk``).
         """
         if self._is_closed:
             self._open()
 
-        if collection == "tasks":
-            _db = self._tasks_db
-        elif collection == "workflows":
-            _db = self._workflows_db
-        elif collection == "agents":
-            _db = self._agents_db
-        else:
+        if collection not in LMDBDAO._PRIMARY_KEYS:
             self.logger.warning(f"LMDB does not support collection '{collection}'. Returning None.")
             return None
 
         try:
-            data = []
-            with self._env.begin(db=_db) as txn:
-                cursor = txn.cursor()
-                for key, value in cursor:
-                    entry = json.loads(value.decode())
-                    if LMDBDAO._match_filter(entry, filter):
-                        data.append(entry)
+            data = None
+            if sort and limit and collection == "tasks":
+                data = self._sorted_walk(filter, sort, limit)
+            if data is None:
+                # Without a sort, documents come out in key order and we can stop at the limit.
+                stop_at = limit if (limit and not sort) else None
+                docs = self._iter_docs(collection, filter)
+                try:
+                    data = list(islice(docs, stop_at))
+                finally:
+                    docs.close()  # Ends the read transaction when stopping at the limit.
+                if sort:
+                    data = LMDBDAO._sort_docs(data, sort)
+                if limit:
+                    data = data[:limit]
+            if projection:
+                data = [LMDBDAO._project(doc, projection) for doc in data]
             return data
         except Exception as e:
             self.logger.exception(e)
             return None
 
+    def _iter_docs(self, collection: str, filter=None) -> Iterator[Dict]:
+        """Yield the documents of ``collection`` matching ``filter``, in key order, within one read transaction."""
+        _db = {"tasks": self._tasks_db, "workflows": self._workflows_db, "agents": self._agents_db}[collection]
+        with self._env.begin(db=_db) as txn:
+            candidates = self._plan_candidates(txn, collection, filter)
+            if candidates is None:
+                items = txn.cursor()
+            else:
+                items = txn.cursor().getmulti(sorted(candidates))
+            for key, value in items:
+                entry = LMDBValueCodec.decode(value)
+                if LMDBDAO._match_filter(entry, filter):
+                    yield entry
+
+    def _plan_candidates(self, txn, collection, filter) -> Optional[set]:
+        """Resolve the indexable part of ``filter`` into a set of primary keys.
+
+        Returns None when no predicate can be answered by an index, in which case the
+        caller falls back to a full scan. The returned set may be a superset of the
+        matching keys, never a subset.
+        """
+        if not filter or not isinstance(filter, dict):
+            return None
+
+        predicates = []  # (estimated_size or None, resolver)
+        for field, condition in filter.items():
+            if field == "$and":
+                for clause in condition:
+                    predicates.append((None, lambda c=clause: self._plan_candidates(txn, collection, c)))
+            elif field == "$or":
+                predicates.append((None, lambda c=condition: self._plan_or(txn, collection, c)))
+            elif not field.startswith("$"):
+                predicate = self._plan_field(txn, collection, field, condition)
+                if predicate is not None:
+                    predicates.append(predicate)
+
+        result = None
+        # Cheapest estimates first; unknown sizes (sub-clauses, ranges) last.
+        predicates.sort(key=lambda p: float("inf") if p[0] is None else p[0])
+        for estimate, resolver in predicates:
+            if result is not None:
+                if not result:
+                    break
+                if estimate is None or estimate > len(result) * LMDBDAO._INDEX_INTERSECT_RATIO:
+                    continue  # left for _match_filter
+            keys = resolver()
+            if keys is None:
+                continue
+            result = keys if result is None else result & keys
+        return result
+
+    def _plan_or(self, txn, collection, clauses) -> Optional[set]:
+        """Union the candidates of ``$or`` clauses, or None if any clause needs a full scan."""
+        result = set()
+        for clause in clauses:
+            keys = self._plan_candidates(txn, collection, clause)
+            if keys is None:
+                return None
+            result |= keys
+        return result
+
+    def _plan_field(self, txn, collection, field, condition):
+        """Return ``(estimated_size, resolver)`` for an indexable field predicate, else None."""
+        if isinstance(condition, dict):
+            values = None
+            if "$eq" in condition:
+                values = [condition["$eq"]]
+            elif isinstance(condition.get("$in"), (list, tuple, set)):
+                values = list(condition["$in"])
+            bounds = {op: condition[op] for op in ("$gt", "$gte", "$lt", "$lte") if op in condition}
+        else:
+            values, bounds = [condition], {}
+
+        if field == LMDBDAO._PRIMARY_KEYS.get(collection):
+            if values is None or not all(isinstance(v, str) for v in values):
+                return None
+            keys = {v.encode() for v in values}
+            return len(keys), lambda: keys
+
+        if collection != "tasks" or field not in self._task_index_dbs:
+            return None
+        index_db = self._task_index_dbs[field]
+
+        if values is not None:
+            index_keys = [LMDBDAO._index_key(v) for v in values]
+            if any(k is None for k in index_keys):
+                return None  # e.g. None also matches missing fields, which are not indexed
+            cursor = txn.cursor(db=index_db)
+            estimate = sum(cursor.count() for k in set(index_keys) if cursor.set_key(k))
+            return estimate, lambda: LMDBDAO._index_lookup(txn, index_db, index_keys)
+
+        if bounds and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in bounds.values()):
+            lower = max((v for op, v in bounds.items() if op in ("$gt", "$gte")), default=None)
+            upper = min((v for op, v in bounds.items() if op in ("$lt", "$lte")), default=None)
+            return None, lambda: LMDBDAO._index_range(txn, index_db, lower, upper)
+        return None
+
+    @staticmethod
+    def _index_lookup(txn, index_db, index_keys) -> set:
+        """Collect the primary keys stored under any of ``index_keys``."""
+        keys = set()
+        cursor = txn.cursor(db=index_db)
+        for index_key in set(index_keys):
+            if cursor.set_key(index_key):
+                keys.update(cursor.iternext_dup())
+        return keys
+
+    @staticmethod
+    def _index_range(txn, index_db, lower, upper) -> Optional[set]:
+        """Collect the primary keys whose numeric index value lies in ``[lower, upper]``.
+
+        Bounds are inclusive; strict comparisons are enforced by ``_match_filter``.
+        """
+        start = LMDBDAO._index_key(lower) if lower is not None else b"n"
+        end = LMDBDAO._index_key(upper) if upper is not None else None
+        if start is None or (upper is not None and end is None):
+            return None
+        keys = set()
+        cursor = txn.cursor(db=index_db)
+        if not cursor.set_range(start):
+            return keys
+        for index_key, task_key in cursor.iternext():
+            if not index_key.startswith(b"n") or (end is not None and index_key > end):
+                break
+            keys.add(task_key)
+        return keys
+
+    @staticmethod
+    def _field_bounds(filter, field) -> Tuple[float, float]:
+        """Return the inclusive numeric bounds ``filter`` implies on the indexed values of ``field``.
+
+        ``(-inf, inf)`` means unbounded, and ``lower > upper`` that only documents without an
+        indexed value (e.g., ``{field: None}``) can match.
+        """
+        lower, upper = -math.inf, math.inf
+        for key, condition in (filter or {}).items():
+            if key == "$and":
+                bounds = [LMDBDAO._field_bounds(clause, field) for clause in condition]
+            elif key == "$or" and condition:
+                clauses = [LMDBDAO._field_bounds(clause, field) for clause in condition]
+                bounds = [(min(lo for lo, _ in clauses), max(hi for _, hi in clauses))]
+            elif key == field:
+                bounds = [LMDBDAO._condition_bounds(condition)]
+            else:
+                continue
+            for lo, hi in bounds:
+                lower, upper = max(lower, lo), min(upper, hi)
+        return lower, upper
+
+    @staticmethod
+    def _condition_bounds(condition) -> Tuple[float, float]:
+        """Return the inclusive numeric bounds of a single field condition (see ``_field_bounds``)."""
+
+        def is_number(value):
+            return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        lower, upper = -math.inf, math.inf
+        for op, value in condition.items():
+            if op == "$eq" or (op == "$in" and isinstance(value, (list, tuple, set))):
+                values = [v for v in ([value] if op == "$eq" else value) if v is not None]
+                if not values:
+                    return math.inf, -math.inf  # Only null or missing values match.
+                if all(is_number(v) for v in values):
+                    lower, upper = max(lower, min(values)), min(upper, max(values))
+            elif op in ("$gt", "$gte") and is_number(value):
+                lower = max(lower, value)
+            elif op in ("$lt", "$lte") and is_number(value):
+                upper = min(upper, value)
+        return lower, upper
+
+    @staticmethod
+    def _index_walk(txn, index_db, lower, upper, descending) -> Iterator[List[bytes]]:
+        """Yield the primary keys of ``index_db`` grouped by index key, in index order.
+
+        With finite bounds, only the numeric keys within ``[lower, upper]`` are walked.
+        """
+        if lower > upper:
+            return
+        numeric = lower > -math.inf or upper < math.inf
+        low = (LMDBDAO._index_key(lower) if lower > -math.inf else None) or (b"n" if numeric else b"")
+        high = (LMDBDAO._index_key(upper) if upper < math.inf else None) or (b"o" if numeric else None)
+        cursor = txn.cursor(db=index_db)
+        if not descending:
+            positioned, step = cursor.set_range(low), cursor.next
+        elif high is not None and cursor.set_range(high):
+            positioned = cursor.last_dup() if cursor.key() == high else cursor.prev()
+            step = cursor.prev
+        else:
+            positioned, step = cursor.last(), cursor.prev
+        group, group_key = [], None
+        while positioned:
+            index_key = cursor.key()
+            if index_key < low or (high is not None and index_key > high):
+                break
+            if index_key != group_key:
+                if group:
+                    yield group
+                group, group_key = [], index_key
+            group.append(cursor.value())
+            positioned = step()
+        if group:
+            yield group
+
+    @staticmethod
+    def _sort_value(value):
+        """Sort key following MongoDB's type order: null < numbers < strings < others."""
+        if value is None:
+            return 0, 0
+        if isinstance(value, (bool, int, float)):
+            return 1, value
+        if isinstance(value, str):
+            return 2, value
+        return 3, str(value)
+
+    @staticmethod
+    def _sort_docs(docs: List[Dict], sort) -> List[Dict]:
+        """Sort documents by a list of ``(field, order)`` pairs (order: 1/-1 or "asc"/"desc")."""
+        from flowcept.commons.daos.docdb_dao.docdb_dao_utils import get_nested
+
+        for field, order in reversed(list(sort)):
+            docs = sorted(
+                docs, key=lambda d: LMDBDAO._sort_value(get_nested(d, field)), reverse=LMDBDAO._is_descending(order)
+            )
+        return docs
+
+    @staticmethod
+    def _is_descending(order) -> bool:
+        return order == -1 or str(order).lower() in ("desc", "descending", "-1")
+
+    def _sorted_walk(self, filter, sort, limit) -> Optional[List[Dict]]:
+        """Return the first ``limit`` tasks matching ``filter`` in ``sort`` order by walking an index.
+
+        The entries of the first sort field's index are read in order and grouped by value,
+        each group is sorted by the remaining sort fields, and the walk stops once ``limit``
+        documents matched. The walk is restricted to the numeric bounds ``filter`` implies
+        on the field, so a keyset-paginated query starts at its cursor. Documents without an
+        indexed value for the field (missing, None, containers, ...) are ordered like nulls:
+        last in descending order. Returns None when the walk does not apply and the matching
+        documents must be sorted instead.
+        """
+        field, order = sort[0]
+        if field not in self._task_index_dbs:
+            return None
+        descending = LMDBDAO._is_descending(order)
+        index_db = self._task_index_dbs[field]
+        with self._env.begin(db=self._tasks_db) as txn:
+            unindexed = txn.stat(self._tasks_db)["entries"] - txn.stat(index_db)["entries"]
+            if unindexed and not descending:
+                return None  # They would come first: finding them needs a scan anyway.
+            lower, upper = LMDBDAO._field_bounds(filter, field)
+            # Dense filters are checked on the walked documents directly. Once the walk read many
+            # more documents than the limit, the filter's index candidates are resolved instead.
+            planned, candidates = not filter, None
+            budget = limit * LMDBDAO._INDEX_INTERSECT_RATIO
+            docs, walked = [], set()
+            for group in LMDBDAO._index_walk(txn, index_db, lower, upper, descending):
+                walked.update(group)
+                if not planned and len(walked) > budget:
+                    planned, candidates = True, self._plan_candidates(txn, "tasks", filter)
+                if candidates is not None:
+                    group = [key for key in group if key in candidates]
+                matched = []
+                for _, value in txn.cursor().getmulti(group):
+                    entry = LMDBValueCodec.decode(value)
+                    if LMDBDAO._match_filter(entry, filter):
+                        matched.append(entry)
+                docs.extend(LMDBDAO._sort_docs(matched, sort[1:]))
+                if len(docs) >= limit:
+                    return docs[:limit]
+            if unindexed:
+                if not planned:
+                    candidates = self._plan_candidates(txn, "tasks", filter)
+                if candidates is None:
+                    items = txn.cursor()
+                else:
+                    items = txn.cursor().getmulti(sorted(candidates - walked))
+                tail = []
+                for _, value in items:
+                    entry = LMDBValueCodec.decode(value)
+                    if LMDBDAO._index_key(entry.get(field)) is None and LMDBDAO._match_filter(entry, filter):
+                        tail.append(entry)
+                docs.extend(LMDBDAO._sort_docs(tail, sort[1:]))
+        return docs[:limit]
+
+    @staticmethod
+    def _project(doc: Dict, projection) -> Dict:
+        """Apply a list (inclusion) or Mongo-style dict projection to a document."""
+        if isinstance(projection, dict):
+            include = [f for f, flag in projection.items() if flag]
+            if not include:
+                excluded = {f for f, flag in projection.items() if not flag}
+                return {k: v for k, v in doc.items() if k not in excluded}
+        else:
+            include = list(projection)
+
+        projected = {}
+        for field in include:
+            source, target = doc, projected
+            parts = field.split(".")
+            for part in parts[:-1]:
+                source = source.get(part) if isinstance(source, dict) else None
+                if not isinstance(source, dict):
+                    break
+                target = target.setdefault(part, {})
+            else:
+                if parts[-1] in source:
+                    target[parts[-1]] = source[parts[-1]]
+        return projected
+
     def task_query(
         self,
         filter=None,
@@ -496,7 +1005,7 @@ class LMDBDAO(DocumentDBDAO):
         try:
             with self._env.begin(write=True, db=self._dashboards_db) as txn:
                 key = dashboard["dashboard_id"].encode()
-                txn.put(key, json.dumps(dashboard).encode())
+                txn.put(key, self._codec.encode(dashboard))
             return True
         except Exception as e:
             self.logger.exception(e)
@@ -520,7 +1029,7 @@ class LMDBDAO(DocumentDBDAO):
         try:
             with self._env.begin(db=self._dashboards_db) as txn:
                 value = txn.get(dashboard_id.encode())
-                return json.loads(value.decode()) if value else None
+                return LMDBValueCodec.decode(value) if value else None
         except Exception as e:
             self.logger.exception(e)
             return None
@@ -545,7 +1054,7 @@ class LMDBDAO(DocumentDBDAO):
             with self._env.begin(db=self._dashboards_db) as txn:
                 cursor = txn.cursor()
                 for _, value in cursor:
-                    doc = json.loads(value.decode())
+                    doc = LMDBValueCodec.decode(value)
                     if filter is None or all(doc.get(k) == v for k, v in filter.items()):
                         results.append(doc)
             return results
@@ -575,53 +1084,69 @@ class LMDBDAO(DocumentDBDAO):
             self.logger.exception(e)
             return False
 
+    def _scan_columns(self, collection: str, filter: Dict, fields: List[str], limit: int = None) -> Dict[str, list]:
+        """Scan a collection and return the requested fields of matching documents as columns.
+
+        Candidates come from the same index planner as ``query``. Without a limit, scans of
+        at least ``LMDB_PARALLEL_SCAN_MIN_RECORDS`` records are split across
+        ``LMDB_SCAN_WORKERS`` processes when more than one worker is configured.
+        """
+        if self._is_closed:
+            self._open()
+        fields = list(dict.fromkeys(fields))
+        _db = {"tasks": self._tasks_db, "workflows": self._workflows_db, "agents": self._agents_db}.get(collection)
+        if _db is None:
+            return {field: [] for field in fields}
+
+        with self._env.begin(db=_db) as txn:
+            candidates = self._plan_candidates(txn, collection, filter)
+            total = txn.stat(_db)["entries"] if candidates is None else len(candidates)
+            workers = LMDB_SCAN_WORKERS
+            if limit or workers < 2 or total < LMDB_PARALLEL_SCAN_MIN_RECORDS:
+                items = txn.cursor() if candidates is None else txn.cursor().getmulti(sorted(candidates))
+                return lmdb_scan.collect_columns(items, fields, filter, limit)
+            if candidates is None:
+                ranges, key_chunks = lmdb_scan.split_key_range(txn, _db, workers, total), None
+            else:
+                keys = sorted(candidates)
+                step = -(-len(keys) // workers)
+                ranges, key_chunks = None, [keys[i : i + step] for i in range(0, len(keys), step)]
+        return lmdb_scan.parallel_collect_columns(
+            self._path, collection.encode(), fields, filter, workers, ranges=ranges, key_chunks=key_chunks
+        )
+
     def task_summary(self, filter: Dict) -> Dict:
-        """Summarize tasks via in-process aggregation (LMDB path).
+        """Summarize tasks via a columnar scan and vectorized aggregation (LMDB path).
 
         Returns status counts, per-activity stats, and time range for tasks matching filter.
         """
-        from flowcept.commons.daos.docdb_dao.docdb_dao_utils import _merge_summary_rows, _duration
-
-        docs = (
-            self.task_query(
-                filter=filter,
-                projection=["activity_id", "status", "started_at", "ended_at"],
-            )
-            or []
-        )
-        groups: Dict = {}
-        for doc in docs:
-            key = (doc.get("activity_id"), doc.get("status"))
-            group = groups.setdefault(
-                key,
+        from flowcept.commons.daos.docdb_dao.docdb_dao_utils import _merge_summary_rows
+
+        columns = self._scan_columns("tasks", filter, ["activity_id", "status", "started_at", "ended_at"])
+        if not columns["activity_id"]:
+            return _merge_summary_rows([])
+        codes, keys = lmdb_scan.group_codes(columns["activity_id"], columns["status"])
+        n_groups = len(keys)
+        durations = lmdb_scan.epoch_column(columns["ended_at"]) - lmdb_scan.epoch_column(columns["started_at"])
+        duration_stats = lmdb_scan.group_stats(codes, n_groups, durations)
+        started_stats = lmdb_scan.group_stats(codes, n_groups, lmdb_scan.numeric_column(columns["started_at"]))
+        ended_stats = lmdb_scan.group_stats(codes, n_groups, lmdb_scan.numeric_column(columns["ended_at"]))
+        counts = np.bincount(codes, minlength=n_groups)
+        rows = []
+        for i, (activity_id, status) in enumerate(keys):
+            rows.append(
                 {
-                    "activity_id": key[0],
-                    "status": key[1],
-                    "count": 0,
-                    "durations": [],
-                    "min_started_at": None,
-                    "max_ended_at": None,
-                },
+                    "activity_id": activity_id,
+                    "status": status,
+                    "count": int(counts[i]),
+                    "min_started_at": lmdb_scan.to_optional(started_stats["min"][i]),
+                    "max_ended_at": lmdb_scan.to_optional(ended_stats["max"][i]),
+                    "avg_duration": lmdb_scan.to_optional(duration_stats["avg"][i]),
+                    "min_duration": lmdb_scan.to_optional(duration_stats["min"][i]),
+                    "max_duration": lmdb_scan.to_optional(duration_stats["max"][i]),
+                    "sum_duration": lmdb_scan.to_optional(duration_stats["sum"][i]),
+                }
             )
-            group["count"] += 1
-            dur = _duration(doc)
-            if dur is not None:
-                group["durations"].append(dur)
-            started, ended = doc.get("started_at"), doc.get("ended_at")
-            if isinstance(started, (int, float)):
-                current = group["min_started_at"]
-                group["min_started_at"] = started if current is None else min(current, started)
-            if isinstance(ended, (int, float)):
-                current = group["max_ended_at"]
-                group["max_ended_at"] = ended if current is None else max(current, ended)
-        rows = []
-        for group in groups.values():
-            durations = group.pop("durations")
-            group["avg_duration"] = sum(durations) / len(durations) if durations else None
-            group["min_duration"] = min(durations) if durations else None
-            group["max_duration"] = max(durations) if durations else None
-            group["sum_duration"] = sum(durations) if durations else None
-            rows.append(group)
         return _merge_summary_rows(rows)
 
     def derive_campaigns(self, campaign_id: str = None) -> List[Dict]:
@@ -666,12 +1191,20 @@ class LMDBDAO(DocumentDBDAO):
                 record["workflow_names"].add(doc["name"])
             _expand(record, doc.get("utc_timestamp"))
 
-        for doc in self.task_query(filter=wf_filter, projection=["campaign_id", "started_at", "ended_at"]) or []:
-            if not doc.get("campaign_id"):
-                continue
-            record = _campaign(doc["campaign_id"])
-            record["task_count"] += 1
-            _expand(record, doc.get("started_at"), doc.get("ended_at"))
+        columns = self._scan_columns("tasks", wf_filter, ["campaign_id", "started_at", "ended_at"])
+        if columns["campaign_id"]:
+            codes, keys = lmdb_scan.group_codes(columns["campaign_id"])
+            epochs = np.concatenate(
+                [lmdb_scan.epoch_column(columns["started_at"]), lmdb_scan.epoch_column(columns["ended_at"])]
+            )
+            ts_stats = lmdb_scan.group_stats(np.concatenate([codes, codes]), len(keys), epochs)
+            counts = np.bincount(codes, minlength=len(keys))
+            for i, cid in enumerate(keys):
+                if not cid:
+                    continue
+                record = _campaign(cid)
+                record["task_count"] += int(counts[i])
+                _expand(record, lmdb_scan.to_optional(ts_stats["min"][i]), lmdb_scan.to_optional(ts_stats["max"][i]))
 
         results = []
         for record in campaigns.values():
@@ -713,53 +1246,37 @@ class LMDBDAO(DocumentDBDAO):
             return []
 
         agent_ids = [a["agent_id"] for a in stored if "agent_id" in a]
-        docs = (
-            self.task_query(
-                filter={"agent_id": {"$in": agent_ids}},
-                projection=[
-                    "agent_id",
-                    "activity_id",
-                    "source_agent_id",
-                    "campaign_id",
-                    "workflow_id",
-                    "registered_at",
-                ],
-            )
-            or []
+        set_fields = (
+            ("activities", "activity_id"),
+            ("source_agent_ids", "source_agent_id"),
+            ("campaign_ids", "campaign_id"),
+            ("workflow_ids", "workflow_id"),
+        )
+        columns = self._scan_columns(
+            "tasks",
+            {"agent_id": {"$in": agent_ids}},
+            ["agent_id", "registered_at"] + [field for _, field in set_fields],
         )
 
         stats_map: Dict = {}
-        for doc in docs:
-            agent_id = doc.get("agent_id")
-            if not agent_id:
-                continue
-            record = stats_map.setdefault(
-                agent_id,
-                {
-                    "task_count": 0,
-                    "activities": set(),
-                    "source_agent_ids": set(),
-                    "campaign_ids": set(),
-                    "workflow_ids": set(),
-                    "last_active": None,
-                },
-            )
-            record["task_count"] += 1
-            for key, field in (
-                ("activities", "activity_id"),
-                ("source_agent_ids", "source_agent_id"),
-                ("campaign_ids", "campaign_id"),
-                ("workflow_ids", "workflow_id"),
-            ):
-                if doc.get(field):
-                    record[key].add(doc[field])
-            ts = _ts(doc.get("registered_at"))
-            if ts is not None:
-                current = record["last_active"]
-                record["last_active"] = ts if current is None else max(current, ts)
-        for record in stats_map.values():
-            for key in ("activities", "source_agent_ids", "campaign_ids", "workflow_ids"):
-                record[key] = sorted(record[key])
+        if columns["agent_id"]:
+            codes, keys = lmdb_scan.group_codes(columns["agent_id"])
+            counts = np.bincount(codes, minlength=len(keys))
+            registered = np.array([_ts(v) for v in columns["registered_at"]], dtype=float)
+            last_active = lmdb_scan.group_stats(codes, len(keys), registered)["max"]
+            for i, agent_id in enumerate(keys):
+                if agent_id:
+                    stats_map[agent_id] = {
+                        "task_count": int(counts[i]),
+                        "last_active": lmdb_scan.to_optional(last_active[i]),
+                    }
+            for key, field in set_fields:
+                values: Dict = {agent_id: set() for agent_id in stats_map}
+                for agent_id, value in zip(columns["agent_id"], columns[field]):
+                    if value and agent_id in values:
+                        values[agent_id].add(value)
+                for agent_id, record in stats_map.items():
+                    record[key] = sorted(values[agent_id])
 
         agents = []
         for sa in stored:
@@ -801,39 +1318,15 @@ class LMDBDAO(DocumentDBDAO):
         self, filter: Dict, fields: List, x_field: str = "started_at", limit: int = 1000
     ) -> List[Dict]:
         """Extract plottable rows of dot-notated fields from tasks (LMDB path)."""
-        from flowcept.commons.daos.docdb_dao.docdb_dao_utils import get_nested
-
-        top_level = sorted({f.split(".")[0] for f in fields} | {x_field.split(".")[0]})
-        docs = (
-            self.task_query(
-                filter=filter,
-                projection=["task_id", "activity_id"] + top_level,
-                limit=limit,
-            )
-            or []
-        )
-        rows = []
-        for doc in docs:
-            row = {
-                x_field: get_nested(doc, x_field),
-                "task_id": doc.get("task_id"),
-                "activity_id": doc.get("activity_id"),
-            }  # noqa: E501
-            row.update({f: get_nested(doc, f) for f in fields})
-            rows.append(row)
+        columns = self._scan_columns("tasks", filter, [x_field, "task_id", "activity_id"] + list(fields), limit=limit)
+        names = list(columns)
+        rows = [dict(zip(names, values)) for values in zip(*columns.values())]
         rows.sort(key=lambda r: (r[x_field] is None, r[x_field]))
         return rows
 
     def resolve_chart_data(self, data: Dict, context: Dict = None) -> Dict:
         """Resolve a declarative chart spec into plottable rows (LMDB path)."""
-        from collections import defaultdict
-
-        from flowcept.commons.daos.docdb_dao.docdb_dao_utils import (
-            _merge_context_filter,
-            _metric_key,
-            get_nested,
-            to_epoch,
-        )
+        from flowcept.commons.daos.docdb_dao.docdb_dao_utils import _merge_context_filter, _metric_key
 
         card_filter = data.get("filter") or {}
         query_filter = _merge_context_filter(card_filter, context)
@@ -852,43 +1345,36 @@ class LMDBDAO(DocumentDBDAO):
             metrics = metrics or [{"field": "", "agg": "count"}]
             has_elapsed = any(m.get("field") == "elapsed" for m in metrics)
             fields = sorted({m["field"] for m in metrics if m.get("field") and m["field"] != "elapsed"})
-            elapsed_fields = ["started_at", "ended_at"] if has_elapsed else []
-            top_level = sorted(
-                {f.split(".")[0] for f in fields}
-                | ({group_by.split(".")[0]} if group_by else set())
-                | set(elapsed_fields)
+            scan_fields = (
+                ([group_by] if group_by else []) + fields + (["started_at", "ended_at"] if has_elapsed else [])
             )
-            docs = self.query(collection=source, filter=query_filter, projection=top_level or None) or []
-            grouped: Dict = defaultdict(list)
-            for doc in docs:
-                grouped[get_nested(doc, group_by) if group_by else None].append(doc)
+            # Count-only cards still need one column to count rows.
+            columns = self._scan_columns(
+                source, query_filter, scan_fields or [LMDBDAO._PRIMARY_KEYS.get(source, "_id")]
+            )
+            n_docs = len(next(iter(columns.values())))
+            if group_by:
+                codes, keys = lmdb_scan.group_codes(columns[group_by])
+            else:
+                codes, keys = np.zeros(n_docs, dtype=np.int64), [None] if n_docs else []
+            counts = np.bincount(codes, minlength=len(keys))
+            stats = {}
+            for field in fields:
+                stats[field] = lmdb_scan.group_stats(codes, len(keys), lmdb_scan.numeric_column(columns[field]))
+            if has_elapsed:
+                elapsed = lmdb_scan.epoch_column(columns["ended_at"]) - lmdb_scan.epoch_column(columns["started_at"])
+                stats["elapsed"] = lmdb_scan.group_stats(codes, len(keys), elapsed)
             out = []
-            for key, group_docs in grouped.items():
+            for i, key in enumerate(keys):
                 record = {group_by or "group": key}
                 for metric in metrics:
                     field = metric.get("field", "")
                     agg = metric.get("agg", "count")
-                    if field == "elapsed":
-                        values = []
-                        for d in group_docs:
-                            s, e = to_epoch(d.get("started_at")), to_epoch(d.get("ended_at"))
-                            if s is not None and e is not None:
-                                values.append(e - s)
-                    else:
-                        values = [v for v in (get_nested(d, field) for d in group_docs) if isinstance(v, (int, float))]
                     mk = _metric_key(metric)
                     if agg == "count":
-                        record[mk] = len(group_docs)
-                    elif not values:
-                        record[mk] = None
-                    elif agg == "avg":
-                        record[mk] = sum(values) / len(values)
-                    elif agg == "sum":
-                        record[mk] = sum(values)
-                    elif agg == "min":
-                        record[mk] = min(values)
-                    elif agg == "max":
-                        record[mk] = max(values)
+                        record[mk] = int(counts[i])
+                    elif agg in ("avg", "sum", "min", "max"):
+                        record[mk] = lmdb_scan.to_optional(stats[field][agg][i]) if field in stats else None
                 out.append(record)
             out.sort(key=lambda r: str(r.get(group_by or "group")))
             rows = out[:limit]
@@ -923,37 +1409,114 @@ class LMDBDAO(DocumentDBDAO):
         raise NotImplementedError
 
     def get_tasks_recursive(self, workflow_id, max_depth=999, mapping=None):
-        """Get_tasks_recursive in LMDB."""
-        raise NotImplementedError
+        """Get_tasks_recursive in LMDB, with one ``parent_task_id`` index lookup per depth."""
+        return [task for batch in self._iter_tasks_recursive(workflow_id, max_depth, mapping) for task in batch]
 
-    def dump_tasks_to_file_recursive(self, workflow_id, output_file="tasks.parquet", max_depth=999, mapping=None):
-        """Dump_tasks_to_file_recursive in LMDB."""
-        raise NotImplementedError
+    def _iter_tasks_recursive(self, workflow_id, max_depth=999, mapping=None) -> Iterator[List[Dict]]:
+        roots = self.query(filter={"workflow_id": workflow_id, "parent_task_id": None})
+        if roots is None:
+            raise Exception(f"Could not query the root tasks of workflow {workflow_id}.")
+        yield from self._traverse_task_tree(roots, self._find_children, max_depth, mapping)
+
+    def _find_children(self, parent_ids: List[str]) -> List[Dict]:
+        children = self.query(filter={"parent_task_id": {"$in": parent_ids}})
+        if children is None:
+            raise Exception("Could not query the children tasks.")
+        return children
+
+    @staticmethod
+    def _lineage_prefix(workflow_id: str) -> bytes:
+        return workflow_id.encode() + b"\x00"
+
+    @staticmethod
+    def _encode_posting(role: str, at, task_id: str) -> bytes:
+        return role.encode() + struct.pack(">d", math.nan if at is None else at) + task_id.encode()
+
+    @staticmethod
+    def _decode_posting(value: bytes) -> Tuple[str, Optional[float], str]:
+        (at,) = struct.unpack(">d", value[1:9])
+        return value[:1].decode(), None if at != at else at, value[9:].decode()
+
+    def _save_lineage_postings(self, workflow_id: str, postings: List[tuple]) -> List[tuple]:
+        prefix = LMDBDAO._lineage_prefix(workflow_id)
+        by_fingerprint: Dict[str, List[tuple]] = {}
+        for posting in postings:
+            if len(posting[2].encode()) <= LMDBDAO._MAX_INDEX_KEY_BYTES:
+                by_fingerprint.setdefault(posting[0], []).append(posting)
+        stored = []
+        with self._env.begin(write=True, db=self._lineage_postings_db) as txn:
+            cursor = txn.cursor()
+            for fingerprint, new_postings in by_fingerprint.items():
+                key = prefix + bytes.fromhex(fingerprint)
+                existing = {}
+                if cursor.set_key(key):
+                    for value in cursor.iternext_dup():
+                        role, at, task_id = LMDBDAO._decode_posting(value)
+                        existing[(role, task_id)] = (at, value)
+                for _, role, task_id, at in new_postings:
+                    old = existing.get((role, task_id))
+                    if old is not None and (at is None or at == old[0]):
+                        continue
+                    if old is not None:
+                        txn.delete(key, old[1])
+                    value = LMDBDAO._encode_posting(role, at, task_id)
+                    txn.put(key, value)
+                    existing[(role, task_id)] = (at, value)
+                stored.extend((fingerprint, role, task_id, at) for (role, task_id), (at, _) in existing.items())
+        return stored
+
+    def _save_lineage_edges(self, workflow_id: str, edges):
+        prefix = LMDBDAO._lineage_prefix(workflow_id)
+        with self._env.begin(write=True, db=self._lineage_edges_db) as txn:
+            for source, target in edges:
+                source_id, target_id = source.encode(), target.encode()
+                if max(len(source_id), len(target_id)) > LMDBDAO._MAX_INDEX_KEY_BYTES:
+                    continue
+                txn.put(b"d" + prefix + source_id, target_id)
+                txn.put(b"u" + prefix + target_id, source_id)
+
+    def _lineage_neighbors(self, workflow_id: str, task_ids: List[str], upstream: bool):
+        prefix = (b"u" if upstream else b"d") + LMDBDAO._lineage_prefix(workflow_id)
+        with self._env.begin(db=self._lineage_edges_db) as txn:
+            neighbors = LMDBDAO._index_lookup(txn, self._lineage_edges_db, [prefix + t.encode() for t in task_ids])
+        return [task_id.decode() for task_id in neighbors]
+
+    def _has_lineage_postings(self, workflow_id: str) -> bool:
+        prefix = LMDBDAO._lineage_prefix(workflow_id)
+        with self._env.begin(db=self._lineage_postings_db) as txn:
+            cursor = txn.cursor()
+            return cursor.set_range(prefix) and cursor.key().startswith(prefix)
+
+    def _delete_lineage_index(self, workflow_id: str):
+        prefix = LMDBDAO._lineage_prefix(workflow_id)
+        with self._env.begin(write=True) as txn:
+            for db, key_prefix in (
+                (self._lineage_postings_db, prefix),
+                (self._lineage_edges_db, b"d" + prefix),
+                (self._lineage_edges_db, b"u" + prefix),
+            ):
+                cursor = txn.cursor(db=db)
+                found = cursor.set_range(key_prefix)
+                while found and cursor.key().startswith(key_prefix):
+                    found = cursor.delete(dupdata=True)
 
     def dump_to_file(self, collection, filter, output_file, export_format, should_zip):
-        """Dump collection data to a CSV or Parquet file, optionally zipped."""
-        import os
-        import zipfile
+        """Dump collection data to a JSON, JSONL, CSV, or Parquet file, optionally zipped.
+
+        Documents are streamed from a read transaction (see :func:`export_documents`).
+        """
         from datetime import datetime
 
-        df = self.to_df(collection, filter)
+        if collection not in LMDBDAO._PRIMARY_KEYS:
+            raise ValueError(f"LMDB does not support collection '{collection}'.")
+        if self._is_closed:
+            self._open()
 
         if output_file is None:
             ts = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_file = f"{collection}_{ts}.{export_format}"
 
-        if export_format == "csv":
-            df.to_csv(output_file, index=False)
-        elif export_format == "parquet":
-            df.to_parquet(output_file, index=False)
-        else:
-            raise ValueError(f"Unsupported format '{export_format}'. Use 'csv' or 'parquet'.")
-
-        if should_zip:
-            zip_path = output_file + ".zip"
-            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-                zf.write(output_file, arcname=os.path.basename(output_file))
-            os.remove(output_file)
+        export_documents(self._iter_docs(collection, filter), output_file, export_format, should_zip)
 
     def save_or_update_object(
         self,
@@ -0,0 +1,186 @@
+"""Columnar scans over LMDB collections.
+
+The LMDB aggregations (``task_summary``, ``derive_campaigns``, ``derive_agents``,
+``telemetry_timeseries``, and ``resolve_chart_data``) only need a handful of fields
+per document. This module decodes documents, applies the filter, and keeps just the
+requested fields as columns. Large scans can be split by key range across a pool
+of worker processes, each with its own read-only LMDB environment and read
+transaction; the resulting columns are then aggregated with NumPy/pandas.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import lmdb
+import numpy as np
+
+from flowcept.commons.daos.docdb_dao.docdb_dao_utils import get_nested, to_epoch
+from flowcept.commons.daos.docdb_dao.lmdb_codec import LMDBValueCodec
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_worker_envs: Dict[str, lmdb.Environment] = {}
+
+
+def collect_columns(
+    items: Iterable[Tuple[bytes, bytes]], fields: List[str], filter: Optional[Dict] = None, limit: int = None
+) -> Dict[str, list]:
+    """Decode ``(key, value)`` items and gather ``fields`` of the matching documents.
+
+    Parameters
+    ----------
+    items : iterable of (bytes, bytes)
+        Raw LMDB items, e.g., a cursor.
+    fields : list of str
+        Fields to extract. Dot-notated names are read from nested dicts.
+    filter : dict, optional
+        Mongo-style filter evaluated on every decoded document.
+    limit : int, optional
+        Stop after this many matching documents.
+
+    Returns
+    -------
+    dict
+        One list per field, all with the same length.
+    """
+    from flowcept.commons.daos.docdb_dao.lmdb_dao import LMDBDAO
+
+    columns = {field: [] for field in fields}
+    appenders = [(columns[field].append, field, "." in field) for field in fields]
+    count = 0
+    for _, value in items:
+        doc = LMDBValueCodec.decode(value)
+        if filter and not LMDBDAO._match_filter(doc, filter):
+            continue
+        for append, field, nested in appenders:
+            append(get_nested(doc, field) if nested else doc.get(field))
+        count += 1
+        if limit and count >= limit:
+            break
+    return columns
+
+
+def _scan_worker(path: str, db_name: bytes, fields, filter, start=None, end=None, keys=None) -> Dict[str, list]:
+    """Run ``collect_columns`` on a key range or key list inside a worker process."""
+    env = _worker_envs.get(path)
+    if env is None:
+        env = lmdb.open(path, readonly=True, max_dbs=32)
+        _worker_envs[path] = env
+    db = env.open_db(db_name, create=False)
+    with env.begin(db=db) as txn:
+        cursor = txn.cursor()
+        if keys is not None:
+            return collect_columns(cursor.getmulti(keys), fields, filter)
+
+        def _range():
+            if not (cursor.set_range(start) if start is not None else cursor.first()):
+                return
+            for key, value in cursor.iternext():
+                if end is not None and key >= end:
+                    return
+                yield key, value
+
+        return collect_columns(_range(), fields, filter)
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """Return a shared process pool. Workers are spawned, as LMDB environments must not cross a fork."""
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _executor_workers = workers
+    return _executor
+
+
+def split_key_range(txn, db, parts: int, total: int) -> List[Tuple[Optional[bytes], Optional[bytes]]]:
+    """Split a sub-database into ``parts`` contiguous ``[start, end)`` key ranges of similar size.
+
+    Only keys are traversed, so this is much cheaper than the scan it prepares.
+    """
+    step = max(1, -(-total // parts))
+    boundaries = [None]
+    for i, key in enumerate(txn.cursor(db=db).iternext(keys=True, values=False)):
+        if i and i % step == 0:
+            boundaries.append(key)
+    boundaries.append(None)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def parallel_collect_columns(
+    path: str, db_name: bytes, fields: List[str], filter: Optional[Dict], workers: int, ranges=None, key_chunks=None
+) -> Dict[str, list]:
+    """Scan key ranges (or key chunks) in parallel and concatenate the columns in key order."""
+    executor = _get_executor(workers)
+    if key_chunks is not None:
+        futures = [executor.submit(_scan_worker, path, db_name, fields, filter, keys=chunk) for chunk in key_chunks]
+    else:
+        futures = [executor.submit(_scan_worker, path, db_name, fields, filter, start, end) for start, end in ranges]
+    columns = {field: [] for field in fields}
+    for future in futures:
+        for field, values in future.result().items():
+            columns[field].extend(values)
+    return columns
+
+
+def numeric_column(values: list) -> np.ndarray:
+    """Return a float array holding the numeric values and NaN elsewhere."""
+    return np.fromiter(
+        (v if isinstance(v, (int, float)) else np.nan for v in values),
+        dtype=float,
+        count=len(values),
+    )
+
+
+def epoch_column(values: list) -> np.ndarray:
+    """Vectorized ``to_epoch``: epoch seconds as floats, NaN where a value is not a timestamp."""
+    epochs = numeric_column(values)
+    epochs = np.where(epochs >= 1e12, epochs / 1000.0, epochs)
+    for i in np.flatnonzero(np.isnan(epochs)):
+        value = values[i]
+        if value is not None and not isinstance(value, (int, float)):
+            converted = to_epoch(value)
+            if converted is not None:
+                epochs[i] = converted
+    return epochs
+
+
+def group_codes(*columns: list) -> Tuple[np.ndarray, list]:
+    """Assign a group code to every row of the given key columns.
+
+    Returns the codes and the distinct keys in first-seen order; keys are tuples when
+    more than one column is given. Keys compare like dict keys, so ``None`` is a group.
+    """
+    keys = zip(*columns) if len(columns) > 1 else columns[0]
+    index: Dict = {}
+    codes = np.fromiter((index.setdefault(k, len(index)) for k in keys), dtype=np.int64, count=len(columns[0]))
+    return codes, list(index)
+
+
+def group_stats(codes: np.ndarray, n_groups: int, values: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-group ``count``, ``sum``, ``min``, ``max``, and ``avg`` of the non-NaN ``values``.
+
+    Groups without values get a count of 0 and NaN for the other statistics.
+    """
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    count = np.bincount(codes, minlength=n_groups)
+    total = np.bincount(codes, weights=values, minlength=n_groups).astype(float)
+    low = np.full(n_groups, np.inf)
+    high = np.full(n_groups, -np.inf)
+    np.minimum.at(low, codes, values)
+    np.maximum.at(high, codes, values)
+    empty = count == 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg = total / count
+    for stat in (total, low, high, avg):
+        stat[empty] = np.nan
+    return {"count": count, "sum": total, "min": low, "max": high, "avg": avg}
+
+
+def to_optional(value):
+    """Convert a NumPy scalar to a Python number, or None if it is NaN."""
+    value = value.item() if hasattr(value, "item") else value
+    return None if isinstance(value, float) and np.isnan(value) else value
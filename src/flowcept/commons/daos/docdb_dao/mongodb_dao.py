@@ -1,24 +1,20 @@
 """Document DB interaction module."""
 
-import os
 import hashlib
-from typing import List, Dict, Tuple, Any
-import io
-import json
+from typing import List, Dict, Iterator, Tuple, Any
+from functools import partial
 from uuid import uuid4
 
 import pickle
-import zipfile
 
 import pandas as pd
-import pyarrow.parquet as pq
-import pyarrow as pa
 
 from bson import ObjectId
-from bson.json_util import dumps
 from pymongo import MongoClient, UpdateOne
+from pymongo.errors import OperationFailure
 
 from flowcept.commons.daos.docdb_dao.docdb_dao_base import DocumentDBDAO
+from flowcept.commons.daos.docdb_dao.docdb_export import EXPORT_FORMATS, export_documents
 from flowcept.commons.flowcept_dataclasses.workflow_object import (
     WorkflowObject,
 )
@@ -88,6 +84,8 @@ class MongoDBDAO(DocumentDBDAO):
         self._dashboards_collection = self._db["dashboards"]
         self._agents_collection = self._db["agents"]
         self._node_positions_collection = self._db["node_positions"]
+        self._lineage_postings_collection = self._db["lineage_postings"]
+        self._lineage_edges_collection = self._db["lineage_edges"]
 
         if create_indices:
             self._create_indices()
@@ -103,6 +101,14 @@ class MongoDBDAO(DocumentDBDAO):
             self._tasks_collection.create_index("parent_task_id")
         if "campaign_id" not in existing_indices:
             self._tasks_collection.create_index("campaign_id")
+        # Keyset pagination order (newest first), over all tasks and within a workflow.
+        existing_compound_indices = [list(x["key"].items()) for x in self._tasks_collection.list_indexes()]
+        for keys in (
+            [("started_at", -1), ("task_id", -1)],
+            [("workflow_id", 1), ("started_at", -1), ("task_id", -1)],
+        ):
+            if keys not in existing_compound_indices:
+                self._tasks_collection.create_index(keys)
 
         # Creating workflow collection indices:
         existing_indices = [list(x["key"].keys())[0] for x in self._wfs_collection.list_indexes()]
@@ -152,6 +158,18 @@ class MongoDBDAO(DocumentDBDAO):
         if "workflow_id" not in existing_indices_np:
             self._node_positions_collection.create_index([("workflow_id", 1), ("graph_type", 1)], unique=True)
 
+        # Creating lineage index collection indices:
+        existing_indices = [list(x["key"].keys()) for x in self._lineage_postings_collection.list_indexes()]
+        if ["workflow_id", "fingerprint", "role", "task_id"] not in existing_indices:
+            self._lineage_postings_collection.create_index(
+                [("workflow_id", 1), ("fingerprint", 1), ("role", 1), ("task_id", 1)], unique=True
+            )
+        existing_indices = [list(x["key"].keys()) for x in self._lineage_edges_collection.list_indexes()]
+        if ["workflow_id", "source", "target"] not in existing_indices:
+            self._lineage_edges_collection.create_index([("workflow_id", 1), ("source", 1), ("target", 1)], unique=True)
+        if ["workflow_id", "target"] not in existing_indices:
+            self._lineage_edges_collection.create_index([("workflow_id", 1), ("target", 1)])
+
     def _pipeline(
         self,
         filter: Dict = None,
@@ -515,6 +533,7 @@ class MongoDBDAO(DocumentDBDAO):
         tasks_result = self._tasks_collection.delete_many({"workflow_id": workflow_id})
         objects_result = self._obj_collection.delete_many({"workflow_id": workflow_id})
         wfs_result = self._wfs_collection.delete_many({"workflow_id": workflow_id})
+        self._delete_lineage_index(workflow_id)
         agents_deleted = self._delete_orphaned_agents(agent_ids)
         return {
             "workflows": wfs_result.deleted_count,
@@ -838,7 +857,7 @@ class MongoDBDAO(DocumentDBDAO):
         export_format="json",
         should_zip=False,
     ):
-        """Dump it to file."""
+        """Dump it to file, streaming the documents (see :func:`export_documents`)."""
         if collection == "tasks":
             _collection = self._tasks_collection
         elif collection == "workflows":
@@ -847,12 +866,12 @@ class MongoDBDAO(DocumentDBDAO):
             msg = "Only tasks and workflows "
             raise Exception(msg + "collections are currently available for dump.")
 
-        if export_format != "json":
-            raise Exception("Sorry, only JSON is currently supported.")
+        if export_format not in EXPORT_FORMATS:
+            raise Exception(f"Sorry, only {', '.join(EXPORT_FORMATS)} are currently supported.")
 
         if output_file is None:
-            output_file = f"docs_dump_{collection}_{get_utc_now_str()}"
-            output_file += ".zip" if should_zip else ".json"
+            output_file = f"docs_dump_{collection}_{get_utc_now_str()}.{export_format}"
+            output_file += ".zip" if should_zip else ""
 
         try:
             cursor = _collection.find(filter=filter)
@@ -861,23 +880,7 @@ class MongoDBDAO(DocumentDBDAO):
             return
 
         try:
-            json_data = dumps(cursor)
-        except Exception as e:
-            self.logger.exception(e)
-            return
-
-        try:
-            if should_zip:
-                in_memory_stream = io.BytesIO()
-                with zipfile.ZipFile(in_memory_stream, "w", zipfile.ZIP_DEFLATED) as zip_file:
-                    zip_file.writestr("dump_file.json", json_data)
-                compressed_data = in_memory_stream.getvalue()
-                with open(output_file, "wb") as f:
-                    f.write(compressed_data)
-            else:
-                with open(output_file, "w") as f:
-                    json.dump(json.loads(json_data), f)
-
+            output_file = export_documents(cursor, output_file, export_format, should_zip)
             self.logger.info(f"DB dump file {output_file} saved.")
         except Exception as e:
             self.logger.exception(e)
@@ -1307,6 +1310,37 @@ class MongoDBDAO(DocumentDBDAO):
             self.logger.exception(e)
             return None
 
+    def watch(self, collections: List[str], resume_after=None):
+        """
+        Open a change stream on the inserted, updated, and replaced documents of ``collections``.
+
+        Parameters
+        ----------
+        collections : list of str
+            Collection names, e.g., ``["tasks", "workflows"]``.
+        resume_after : dict, optional
+            Resume token (``change["_id"]``) of the last change seen.
+
+        Returns
+        -------
+        pymongo.change_stream.DatabaseChangeStream
+            Changes carrying the current document in ``fullDocument``.
+
+        Raises
+        ------
+        pymongo.errors.OperationFailure
+            If the server does not support change streams (e.g., not a replica set).
+        """
+        pipeline = [
+            {
+                "$match": {
+                    "ns.coll": {"$in": list(collections)},
+                    "operationType": {"$in": ["insert", "update", "replace"]},
+                }
+            }
+        ]
+        return self._db.watch(pipeline, full_document="updateLookup", resume_after=resume_after)
+
     def save_dashboard(self, dashboard: Dict) -> bool:
         """Insert or replace a dashboard document keyed by ``dashboard_id``.
 
@@ -1575,211 +1609,113 @@ class MongoDBDAO(DocumentDBDAO):
     def get_tasks_recursive(self, workflow_id, max_depth=999, mapping=None):
         """Get_tasks_recursive in MongoDB."""
         try:
-            result = []
-            parent_tasks = self._tasks_collection.find(
-                {"workflow_id": workflow_id, "parent_task_id": None}, projection={"_id": 0}
-            )
-            for parent_task in parent_tasks:
-                if "finished" in parent_task and parent_task["status"] != Status.FINISHED.value:
-                    parent_task["status"] = Status.FINISHED.value
-                result.append(parent_task)
-                self._get_children_tasks_iterative(parent_task, result, max_depth, mapping)
-            return result
+            return [task for batch in self._iter_tasks_recursive(workflow_id, max_depth, mapping) for task in batch]
         except Exception as e:
             raise Exception(e)
 
-    @staticmethod
-    def _align_schemas(tables):
+    def _iter_tasks_recursive(self, workflow_id, max_depth=999, mapping=None) -> Iterator[List[Dict]]:
         """
-        Aligns schemas of a list of PyArrow tables by adding missing columns with default values
-        and ensuring a consistent column order.
-
-        Parameters
-        ----------
-        tables : list of pyarrow.Table
-            List of tables to be aligned.
+        Yield the task trees of a workflow, one tree at a time.
 
-        Returns
-        -------
-        list of pyarrow.Table
-            The tables with aligned schemas.
+        The trees are fetched with a ``$graphLookup`` aggregation over the ``parent_task_id``
+        index, whose cursor returns one root with its descendants at a time. If the server
+        rejects it (e.g., a tree exceeds its memory limit), the remaining trees are fetched
+        level by level, with one ``$in`` query per depth.
         """
-        if not tables:
-            return []
-
-        # Reference schema: take from the first table
-        reference_schema = tables[0].schema
+        done = []
+        try:
+            for root, children in self._get_task_trees_graph_lookup(workflow_id, max_depth):
+                fetch_children = partial(MongoDBDAO._grouped_children, children)
+                yield from self._traverse_task_tree([root], fetch_children, max_depth, mapping)
+                done.append(root["task_id"])
+            return
+        except OperationFailure as e:
+            self.logger.debug(f"$graphLookup of workflow {workflow_id} failed, fetching it per level: {e}")
+        roots = self._tasks_collection.find(
+            {"workflow_id": workflow_id, "parent_task_id": None, "task_id": {"$nin": done}}, projection={"_id": 0}
+        )
+        yield from self._traverse_task_tree(roots, self._find_children, max_depth, mapping)
 
-        aligned_tables = []
-        for table in tables:
-            current_schema = table.schema
+    def _find_children(self, parent_ids: List[str]):
+        return self._tasks_collection.find({"parent_task_id": {"$in": parent_ids}}, projection={"_id": 0})
 
-            # Find missing columns in the current table
-            missing_columns = [
-                (field.name, field.type) for field in reference_schema if field.name not in current_schema.names
-            ]
+    @staticmethod
+    def _grouped_children(children: Dict[str, List[Dict]], parent_ids: List[str]) -> List[Dict]:
+        return [child for parent_id in parent_ids for child in children.get(parent_id, ())]
+
+    def _get_task_trees_graph_lookup(self, workflow_id, max_depth) -> Iterator[Tuple[Dict, Dict[str, List[Dict]]]]:
+        """Yield the root tasks of a workflow, each with its descendants grouped by ``parent_task_id``."""
+        pipeline = [{"$match": {"workflow_id": workflow_id, "parent_task_id": None}}]
+        if max_depth > 0:
+            pipeline.append(
+                {
+                    "$graphLookup": {
+                        "from": self._tasks_collection.name,
+                        "startWith": "$task_id",
+                        "connectFromField": "task_id",
+                        "connectToField": "parent_task_id",
+                        "as": "_descendants",
+                        "maxDepth": max_depth - 1,
+                    }
+                }
+            )
+            pipeline.append({"$project": {"_id": 0, "_descendants._id": 0}})
+        else:
+            pipeline.append({"$project": {"_id": 0}})
+        for root in self._tasks_collection.aggregate(pipeline):
+            children = {}
+            for task in root.pop("_descendants", ()):
+                children.setdefault(task["parent_task_id"], []).append(task)
+            yield root, children
+
+    def _save_lineage_postings(self, workflow_id: str, postings: List[tuple]) -> List[tuple]:
+        ops = [
+            UpdateOne(
+                {"workflow_id": workflow_id, "fingerprint": fingerprint, "role": role, "task_id": task_id},
+                {"$set": {"at": at}} if at is not None else {"$setOnInsert": {"at": None}},
+                upsert=True,
+            )
+            for fingerprint, role, task_id, at in postings
+        ]
+        self._lineage_postings_collection.bulk_write(ops, ordered=False)
+        fingerprints = list({posting[0] for posting in postings})
+        stored = []
+        for i in range(0, len(fingerprints), DocumentDBDAO.RECURSIVE_BATCH_SIZE):
+            docs = self._lineage_postings_collection.find(
+                {
+                    "workflow_id": workflow_id,
+                    "fingerprint": {"$in": fingerprints[i : i + DocumentDBDAO.RECURSIVE_BATCH_SIZE]},
+                },
+                projection={"_id": 0, "fingerprint": 1, "role": 1, "task_id": 1, "at": 1},
+            )
+            stored.extend((d["fingerprint"], d["role"], d["task_id"], d.get("at")) for d in docs)
+        return stored
+
+    def _save_lineage_edges(self, workflow_id: str, edges):
+        ops = [
+            UpdateOne(
+                {"workflow_id": workflow_id, "source": source, "target": target},
+                {"$setOnInsert": {"created_at": time()}},
+                upsert=True,
+            )
+            for source, target in edges
+        ]
+        self._lineage_edges_collection.bulk_write(ops, ordered=False)
+
+    def _lineage_neighbors(self, workflow_id: str, task_ids: List[str], upstream: bool):
+        known, wanted = ("target", "source") if upstream else ("source", "target")
+        docs = self._lineage_edges_collection.find(
+            {"workflow_id": workflow_id, known: {"$in": task_ids}}, projection={"_id": 0, wanted: 1}
+        )
+        return [doc[wanted] for doc in docs]
 
-            # Add missing columns with default values
-            for col_name, col_type in missing_columns:
-                if pa.types.is_integer(col_type) or pa.types.is_floating(col_type):
-                    default_value = 0
-                elif pa.types.is_boolean(col_type):
-                    default_value = False
-                elif pa.types.is_timestamp(col_type):
-                    default_value = pa.scalar(0, type=col_type)
-                elif pa.types.is_string(col_type):
-                    default_value = ""
-                else:
-                    default_value = None  # Default to None for unknown types
-
-                table = table.append_column(col_name, pa.array([default_value] * len(table), type=col_type))
-
-            # Reorder columns to match reference schema
-            table = table.select([field.name for field in reference_schema])
-            aligned_tables.append(table)
-
-        return aligned_tables
-
-    def dump_tasks_to_file_recursive(self, workflow_id, output_file="tasks.parquet", max_depth=999, mapping=None):
-        """Dump_tasks_to_file_recursive in MongoDB."""
-        try:
-            tasks = self.get_tasks_recursive(workflow_id, max_depth=max_depth, mapping=mapping)
-            chunk_size = 100_000
-            dict_fields = TaskObject.get_dict_field_names()
-            dict_fields.extend(["ancestor_ids", "custom_characterization"])
-            output_dir = "temp_chunks"
-            os.makedirs(output_dir, exist_ok=True)
-            # Write chunks to temporary Parquet files
-            chunk = []
-            file_count = 0
-            for idx, record in enumerate(tasks):
-                chunk.append(record)
-                if (idx + 1) % chunk_size == 0:
-                    df = pd.DataFrame(chunk)
-                    for field in dict_fields:
-                        if field in df.columns:
-                            df[field] = df[field].apply(lambda x: json.dumps(x))
-                    table = pa.Table.from_pandas(df)
-                    pq.write_table(table, f"{output_dir}/chunk_{file_count}.parquet")
-                    file_count += 1
-                    chunk = []  # Clear the chunk
-
-            # Write remaining rows
-            if chunk:
-                df = pd.DataFrame(chunk)
-                for field in dict_fields:
-                    if field in df.columns:
-                        df[field] = df[field].apply(lambda x: json.dumps(x))
-                table = pa.Table.from_pandas(df)
-                pq.write_table(table, f"{output_dir}/chunk_{file_count}.parquet")
-
-            # Merge all chunked files into a single Parquet file
-            chunk_files = [f"{output_dir}/chunk_{i}.parquet" for i in range(file_count + 1)]
-            tables = [pq.read_table(f) for f in chunk_files]
-            tables = MongoDBDAO._align_schemas(tables)  # Use the returned aligned tables
-            merged_table = pa.concat_tables(tables)
-            pq.write_table(merged_table, output_file)
-
-            # Cleanup temporary files
-            try:
-                for f in chunk_files:
-                    os.remove(f)
-                os.rmdir(output_dir)
-            except Exception as e:
-                self.logger.warning(e)
+    def _has_lineage_postings(self, workflow_id: str) -> bool:
+        posting = self._lineage_postings_collection.find_one({"workflow_id": workflow_id}, projection={"_id": 1})
+        return posting is not None
 
-        except Exception as e:
-            self.logger.exception(e)
-            raise e
-
-    def _resolve_mapping(self, task, mapping, ancestors):
-        def do_eval(x, task, ancestors):
-            for word in ["task", "ancestors"]:
-                if word in x:
-                    return eval(x)
-            return x
-
-        custom_characterization = {}
-        for mapping_type in {"activity_id", "subtype"}:
-            if mapping_type in task and task[mapping_type] in mapping[mapping_type]:
-                rules = mapping[mapping_type].get(task[mapping_type])
-                rules_str = str(rules)
-                if "grandparent" in rules_str:
-                    rules_str = rules_str.replace("grandparent", "ancestors[task['task_id']][-2]")
-                if "parent" in rules_str:
-                    rules_str = rules_str.replace("parent", "ancestors[task['task_id']][-1]")
-                if "primogenitor" in rules_str:
-                    rules_str = rules_str.replace("primogenitor", "ancestors[task['task_id']][0]")
-                rules = eval(rules_str)
-                for k, v in rules.items():
-                    k = do_eval(k, task, ancestors)
-                    v = do_eval(v, task, ancestors)
-                    if k == "extend":
-                        if isinstance(v, list):
-                            for _ in v:
-                                custom_characterization.update(_)
-                        elif isinstance(v, dict):
-                            custom_characterization.update(v)
-                    elif k == "query":
-                        query = v
-                        new_filter = {}
-                        for fk, fv in query["filter"].items():
-                            new_filter[fk] = do_eval(fv, task, ancestors)
-                        try:
-                            docs = self.query(
-                                filter=new_filter,
-                                collection=query.get("collection", None),
-                                projection=query.get("projection"),
-                                remove_json_unserializables=True,
-                            )
-                            if docs is not None:
-                                if len(docs) == 1:
-                                    query_result = docs[0]
-                                    for dict_field in {"used", "generated", "custom_metadata"}:
-                                        if dict_field in query_result:
-                                            dict_value = query_result.pop(dict_field)
-                                            custom_characterization.update(dict_value)
-                                    custom_characterization.update(query_result)
-                                elif len(docs) > 1:
-                                    custom_characterization["query_result"] = docs
-                        except Exception as e:
-                            self.logger.exception(e)
-                            continue
-                    else:
-                        custom_characterization[k] = v
-                task["custom_characterization"] = custom_characterization
-
-    def _get_children_tasks_iterative(self, current_parent, result, max_depth=999, mapping=None):
-        queue = []
-        tasks_ancestors = {current_parent["task_id"]: []}
-        current_parent["ancestor_ids"] = []
-        current_parent["depth"] = 0
-
-        while current_parent["depth"] < max_depth:
-            tasks = []
-            rs = self._tasks_collection.find({"parent_task_id": current_parent["task_id"]}, projection={"_id": 0})
-
-            for task in rs:
-                if "finished" in task and task["status"] != Status.FINISHED.value:
-                    task["status"] = Status.FINISHED.value
-                tasks_ancestors[task["task_id"]] = tasks_ancestors[current_parent["task_id"]] + [current_parent]
-                task["ancestor_ids"] = current_parent["ancestor_ids"] + [
-                    {current_parent["activity_id"]: current_parent["task_id"]}
-                ]
-                task["depth"] = current_parent["depth"] + 1
-                if mapping is not None:
-                    self._resolve_mapping(task, mapping, tasks_ancestors)
-                tasks.append(task)
-
-            if len(tasks):
-                result.extend(tasks)
-                queue = tasks + queue
-
-            if len(queue):
-                current_parent = queue[0]
-                queue = queue[1:]
-            else:
-                break
+    def _delete_lineage_index(self, workflow_id: str):
+        self._lineage_postings_collection.delete_many({"workflow_id": workflow_id})
+        self._lineage_edges_collection.delete_many({"workflow_id": workflow_id})
 
     def save_node_positions(self, workflow_id: str, graph_type: str, positions: Dict) -> bool:
         """Save or update node positions for a workflow graph type.
@@ -3,11 +3,13 @@
 from abc import abstractmethod
 from typing import Union, List, Callable
 import csv
+import struct
 import msgpack
 from time import time
 import flowcept.commons
 from flowcept.commons.autoflush_buffer import AutoflushBuffer
 from flowcept.commons.daos.keyvalue_dao import KeyValueDAO
+from flowcept.commons.flowcept_dataclasses.task_record import materialize_messages
 from flowcept.commons.utils import chunked, buffer_to_disk, resolve_dump_buffer_path
 from flowcept.commons.flowcept_logger import FlowceptLogger
 from flowcept.configs import (
@@ -15,7 +17,13 @@ from flowcept.configs import (
     JSON_SERIALIZER,
     MQ_BUFFER_SIZE,
     MQ_INSERTION_BUFFER_TIME,
+    MQ_BUFFER_CAPACITY,
+    MQ_BUFFER_OVERFLOW_POLICY,
+    MQ_BUFFER_SPILL_DIR,
+    MQ_BUFFER_FLUSH_WORKERS,
+    MQ_BUFFER_MAX_IN_FLIGHT,
     MQ_CHUNK_SIZE,
+    MQ_BATCH_ENVELOPE,
     MQ_TYPE,
     MQ_TIMING,
     KVDB_ENABLED,
@@ -25,6 +33,7 @@ from flowcept.configs import (
     APPEND_ID_TO_PATH,
 )
 
+from flowcept.commons.msgpack_ext import decode_ext, encode_ext, packb
 from flowcept.commons.utils import GenericJSONEncoder
 
 
@@ -35,6 +44,9 @@ class MQDao(object):
     # TODO we don't have a unit test to cover complex dict!
     MQ_THREAD_SET_ID = "started_mq_thread_execution"
     MQ_FLUSH_COMPLETE_SET_ID = "pending_mq_flush_complete"
+    # 0xC1 is never used by msgpack, so no plain msgpack message starts with this magic.
+    ENVELOPE_MAGIC = b"\xc1FB\x01"
+    _ENVELOPE_HEADER = struct.Struct(">I")
 
     @staticmethod
     def build(*args, **kwargs) -> "MQDao":
@@ -46,6 +58,10 @@ class MQDao(object):
             from flowcept.commons.daos.mq_dao.mq_dao_redis import MQDaoRedis
 
             return MQDaoRedis(*args, **kwargs)
+        elif MQ_TYPE == "redis_streams":
+            from flowcept.commons.daos.mq_dao.mq_dao_redis_streams import MQDaoRedisStreams
+
+            return MQDaoRedisStreams(*args, **kwargs)
         elif MQ_TYPE == "kafka":
             from flowcept.commons.daos.mq_dao.mq_dao_kafka import MQDaoKafka
 
@@ -73,6 +89,12 @@ class MQDao(object):
             self._keyvalue_dao = None
         self._time_based_flushing_started = False
         self.buffer: Union[AutoflushBuffer, List] = None
+        # Consumers sharing a group split the messages among themselves on backends that
+        # support it (redis_streams). None means this consumer receives every message.
+        self.consumer_group: str = None
+        # Decodes the msgpack extensions of received messages; consumers that store the
+        # messages use msgpack_ext.decode_ext_storable to get plain values.
+        self.ext_hook = decode_ext
         if MQ_TIMING:
             self._flush_events = []
             self.stop = self._stop_timed
@@ -82,10 +104,10 @@ class MQDao(object):
             self.stop = self._stop
 
     @abstractmethod
-    def _bulk_publish(self, buffer, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def _bulk_publish(self, buffer, channel=MQ_CHANNEL, serializer=packb):
         raise NotImplementedError()
 
-    def _bulk_publish_timed(self, buffer, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def _bulk_publish_timed(self, buffer, channel=MQ_CHANNEL, serializer=packb):
         raise NotImplementedError()
 
     def bulk_publish(self, buffer):
@@ -93,9 +115,61 @@ class MQDao(object):
         # self.logger.info(f"Going to flush {len(buffer)} to MQ...")
         if MQ_CHUNK_SIZE > 1:
             for chunk in chunked(buffer, MQ_CHUNK_SIZE):
-                self._bulk_publish(chunk)
+                self._publish_chunk(chunk)
+        else:
+            self._publish_chunk(buffer)
+
+    def _publish_chunk(self, chunk):
+        if MQ_BATCH_ENVELOPE and MQ_TYPE != "mofka":
+            # The whole chunk travels as a single broker message.
+            self._bulk_publish([chunk], serializer=self.pack_envelope)
         else:
-            self._bulk_publish(buffer)
+            self._bulk_publish(chunk)
+
+    @staticmethod
+    def pack_envelope(messages: List) -> bytes:
+        """Serialize many messages into one batch envelope.
+
+        The envelope is ``ENVELOPE_MAGIC``, the number of messages, and then each message as a
+        4-byte big-endian length followed by its msgpack bytes. Messages that cannot be
+        serialized are logged and left out.
+        """
+        length = MQDao._ENVELOPE_HEADER.pack
+        packer = msgpack.Packer(default=encode_ext)
+        parts = [MQDao.ENVELOPE_MAGIC, b""]
+        count = 0
+        for message in messages:
+            try:
+                packed = packer.pack(message)
+            except Exception as e:
+                FlowceptLogger().error(f"Message could not be serialized and was not published: {message}. {e}")
+                continue
+            parts.append(length(len(packed)))
+            parts.append(packed)
+            count += 1
+        parts[1] = length(count)
+        return b"".join(parts)
+
+    @staticmethod
+    def unpack_messages(payload: bytes, ext_hook=decode_ext) -> List:
+        """Deserialize an MQ payload into its messages: one for plain msgpack, many for an envelope.
+
+        Msgpack extensions (numpy, pandas, and torch values) are decoded with ``ext_hook``.
+        """
+        magic = MQDao.ENVELOPE_MAGIC
+        if payload[: len(magic)] != magic:
+            return [msgpack.loads(payload, ext_hook=ext_hook, strict_map_key=False)]
+        view = memoryview(payload)
+        header = MQDao._ENVELOPE_HEADER
+        (count,) = header.unpack_from(view, len(magic))
+        offset = len(magic) + header.size
+        messages = []
+        for _ in range(count):
+            (size,) = header.unpack_from(view, offset)
+            offset += header.size
+            messages.append(msgpack.loads(view[offset : offset + size], ext_hook=ext_hook, strict_map_key=False))
+            offset += size
+        return messages
 
     def register_time_based_thread_init(self, interceptor_instance_id: str, exec_bundle_id=None):
         """Register the time."""
@@ -163,6 +237,13 @@ class MQDao(object):
                     flush_function=self.bulk_publish,
                     max_size=MQ_BUFFER_SIZE,
                     flush_interval=MQ_INSERTION_BUFFER_TIME,
+                    capacity=MQ_BUFFER_CAPACITY,
+                    overflow_policy=MQ_BUFFER_OVERFLOW_POLICY,
+                    spill_dir=MQ_BUFFER_SPILL_DIR,
+                    flush_workers=MQ_BUFFER_FLUSH_WORKERS,
+                    max_in_flight=MQ_BUFFER_MAX_IN_FLIGHT,
+                    ordering_key="task_id",
+                    prepare_function=materialize_messages,
                 )
                 if check_safe_stops:
                     self.register_time_based_thread_init(interceptor_instance_id, exec_bundle_id)
@@ -191,7 +272,7 @@ class MQDao(object):
                 self.logger.error("MQ time-based flushing is not started")
         else:
             if MQ_ENABLED and self.buffer:
-                self.bulk_publish(self.buffer)  # end-of-run single flush to Redis
+                self.bulk_publish(materialize_messages(self.buffer))  # end-of-run single flush to Redis
             self.buffer = list()
 
         self.logger.debug("Buffer closed.")
@@ -247,12 +328,12 @@ class MQDao(object):
         self.send_message(msg)
 
     @abstractmethod
-    def send_message(self, message: dict, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def send_message(self, message: dict, channel=MQ_CHANNEL, serializer=packb):
         """Send a message."""
         raise NotImplementedError()
 
     @abstractmethod
-    def _send_message_timed(self, message: dict, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def _send_message_timed(self, message: dict, channel=MQ_CHANNEL, serializer=packb):
         """Send a message."""
         raise NotImplementedError()
 
@@ -2,7 +2,7 @@
 
 from typing import Callable
 from time import time
-import msgpack
+from flowcept.commons.msgpack_ext import packb
 
 import os
 from uuid import uuid4
@@ -59,27 +59,27 @@ class MQDaoKafka(MQDao):
                     else:
                         self.logger.error(f"Consumer error: {msg.error()}")
                         break
-                message = msgpack.loads(msg.value(), raw=False, strict_map_key=False)
-                self.logger.debug(f"Received message: {message}")
-                if not message_handler(message):
+                messages = self.unpack_messages(msg.value(), self.ext_hook)
+                self.logger.debug(f"Received messages: {messages}")
+                if not all(message_handler(message) for message in messages):
                     break
         except Exception as e:
             self.logger.exception(e)
         finally:
             self.unsubscribe()
 
-    def send_message(self, message: dict, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def send_message(self, message: dict, channel=MQ_CHANNEL, serializer=packb):
         """Send the message."""
         self._producer.produce(channel, key=channel, value=serializer(message))
         self._producer.flush()
 
-    def _send_message_timed(self, message: dict, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def _send_message_timed(self, message: dict, channel=MQ_CHANNEL, serializer=packb):
         t1 = time()
         self.send_message(message, channel, serializer)
         t2 = time()
         self._flush_events.append(["single", t1, t2, t2 - t1, len(str(message).encode())])
 
-    def _bulk_publish(self, buffer, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def _bulk_publish(self, buffer, channel=MQ_CHANNEL, serializer=packb):
         for message in buffer:
             try:
                 self._producer.produce(channel, key=channel, value=serializer(message))
@@ -93,7 +93,7 @@ class MQDaoKafka(MQDao):
         except Exception as e:
             self.logger.exception(e)
 
-    def _bulk_publish_timed(self, buffer, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def _bulk_publish_timed(self, buffer, channel=MQ_CHANNEL, serializer=packb):
         total = 0
         for message in buffer:
             try:
@@ -1,7 +1,7 @@
 import uuid
 from typing import Callable
 
-import msgpack
+from flowcept.commons.msgpack_ext import packb
 from time import time
 
 import mochi.mofka.client as mofka
@@ -51,18 +51,18 @@ class MQDaoMofka(MQDao):
         finally:
             pass
 
-    def send_message(self, message: dict, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def send_message(self, message: dict, channel=MQ_CHANNEL, serializer=packb):
         """Send a single message to Mofka."""
         self.producer.push(metadata=message)  # using metadata to send data
         self.producer.flush()
 
-    def _send_message_timed(self, message: dict, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def _send_message_timed(self, message: dict, channel=MQ_CHANNEL, serializer=packb):
         t1 = time()
         self.send_message(message, channel, serializer)
         t2 = time()
         self._flush_events.append(["single", t1, t2, t2 - t1, len(str(message).encode())])
 
-    def _bulk_publish(self, buffer, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def _bulk_publish(self, buffer, channel=MQ_CHANNEL, serializer=packb):
         try:
             # self.logger.debug(f"Going to send Message:\n\t[BEGIN_MSG]{buffer}\n[END_MSG]\t")
             for m in buffer:
@@ -78,7 +78,7 @@ class MQDaoMofka(MQDao):
         except Exception as e:
             self.logger.exception(e)
 
-    def _bulk_publish_timed(self, buffer, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def _bulk_publish_timed(self, buffer, channel=MQ_CHANNEL, serializer=packb):
         total = 0
         try:
             # self.logger.debug(f"Going to send Message:\n\t[BEGIN_MSG]{buffer}\n[END_MSG]\t")
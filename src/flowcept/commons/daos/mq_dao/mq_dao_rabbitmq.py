@@ -3,7 +3,7 @@
 from time import time
 from typing import Callable
 
-import msgpack
+from flowcept.commons.msgpack_ext import packb
 import pika
 
 from flowcept.commons.daos.mq_dao.mq_dao_base import MQDao
@@ -108,8 +108,7 @@ class MQDaoRabbitMQ(MQDao):
                     # Heartbeat tick — no message delivered; keep looping.
                     continue
                 try:
-                    msg_obj = msgpack.loads(body, strict_map_key=False)
-                    keep_going = message_handler(msg_obj)
+                    keep_going = all(message_handler(msg_obj) for msg_obj in self.unpack_messages(body, self.ext_hook))
                     self._sub_channel.basic_ack(method_frame.delivery_tag)
                     if not keep_going:
                         break
@@ -122,7 +121,7 @@ class MQDaoRabbitMQ(MQDao):
         finally:
             self.unsubscribe()
 
-    def send_message(self, message: dict, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def send_message(self, message: dict, channel=MQ_CHANNEL, serializer=packb):
         """Publish a single message to the fanout exchange."""
         self._ensure_producer()
         self._pub_channel.basic_publish(
@@ -131,14 +130,14 @@ class MQDaoRabbitMQ(MQDao):
             body=serializer(message),
         )
 
-    def _send_message_timed(self, message: dict, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def _send_message_timed(self, message: dict, channel=MQ_CHANNEL, serializer=packb):
         """Timed variant of :meth:`send_message`."""
         t1 = time()
         self.send_message(message, channel, serializer)
         t2 = time()
         self._flush_events.append(["single", t1, t2, t2 - t1, len(str(message).encode())])
 
-    def _bulk_publish(self, buffer, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def _bulk_publish(self, buffer, channel=MQ_CHANNEL, serializer=packb):
         """Publish all messages in *buffer* to the fanout exchange."""
         self._ensure_producer()
         for message in buffer:
@@ -153,7 +152,7 @@ class MQDaoRabbitMQ(MQDao):
                 self.logger.error(f"Message could not be flushed: {message}")
         self.logger.debug(f"Flushed {len(buffer)} msgs to MQ!")
 
-    def _bulk_publish_timed(self, buffer, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def _bulk_publish_timed(self, buffer, channel=MQ_CHANNEL, serializer=packb):
         """Timed variant of :meth:`_bulk_publish`."""
         total = 0
         self._ensure_producer()
@@ -4,7 +4,7 @@ from threading import Thread
 from typing import Callable
 import redis
 
-import msgpack
+from flowcept.commons.msgpack_ext import packb
 from time import time, sleep
 
 from flowcept.commons.daos.mq_dao.mq_dao_base import MQDao
@@ -86,10 +86,12 @@ class MQDaoRedis(MQDao):
                         continue
 
                     try:
-                        msg_obj = msgpack.loads(message["data"], strict_map_key=False)
-                        # self.logger.debug(f"In mq dao redis, received msg!  {msg_obj}")
-                        if not message_handler(msg_obj):
-                            should_continue = False  # Break While loop
+                        for msg_obj in self.unpack_messages(message["data"], self.ext_hook):
+                            # self.logger.debug(f"In mq dao redis, received msg!  {msg_obj}")
+                            if not message_handler(msg_obj):
+                                should_continue = False  # Break While loop
+                                break
+                        if not should_continue:
                             break  # Break For loop
                     except Exception as e:
                         self.logger.error(f"Failed to process message {message}")
@@ -112,18 +114,18 @@ class MQDaoRedis(MQDao):
                 self.logger.exception(e)
                 continue
 
-    def send_message(self, message: dict, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def send_message(self, message: dict, channel=MQ_CHANNEL, serializer=packb):
         """Send the message."""
         self._producer.publish(channel, serializer(message))
 
-    def _send_message_timed(self, message: dict, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def _send_message_timed(self, message: dict, channel=MQ_CHANNEL, serializer=packb):
         """Send the message using timing for performance evaluation."""
         t1 = time()
         self.send_message(message, channel, serializer)
         t2 = time()
         self._flush_events.append(["single", t1, t2, t2 - t1, len(str(message).encode())])
 
-    def _bulk_publish(self, buffer, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def _bulk_publish(self, buffer, channel=MQ_CHANNEL, serializer=packb):
         pipe = self._producer.pipeline()
         for message in buffer:
             try:
@@ -138,7 +140,7 @@ class MQDaoRedis(MQDao):
         except Exception as e:
             self.logger.exception(e)
 
-    def _bulk_publish_timed(self, buffer, channel=MQ_CHANNEL, serializer=msgpack.dumps):
+    def _bulk_publish_timed(self, buffer, channel=MQ_CHANNEL, serializer=packb):
         total = 0
         pipe = self._producer.pipeline()
         for message in buffer:
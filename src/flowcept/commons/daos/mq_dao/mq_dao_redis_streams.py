@@ -0,0 +1,221 @@
+"""MQ Redis Streams module."""
+
+import os
+import socket
+from time import time, sleep
+from typing import Callable, Dict, List, Optional
+from uuid import uuid4
+
+from flowcept.commons.msgpack_ext import packb
+import redis
+
+from flowcept.commons.daos.mq_dao.mq_dao_redis import MQDaoRedis
+from flowcept.configs import MQ_CHANNEL, MQ_SETTINGS
+
+
+class MQDaoRedisStreams(MQDaoRedis):
+    """MQ DAO on Redis Streams (``mq.type: redis_streams``).
+
+    Messages are appended to the ``MQ_CHANNEL`` stream with XADD and read with XREADGROUP.
+    Consumers whose ``consumer_group`` is set (the DocumentInserter) share that group, so
+    several processes split the load and entries not acknowledged by a crashed consumer are
+    reclaimed by the others after ``reclaim_idle_ms``. Consumers without a group get a
+    private group and see every new message, like pub/sub subscribers.
+
+    Control messages (``type: flowcept_control``) go to a separate ``<channel>.control``
+    stream that every consumer reads in full, so all inserters of a group see the stop
+    signals. Before handling a control message, a consumer drains the data entries still
+    waiting for its group.
+    """
+
+    DATA_FIELD = b"data"
+
+    def __init__(self, adapter_settings=None):
+        super().__init__(adapter_settings)
+        self._stream = MQ_CHANNEL
+        self._control_stream = f"{MQ_CHANNEL}.control"
+        self._maxlen = int(MQ_SETTINGS.get("stream_maxlen", 1_000_000)) or None
+        self._read_count = int(MQ_SETTINGS.get("read_count", 500))
+        self._block_ms = int(MQ_SETTINGS.get("block_ms", 1000))
+        self._reclaim_idle_ms = int(MQ_SETTINGS.get("reclaim_idle_ms", 60_000))
+        self._consumer_name = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:8]}"
+        self._group = None
+        self._private_group = False
+        self._control_last_id = None
+
+    def subscribe(self):
+        """Join the consumer group of the data stream and start following the control stream."""
+        if self.consumer_group:
+            # A shared group starts at the beginning of the stream so nothing published
+            # before the first consumer joined is lost.
+            self._group, start_id, self._private_group = self.consumer_group, "0", False
+        else:
+            self._group, start_id, self._private_group = f"{self._consumer_name}.private", "$", True
+        try:
+            self._producer.xgroup_create(self._stream, self._group, id=start_id, mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        last = self._producer.xrevrange(self._control_stream, count=1)
+        self._control_last_id = last[0][0] if last else b"0-0"
+
+    def unsubscribe(self):
+        """Leave the data stream; private groups are destroyed."""
+        if self._group is None:
+            return
+        try:
+            if self._private_group:
+                self._producer.xgroup_destroy(self._stream, self._group)
+            else:
+                self._producer.xgroup_delconsumer(self._stream, self._group, self._consumer_name)
+        except Exception as e:
+            self.logger.exception(e)
+        self._group = None
+
+    def _handle_entries(self, entries: List, message_handler: Callable) -> bool:
+        """Run the handler on stream entries and acknowledge them. Returns False to stop."""
+        acked = []
+        try:
+            for entry_id, fields in entries:
+                if fields is None:  # Trimmed away while pending.
+                    acked.append(entry_id)
+                    continue
+                try:
+                    messages = self.unpack_messages(fields[self.DATA_FIELD], self.ext_hook)
+                except Exception as e:
+                    self.logger.error(f"Failed to decode stream entry {entry_id}.")
+                    self.logger.exception(e)
+                    acked.append(entry_id)
+                    continue
+                keep_going = True
+                for msg_obj in messages:
+                    try:
+                        keep_going = message_handler(msg_obj)
+                    except Exception as e:
+                        self.logger.error(f"Failed to process message {msg_obj}")
+                        self.logger.exception(e)
+                        continue
+                    if not keep_going:
+                        break
+                acked.append(entry_id)
+                if not keep_going:
+                    return False
+            return True
+        finally:
+            if acked:
+                self._producer.xack(self._stream, self._group, *acked)
+
+    def _read_data(self, message_handler: Callable, block: Optional[int]) -> Optional[bool]:
+        """Read one batch of new entries for this consumer. Returns None if there was none."""
+        response = self._producer.xreadgroup(
+            self._group, self._consumer_name, {self._stream: ">"}, count=self._read_count, block=block
+        )
+        if not response or not response[0][1]:
+            return None
+        return self._handle_entries(response[0][1], message_handler)
+
+    def _reclaim(self, message_handler: Callable) -> bool:
+        """Take over and handle entries left pending too long by other consumers of the group."""
+        start = "0-0"
+        while True:
+            response = self._producer.xautoclaim(
+                self._stream,
+                self._group,
+                self._consumer_name,
+                min_idle_time=self._reclaim_idle_ms,
+                start_id=start,
+                count=self._read_count,
+            )
+            start, entries = response[0], response[1]
+            if entries:
+                self.logger.warning(f"Reclaimed {len(entries)} pending entries of {self._stream}.")
+                if not self._handle_entries(entries, message_handler):
+                    return False
+            if start in (b"0-0", "0-0"):
+                return True
+
+    def _read_control(self, message_handler: Callable) -> bool:
+        response = self._producer.xread({self._control_stream: self._control_last_id}, count=self._read_count)
+        if not response:
+            return True
+        # Data published before these control messages is handled first.
+        while True:
+            result = self._read_data(message_handler, block=None)
+            if result is None:
+                break
+            if not result:
+                return False
+        for entry_id, fields in response[0][1]:
+            self._control_last_id = entry_id
+            for msg_obj in self.unpack_messages(fields[self.DATA_FIELD], self.ext_hook):
+                if not message_handler(msg_obj):
+                    return False
+        return True
+
+    def message_listener(self, message_handler: Callable):
+        """Read, handle, and acknowledge stream entries until the handler returns False."""
+        max_retrials = 10
+        current_trials = 0
+        last_reclaim = 0.0
+        while current_trials < max_retrials:
+            try:
+                if not self._private_group and time() - last_reclaim >= self._reclaim_idle_ms / 1000:
+                    last_reclaim = time()
+                    if not self._reclaim(message_handler):
+                        return
+                if not self._read_control(message_handler):
+                    return
+                if self._read_data(message_handler, block=self._block_ms) is False:
+                    return
+                current_trials = 0
+            except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+                current_trials += 1
+                self.logger.critical(f"Redis connection lost: {e}. Trying to reconnect in 3 seconds...")
+                sleep(3)
+            except Exception as e:
+                self.logger.exception(e)
+                sleep(0.1)
+
+    def _xadd(self, target, stream: str, payload: bytes):
+        maxlen = self._maxlen if stream == self._stream else 10_000
+        target.xadd(stream, {self.DATA_FIELD: payload}, maxlen=maxlen, approximate=True)
+
+    def send_message(self, message: Dict, channel=MQ_CHANNEL, serializer=packb):
+        """Send the message; control messages go to the control stream."""
+        is_control = message.get("type") == "flowcept_control"
+        self._xadd(self._producer, self._control_stream if is_control else self._stream, serializer(message))
+
+    def _bulk_publish(self, buffer, channel=MQ_CHANNEL, serializer=packb):
+        pipe = self._producer.pipeline(transaction=False)
+        for message in buffer:
+            try:
+                self._xadd(pipe, self._stream, serializer(message))
+            except Exception as e:
+                self.logger.exception(e)
+                self.logger.error("Some messages couldn't be flushed! Check the messages' contents!")
+                self.logger.error(f"Message that caused error: {message}")
+        try:
+            pipe.execute()
+            self.logger.debug(f"Flushed {len(buffer)} msgs to MQ!")
+        except Exception as e:
+            self.logger.exception(e)
+
+    def _bulk_publish_timed(self, buffer, channel=MQ_CHANNEL, serializer=packb):
+        total = 0
+        pipe = self._producer.pipeline(transaction=False)
+        for message in buffer:
+            try:
+                total += len(str(message).encode())
+                self._xadd(pipe, self._stream, serializer(message))
+            except Exception as e:
+                self.logger.exception(e)
+                self.logger.error("Some messages couldn't be flushed! Check the messages' contents!")
+                self.logger.error(f"Message that caused error: {message}")
+        try:
+            t1 = time()
+            pipe.execute()
+            t2 = time()
+            self._flush_events.append(["bulk", t1, t2, t2 - t1, total])
+            self.logger.debug(f"Flushed {len(buffer)} msgs to MQ!")
+        except Exception as e:
+            self.logger.exception(e)
@@ -0,0 +1,214 @@
+"""Compact task record module."""
+
+import copy
+import os
+from itertools import count
+from typing import Any, Dict, List
+from uuid import uuid4
+
+import numpy as np
+
+from flowcept.commons.flowcept_logger import FlowceptLogger
+from flowcept.commons.payload_budget import PayloadBudget
+from flowcept.configs import COPY_MAX_ITEMS, COPY_ON_CAPTURE
+
+COPY_NONE = "none"
+COPY_SHALLOW = "shallow"
+COPY_DEEP = "deep"
+_COPYABLE = (dict, list, set, bytearray, np.ndarray)
+_IMMUTABLE = frozenset((int, float, str, bool, bytes, type(None)))
+_PAYLOAD_BUDGET = PayloadBudget.from_settings()
+
+
+class TaskRecord:
+    """Compact task captured by the ``@flowcept_task`` fast path.
+
+    Unlike :class:`~flowcept.commons.flowcept_dataclasses.task_object.TaskObject`, a record has
+    fixed ``__slots__`` and is put in the MQ buffer as is: :meth:`to_dict` builds the task
+    message, converts the telemetry snapshots and, if ``sanitize`` is set, replaces the
+    non-JSON-serializable values of ``used`` and ``generated``. It is called by the
+    interceptor's background serializer threads or, without them, in the MQ buffer's flush
+    thread, so this work is not paid by the instrumented function's caller.
+
+    ``used`` and ``generated`` keep the values given by the caller, as snapshotted by
+    :func:`snapshot_value` (see ``instrumentation.serialization.copy_on_capture``); values kept
+    by reference and modified in place before the serialization are captured modified.
+    """
+
+    __slots__ = (
+        "task_id",
+        "subtype",
+        "activity_id",
+        "workflow_id",
+        "campaign_id",
+        "agent_id",
+        "source_agent_id",
+        "used",
+        "generated",
+        "tags",
+        "custom_metadata",
+        "started_at",
+        "ended_at",
+        "hostname",
+        "status",
+        "stderr",
+        "telemetry_at_start",
+        "telemetry_at_end",
+        "sanitize",
+    )
+
+    def __init__(self):
+        self.subtype = self.agent_id = self.source_agent_id = self.tags = self.custom_metadata = None
+        self.generated = self.ended_at = self.status = self.stderr = None
+        self.telemetry_at_start = self.telemetry_at_end = None
+        self.sanitize = False
+
+    def get(self, key, default=None):
+        """Return a field as ``dict.get`` would, e.g. for the buffer's ``ordering_key``."""
+        return getattr(self, key, default) if key in TaskRecord.__slots__ else default
+
+    def to_dict(self, as_strings: bool = False) -> Dict:
+        """Build the task message, leaving out the fields that are None.
+
+        With ``as_strings``, the values of ``used`` and ``generated`` are sent as their ``str``,
+        without the payload budget and the sanitization (see :func:`materialize_messages`).
+        """
+        used, generated = self.used, self.generated
+        if as_strings:
+            used = _as_strings(used)
+            if generated is not None:
+                generated = _as_strings(generated)
+        elif _PAYLOAD_BUDGET is not None:
+            # Before the sanitization, so that large arrays are summarized rather than replaced by their id.
+            used = _PAYLOAD_BUDGET.apply(used, "used", self.task_id, self.workflow_id)
+            if generated is not None:
+                generated = _PAYLOAD_BUDGET.apply(generated, "generated", self.task_id, self.workflow_id)
+        if self.sanitize and not as_strings:
+            from flowcept.commons.utils import replace_non_serializable
+
+            used = replace_non_serializable(used)
+            if generated is not None:
+                generated = replace_non_serializable(generated)
+        msg = {
+            "type": "task",
+            "task_id": self.task_id,
+            "activity_id": self.activity_id,
+            "used": used,
+            "started_at": self.started_at,
+            "status": self.status,
+        }
+        for key, value in (
+            ("subtype", self.subtype),
+            ("workflow_id", self.workflow_id),
+            ("campaign_id", self.campaign_id),
+            ("agent_id", self.agent_id),
+            ("source_agent_id", self.source_agent_id),
+            ("generated", generated),
+            ("tags", self.tags),
+            ("custom_metadata", self.custom_metadata),
+            ("ended_at", self.ended_at),
+            ("hostname", self.hostname),
+            ("stderr", self.stderr),
+        ):
+            if value is not None:
+                msg[key] = value
+        if self.telemetry_at_start is not None:
+            msg["telemetry_at_start"] = self.telemetry_at_start.to_dict()
+        if self.telemetry_at_end is not None:
+            msg["telemetry_at_end"] = self.telemetry_at_end.to_dict()
+        return msg
+
+
+def snapshot_value(value: Any, mode: str = COPY_ON_CAPTURE, max_items: int = COPY_MAX_ITEMS) -> Any:
+    """
+    Return what a task keeps of ``value`` until it is serialized.
+
+    Mutable containers (``dict``, ``list``, ``set``, ``bytearray``) and numpy arrays with at
+    most ``max_items`` items (``size`` for arrays) are copied, shallowly or deeply depending on
+    ``mode``, so changes made in place after the call are not captured. Other values, larger
+    containers, and every value when ``mode`` is ``none`` are kept by reference.
+    """
+    if mode == COPY_NONE or type(value) in _IMMUTABLE or not isinstance(value, _COPYABLE):
+        return value
+    if (value.size if isinstance(value, np.ndarray) else len(value)) > max_items:
+        return value
+    try:
+        return copy.deepcopy(value) if mode == COPY_DEEP else copy.copy(value)
+    except Exception:
+        return value
+
+
+def snapshot_dict(values: Dict, mode: str = COPY_ON_CAPTURE, max_items: int = COPY_MAX_ITEMS) -> Dict:
+    """Apply :func:`snapshot_value` to the values of ``values``, in place, and return it."""
+    if mode != COPY_NONE:
+        for key, value in values.items():
+            if type(value) not in _IMMUTABLE:
+                values[key] = snapshot_value(value, mode, max_items)
+    return values
+
+
+def _as_strings(values: Any) -> Any:
+    return {key: str(value) for key, value in values.items()} if isinstance(values, dict) else str(values)
+
+
+def _record_to_dict(record: TaskRecord) -> Dict:
+    """Return ``record.to_dict()``; if it fails, the message with its values as strings, or None."""
+    try:
+        return record.to_dict()
+    except Exception as e:
+        FlowceptLogger().warning(f"Could not serialize the values of task {record.task_id}, sending their str: {e}")
+    try:
+        return record.to_dict(as_strings=True)
+    except Exception as e:
+        FlowceptLogger().error(f"Could not serialize task {record.task_id}, dropping it: {e}")
+        return None
+
+
+def materialize_messages(messages: List) -> List[Dict]:
+    """
+    Convert the task records of a batch of buffered messages into message dicts.
+
+    With ``project.payload_budget`` enabled, the ``used``/``generated`` fields of the other
+    task messages are also brought within the budget. A failure affects only its message: a
+    record whose values cannot be serialized is sent with their ``str`` (or dropped if even
+    that fails), and a message the budget cannot be applied to is sent as is.
+    """
+    if _PAYLOAD_BUDGET is None and not any(type(msg) is TaskRecord for msg in messages):
+        return messages
+    materialized = []
+    for msg in messages:
+        if type(msg) is TaskRecord:
+            msg = _record_to_dict(msg)
+            if msg is None:
+                continue
+        elif _PAYLOAD_BUDGET is not None and isinstance(msg, dict) and msg.get("type") == "task":
+            try:
+                msg = _PAYLOAD_BUDGET.apply_to_message(msg)
+            except Exception as e:
+                FlowceptLogger().warning(f"Could not apply the payload budget to task {msg.get('task_id')}: {e}")
+        materialized.append(msg)
+    return materialized
+
+
+def _new_id_prefix() -> str:
+    return f"{uuid4().hex[:12]}-{os.getpid()}"
+
+
+_id_prefix = _new_id_prefix()
+_id_counter = count()
+
+
+def _reset_id_generator():
+    global _id_prefix, _id_counter
+    _id_prefix = _new_id_prefix()
+    _id_counter = count()
+
+
+if hasattr(os, "register_at_fork"):
+    # A forked child must not reuse its parent's prefix and counter.
+    os.register_at_fork(after_in_child=_reset_id_generator)
+
+
+def new_task_id() -> str:
+    """Return a task ID unique across threads and processes: a random per-process prefix and a counter."""
+    return f"{_id_prefix}-{next(_id_counter)}"
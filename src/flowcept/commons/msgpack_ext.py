@@ -0,0 +1,262 @@
+"""Msgpack extension types for numpy arrays, pandas Series/DataFrames, and torch tensors.
+
+Arrays travel as their raw bytes next to a small header (dtype, shape, codec), so they are
+neither converted to Python lists nor replaced by their id: encoding copies the data once into
+the message, and decoding a numpy array is zero-copy (``np.frombuffer`` over the received
+bytes, so decoded arrays are read-only).
+"""
+
+import base64
+import struct
+import sys
+import zlib
+from functools import partial
+from typing import Any, List
+
+import msgpack
+import numpy as np
+
+from flowcept.configs import NATIVE_ARRAYS_COMPRESSION, NATIVE_ARRAYS_COMPRESSION_MIN_BYTES
+
+NDARRAY_EXT = 1
+SERIES_EXT = 2
+DATAFRAME_EXT = 3
+TENSOR_EXT = 4
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+_CODECS = {None: CODEC_RAW, "none": CODEC_RAW, "zlib": CODEC_ZLIB}
+
+# Key of the JSON objects standing for an extension in JSONL buffer files.
+JSON_EXT_KEY = "__flowcept_ext__"
+_JSON_EXT_MARKER = JSON_EXT_KEY.encode()
+
+_HEADER_LENGTH = struct.Struct(">I")
+
+
+def _pandas():
+    # pandas and torch values can only exist if their module was imported by someone else.
+    return sys.modules.get("pandas")
+
+
+def _torch():
+    return sys.modules.get("torch")
+
+
+def is_native_value(obj) -> bool:
+    """Return True if ``obj`` is a numpy array, a pandas Series/DataFrame, or a torch tensor."""
+    if isinstance(obj, np.ndarray):
+        return True
+    pd = _pandas()
+    if pd is not None and isinstance(obj, (pd.Series, pd.DataFrame)):
+        return True
+    torch = _torch()
+    return torch is not None and isinstance(obj, torch.Tensor)
+
+
+def _pack_array(array: np.ndarray, compression, min_bytes: int, tag: str = None):
+    """Return the extension payload of ``array``, or None for object and structured dtypes."""
+    if array.dtype.hasobject or array.dtype.fields is not None:
+        return None
+    shape = list(array.shape)  # np.ascontiguousarray turns 0-d arrays into 1-d arrays.
+    array = np.ascontiguousarray(array)
+    data = array.reshape(-1).view(np.uint8)
+    codec = _CODECS[compression] if array.nbytes >= min_bytes else CODEC_RAW
+    if codec == CODEC_ZLIB:
+        data = zlib.compress(data)
+    header = msgpack.packb([array.dtype.str, shape, codec, tag])
+    return b"".join((_HEADER_LENGTH.pack(len(header)), header, data))
+
+
+def _unpack_array(data: bytes):
+    """Return the array of an extension payload and its tag."""
+    (size,) = _HEADER_LENGTH.unpack_from(data, 0)
+    offset = _HEADER_LENGTH.size + size
+    dtype, shape, codec, tag = msgpack.unpackb(data[_HEADER_LENGTH.size : offset])
+    if codec == CODEC_ZLIB:
+        data, offset = zlib.decompress(memoryview(data)[offset:]), 0
+    return np.frombuffer(data, dtype=np.dtype(dtype), offset=offset).reshape(tuple(shape)), tag
+
+
+def _values(array, compression, min_bytes):
+    packed = _pack_array(array, compression, min_bytes)
+    return array.tolist() if packed is None else msgpack.ExtType(NDARRAY_EXT, packed)
+
+
+def _index(index, compression, min_bytes) -> List:
+    pd = _pandas()
+    if isinstance(index, pd.RangeIndex):
+        return ["range", index.start, index.stop, index.step]
+    return ["values", _values(index.to_numpy(), compression, min_bytes)]
+
+
+def _pack_fields(fields: List, compression, min_bytes: int) -> bytes:
+    return msgpack.packb(fields, default=partial(encode_ext, compression=compression, compression_min_bytes=min_bytes))
+
+
+def encode_ext(
+    obj,
+    compression=NATIVE_ARRAYS_COMPRESSION,
+    compression_min_bytes: int = NATIVE_ARRAYS_COMPRESSION_MIN_BYTES,
+):
+    """
+    Msgpack ``default`` hook: encode numpy, pandas, and torch values as extension types.
+
+    Parameters
+    ----------
+    obj : Any
+        A value msgpack cannot serialize by itself.
+    compression : str, optional
+        ``None`` or ``"zlib"``; only applied to arrays of at least ``compression_min_bytes`` bytes.
+    compression_min_bytes : int, optional
+        Size under which arrays are never compressed.
+
+    Returns
+    -------
+    msgpack.ExtType or Any
+        The extension, or a plain value (numpy scalars and arrays of Python objects).
+
+    Raises
+    ------
+    TypeError
+        If ``obj`` is of any other type.
+    """
+    if isinstance(obj, np.ndarray):
+        packed = _pack_array(obj, compression, compression_min_bytes)
+        return obj.tolist() if packed is None else msgpack.ExtType(NDARRAY_EXT, packed)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    pd = _pandas()
+    if pd is not None:
+        if isinstance(obj, pd.Series):
+            fields = [
+                obj.name,
+                _index(obj.index, compression, compression_min_bytes),
+                _values(obj.to_numpy(), compression, compression_min_bytes),
+            ]
+            return msgpack.ExtType(SERIES_EXT, _pack_fields(fields, compression, compression_min_bytes))
+        if isinstance(obj, pd.DataFrame):
+            fields = [
+                list(obj.columns),
+                _index(obj.index, compression, compression_min_bytes),
+                [_values(obj.iloc[:, i].to_numpy(), compression, compression_min_bytes) for i in range(obj.shape[1])],
+            ]
+            return msgpack.ExtType(DATAFRAME_EXT, _pack_fields(fields, compression, compression_min_bytes))
+    torch = _torch()
+    if torch is not None and isinstance(obj, torch.Tensor):
+        tensor = obj.detach().cpu()
+        tag = None
+        if tensor.dtype == torch.bfloat16:
+            # numpy has no bfloat16: its bits are sent as int16 and viewed back on decoding.
+            tensor, tag = tensor.view(torch.int16), "bfloat16"
+        return msgpack.ExtType(TENSOR_EXT, _pack_array(tensor.numpy(), compression, compression_min_bytes, tag))
+    raise TypeError(f"Cannot serialize {type(obj).__name__} with msgpack.")
+
+
+def _range_or_values(index) -> Any:
+    kind, *args = index
+    return range(*args) if kind == "range" else args[0]
+
+
+def decode_ext(code: int, data: bytes):
+    """
+    Msgpack ``ext_hook``: decode the extensions of :func:`encode_ext` into their original types.
+
+    numpy arrays are read-only views of ``data``. Tensors are copied into writable torch
+    tensors, or returned as numpy arrays if torch is not installed. Without pandas, Series
+    and DataFrames are decoded as with :func:`decode_ext_storable`.
+    """
+    if code == NDARRAY_EXT:
+        return _unpack_array(data)[0]
+    if code == TENSOR_EXT:
+        array, tag = _unpack_array(data)
+        try:
+            import torch
+        except ModuleNotFoundError:
+            return _storable_array(array, tag) if tag else array
+        tensor = torch.from_numpy(array.copy())
+        return tensor.view(torch.bfloat16) if tag == "bfloat16" else tensor
+    if code in (SERIES_EXT, DATAFRAME_EXT):
+        try:
+            import pandas as pd
+        except ModuleNotFoundError:
+            return decode_ext_storable(code, data)
+        if code == SERIES_EXT:
+            name, index, values = unpackb(data)
+            return pd.Series(values, index=_range_or_values(index), name=name)
+        columns, index, values = unpackb(data)
+        df = pd.DataFrame(dict(enumerate(values)), index=_range_or_values(index))
+        df.columns = columns
+        return df
+    return msgpack.ExtType(code, data)
+
+
+def _storable_array(array: np.ndarray, tag) -> np.ndarray:
+    if tag == "bfloat16":
+        return (array.view(np.uint16).astype(np.uint32) << 16).view(np.float32)
+    return array
+
+
+def decode_ext_storable(code: int, data: bytes):
+    """
+    Msgpack ``ext_hook`` for consumers that store messages: decode the extensions into plain values.
+
+    Arrays and tensors become (nested) lists, Series become ``{str(index): value}``, and
+    DataFrames ``{str(column): {str(index): value}}``, as ``to_dict`` would return.
+    """
+    if code in (NDARRAY_EXT, TENSOR_EXT):
+        array = _storable_array(*_unpack_array(data))
+        if array.dtype.kind in "mM":  # datetime64 and timedelta64
+            return array.astype(str).tolist()
+        return array.tolist()
+    if code == SERIES_EXT:
+        _, index, values = unpackb(data, decode_ext_storable)
+        return {str(i): v for i, v in zip(_range_or_values(index), values)}
+    if code == DATAFRAME_EXT:
+        columns, index, values = unpackb(data, decode_ext_storable)
+        keys = [str(i) for i in _range_or_values(index)]
+        return {str(c): dict(zip(keys, column)) for c, column in zip(columns, values)}
+    return msgpack.ExtType(code, data)
+
+
+def packb(obj) -> bytes:
+    """Serialize ``obj`` with msgpack, encoding numpy, pandas, and torch values as extensions."""
+    return msgpack.packb(obj, default=encode_ext)
+
+
+def unpackb(data, ext_hook=decode_ext) -> Any:
+    """Deserialize msgpack ``data``, decoding the extensions with ``ext_hook``."""
+    return msgpack.unpackb(data, ext_hook=ext_hook, strict_map_key=False)
+
+
+def json_default(obj) -> Any:
+    """
+    ``default`` hook for ``orjson.dumps``: encode numpy, pandas, and torch values.
+
+    Extensions become ``{"__flowcept_ext__": <code>, "data": <base64 payload>}``, which
+    :func:`decode_json_ext` turns back into values.
+    """
+    ext = encode_ext(obj)
+    if not isinstance(ext, msgpack.ExtType):
+        return ext
+    return {JSON_EXT_KEY: ext.code, "data": base64.b64encode(ext.data).decode()}
+
+
+def has_json_ext(raw: bytes) -> bool:
+    """Return True if the JSON bytes ``raw`` may contain encoded extensions."""
+    return _JSON_EXT_MARKER in raw
+
+
+def decode_json_ext(obj, ext_hook=decode_ext) -> Any:
+    """Replace, in place, the encoded extensions found in loaded JSON ``obj``, and return it."""
+    if isinstance(obj, dict):
+        if JSON_EXT_KEY in obj and len(obj) == 2 and "data" in obj:
+            return ext_hook(obj[JSON_EXT_KEY], base64.b64decode(obj["data"]))
+        for key, value in obj.items():
+            if isinstance(value, (dict, list)):
+                obj[key] = decode_json_ext(value, ext_hook)
+    elif isinstance(obj, list):
+        for i, value in enumerate(obj):
+            if isinstance(value, (dict, list)):
+                obj[i] = decode_json_ext(value, ext_hook)
+    return obj
@@ -0,0 +1,230 @@
+"""Payload budget module: bounds the size of the used and generated fields of task messages."""
+
+import hashlib
+import pickle
+from itertools import islice
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from flowcept.commons.flowcept_logger import FlowceptLogger
+from flowcept.configs import (
+    PAYLOAD_BUDGET_ENABLED,
+    PAYLOAD_MAX_FIELD_BYTES,
+    PAYLOAD_MAX_ITEMS,
+    PAYLOAD_OFFLOAD,
+)
+
+PAYLOAD_OBJECT_TYPE = "task_payload"
+BUDGETED_FIELDS = ("used", "generated")
+_SCALARS = frozenset((int, float, bool, type(None)))
+
+
+def summarize_array(array) -> Dict:
+    """
+    Summarize an array (or array-like, e.g., a pandas Series) without keeping its values.
+
+    Parameters
+    ----------
+    array : np.ndarray or array-like
+        The array to summarize.
+
+    Returns
+    -------
+    dict
+        ``shape``, ``dtype``, ``size`` and a ``hash`` of the contents, plus ``min``, ``max``
+        and ``mean`` for non-empty numeric arrays.
+    """
+    if hasattr(array, "detach"):  # torch.Tensor
+        array = array.detach().cpu().numpy()
+    array = np.asarray(array)
+    summary = {"shape": list(array.shape), "dtype": str(array.dtype), "size": int(array.size)}
+    if array.size and (np.issubdtype(array.dtype, np.number) or array.dtype == np.bool_):
+        try:
+            summary["min"] = array.min().item()
+            summary["max"] = array.max().item()
+            summary["mean"] = float(array.mean())
+        except Exception:
+            pass
+    try:
+        data = np.ascontiguousarray(array).tobytes() if array.dtype != object else pickle.dumps(array)
+        summary["hash"] = hashlib.blake2b(data, digest_size=16).hexdigest()
+    except Exception:
+        pass
+    return summary
+
+
+def approx_size(value: Any, limit: float = float("inf")) -> int:
+    """
+    Estimate the serialized size of ``value`` in bytes.
+
+    The walk stops as soon as the estimate exceeds ``limit``, so checking a value against a
+    budget costs at most about the budget, whatever the size of the value.
+    """
+    t = type(value)
+    if t in _SCALARS:
+        return 9
+    if t is str or t is bytes or t is bytearray:
+        return len(value) + 5
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 32
+    if t is dict or isinstance(value, dict):
+        size = 5
+        for k, v in value.items():
+            size += approx_size(k, limit) + approx_size(v, limit - size)
+            if size > limit:
+                break
+        return size
+    if t is list or t is tuple or isinstance(value, (list, tuple, set)):
+        size = 5
+        for v in value:
+            size += approx_size(v, limit - size)
+            if size > limit:
+                break
+        return size
+    # Other objects end up as short strings (see replace_non_serializable).
+    return 64
+
+
+class PayloadBudget:
+    """
+    Per-field size limits for the ``used`` and ``generated`` fields of task messages.
+
+    Each top-level entry of ``used``/``generated`` (a *field*) is checked on its own:
+
+    - arrays (and array-likes) with more than ``max_items`` elements or ``max_field_bytes``
+      bytes are replaced by :func:`summarize_array`;
+    - lists, tuples and dicts with more than ``max_items`` items keep their ``length`` and
+      first ``max_items`` items under ``head``;
+    - a field still estimated above ``max_field_bytes`` is replaced as a whole.
+
+    Every replacement is a dict with ``"truncated": True``, the original ``type`` and its
+    size. With ``offload``, the original value is also saved (pickled) in the blob object
+    store (MongoDB), with ``object_type="task_payload"``, and the replacement keeps its ``object_id``.
+    Each value is stored once: replacements nested in a replaced container have no ``object_id``
+    of their own, their originals being part of the container's object.
+    """
+
+    def __init__(
+        self,
+        max_field_bytes: int = PAYLOAD_MAX_FIELD_BYTES,
+        max_items: int = PAYLOAD_MAX_ITEMS,
+        offload: bool = PAYLOAD_OFFLOAD,
+    ):
+        self.max_field_bytes = max_field_bytes
+        self.max_items = max_items
+        self.offload = offload
+        self.logger = FlowceptLogger()
+
+    @staticmethod
+    def from_settings() -> Optional["PayloadBudget"]:
+        """Return the budget of ``project.payload_budget``, or None if it is disabled."""
+        return PayloadBudget() if PAYLOAD_BUDGET_ENABLED else None
+
+    def apply_to_message(self, msg: Dict) -> Dict:
+        """Return ``msg``, or a copy of it whose ``used``/``generated`` fit the budget."""
+        new_msg = msg
+        for field in BUDGETED_FIELDS:
+            value = msg.get(field)
+            if value is None:
+                continue
+            limited = self.apply(value, field, msg.get("task_id"), msg.get("workflow_id"))
+            if limited is not value:
+                if new_msg is msg:
+                    new_msg = dict(msg)
+                new_msg[field] = limited
+        return new_msg
+
+    def apply(self, value: Any, field: str, task_id: str = None, workflow_id: str = None) -> Any:
+        """Return ``value`` (a ``used`` or ``generated`` payload), or a copy of it that fits the budget."""
+        ctx = (task_id, workflow_id)
+        if type(value) is not dict:
+            return self._limit_field(value, field, ctx)
+        limited = value
+        for key, v in value.items():
+            new_v = self._limit_field(v, f"{field}.{key}", ctx)
+            if new_v is not v:
+                if limited is value:
+                    limited = dict(value)
+                limited[key] = new_v
+        return limited
+
+    def _limit_field(self, value, path, ctx):
+        if type(value) in _SCALARS:
+            return value
+        replaced = []  # (replacement, original value, path), offloaded once the field is settled.
+        shrunk = self._shrink(value, path, replaced)
+        if approx_size(shrunk, self.max_field_bytes) > self.max_field_bytes:
+            # Capped estimate: a lower bound for values much larger than the budget.
+            size = approx_size(value, 16 * self.max_field_bytes)
+            replaced = []
+            shrunk = self._replace(value, path, replaced, {"approx_bytes": size})
+        if self.offload:
+            for replacement, original, original_path in replaced:
+                object_id = self._offload(original, original_path, ctx)
+                if object_id is not None:
+                    replacement["object_id"] = object_id
+        return shrunk
+
+    def _shrink(self, value, path, replaced):
+        """Apply the item limits inside ``value``, copying only the containers that change."""
+        t = type(value)
+        if t in _SCALARS or t is str or t is bytes:
+            return value
+        if isinstance(value, (dict, list, tuple)):
+            n = len(value)
+            # Item paths are only needed as offload metadata.
+            offload = self.offload
+            first_nested = len(replaced)
+            if isinstance(value, dict):
+                items = list(islice(value.items(), self.max_items))
+                shrunk = {k: self._shrink(v, f"{path}.{k}" if offload else path, replaced) for k, v in items}
+                changed = n > self.max_items or any(shrunk[k] is not v for k, v in items)
+            else:
+                items = value[: self.max_items] if n > self.max_items else value
+                shrunk = [self._shrink(v, f"{path}[{i}]" if offload else path, replaced) for i, v in enumerate(items)]
+                changed = n > self.max_items or any(a is not b for a, b in zip(shrunk, items))
+            if n > self.max_items:
+                # The items replaced inside are offloaded with the whole container, not on their own.
+                del replaced[first_nested:]
+                return self._replace(value, path, replaced, {"length": n, "head": shrunk})
+            return shrunk if changed else value
+        if isinstance(value, np.ndarray) or (hasattr(value, "__array__") and hasattr(value, "shape")):
+            try:
+                if hasattr(value, "numel"):  # torch.Tensor
+                    size = value.numel()
+                    nbytes = size * value.element_size()
+                else:
+                    size = int(np.prod(value.shape))
+                    nbytes = getattr(value, "nbytes", 0)
+                if size > self.max_items or nbytes > self.max_field_bytes:
+                    return self._replace(value, path, replaced, summarize_array(value))
+            except Exception as e:
+                self.logger.exception(e)
+        return value
+
+    @staticmethod
+    def _replace(value, path, replaced, summary: Dict) -> Dict:
+        replacement = {"truncated": True, "type": type(value).__name__}
+        replacement.update(summary)
+        replaced.append((replacement, value, path))
+        return replacement
+
+    def _offload(self, value, path, ctx) -> Optional[str]:
+        from flowcept.commons.flowcept_dataclasses.blob_object import BlobObject
+        from flowcept.flowcept_api.db_api import DBAPI
+
+        task_id, workflow_id = ctx
+        blob = BlobObject(
+            task_id=task_id,
+            workflow_id=workflow_id,
+            object_type=PAYLOAD_OBJECT_TYPE,
+            custom_metadata={"field": path},
+        )
+        try:
+            is_bytes = isinstance(value, (bytes, bytearray))
+            DBAPI()._insert_or_update_object(blob, bytes(value) if is_bytes else value, pickle=not is_bytes)
+            return blob.object_id
+        except Exception as e:
+            self.logger.error(f"Could not offload {path} of task {task_id}: {e!r}")
+            return None
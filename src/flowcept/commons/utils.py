@@ -22,7 +22,8 @@ except Exception:
 from flowcept import configs
 from flowcept.commons.flowcept_dataclasses.task_object import TaskObject
 from flowcept.commons.flowcept_logger import FlowceptLogger
-from flowcept.configs import PERF_LOG
+from flowcept.configs import NATIVE_ARRAYS_ENABLED, PERF_LOG
+from flowcept.commons.msgpack_ext import is_native_value, json_default
 from flowcept.commons.vocabulary import Status
 
 
@@ -210,6 +211,9 @@ def replace_non_serializable(obj):
             return [replace_non_serializable(item) for item in obj]
         else:
             return obj
+    elif NATIVE_ARRAYS_ENABLED and is_native_value(obj):
+        # Sent as msgpack extensions (see flowcept.commons.msgpack_ext).
+        return obj
     else:
         cls_dict = type(obj).__dict__
         m = cls_dict.get("to_flowcept_dict") or cls_dict.get("to_dict")
@@ -288,6 +292,9 @@ def generate_pseudo_id() -> str:
 def buffer_to_disk(buffer: List[Dict], path: str, logger):
     """
     Append the in-memory buffer to a JSON Lines (JSONL) file on disk.
+
+    numpy, pandas, and torch values are written as encoded extensions, which
+    ``Flowcept.read_buffer_file`` decodes.
     """
     if not buffer:
         logger.warning("The buffer is currently empty.")
@@ -297,7 +304,7 @@ def buffer_to_disk(buffer: List[Dict], path: str, logger):
             obj.pop("data", None)  # We are not going to store data in the buffer file.
             from orjson import orjson
 
-            f.write(orjson.dumps(obj))
+            f.write(orjson.dumps(obj, default=json_default))
             f.write(b"\n")
 
     logger.info(f"Saved Flowcept buffer into {path}.")
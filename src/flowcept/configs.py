@@ -115,8 +115,15 @@ MQ_USERNAME = _get_env("MQ_USERNAME", settings["mq"].get("username", "guest"))
 MQ_VHOST = _get_env("MQ_VHOST", settings["mq"].get("vhost", "/"))
 MQ_BUFFER_SIZE = settings["mq"].get("buffer_size", 1)
 MQ_INSERTION_BUFFER_TIME = settings["mq"].get("insertion_buffer_time_secs", 1)
+MQ_BUFFER_CAPACITY = int(settings["mq"].get("buffer_capacity", 100_000))
+MQ_BUFFER_OVERFLOW_POLICY = settings["mq"].get("buffer_overflow_policy", "block")
+MQ_BUFFER_SPILL_DIR = settings["mq"].get("buffer_spill_dir", None)
+MQ_BUFFER_FLUSH_WORKERS = int(settings["mq"].get("buffer_flush_workers", 1))
+MQ_BUFFER_MAX_IN_FLIGHT = settings["mq"].get("buffer_max_in_flight", None)
 MQ_TIMING = settings["mq"].get("timing", False)
 MQ_CHUNK_SIZE = int(settings["mq"].get("chunk_size", -1))
+MQ_BATCH_ENVELOPE = settings["mq"].get("batch_envelope", False)
+MQ_CONSUMER_GROUP = settings["mq"].get("consumer_group", "flowcept_document_inserters")
 
 #####################
 # KV SETTINGS       #
@@ -154,6 +161,9 @@ if _mongo_settings:
 ######################
 LMDB_SETTINGS = DATABASES.get("lmdb", {})
 LMDB_ENABLED = False
+LMDB_VALUE_CODEC = (LMDB_SETTINGS or {}).get("value_codec", "json")
+LMDB_SCAN_WORKERS = int((LMDB_SETTINGS or {}).get("scan_workers", 0))
+LMDB_PARALLEL_SCAN_MIN_RECORDS = int((LMDB_SETTINGS or {}).get("parallel_scan_min_records", 100_000))
 if LMDB_SETTINGS:
     LMDB_ENABLED = _get_env_bool("LMDB_ENABLED", LMDB_SETTINGS.get("enabled", False))
     _lmdb_path_default = LMDB_SETTINGS.get("path", "flowcept_lmdb")
@@ -172,9 +182,17 @@ db_buffer_settings = settings["db_buffer"]
 
 INSERTION_BUFFER_TIME = db_buffer_settings.get("insertion_buffer_time_secs", None)  # In seconds:
 DB_BUFFER_SIZE = int(db_buffer_settings.get("buffer_size", 50))
+DB_BUFFER_CAPACITY = int(db_buffer_settings.get("capacity", 100_000))
+DB_BUFFER_OVERFLOW_POLICY = db_buffer_settings.get("overflow_policy", "block")
+DB_BUFFER_SPILL_DIR = db_buffer_settings.get("spill_dir", None)
+DB_BUFFER_FLUSH_WORKERS = int(db_buffer_settings.get("flush_workers", 1))
+DB_BUFFER_MAX_IN_FLIGHT = db_buffer_settings.get("max_in_flight", None)
 REMOVE_EMPTY_FIELDS = db_buffer_settings.get("remove_empty_fields", False)
 DB_INSERTER_MAX_TRIALS_STOP = db_buffer_settings.get("stop_max_trials", 240)
 DB_INSERTER_SLEEP_TRIALS_STOP = db_buffer_settings.get("stop_trials_sleep", 0.01)
+DB_INSERTER_SHARDS = int(db_buffer_settings.get("inserter_shards", 0))
+DB_INSERTER_SHARD_QUEUE_SIZE = int(db_buffer_settings.get("inserter_shard_queue_size", 64))
+DB_LINEAGE_INDEX = db_buffer_settings.get("lineage_index", True)
 
 
 ###########################
@@ -186,6 +204,15 @@ PERF_LOG = settings["project"].get("performance_logging", False)
 JSON_SERIALIZER = settings["project"].get("json_serializer", "default")
 REPLACE_NON_JSON_SERIALIZABLE = settings["project"].get("replace_non_json_serializable", True)
 ENRICH_MESSAGES = settings["project"].get("enrich_messages", True)
+_payload_budget_settings = settings["project"].get("payload_budget", None) or {}
+PAYLOAD_BUDGET_ENABLED = _payload_budget_settings.get("enabled", False)
+PAYLOAD_MAX_FIELD_BYTES = int(_payload_budget_settings.get("max_field_bytes", 1_048_576))
+PAYLOAD_MAX_ITEMS = int(_payload_budget_settings.get("max_items", 10_000))
+PAYLOAD_OFFLOAD = _payload_budget_settings.get("offload", False)
+_native_arrays_settings = settings["project"].get("native_arrays", None) or {}
+NATIVE_ARRAYS_ENABLED = _native_arrays_settings.get("enabled", False)
+NATIVE_ARRAYS_COMPRESSION = _native_arrays_settings.get("compression", None)
+NATIVE_ARRAYS_COMPRESSION_MIN_BYTES = int(_native_arrays_settings.get("compression_min_bytes", 65_536))
 
 
 # Default: enable dump buffer only when running in offline flush mode.
@@ -205,8 +232,19 @@ APPEND_ID_TO_PATH = settings["project"].get("dump_buffer", {}).get("append_id_to
 DELETE_BUFFER_FILE = settings["project"].get("dump_buffer", {}).get("delete_previous_file", True)
 
 TELEMETRY_CAPTURE = settings.get("telemetry_capture", None)
+_telemetry_sampler_settings = {}
+if TELEMETRY_CAPTURE is not None:
+    # The sampler settings are not a type of telemetry to capture.
+    _telemetry_sampler_settings = TELEMETRY_CAPTURE.get("sampler", None) or {}
+    TELEMETRY_CAPTURE = {k: v for k, v in TELEMETRY_CAPTURE.items() if k != "sampler"}
 TELEMETRY_ENABLED = _get_env_bool("TELEMETRY_ENABLED", True)
 TELEMETRY_ENABLED = TELEMETRY_ENABLED and (TELEMETRY_CAPTURE is not None) and (len(TELEMETRY_CAPTURE) > 0)
+TELEMETRY_SAMPLER_ENABLED = _get_env_bool(
+    "TELEMETRY_SAMPLER_ENABLED", _telemetry_sampler_settings.get("enabled", False)
+)
+TELEMETRY_SAMPLER_INTERVAL = float(_telemetry_sampler_settings.get("interval_secs", 1.0))
+TELEMETRY_SAMPLER_RING_SIZE = int(_telemetry_sampler_settings.get("ring_size", 600))
+TELEMETRY_SAMPLER_SHIP_BATCH_SIZE = int(_telemetry_sampler_settings.get("ship_batch_size", 60))
 
 ######################
 # SYS METADATA #
@@ -269,6 +307,10 @@ WEBSERVER_UI_ENABLED = _webserver_settings.get("ui_enabled", True)
 WEBSERVER_CORS_ORIGINS = _webserver_settings.get("cors_origins", [])
 WEBSERVER_SSE_POLL_INTERVAL = float(_webserver_settings.get("sse_poll_interval_sec", 2.0))
 WEBSERVER_SSE_MAX_BATCH = int(_webserver_settings.get("sse_max_batch", 500))
+WEBSERVER_SSE_SOURCE = _get_env("WEBSERVER_SSE_SOURCE", _webserver_settings.get("sse_source", "auto"))
+WEBSERVER_SSE_CLIENT_QUEUE_SIZE = int(_webserver_settings.get("sse_client_queue_size", 256))
+WEBSERVER_SSE_REPLAY_SIZE = int(_webserver_settings.get("sse_replay_size", 10_000))
+WEBSERVER_SSE_FLUSH_INTERVAL = float(_webserver_settings.get("sse_flush_interval_sec", 0.25))
 WEBSERVER_DASHBOARDS_DIR = os.path.expanduser(
     _webserver_settings.get("dashboards_dir", f"~/.{PROJECT_NAME}/dashboards")
 )
@@ -282,6 +324,22 @@ WEBSERVER_MAX_LABEL_LENGTH = int(
 
 INSTRUMENTATION = settings.get("instrumentation", {})
 INSTRUMENTATION_ENABLED = INSTRUMENTATION.get("enabled", True)
+TASK_SAMPLING = INSTRUMENTATION.get("sampling", None) or {}
+TASK_CAPTURE_MODE = INSTRUMENTATION.get("capture_mode", "full")
+_aggregation_settings = INSTRUMENTATION.get("aggregation", None) or {}
+AGGREGATION_INTERVAL = float(_aggregation_settings.get("interval_secs", 10))
+AGGREGATION_RELATIVE_ACCURACY = float(_aggregation_settings.get("relative_accuracy", 0.01))
+_serialization_settings = INSTRUMENTATION.get("serialization", None) or {}
+SERIALIZER_WORKERS = int(_serialization_settings.get("workers", 0) or 0)
+SERIALIZER_BATCH_SIZE = int(_serialization_settings.get("batch_size", 100))
+SERIALIZER_FLUSH_INTERVAL = float(_serialization_settings.get("flush_interval_secs", 0.5))
+SERIALIZER_CAPACITY = int(_serialization_settings.get("capacity", 100_000) or 0)
+COPY_ON_CAPTURE = _serialization_settings.get("copy_on_capture", "shallow") or "none"
+COPY_MAX_ITEMS = int(_serialization_settings.get("copy_max_items", 1000))
+_streaming_loop_settings = INSTRUMENTATION.get("streaming_loop", None) or {}
+STREAMING_LOOP_BATCH_SIZE = int(_streaming_loop_settings.get("batch_size", 1000))
+STREAMING_LOOP_ITEM_CAPTURE = _streaming_loop_settings.get("item_capture", "repr") or "none"
+STREAMING_LOOP_MAX_REPR_LENGTH = int(_streaming_loop_settings.get("max_repr_length", 256))
 
 AGENT = settings.get("agent", {})
 AGENT_API_KEY = _get_env("AGENT_API_KEY", AGENT.get("api_key", None))
@@ -580,12 +580,61 @@ class DBAPI(object):
             self.logger.exception(e)
             raise e
 
+    def get_lineage(self, workflow_id, task_ids, direction="both", max_depth=None):
+        """
+        Return the tasks upstream and/or downstream of some tasks, from the lineage index.
+
+        A task is upstream of another when the other used a value it generated (see
+        :mod:`flowcept.commons.daos.docdb_dao.lineage_index`). A workflow not indexed yet is
+        indexed on its first lookup.
+
+        Parameters
+        ----------
+        workflow_id : str
+            The workflow of the tasks.
+        task_ids : list of str
+            The tasks to start from.
+        direction : str, optional
+            ``upstream``, ``downstream``, or ``both`` (default).
+        max_depth : int, optional
+            Number of edges to follow; unlimited by default.
+
+        Returns
+        -------
+        list of str
+            The given task IDs followed by the IDs of the tasks reached.
+        """
+        try:
+            return DBAPI._dao().get_lineage(workflow_id, task_ids, direction, max_depth)
+        except Exception as e:
+            self.logger.exception(e)
+            raise e
+
+    def rebuild_lineage_index(self, workflow_id):
+        """
+        Rebuild the lineage index of a workflow from its stored tasks.
+
+        Needed for workflows stored before the index existed or with ``db_buffer.lineage_index``
+        disabled.
+
+        Parameters
+        ----------
+        workflow_id : str
+            The workflow to reindex.
+        """
+        try:
+            return DBAPI._dao().rebuild_lineage_index(workflow_id)
+        except Exception as e:
+            self.logger.exception(e)
+            raise e
+
     def dump_tasks_to_file_recursive(self, workflow_id, output_file="tasks.parquet", max_depth=999, mapping=None):
         """
         Dump tasks recursively for a given workflow ID to a file.
 
         This method retrieves all tasks (parent and children) for the given workflow ID
-        up to a specified recursion depth and saves them to a file in Parquet format.
+        up to a specified recursion depth and saves them to a file in Parquet format, or in
+        JSON, JSONL, or CSV format if ``output_file`` has one of these extensions.
 
         Parameters
         ----------
@@ -635,7 +684,8 @@ class DBAPI(object):
         output_file : str, optional
             Output file path.
         export_format : str, optional
-            Export format supported by backend DAO.
+            ``json`` (default), ``jsonl``, ``csv``, or ``parquet``. Documents are streamed to
+            the file, so the export does not hold the whole collection in memory.
         should_zip : bool, optional
             Whether output should be compressed.
 
@@ -33,6 +33,7 @@ from flowcept.configs import (
     DUMP_BUFFER_PATH,
     APPEND_WORKFLOW_ID_TO_PATH,
     APPEND_ID_TO_PATH,
+    DB_INSERTER_SHARDS,
 )
 from flowcept.flowceptor.adapters.base_interceptor import BaseInterceptor
 
@@ -352,6 +353,8 @@ class Flowcept(object):
         with ``orjson``. If ``return_df`` is True, it returns a pandas DataFrame
         created via ``pandas.json_normalize(..., sep='.')`` so nested fields become
         dot-separated columns (for example, ``generated.attention``).
+        numpy arrays, pandas Series/DataFrames, and torch tensors written by the buffer
+        (see ``project.native_arrays``) are decoded back into their types.
 
         Parameters
         ----------
@@ -406,6 +409,7 @@ class Flowcept(object):
         """
         import os
         import orjson
+        from flowcept.commons.msgpack_ext import decode_json_ext, has_json_ext
 
         if file_path is None:
             file_path = DUMP_BUFFER_PATH
@@ -424,7 +428,11 @@ class Flowcept(object):
         with open(file_path, "rb") as f:
             lines = [ln for ln in f.read().splitlines() if ln]
 
-        buffer: List[Dict[str, Any]] = orjson.loads(b"[" + b",".join(lines) + b"]")
+        raw = b"[" + b",".join(lines) + b"]"
+        buffer: List[Dict[str, Any]] = orjson.loads(raw)
+        encoded_values = has_json_ext(raw)
+        if encoded_values:
+            buffer = decode_json_ext(buffer)
 
         if return_df:
             try:
@@ -433,6 +441,8 @@ class Flowcept(object):
                 raise ModuleNotFoundError("pandas is required when return_df=True. Please install pandas.") from e
             if normalize_df:
                 return pd.json_normalize(buffer, sep=".")
+            elif encoded_values:
+                return pd.DataFrame(buffer)
             else:
                 return pd.read_json(file_path, lines=True)
 
@@ -934,9 +944,9 @@ class Flowcept(object):
         if not LMDB_ENABLED and not MONGO_ENABLED:
             return
 
-        from flowcept.flowceptor.consumers.document_inserter import DocumentInserter
-
-        doc_inserter = DocumentInserter(check_safe_stops=self._check_safe_stops, bundle_exec_id=self.bundle_exec_id)
+        doc_inserter = Flowcept._build_document_inserter(
+            check_safe_stops=self._check_safe_stops, bundle_exec_id=self.bundle_exec_id
+        )
         doc_inserter.start()
         self._db_inserters.append(doc_inserter)
 
@@ -956,6 +966,9 @@ class Flowcept(object):
             self._first_interceptor.intercept(self._current_workflow_obj.to_dict())
 
         if self._interceptors and len(self._interceptor_instances):
+            from flowcept.instrumentation.task_sampling import flush_sampling_summaries
+
+            flush_sampling_summaries()
             for interceptor in self._interceptor_instances:
                 if interceptor is None:
                     continue
@@ -1048,6 +1061,18 @@ class Flowcept(object):
         """Return True when all enabled services are reachable (or none are enabled)."""
         return all(v == "ok" for v in Flowcept.services_status().values())
 
+    @staticmethod
+    def _build_document_inserter(check_safe_stops: bool, bundle_exec_id: str = None):
+        """Return a DocumentInserter, or a ShardedDocumentInserter if ``db_buffer.inserter_shards`` > 0."""
+        if DB_INSERTER_SHARDS > 0:
+            from flowcept.flowceptor.consumers.sharded_document_inserter import ShardedDocumentInserter
+
+            return ShardedDocumentInserter(check_safe_stops=check_safe_stops, bundle_exec_id=bundle_exec_id)
+
+        from flowcept.flowceptor.consumers.document_inserter import DocumentInserter
+
+        return DocumentInserter(check_safe_stops=check_safe_stops, bundle_exec_id=bundle_exec_id)
+
     @staticmethod
     def start_consumption_services(bundle_exec_id: str = None, check_safe_stops: bool = False, consumers: List = None):
         """
@@ -1073,6 +1098,7 @@ class Flowcept(object):
         - The method initializes the `DocumentInserter` service, which processes documents
           based on the provided parameters.
         - The `threaded` parameter for `DocumentInserter.start` is set to `False`.
+        - If ``db_buffer.inserter_shards`` > 0, a `ShardedDocumentInserter` is started instead.
 
         Examples
         --------
@@ -1080,9 +1106,9 @@ class Flowcept(object):
         """
         if consumers is not None:
             raise NotImplementedError("We currently only have one type of consumer.")
-        from flowcept.flowceptor.consumers.document_inserter import DocumentInserter
-
         logger = FlowceptLogger()
-        doc_inserter = DocumentInserter(check_safe_stops=check_safe_stops, bundle_exec_id=bundle_exec_id)
+        doc_inserter = Flowcept._build_document_inserter(
+            check_safe_stops=check_safe_stops, bundle_exec_id=bundle_exec_id
+        )
         logger.debug("Starting doc inserter service.")
         doc_inserter.start(threaded=False)
@@ -13,11 +13,19 @@ from flowcept.configs import (
     ENRICH_MESSAGES,
     TELEMETRY_ENABLED,
     TELEMETRY_CAPTURE,
+    TELEMETRY_SAMPLER_ENABLED,
+    SERIALIZER_WORKERS,
+    SERIALIZER_BATCH_SIZE,
+    SERIALIZER_FLUSH_INTERVAL,
+    SERIALIZER_CAPACITY,
 )
+from flowcept.commons.autoflush_buffer import AutoflushBuffer
 from flowcept.commons.flowcept_logger import FlowceptLogger
 from flowcept.commons.daos.mq_dao.mq_dao_base import MQDao
 from flowcept.commons.flowcept_dataclasses.task_object import TaskObject
+from flowcept.commons.flowcept_dataclasses.task_record import TaskRecord, materialize_messages
 from flowcept.commons.settings_factory import get_settings
+from flowcept.flowceptor.adapters.task_aggregator import TaskAggregator
 
 
 # TODO :base-interceptor-refactor: :ml-refactor: :code-reorg: :usability:
@@ -81,6 +89,10 @@ class BaseInterceptor(object):
             from flowcept.flowceptor.telemetry_capture import TelemetryCapture
 
             self.telemetry_capture = TelemetryCapture()
+            if TELEMETRY_SAMPLER_ENABLED:
+                from flowcept.flowceptor.telemetry_sampler import TelemetrySampler
+
+                self.telemetry_capture = TelemetrySampler(self, self.telemetry_capture)
         else:
             self.telemetry_capture = None
 
@@ -88,6 +100,8 @@ class BaseInterceptor(object):
         self._saved_agents = set()
         self._generated_workflow_id = False
         self.kind = kind
+        self.task_aggregator = TaskAggregator(self)
+        self._serializer: AutoflushBuffer = None
 
     def prepare_task_msg(self, *args, **kwargs) -> TaskObject:
         """Prepare a task."""
@@ -98,11 +112,29 @@ class BaseInterceptor(object):
         if not self.started:
             self._bundle_exec_id = bundle_exec_id
             self._mq_dao.init_buffer(self._interceptor_instance_id, bundle_exec_id, check_safe_stops)
+            if SERIALIZER_WORKERS and isinstance(self._mq_dao.buffer, AutoflushBuffer):
+                self._serializer = AutoflushBuffer(
+                    flush_function=self._serialize_records,
+                    max_size=SERIALIZER_BATCH_SIZE,
+                    flush_interval=SERIALIZER_FLUSH_INTERVAL,
+                    capacity=SERIALIZER_CAPACITY,
+                    flush_workers=SERIALIZER_WORKERS,
+                )
             self.started = True
+            if TELEMETRY_SAMPLER_ENABLED and self.telemetry_capture is not None:
+                self.telemetry_capture.start()
         return self
 
     def stop(self, check_safe_stops: bool = True):
         """Stop an interceptor."""
+        if self.started:
+            self.task_aggregator.flush()
+            if TELEMETRY_SAMPLER_ENABLED and self.telemetry_capture is not None:
+                self.telemetry_capture.stop()
+        if self._serializer is not None:
+            # Serialize the pending records before the MQ buffer is flushed for the last time.
+            self._serializer.stop()
+            self._serializer = None
         self._mq_dao.stop(
             interceptor_instance_id=self._interceptor_instance_id,
             check_safe_stops=check_safe_stops,
@@ -181,6 +213,25 @@ class BaseInterceptor(object):
         """Intercept a list of messages."""
         self._mq_dao.buffer.extend(obj_messages)
 
+    def intercept_record(self, record: TaskRecord):
+        """
+        Intercept a task record whose message is built off the caller's thread.
+
+        With ``instrumentation.serialization.workers`` > 0, the background serializer threads
+        build the message and put it in the MQ buffer. Otherwise, the record goes into the
+        MQ buffer and is converted in its flush thread. An offline (list) buffer gets the
+        message right away.
+        """
+        if self._serializer is not None:
+            self._serializer.append(record)
+        elif isinstance(self._mq_dao.buffer, list):
+            self._mq_dao.buffer.append(record.to_dict())
+        else:
+            self._mq_dao.buffer.append(record)
+
+    def _serialize_records(self, records: List[TaskRecord]):
+        self._mq_dao.buffer.extend(materialize_messages(records))
+
     def set_buffer(self, buffer):
         """Redefine the interceptor's buffer. Use it very carefully."""
         self._mq_dao.buffer = buffer
@@ -0,0 +1,212 @@
+"""Streaming per-activity task aggregation module."""
+
+import math
+from numbers import Number
+from threading import Lock
+from time import time
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from flowcept.commons.flowcept_logger import FlowceptLogger
+from flowcept.commons.vocabulary import Status
+from flowcept.configs import AGGREGATION_INTERVAL, AGGREGATION_RELATIVE_ACCURACY, HOSTNAME
+
+ACTIVITY_AGGREGATE_SUBTYPE = "activity_aggregate"
+CAPTURE_MODE_FULL = "full"
+CAPTURE_MODE_AGGREGATE = "aggregate"
+
+
+class DurationSketch:
+    """
+    Log-bucketed histogram of positive values with bounded relative error on quantiles.
+
+    A value ``v`` falls in bucket ``ceil(log(v) / log(gamma))`` with
+    ``gamma = (1 + accuracy) / (1 - accuracy)``, so any quantile is returned within
+    ``accuracy`` (relative) of the true value, using one counter per occupied bucket.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value: float):
+        """Add a value."""
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def _bucket_value(self, key: int) -> float:
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return an estimate of the ``q`` quantile (0 <= q <= 1)."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return self._bucket_value(key)
+        return self._bucket_value(max(self.buckets))
+
+    def histogram(self) -> List[List]:
+        """Return ``[upper_bound, count]`` pairs of the occupied buckets, in increasing order."""
+        hist = [[0.0, self.zeros]] if self.zeros else []
+        hist.extend([self.gamma**key, self.buckets[key]] for key in sorted(self.buckets))
+        return hist
+
+
+class _ActivityAggregate:
+    __slots__ = ("started_at", "count", "errors", "total", "min", "max", "sketch", "fields")
+
+    def __init__(self, started_at: float, relative_accuracy: float):
+        self.started_at = started_at
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.sketch = DurationSketch(relative_accuracy)
+        self.fields: Dict[str, List] = {}  # name -> [count, sum, min, max]
+
+    def add(self, duration: float, failed: bool, generated: Optional[Dict]):
+        self.count += 1
+        if failed:
+            self.errors += 1
+        self.total += duration
+        if duration < self.min:
+            self.min = duration
+        if duration > self.max:
+            self.max = duration
+        self.sketch.add(duration)
+        if generated:
+            for name, value in generated.items():
+                if isinstance(value, bool) or not isinstance(value, Number):
+                    continue
+                stats = self.fields.get(name)
+                if stats is None:
+                    self.fields[name] = [1, value, value, value]
+                else:
+                    stats[0] += 1
+                    stats[1] += value
+                    if value < stats[2]:
+                        stats[2] = value
+                    if value > stats[3]:
+                        stats[3] = value
+
+    def summary(self) -> Dict:
+        sketch = self.sketch
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "duration": {
+                "total": self.total,
+                "min": self.min,
+                "max": self.max,
+                "mean": self.total / self.count,
+                "p50": sketch.quantile(0.5),
+                "p90": sketch.quantile(0.9),
+                "p99": sketch.quantile(0.99),
+                "histogram": sketch.histogram(),
+            },
+            "fields": {
+                name: {"count": n, "min": lo, "max": hi, "mean": total / n}
+                for name, (n, total, lo, hi) in self.fields.items()
+            },
+        }
+
+
+class TaskAggregator:
+    """
+    Per-activity streaming aggregates kept by an interceptor for the ``aggregate`` capture mode.
+
+    Instead of one message per call, each call only updates the aggregate of its
+    ``(workflow_id, activity_id)``: call and error counts, total/min/max/mean duration, a
+    duration sketch (p50/p90/p99 and histogram), and count/min/max/mean of the numeric
+    ``generated`` values. Every ``interval`` seconds, and when the interceptor stops, one
+    task message per activity is sent with ``subtype="activity_aggregate"`` and the
+    aggregates in ``generated``.
+    """
+
+    def __init__(self, interceptor, interval: float = None, relative_accuracy: float = None):
+        self._interceptor = interceptor
+        self._interval = AGGREGATION_INTERVAL if interval is None else interval
+        self._relative_accuracy = relative_accuracy or AGGREGATION_RELATIVE_ACCURACY
+        self._lock = Lock()
+        self._aggregates: Dict[Tuple[str, str], _ActivityAggregate] = {}
+        self._deadline = time() + self._interval if self._interval else float("inf")
+
+    def add(
+        self,
+        activity_id: str,
+        duration: float,
+        failed: bool = False,
+        generated: Optional[Dict] = None,
+        workflow_id: str = None,
+    ):
+        """
+        Account for one call of an activity.
+
+        Parameters
+        ----------
+        activity_id : str
+            Activity of the call.
+        duration : float
+            Duration of the call in seconds.
+        failed : bool, optional
+            Whether the call raised or ended with an error.
+        generated : dict, optional
+            Outputs of the call; only numeric values are aggregated.
+        workflow_id : str, optional
+            Workflow the call belongs to.
+        """
+        key = (workflow_id, activity_id)
+        with self._lock:
+            aggregate = self._aggregates.get(key)
+            if aggregate is None:
+                aggregate = self._aggregates[key] = _ActivityAggregate(time(), self._relative_accuracy)
+            aggregate.add(duration, failed, generated)
+        if time() >= self._deadline:
+            self.flush()
+
+    def flush(self):
+        """Send one summary message per activity aggregated since the last flush."""
+        now = time()
+        with self._lock:
+            aggregates, self._aggregates = self._aggregates, {}
+            self._deadline = now + self._interval if self._interval else float("inf")
+        if not aggregates:
+            return
+        interceptor = self._interceptor
+        if not interceptor.started:
+            FlowceptLogger().warning(f"Dropping {len(aggregates)} activity aggregates: the interceptor is not started.")
+            return
+        from flowcept.flowcept_api.flowcept_controller import Flowcept
+
+        interceptor.intercept_many(
+            [
+                {
+                    "type": "task",
+                    "subtype": ACTIVITY_AGGREGATE_SUBTYPE,
+                    "task_id": str(uuid4()),
+                    "activity_id": activity_id,
+                    "workflow_id": workflow_id,
+                    "campaign_id": Flowcept.campaign_id,
+                    "started_at": aggregate.started_at,
+                    "ended_at": now,
+                    "status": Status.FINISHED.value,
+                    "hostname": HOSTNAME,
+                    "generated": aggregate.summary(),
+                }
+                for (workflow_id, activity_id), aggregate in aggregates.items()
+            ]
+        )
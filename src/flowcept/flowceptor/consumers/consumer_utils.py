@@ -10,52 +10,84 @@ from flowcept.commons.vocabulary import Status
 
 UTC_TZ = ZoneInfo("UTC")
 
+# Field tables are built once instead of on every message.
+_DICT_FIELDS = tuple(TaskObject.get_dict_field_names())
+_DICT_FIELD_SET = frozenset(_DICT_FIELDS)
+_TIME_FIELDS = tuple(TaskObject.get_time_field_names())
+_FINISHED = Status.FINISHED.value
 
-def curate_task_msg(task_msg_dict: dict, convert_times=True, keys_to_drop: List = None):
-    """Curate a task message."""
+
+def _as_dict_field(field_val) -> dict:
+    """Turn a non-dict ``used``/``generated``-like value into ``{"arg0": ..., "arg1": ...}``."""
+    if type(field_val) in (list, tuple):
+        return {f"arg{i}": arg for i, arg in enumerate(field_val)}
+    return {"arg0": field_val}  # Scalar value
+
+
+def _needs_key_conversion(obj) -> bool:
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            if type(k) is not str or (isinstance(v, (dict, list)) and _needs_key_conversion(v)):
+                return True
+    elif isinstance(obj, list):
+        for v in obj:
+            if isinstance(v, (dict, list)) and _needs_key_conversion(v):
+                return True
+    return False
+
+
+def _curate_dict_value(field_val: dict) -> dict:
+    """Drop inner empty dicts and stringify keys, returning ``field_val`` itself if nothing changes."""
+    for k, v in field_val.items():
+        if (
+            type(k) is not str
+            or (type(v) is dict and not v)
+            or (isinstance(v, (dict, list)) and _needs_key_conversion(v))
+        ):
+            break
+    else:
+        return field_val
+    return {str(k): convert_keys_to_strings(v) for k, v in field_val.items() if not (type(v) is dict and not v)}
+
+
+def curate_task_msg(task_msg_dict: dict, convert_times=True, keys_to_drop: List = None, registered_at=None):
+    """Curate a task message in place.
+
+    ``registered_at`` is used for messages without one; it defaults to the current time.
+    """
     # Converting any arg to kwarg in the form {"arg1": val1, "arg2: val2}
-    for field in TaskObject.get_dict_field_names():
+    for field in _DICT_FIELDS:
         if field not in task_msg_dict:
             continue
         field_val = task_msg_dict[field]
-        if type(field_val) is dict and not field_val:
-            task_msg_dict.pop(field)  # removing empty fields
-            continue
-
         if type(field_val) is dict:
-            original_field_val = field_val.copy()
-            for k in original_field_val:
-                if type(original_field_val[k]) is dict and not original_field_val[k]:
-                    field_val.pop(k)  # removing inner empty fields
-            field_val = convert_keys_to_strings(field_val)
-            task_msg_dict[field] = field_val
+            if not field_val:
+                task_msg_dict.pop(field)  # removing empty fields
+            else:
+                task_msg_dict[field] = _curate_dict_value(field_val)
         else:
-            field_val_dict = {}
-            if type(field_val) in [list, tuple]:
-                i = 0
-                for arg in field_val:
-                    field_val_dict[f"arg{i}"] = arg
-                    i += 1
-            else:  # Scalar value
-                field_val_dict["arg0"] = field_val
-            task_msg_dict[field] = field_val_dict
+            task_msg_dict[field] = _as_dict_field(field_val)
 
     # Moving 'workflow_id' to the right place if it's in the 'used' field.
     # This happens because of the @lightweight_flowcept_task
-    if "used" in task_msg_dict and task_msg_dict["used"].get("workflow_id", None):
-        task_msg_dict["workflow_id"] = task_msg_dict["used"].pop("workflow_id")
+    used = task_msg_dict.get("used")
+    if used and used.get("workflow_id", None):
+        used = dict(used)  # The used dict may still be the caller's.
+        task_msg_dict["workflow_id"] = used.pop("workflow_id")
+        task_msg_dict["used"] = used
 
     if keys_to_drop is not None:
         for k in keys_to_drop:
             task_msg_dict.pop(k, None)
 
     if convert_times:
-        for time_field in TaskObject.get_time_field_names():
+        fromtimestamp = datetime.fromtimestamp
+        for time_field in _TIME_FIELDS:
             if time_field in task_msg_dict:
-                task_msg_dict[time_field] = datetime.fromtimestamp(task_msg_dict[time_field], UTC_TZ)
+                task_msg_dict[time_field] = fromtimestamp(task_msg_dict[time_field], UTC_TZ)
 
         if "registered_at" not in task_msg_dict:
-            task_msg_dict["registered_at"] = datetime.fromtimestamp(time(), UTC_TZ)
+            task_msg_dict["registered_at"] = registered_at or datetime.fromtimestamp(time(), UTC_TZ)
 
 
 def remove_empty_fields_from_dict(obj: dict):
@@ -121,11 +153,17 @@ def curate_dict_task_messages(
     It also resolves updates (instead of replacement) of inner nested fields
     in a JSON object.
 
+    Docs are shallow-copied once, nested dicts are only copied when they need changes or
+    when a second message of the same task is merged into them, and ``registered_at`` is
+    computed once per batch.
+
     :param doc_list:
     :param indexing_key: #the key we want to index. E.g., task_id in tasks collection
     :return:
     """
+    registered_at = datetime.fromtimestamp(time(), UTC_TZ) if convert_times else None
     indexed_buffer = {}
+    merged_keys = set()
     for doc_ref in doc_list:
         if (len(doc_ref) == 1) and (indexing_key in doc_ref) and (doc_ref[indexing_key] in indexed_buffer):
             # This task_msg does not add any metadata
@@ -133,31 +171,71 @@ def curate_dict_task_messages(
         doc = doc_ref.copy()
         # Reformatting the task msg so to append statuses, as updating them was
         # causing inconsistencies in the DB.
-        if "status" in doc:
-            doc[doc["status"].lower()] = True
-            # doc.pop("status")
-            if "finished" in doc and doc["finished"]:
-                doc["status"] = Status.FINISHED.value
+        status = doc.get("status")
+        if status is not None:
+            doc[status.lower()] = True
+            if doc.get("finished"):
+                doc["status"] = _FINISHED
 
         if utc_time_at_insertion > 0:
             doc["utc_time_at_insertion"] = utc_time_at_insertion
 
-        curate_task_msg(doc, convert_times, keys_to_drop)
+        curate_task_msg(doc, convert_times, keys_to_drop, registered_at)
         indexing_key_value = doc[indexing_key]
 
-        if indexing_key_value not in indexed_buffer:
+        stored = indexed_buffer.get(indexing_key_value)
+        if stored is None:
             indexed_buffer[indexing_key_value] = doc
             continue
 
-        for field in TaskObject.get_dict_field_names():
-            if field in doc:
-                if doc[field] is not None and len(doc[field]):
-                    doc[field] = convert_keys_to_strings(doc[field])
-                    if field in indexed_buffer[indexing_key_value]:
-                        indexed_buffer[indexing_key_value][field].update(doc[field])
-                    else:
-                        indexed_buffer[indexing_key_value][field] = doc[field]
-                doc.pop(field)
-
-        indexed_buffer[indexing_key_value].update(**doc)
+        if indexing_key_value not in merged_keys:
+            # The stored nested dicts may still be the caller's; copy them before updating.
+            merged_keys.add(indexing_key_value)
+            for field in _DICT_FIELDS:
+                if field in stored:
+                    stored[field] = dict(stored[field])
+        for field in _DICT_FIELDS:
+            field_val = doc.pop(field, None)
+            if field_val:
+                if _needs_key_conversion(field_val):
+                    field_val = convert_keys_to_strings(field_val)
+                if field in stored:
+                    stored[field].update(field_val)
+                else:
+                    stored[field] = dict(field_val)
+
+        stored.update(doc)
     return indexed_buffer
+
+
+def _deep_merge(stored: Dict, update: Dict) -> Dict:
+    """Merge ``update`` into a copy of ``stored``, recursing into nested dicts."""
+    merged = dict(stored)
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def merge_task_docs(stored: Dict, update: Dict) -> Dict:
+    """Merge a curated task update into a previously stored task document.
+
+    This mirrors what the pipeline ``$set`` gives MongoDB in
+    ``MongoDBDAO.insert_and_update_many_tasks``: nested dicts (e.g., ``used``,
+    ``telemetry_at_start``) are merged key by key and other values are replaced.
+    Finished statuses take precedence, so a late "RUNNING" message arriving in a
+    later flush never downgrades a task that is already finished.
+
+    :param stored: the task document currently in the database
+    :param update: the curated task document produced by ``curate_dict_task_messages``
+    :return: the merged document
+    """
+    merged = _deep_merge(stored, update)
+    finished_statuses = [s.value for s in Status.get_finished_statuses()]
+    if merged.get("finished"):
+        merged["status"] = Status.FINISHED.value
+    elif stored.get("status") in finished_statuses and update.get("status") not in finished_statuses:
+        merged["status"] = stored["status"]
+    return merged
@@ -14,17 +14,25 @@ from flowcept.commons.flowcept_dataclasses.workflow_object import (
 )
 from flowcept.commons.flowcept_dataclasses.agent_object import AgentObject
 from flowcept.commons.flowcept_logger import FlowceptLogger
+from flowcept.commons.msgpack_ext import decode_ext_storable
 from flowcept.commons.utils import GenericJSONDecoder
 from flowcept.commons.vocabulary import Status
 from flowcept.configs import (
     INSERTION_BUFFER_TIME,
     DB_BUFFER_SIZE,
+    DB_BUFFER_CAPACITY,
+    DB_BUFFER_OVERFLOW_POLICY,
+    DB_BUFFER_SPILL_DIR,
+    DB_BUFFER_FLUSH_WORKERS,
+    DB_BUFFER_MAX_IN_FLIGHT,
     DB_INSERTER_MAX_TRIALS_STOP,
     DB_INSERTER_SLEEP_TRIALS_STOP,
+    DB_LINEAGE_INDEX,
     REMOVE_EMPTY_FIELDS,
     JSON_SERIALIZER,
     ENRICH_MESSAGES,
     MONGO_ENABLED,
+    MQ_CONSUMER_GROUP,
     LMDB_ENABLED,
 )
 from flowcept.flowceptor.consumers.consumer_utils import (
@@ -80,6 +88,10 @@ class DocumentInserter(BaseConsumer):
             return
 
         super().__init__()
+        # Inserters share one consumer group, so several of them can split the MQ load.
+        self._mq_dao.consumer_group = MQ_CONSUMER_GROUP
+        # Arrays, Series, DataFrames, and tensors are decoded straight into storable values.
+        self._mq_dao.ext_hook = decode_ext_storable
         self._previous_time = time()
         self._main_thread: Thread = None
         self._curr_db_buffer_size = DB_BUFFER_SIZE
@@ -90,6 +102,12 @@ class DocumentInserter(BaseConsumer):
             flush_function_kwargs={"logger": self.logger, "doc_daos": self._doc_daos},
             max_size=self._curr_db_buffer_size,
             flush_interval=INSERTION_BUFFER_TIME,
+            capacity=DB_BUFFER_CAPACITY,
+            overflow_policy=DB_BUFFER_OVERFLOW_POLICY,
+            spill_dir=DB_BUFFER_SPILL_DIR,
+            flush_workers=DB_BUFFER_FLUSH_WORKERS,
+            max_in_flight=DB_BUFFER_MAX_IN_FLIGHT,
+            ordering_key=TaskObject.task_id_field(),
         )
 
     @staticmethod
@@ -102,7 +120,8 @@ class DocumentInserter(BaseConsumer):
         buffer : list
             List of messages to be flushed to the databases.
         doc_daos : list
-            List of DAO instances to insert data into (e.g., MongoDBDAO, LMDBDAO).
+            List of DAO instances to insert data into (e.g., MongoDBDAO, LMDBDAO). Their lineage
+            index is updated with the flushed messages unless ``db_buffer.lineage_index`` is false.
         logger : FlowceptLogger
             Logger instance for debug and info logging.
         """
@@ -113,6 +132,12 @@ class DocumentInserter(BaseConsumer):
                 f"DocDao={id(dao)},DocDaoClass={dao.__class__.__name__};\
                 Flushed {len(buffer)} msgs to this DocDB!"
             )  # TODO: add name
+            if DB_LINEAGE_INDEX:
+                try:
+                    dao.update_lineage_index(buffer)
+                except Exception as e:
+                    # The tasks are stored; a gap in the index is fixed with rebuild_lineage_index.
+                    logger.error(f"Could not update the lineage index: {e}")
 
     def _handle_task_message(self, message: Dict):
         if "workflow_id" not in message and len(message.get("used", {})):
@@ -0,0 +1,186 @@
+"""Sharded Document Inserter module."""
+
+import multiprocessing as mp
+from itertools import count
+from queue import Full
+from typing import Dict, List
+
+from flowcept.commons.autoflush_buffer import AutoflushBuffer
+from flowcept.commons.flowcept_dataclasses.task_object import TaskObject
+from flowcept.commons.flowcept_logger import FlowceptLogger
+from flowcept.commons.msgpack_ext import decode_ext_storable
+from flowcept.configs import (
+    DB_BUFFER_CAPACITY,
+    DB_BUFFER_SIZE,
+    DB_INSERTER_SHARD_QUEUE_SIZE,
+    DB_INSERTER_SHARDS,
+    INSERTION_BUFFER_TIME,
+    LMDB_ENABLED,
+    MONGO_ENABLED,
+    MQ_CONSUMER_GROUP,
+)
+from flowcept.flowceptor.consumers.base_consumer import BaseConsumer
+from flowcept.flowceptor.consumers.document_inserter import DocumentInserter
+
+
+def _shard_worker(shard: int, queue, bundle_exec_id: str):
+    """Run one shard: handle the routed messages with a local DocumentInserter until a None arrives."""
+    logger = FlowceptLogger()
+    inserter = DocumentInserter(check_safe_stops=False, bundle_exec_id=bundle_exec_id)
+    logger.debug(f"Doc inserter shard {shard} started.")
+    while True:
+        batch = queue.get()
+        if batch is None:
+            break
+        for msg_obj in batch:
+            try:
+                inserter.message_handler(msg_obj)
+            except Exception as e:
+                logger.error(f"Doc inserter shard {shard} failed to handle a message.")
+                logger.exception(e)
+    inserter.buffer.stop()
+    for dao in inserter._doc_daos:
+        dao.close()
+    logger.debug(f"Doc inserter shard {shard} stopped.")
+
+
+class ShardedDocumentInserter(DocumentInserter):
+    """
+    DocumentInserter that spreads the message handling over a pool of worker processes.
+
+    The router (this object) subscribes to the MQ, handles the control messages, and sends
+    every other message to the shard ``hash(task_id) % shards``; workflows and agents are
+    routed by their own IDs. Each shard is a process running a regular ``DocumentInserter``
+    with its own ``AutoflushBuffer`` and database connections, so enrichment, curation, and
+    inserts run on as many cores as there are shards. All messages of a task reach the same
+    shard, in order, so start and end messages are still merged by the same buffer.
+
+    The safe-stop coordination is unchanged: the router registers the interceptors' stop
+    and flush signals in the KV sets, and ``stop`` waits on them before stopping the router,
+    which then flushes its routing buffer and waits for every shard to drain.
+
+    Parameters
+    ----------
+    check_safe_stops : bool, optional
+        Whether ``stop`` waits for the interceptors' safe-stop signals.
+    bundle_exec_id : str, optional
+        Execution bundle ID used to match the stop message.
+    shards : int, optional
+        Number of worker processes. Defaults to ``db_buffer.inserter_shards``.
+    """
+
+    def __init__(self, check_safe_stops=True, bundle_exec_id=None, shards: int = None):
+        self._doc_daos = []
+        self.logger = FlowceptLogger()
+        self._should_start = MONGO_ENABLED or LMDB_ENABLED
+        if not self._should_start:
+            return
+
+        BaseConsumer.__init__(self)
+        self._mq_dao.consumer_group = MQ_CONSUMER_GROUP
+        # As in DocumentInserter: the shards receive storable values, not arrays or tensors.
+        self._mq_dao.ext_hook = decode_ext_storable
+        self._bundle_exec_id = bundle_exec_id
+        self.check_safe_stops = check_safe_stops
+        self._n_shards = max(1, shards or DB_INSERTER_SHARDS)
+        self._round_robin = count()
+        # The spawn context keeps the parent's threads and DB clients out of the shards.
+        self._mp_context = mp.get_context("spawn")
+        self._queues: List = []
+        self._processes: List = []
+        self.buffer: AutoflushBuffer = AutoflushBuffer(
+            flush_function=self._route,
+            max_size=DB_BUFFER_SIZE,
+            flush_interval=INSERTION_BUFFER_TIME,
+            capacity=DB_BUFFER_CAPACITY,
+        )
+
+    def _start_shard(self, shard: int):
+        process = self._mp_context.Process(
+            target=_shard_worker,
+            args=(shard, self._queues[shard], self._bundle_exec_id),
+            name=f"flowcept-doc-inserter-shard-{shard}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[shard] = process
+
+    def _shard_of(self, message: Dict) -> int:
+        msg_type = message.get("type")
+        if msg_type == "workflow":
+            key = message.get("workflow_id")
+        elif msg_type == "agent":
+            key = message.get("agent_id")
+        else:
+            key = message.get(TaskObject.task_id_field()) or message.get("group_id")
+        if key is None:
+            return next(self._round_robin) % self._n_shards
+        return hash(key) % self._n_shards
+
+    def _route(self, batch: List[Dict]):
+        """Split a batch by shard and hand each part to its shard's queue."""
+        parts = [[] for _ in range(self._n_shards)]
+        for message in batch:
+            parts[self._shard_of(message)].append(message)
+        for shard, part in enumerate(parts):
+            if part:
+                self._put(shard, part)
+
+    def _put(self, shard: int, item):
+        while True:
+            try:
+                self._queues[shard].put(item, timeout=1)
+                return
+            except Full:
+                if not self._processes[shard].is_alive():
+                    self.logger.critical(
+                        f"Doc inserter shard {shard} died (exit code {self._processes[shard].exitcode}). "
+                        f"Restarting it; the messages it had buffered are lost."
+                    )
+                    self._start_shard(shard)
+
+    def message_handler(self, msg_obj: Dict):
+        """Handle control messages here and route everything else to the shards."""
+        if msg_obj.get("type") == "flowcept_control":
+            return self._handle_control_message(msg_obj) != "stop"
+        self.buffer.append(msg_obj)
+        return True
+
+    def start(self, target=None, args=(), threaded: bool = True, daemon=True):
+        """
+        Start the shard processes and the router.
+
+        Parameters
+        ----------
+        target : Callable, optional
+            Ignored; the router always runs ``self.thread_target``.
+        args : tuple, optional
+            Ignored.
+        threaded : bool, optional
+            Whether to run the router in a separate thread. Defaults to True.
+        daemon : bool, optional
+            Whether the router thread should be a daemon. Defaults to True.
+
+        Returns
+        -------
+        ShardedDocumentInserter
+            The current instance.
+        """
+        if not self._should_start:
+            self.logger.info("Doc Inserter cannot start as all DocDBs are disabled.")
+            return self
+        self._queues = [self._mp_context.Queue(maxsize=DB_INSERTER_SHARD_QUEUE_SIZE) for _ in range(self._n_shards)]
+        self._processes = [None] * self._n_shards
+        for shard in range(self._n_shards):
+            self._start_shard(shard)
+        self.logger.info(f"Started {self._n_shards} doc inserter shards.")
+        return super().start(threaded=threaded, daemon=daemon)
+
+    def thread_target(self):
+        """Route messages until stopped, then drain and stop the shards."""
+        super().thread_target()
+        for shard in range(self._n_shards):
+            self._put(shard, None)
+        for process in self._processes:
+            process.join()
+        self.logger.info("All doc inserter shards are stopped.")
@@ -0,0 +1,170 @@
+"""Background telemetry sampling module."""
+
+import os
+from bisect import bisect_left
+from collections import deque
+from itertools import count
+from threading import Event, Lock, Thread
+from time import time
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from flowcept.commons.flowcept_logger import FlowceptLogger
+from flowcept.commons.vocabulary import Status
+from flowcept.configs import (
+    HOSTNAME,
+    TELEMETRY_SAMPLER_INTERVAL,
+    TELEMETRY_SAMPLER_RING_SIZE,
+    TELEMETRY_SAMPLER_SHIP_BATCH_SIZE,
+)
+
+TELEMETRY_SNAPSHOT_SUBTYPE = "telemetry_snapshot"
+TELEMETRY_SAMPLER_ACTIVITY = "telemetry_sampler"
+
+
+class TelemetrySnapshotRef:
+    """Reference to a sampled telemetry snapshot, kept by tasks instead of a telemetry capture."""
+
+    __slots__ = ("snapshot_id", "sampled_at")
+
+    def __init__(self, snapshot_id: str, sampled_at: float):
+        self.snapshot_id = snapshot_id
+        self.sampled_at = sampled_at
+
+    def to_dict(self) -> Dict:
+        """Return the reference as stored in ``telemetry_at_start``/``telemetry_at_end``."""
+        return {"snapshot_id": self.snapshot_id, "sampled_at": self.sampled_at}
+
+
+class TelemetrySampler:
+    """
+    Telemetry captured by a background thread at a fixed rate, shared by all the tasks.
+
+    The sampler replaces the interceptor's :class:`TelemetryCapture` on the hot path:
+    :meth:`capture` returns a :class:`TelemetrySnapshotRef` to the latest snapshot, with no
+    psutil call. The thread captures a snapshot every ``interval`` seconds and keeps the last
+    ``ring_size`` snapshots in a ring buffer (see :meth:`nearest`). Snapshots are shipped
+    ``ship_batch_size`` at a time, and when the sampler stops, as a time series of task
+    messages with ``subtype="telemetry_snapshot"``, their ID as ``task_id`` and the telemetry
+    in ``telemetry_at_end``; tasks are joined to them through ``telemetry_at_*.snapshot_id``.
+    """
+
+    def __init__(
+        self,
+        interceptor,
+        telemetry_capture,
+        interval: float = TELEMETRY_SAMPLER_INTERVAL,
+        ring_size: int = TELEMETRY_SAMPLER_RING_SIZE,
+        ship_batch_size: int = TELEMETRY_SAMPLER_SHIP_BATCH_SIZE,
+    ):
+        self._interceptor = interceptor
+        self.telemetry_capture = telemetry_capture
+        self.interval = interval
+        self.ship_batch_size = max(1, ship_batch_size)
+        self.logger = FlowceptLogger()
+        self._ring = deque(maxlen=max(1, ring_size))  # (sampled_at, snapshot_id, telemetry dict)
+        self._unshipped: List = []
+        self._latest: Optional[TelemetrySnapshotRef] = None
+        self._id_prefix = f"{uuid4().hex[:12]}-{os.getpid()}"
+        self._counter = count()
+        self._lock = Lock()
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> "TelemetrySampler":
+        """Take a first snapshot and start the sampling thread."""
+        if self._thread is None:
+            self._stop_event.clear()
+            self.sample()
+            self._thread = Thread(target=self._run, name="flowcept-telemetry-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the sampling thread, take a last snapshot, and ship the unshipped ones."""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+            self.sample()
+        self.ship()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                self.logger.exception(e)
+
+    def sample(self) -> TelemetrySnapshotRef:
+        """Capture a snapshot now, add it to the ring buffer, and return its reference."""
+        telemetry = self.telemetry_capture.capture()
+        sampled_at = time()
+        ref = TelemetrySnapshotRef(f"{self._id_prefix}-{next(self._counter)}", sampled_at)
+        snapshot = (sampled_at, ref.snapshot_id, telemetry.to_dict() if telemetry is not None else {})
+        with self._lock:
+            self._ring.append(snapshot)
+            self._unshipped.append(snapshot)
+            self._latest = ref
+            ship = len(self._unshipped) >= self.ship_batch_size
+        if ship:
+            self.ship()
+        return ref
+
+    def capture(self) -> TelemetrySnapshotRef:
+        """Return the reference to the latest snapshot; it is only captured now if there is none yet."""
+        return self._latest or self.sample()
+
+    def capture_machine_info(self):
+        """Capture the machine information, as :meth:`TelemetryCapture.capture_machine_info`."""
+        return self.telemetry_capture.capture_machine_info()
+
+    def nearest(self, t: float) -> Optional[Dict]:
+        """
+        Return the snapshot of the ring buffer sampled closest to the time ``t``.
+
+        Returns
+        -------
+        dict or None
+            ``snapshot_id``, ``sampled_at`` and ``telemetry`` of the snapshot, or None if the
+            ring buffer is empty.
+        """
+        with self._lock:
+            ring = list(self._ring)
+        if not ring:
+            return None
+        i = bisect_left(ring, (t,))
+        candidates = ring[max(0, i - 1) : i + 1]
+        sampled_at, snapshot_id, telemetry = min(candidates, key=lambda s: abs(s[0] - t))
+        return {"snapshot_id": snapshot_id, "sampled_at": sampled_at, "telemetry": telemetry}
+
+    def ship(self):
+        """Send the snapshots taken since the last shipment as ``telemetry_snapshot`` task messages."""
+        with self._lock:
+            snapshots, self._unshipped = self._unshipped, []
+        if not snapshots:
+            return
+        interceptor = self._interceptor
+        if not interceptor.started:
+            self.logger.warning(f"Dropping {len(snapshots)} telemetry snapshots: the interceptor is not started.")
+            return
+        from flowcept.flowcept_api.flowcept_controller import Flowcept
+
+        interceptor.intercept_many(
+            [
+                {
+                    "type": "task",
+                    "subtype": TELEMETRY_SNAPSHOT_SUBTYPE,
+                    "task_id": snapshot_id,
+                    "activity_id": TELEMETRY_SAMPLER_ACTIVITY,
+                    "workflow_id": Flowcept.current_workflow_id,
+                    "campaign_id": Flowcept.campaign_id,
+                    "started_at": sampled_at,
+                    "ended_at": sampled_at,
+                    "status": Status.FINISHED.value,
+                    "hostname": HOSTNAME,
+                    "telemetry_at_end": telemetry,
+                }
+                for sampled_at, snapshot_id, telemetry in snapshots
+            ]
+        )
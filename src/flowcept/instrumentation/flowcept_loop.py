@@ -1,13 +1,21 @@
 """Flowcept Loop module."""
 
 import uuid
-from time import time
-from typing import Union, Sized, Iterator, Dict
+from time import perf_counter, time
+from typing import Any, Iterable, Union, Sized, Iterator, Dict
 
 from flowcept import Flowcept
 from flowcept.commons.vocabulary import Status
-from flowcept.configs import INSTRUMENTATION_ENABLED, TELEMETRY_ENABLED
+from flowcept.configs import (
+    INSTRUMENTATION_ENABLED,
+    STREAMING_LOOP_BATCH_SIZE,
+    STREAMING_LOOP_ITEM_CAPTURE,
+    STREAMING_LOOP_MAX_REPR_LENGTH,
+    TASK_CAPTURE_MODE,
+    TELEMETRY_ENABLED,
+)
 from flowcept.flowceptor.adapters.instrumentation_interceptor import InstrumentationInterceptor
+from flowcept.flowceptor.adapters.task_aggregator import CAPTURE_MODE_AGGREGATE
 
 
 class FlowceptLoop:
@@ -26,6 +34,9 @@ class FlowceptLoop:
     """
 
     _interceptor = InstrumentationInterceptor.get_instance()
+    # Whether ``instrumentation.capture_mode`` applies; false for the subclasses that hook into
+    # the iteration tasks (``_capture_iteration_bounds``), which aggregate mode never creates.
+    FOLLOWS_CAPTURE_MODE_SETTING = True
 
     def __init__(
         self,
@@ -36,6 +47,7 @@ class FlowceptLoop:
         workflow_id=None,
         items_length=0,
         capture_enabled=True,
+        capture_mode=None,
     ):
         """
         Initialize a FlowceptLoop instance for tracking iterations.
@@ -71,6 +83,12 @@ class FlowceptLoop:
         capture_enabled : bool, optional
             Whether to enable provenance/telemetry capture. If ``False``, the loop runs
             without instrumentation. Default is ``True``.
+        capture_mode : str, optional
+            ``"full"`` sends one task per iteration. ``"aggregate"`` only adds each
+            iteration's duration and numeric ``generated`` values to the interceptor's
+            per-activity aggregates, and never materializes the items. Defaults to
+            ``instrumentation.capture_mode``, or ``"full"`` for the subclasses that do not
+            follow the setting (``FOLLOWS_CAPTURE_MODE_SETTING``), e.g. the torch loops.
 
         Raises
         ------
@@ -94,6 +112,20 @@ class FlowceptLoop:
             self.enabled = False
             return
 
+        if capture_mode is None and self.FOLLOWS_CAPTURE_MODE_SETTING:
+            capture_mode = TASK_CAPTURE_MODE
+        if capture_mode == CAPTURE_MODE_AGGREGATE:
+            self._iterator = iter(range(items) if isinstance(items, int) else items)
+            self._max = len(items) if hasattr(items, "__len__") else (items if isinstance(items, int) else items_length)
+            self.enabled = True
+            self._next_func = self._aggregate_next
+            self.end_iter = self._aggregate_end_iter
+            self._act_id = loop_name + "_iteration"
+            self.workflow_id = workflow_id or Flowcept.current_workflow_id or str(uuid.uuid4())
+            self._iteration_started = None
+            self._iteration_generated = None
+            return
+
         if hasattr(items, "__len__"):
             self._iterator = iter(items)
             self._max = len(items)
@@ -109,7 +141,10 @@ class FlowceptLoop:
                 # TODO: think of a better way to do it
                 from flowcept.commons.flowcept_logger import FlowceptLogger
 
-                FlowceptLogger().warning("If you know the length size of this iterator, lease inform it.")
+                FlowceptLogger().warning(
+                    "If you know the length size of this iterator, lease inform it. "
+                    "For long or unbounded iterators, use FlowceptStreamingLoop."
+                )
                 items = list(items)
                 self._iterator = iter(items)
                 self._max = len(items)
@@ -145,6 +180,25 @@ class FlowceptLoop:
     def _do_nothing_next(self):
         return next(self._iterator)
 
+    def _aggregate_next(self):
+        # As in _our_next, the beginning of the current iteration is the end of the last.
+        now = perf_counter()
+        if self._iteration_started is not None:
+            FlowceptLoop._interceptor.task_aggregator.add(
+                self._act_id, now - self._iteration_started, False, self._iteration_generated, self.workflow_id
+            )
+        try:
+            item = next(self._iterator)
+        except StopIteration:
+            self._iteration_started = None
+            raise
+        self._iteration_generated = None
+        self._iteration_started = perf_counter()
+        return item
+
+    def _aggregate_end_iter(self, generated_value: Dict):
+        self._iteration_generated = generated_value
+
     def _our_next(self):
         # Basic idea: the beginning of the current iteration is the end of the last
         if self._max <= 0:
@@ -395,3 +449,251 @@ class FlowceptLightweightLoop:
            will be stored in the `generated` field of the iteration's metadata.
         """
         self._current_iteration_tasks[self._next_counter]["generated"] = generated_value
+
+
+ITEM_CAPTURE_NONE = "none"
+ITEM_CAPTURE_REPR = "repr"
+ITEM_CAPTURE_SUMMARY = "summary"
+_PLAIN_ITEMS = frozenset((int, float, bool, type(None)))
+
+
+def capture_item(item: Any, mode: str = ITEM_CAPTURE_REPR, max_repr_length: int = STREAMING_LOOP_MAX_REPR_LENGTH):
+    """
+    Return what an iteration records of its item.
+
+    Numbers, booleans, None and strings (truncated to ``max_repr_length``) are kept as is. In
+    ``repr`` mode, other items are replaced by their truncated ``repr``; in ``summary`` mode,
+    by their ``type`` and, when they have them, their ``len``, ``shape`` and ``dtype``.
+    """
+    t = type(item)
+    if t in _PLAIN_ITEMS:
+        return item
+    if t is str:
+        return item[:max_repr_length]
+    if mode == ITEM_CAPTURE_REPR:
+        try:
+            return repr(item)[:max_repr_length]
+        except Exception:
+            return t.__name__
+    summary = {"type": t.__name__}
+    if hasattr(item, "shape"):
+        summary["shape"] = [int(n) for n in item.shape]
+        if hasattr(item, "dtype"):
+            summary["dtype"] = str(item.dtype)
+    elif hasattr(item, "__len__"):
+        try:
+            summary["len"] = len(item)
+        except Exception:
+            pass
+    return summary
+
+
+class FlowceptStreamingLoop:
+    """
+    Loop instrumentation in constant memory, for long or unbounded iterators.
+
+    Iterations are recorded like in ``FlowceptLoop`` (one task per iteration, with ``used``,
+    ``generated``, ``started_at`` and ``ended_at``), but:
+
+    - the items are never materialized: iterators of unknown length, including infinite
+      generators, are consumed lazily;
+    - iterations are written into ``batch_size`` preallocated slots, and each full batch is
+      sent with one ``intercept_many`` call, so memory does not grow with the number of
+      iterations;
+    - items are recorded according to ``item_capture`` (see :func:`capture_item`), so the loop
+      never holds references to past items.
+
+    The last, partial batch is sent when the iterator is exhausted. If the loop may be left
+    early (e.g., with ``break``), call :meth:`close` or use the loop as a context manager.
+    No per-iteration telemetry is captured.
+
+    Examples
+    --------
+    >>> with FlowceptStreamingLoop(stream(), loop_name="events") as loop:
+    ...     for event in loop:
+    ...         loop.end_iter({"latency": handle(event)})
+    """
+
+    _interceptor = InstrumentationInterceptor.get_instance()
+
+    def __init__(
+        self,
+        items: Union[Iterable, int],
+        loop_name="loop",
+        item_name="item",
+        parent_task_id=None,
+        workflow_id=None,
+        items_length=0,
+        capture_enabled=True,
+        batch_size: int = None,
+        item_capture: str = None,
+    ):
+        """
+        Initialize a FlowceptStreamingLoop.
+
+        Parameters
+        ----------
+        items : Iterable or int
+            The items to iterate over: any iterable or iterator, or an integer (``range(items)``).
+        loop_name : str, optional
+            Name of the loop; iterations get ``activity_id = loop_name + "_iteration"``.
+        item_name : str, optional
+            Key of the item in each iteration's ``used``.
+        parent_task_id : str, optional
+            Parent task of the iterations.
+        workflow_id : str, optional
+            Workflow of the iterations. Defaults to the current workflow.
+        items_length : int, optional
+            Length reported by ``len()`` for iterators; only informative.
+        capture_enabled : bool, optional
+            If False, the loop runs without instrumentation.
+        batch_size : int, optional
+            Iterations sent per ``intercept_many`` call. Defaults to ``instrumentation.streaming_loop.batch_size``.
+        item_capture : str, optional
+            ``none``, ``repr`` or ``summary``. Defaults to ``instrumentation.streaming_loop.item_capture``.
+        """
+        self._iterator = iter(range(items) if isinstance(items, int) else items)
+        if hasattr(items, "__len__"):
+            self._max = len(items)
+        else:
+            self._max = items if isinstance(items, int) else items_length
+        if not (INSTRUMENTATION_ENABLED and capture_enabled):
+            self._next_func = self._do_nothing_next
+            self.end_iter = self._do_nothing_in_end_iter
+            self.enabled = False
+            self.get_current_iteration_id = lambda: None
+            return
+
+        self.enabled = True
+        self._next_func = self._our_next
+        self._item_capture = item_capture or STREAMING_LOOP_ITEM_CAPTURE
+        if self._item_capture not in (ITEM_CAPTURE_NONE, ITEM_CAPTURE_REPR, ITEM_CAPTURE_SUMMARY):
+            raise ValueError(f"Unknown item_capture '{self._item_capture}'. Use none, repr, or summary.")
+        self._batch_size = max(1, batch_size or STREAMING_LOOP_BATCH_SIZE)
+        self._loop_name = loop_name
+        self._item_name = item_name
+        self._parent_task_id = parent_task_id
+        self._group_id = str(id(self) + id(self._iterator) + id(parent_task_id))
+        self._act_id = loop_name + "_iteration"
+        self.workflow_id = workflow_id or Flowcept.current_workflow_id or str(uuid.uuid4())
+        self._current_item = None
+        self._next_counter = -1  # Index of the current iteration.
+        self._batch_start = 0  # Index of the iteration in slot 0.
+        self._n_ended = 0  # Slots holding ended iterations.
+        self._in_iteration = False
+        # The record slots, reused by every batch.
+        self._items = [None] * self._batch_size
+        self._started = [0.0] * self._batch_size
+        self._ended = [0.0] * self._batch_size
+        self._generated = [None] * self._batch_size
+
+    def __iter__(self):
+        return self
+
+    def __len__(self):
+        return self._max
+
+    def __next__(self):
+        return self._next_func()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_current_iteration_id(self):
+        """Get current iteration's task id."""
+        return self._group_id + str(self._next_counter)
+
+    def _do_nothing_next(self):
+        return next(self._iterator)
+
+    def _do_nothing_in_end_iter(self, *args, **kwargs):
+        pass
+
+    def _our_next(self):
+        # As in FlowceptLoop, the beginning of the current iteration is the end of the last.
+        if self._in_iteration:
+            self._end_iteration(time())
+        try:
+            self._current_item = next(self._iterator)
+        except StopIteration:
+            self._current_item = None
+            self.flush()
+            raise
+        self._capture_iteration_bounds()
+        return self._current_item
+
+    def _capture_iteration_bounds(self):
+        slot = self._n_ended
+        self._next_counter += 1
+        self._in_iteration = True
+        self._started[slot] = time()
+        if self._item_capture != ITEM_CAPTURE_NONE:
+            self._items[slot] = capture_item(self._current_item, self._item_capture)
+
+    def _end_iteration(self, ended_at: float):
+        self._ended[self._n_ended] = ended_at
+        self._n_ended += 1
+        self._in_iteration = False
+        if self._n_ended == self._batch_size:
+            self.flush()
+
+    def end_iter(self, generated_value: Dict):
+        """
+        Set the values generated by the current iteration.
+
+        Parameters
+        ----------
+        generated_value : dict
+           Stored in the ``generated`` field of the current iteration's task.
+        """
+        if self._in_iteration:
+            self._generated[self._n_ended] = generated_value
+
+    def flush(self):
+        """Send the ended iterations that were not sent yet."""
+        n = self._n_ended
+        if not n:
+            return
+        items, started, ended, generated = self._items, self._started, self._ended, self._generated
+        capture_items = self._item_capture != ITEM_CAPTURE_NONE
+        messages = []
+        for slot, i in enumerate(range(self._batch_start, self._batch_start + n)):
+            used = {"i": i}
+            if capture_items:
+                used[self._item_name] = items[slot]
+                items[slot] = None
+            message = {
+                "type": "task",
+                "task_id": self._group_id + str(i),
+                "workflow_id": self.workflow_id,
+                "activity_id": self._act_id,
+                "group_id": self._group_id,
+                "used": used,
+                "started_at": started[slot],
+                "ended_at": ended[slot],
+                "status": Status.FINISHED.value,
+            }
+            if generated[slot] is not None:
+                message["generated"] = generated[slot]
+                generated[slot] = None
+            if self._parent_task_id is not None:
+                message["parent_task_id"] = self._parent_task_id
+            messages.append(message)
+        if self._in_iteration:
+            # The current iteration moves to slot 0.
+            items[0], started[0], generated[0] = items[n], started[n], generated[n]
+            items[n] = generated[n] = None
+        self._batch_start += n
+        self._n_ended = 0
+        FlowceptStreamingLoop._interceptor.intercept_many(messages)
+
+    def close(self):
+        """End the current iteration, if any, and send the iterations not sent yet."""
+        if not self.enabled:
+            return
+        if self._in_iteration:
+            self._end_iteration(time())
+        self.flush()
@@ -1,17 +1,19 @@
 """Task module."""
 
 import threading
-from time import time
+from time import perf_counter, time
 import inspect
 from functools import wraps
 import argparse
 
-from flowcept.commons.flowcept_dataclasses.task_object import TaskObject
+from flowcept.commons.flowcept_dataclasses.task_record import COPY_NONE, TaskRecord, new_task_id, snapshot_dict
 from flowcept.commons.vocabulary import Status
 from flowcept.commons.flowcept_logger import FlowceptLogger
 
 from flowcept.commons.utils import replace_non_serializable
 from flowcept.configs import (
+    COPY_ON_CAPTURE,
+    TASK_CAPTURE_MODE,
     REPLACE_NON_JSON_SERIALIZABLE,
     INSTRUMENTATION_ENABLED,
     HOSTNAME,
@@ -21,6 +23,8 @@ from flowcept.flowcept_api.flowcept_controller import Flowcept
 from flowcept.flowceptor.adapters.instrumentation_interceptor import (
     InstrumentationInterceptor,
 )
+from flowcept.flowceptor.adapters.task_aggregator import CAPTURE_MODE_AGGREGATE
+from flowcept.instrumentation.task_sampling import TaskSampler
 
 _thread_local = threading.local()
 
@@ -28,6 +32,14 @@ _thread_local = threading.local()
 # TODO: :code-reorg: consider moving it to utils and reusing it in dask interceptor
 def default_args_handler(*args, **kwargs):
     """Get default arguments."""
+    args_handled = _args_to_dict(*args, **kwargs)
+    if REPLACE_NON_JSON_SERIALIZABLE:
+        args_handled = replace_non_serializable(args_handled)
+    return args_handled
+
+
+def _args_to_dict(*args, **kwargs):
+    """Name the arguments as ``default_args_handler`` does, without replacing non-serializable values."""
     args_handled = {}
     if args is not None and len(args):
         if isinstance(args[0], argparse.Namespace):
@@ -37,8 +49,6 @@ def default_args_handler(*args, **kwargs):
             args_handled[f"arg_{i}"] = args[i]
     if kwargs is not None and len(kwargs):
         args_handled.update(kwargs)
-    if REPLACE_NON_JSON_SERIALIZABLE:
-        args_handled = replace_non_serializable(args_handled)
     return args_handled
 
 
@@ -54,7 +64,7 @@ def telemetry_flowcept_task(func=None):
             task_obj["type"] = "task"
             task_obj["started_at"] = time()
             task_obj["activity_id"] = func.__qualname__
-            task_obj["task_id"] = str(task_obj["started_at"])
+            task_obj["task_id"] = new_task_id()
             _thread_local._flowcept_current_context_task_id = task_obj["task_id"]
             task_obj["workflow_id"] = kwargs.pop("workflow_id", Flowcept.current_workflow_id)
             task_obj["used"] = kwargs
@@ -116,8 +126,24 @@ def flowcept_task(func=None, **decorator_kwargs):
     Flowcept task decorator.
 
     Now supports BOTH sync and async functions. For async functions, we await
-    the function before capturing outputs in `task_obj.generated`, so we no
+    the function before capturing outputs in the task's `generated`, so we no
     longer store just the coroutine object.
+
+    Pass ``sampling=`` (a dict such as ``{"policy": "every_nth", "n": 100}`` or a
+    ``SamplingPolicy``) to record only some calls; see ``task_sampling``. Calls that
+    are not recorded are only timed and counted.
+
+    With ``capture_mode="aggregate"`` (or ``instrumentation.capture_mode: aggregate``), no
+    task is sent per call: each call only updates the interceptor's per-activity aggregates
+    (see ``TaskAggregator``), which are sent periodically as ``activity_aggregate`` tasks.
+
+    Recorded calls are kept as a ``TaskRecord`` with a process-unique ``task_id``. Arguments
+    are named with a positional mapping computed at decoration time (``inspect.Signature.bind``
+    is only used for ``*args``/``**kwargs`` signatures), and with the default ``args_handler``
+    the non-serializable values are replaced off the caller's thread: by the background
+    serializer threads (``instrumentation.serialization.workers``) or in the MQ buffer's flush
+    thread. Mutable arguments and outputs are snapshotted at call time according to
+    ``instrumentation.serialization.copy_on_capture`` (see ``snapshot_value``).
     """
     if INSTRUMENTATION_ENABLED:
         interceptor = InstrumentationInterceptor.get_instance()
@@ -140,124 +166,176 @@ def flowcept_task(func=None, **decorator_kwargs):
         decorator_kwargs.get("source_agent_name", None)
         capture_telemetry = decorator_kwargs.get("capture_telemetry", None)
         task_should_capture_telemetry = TELEMETRY_ENABLED if capture_telemetry is None else capture_telemetry
+        aggregate = decorator_kwargs.get("capture_mode", TASK_CAPTURE_MODE) == CAPTURE_MODE_AGGREGATE
+        sampler = (
+            TaskSampler.for_activity(func.__name__, decorator_kwargs.get("sampling"), interceptor)
+            if INSTRUMENTATION_ENABLED and not aggregate
+            else None
+        )
+
+        # Positional-to-name mapping, computed once so that most calls skip sig.bind().
+        params = sig.parameters.values()
+        positional_names = tuple(p.name for p in params if p.kind == p.POSITIONAL_OR_KEYWORD)
+        param_names = frozenset(p.name for p in params)
+        param_defaults = tuple((p.name, p.default) for p in params if p.default is not p.empty)
+        can_map_args = all(p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY) for p in params)
+        # The default handler's sanitization is deferred to TaskRecord.to_dict (serializer or flush thread),
+        # so mutable values are snapshotted at call time instead (instrumentation.serialization.copy_on_capture).
+        default_handler = args_handler is default_args_handler
+        sanitize = default_handler and REPLACE_NON_JSON_SERIALIZABLE
+        copy_on_capture = default_handler and COPY_ON_CAPTURE != COPY_NONE
+        if REPLACE_NON_JSON_SERIALIZABLE and custom_metadata is not None:
+            custom_metadata = replace_non_serializable(custom_metadata)
 
         # --- shared helpers for sync+async wrappers -------------------------
 
+        def _map_args(f_args, f_kwargs):
+            """Map the call's arguments to parameter names, or return None if sig.bind() is needed."""
+            if not can_map_args or len(f_args) > len(positional_names) or not param_names.issuperset(f_kwargs):
+                return None
+            arguments = dict(zip(positional_names, f_args))
+            if f_kwargs:
+                arguments.update(f_kwargs)
+                if len(arguments) < len(f_args) + len(f_kwargs):
+                    return None  # An argument given both by position and by name.
+            if len(arguments) < len(param_names):
+                for name, default in param_defaults:
+                    if name not in arguments:
+                        arguments[name] = default
+                if len(arguments) < len(param_names):
+                    return None  # A required argument is missing.
+            return arguments
+
+        def _handle_args(*f_args, **f_kwargs):
+            if default_handler:
+                return _args_to_dict(*f_args, **f_kwargs)
+            return args_handler(*f_args, **f_kwargs)
+
         def _common_prep(*f_args, **f_kwargs):
             """
-            Build and populate the TaskObject before running the task.
-            Returns (task_obj, handled_args).
+            Build and populate the TaskRecord before running the task.
             """
-            # Bind inputs to parameter names
-            try:
-                bound_args = sig.bind(*f_args, **f_kwargs)
-                bound_args.apply_defaults()
-                handled_args = args_handler(**dict(bound_args.arguments))
-            except Exception as e:
-                if isinstance(e, TypeError):
-                    # signature mismatch is a real error -> raise
-                    raise e
-                else:
-                    # fallback to positional capture
-                    handled_args = args_handler(*f_args, **f_kwargs)
-
-            task_obj = TaskObject()
-            task_obj.subtype = subtype
-            task_obj.activity_id = func.__name__
-            task_obj.workflow_id = handled_args.pop("workflow_id", Flowcept.current_workflow_id)
-            task_obj.campaign_id = handled_args.pop("campaign_id", Flowcept.campaign_id)
-            task_obj.agent_id = handled_args.pop("agent_id", None) or agent_id
-            task_obj.source_agent_id = handled_args.pop("source_agent_id", source_agent_id)
-            task_obj.used = handled_args
-            task_obj.tags = tags
-            task_obj.started_at = time()
-            task_obj.custom_metadata = (
-                replace_non_serializable(custom_metadata)
-                if (REPLACE_NON_JSON_SERIALIZABLE and custom_metadata is not None)
-                else custom_metadata
-            )
-            task_obj.hostname = HOSTNAME
-            task_obj.task_id = str(task_obj.started_at)
-            _thread_local._flowcept_current_context_task_id = task_obj.task_id
+            arguments = _map_args(f_args, f_kwargs)
+            if arguments is not None:
+                handled_args = arguments if default_handler else args_handler(**arguments)
+            else:
+                # Bind inputs to parameter names
+                try:
+                    bound_args = sig.bind(*f_args, **f_kwargs)
+                    bound_args.apply_defaults()
+                    handled_args = _handle_args(**dict(bound_args.arguments))
+                except Exception as e:
+                    if isinstance(e, TypeError):
+                        # signature mismatch is a real error -> raise
+                        raise e
+                    else:
+                        # fallback to positional capture
+                        handled_args = _handle_args(*f_args, **f_kwargs)
+
+            task = TaskRecord()
+            task.task_id = new_task_id()
+            task.subtype = subtype
+            task.activity_id = func.__name__
+            task.workflow_id = handled_args.pop("workflow_id", Flowcept.current_workflow_id)
+            task.campaign_id = handled_args.pop("campaign_id", Flowcept.campaign_id)
+            task.agent_id = handled_args.pop("agent_id", None) or agent_id
+            task.source_agent_id = handled_args.pop("source_agent_id", source_agent_id)
+            task.used = snapshot_dict(handled_args) if copy_on_capture else handled_args
+            task.tags = tags
+            task.custom_metadata = custom_metadata
+            task.started_at = time()
+            task.hostname = HOSTNAME
+            task.sanitize = sanitize
+            _thread_local._flowcept_current_context_task_id = task.task_id
 
             if task_should_capture_telemetry:
                 # capture telemetry at start
-                task_obj.telemetry_at_start = interceptor.telemetry_capture.capture()
-
-            return task_obj
+                task.telemetry_at_start = interceptor.telemetry_capture.capture()
+
+            return task
+
+        def _name_outputs(result):
+            """Map a tuple/list/scalar result to ``output_names``; None if they don't match."""
+            if isinstance(result, (tuple, list)):
+                if len(output_names) == len(result):
+                    return {k: v for k, v in zip(output_names, result)}
+                elif len(output_names) == 1:
+                    # single output_name: store the whole collection as-is
+                    return {output_names[0]: result}
+            elif isinstance(output_names, str):
+                return {output_names: result}
+            elif isinstance(output_names, (tuple, list)) and len(output_names) == 1:
+                return {output_names[0]: result}
+            return None
+
+        def _aggregate(t0, result, failed, workflow_id):
+            """Add a call to the interceptor's per-activity aggregates instead of sending a task."""
+            if failed or result is None:
+                generated = None
+            elif isinstance(result, dict):
+                generated = result
+            else:
+                generated = (_name_outputs(result) if output_names else None) or {"arg_0": result}
+            interceptor.task_aggregator.add(
+                func.__name__,
+                perf_counter() - t0,
+                failed,
+                generated,
+                workflow_id or Flowcept.current_workflow_id,
+            )
 
-        def _attach_outputs(task_obj, result):
+        def _attach_outputs(task, result):
             """
-            Populate task_obj.generated following the same logic you had before,
-            including output_names mapping and args_handler(), but only if we
-            actually got a result and we didn't error.
+            Populate task.generated following the output_names mapping and
+            args_handler(), but only if we actually got a result and we didn't error.
             """
             if result is None:
                 return
 
             try:
-                named = None
-
                 if isinstance(result, dict):
-                    # User already returned a mapping; pass it through sanitized
+                    # User already returned a mapping; pass it through (sanitized)
+                    named = result
+                elif output_names:
+                    named = _name_outputs(result)
+                else:
+                    named = None
+                if isinstance(named, dict):
                     try:
-                        task_obj.generated = args_handler(**result)
+                        generated = dict(named) if default_handler else args_handler(**named)
                     except Exception:
-                        task_obj.generated = result
-                    return
-
-                if output_names:
-                    # map tuple/list/scalar to provided output_names
-                    if isinstance(result, (tuple, list)):
-                        if len(output_names) == len(result):
-                            named = {k: v for k, v in zip(output_names, result)}
-                        elif len(output_names) == 1:
-                            # single output_name: store the whole collection as-is
-                            named = {output_names[0]: result}
-                    elif isinstance(output_names, str):
-                        named = {output_names: result}
-                    elif isinstance(output_names, (tuple, list)) and len(output_names) == 1:
-                        named = {output_names[0]: result}
-
-                    if isinstance(named, dict):
-                        try:
-                            task_obj.generated = args_handler(**named)
-                        except Exception:
-                            task_obj.generated = named
-                    else:
-                        # fallback: positional capture
-                        task_obj.generated = args_handler(result)
+                        generated = named
                 else:
-                    # No output_names provided, fallback to positional capture
-                    task_obj.generated = args_handler(result)
+                    # No output_names provided (or not matching): positional capture
+                    generated = _handle_args(result)
+                task.generated = snapshot_dict(generated) if copy_on_capture else generated
 
             except Exception as e:
                 # Don't kill the flow if serialization fails
                 logger.exception(e)
 
-        def _common_post(task_obj, result, raised_exc):
+        def _common_post(task, result, raised_exc):
             """
-            Finalize task_obj (status, telemetry_at_end, generated, stderr, etc.)
+            Finalize the task (status, telemetry_at_end, generated, stderr, etc.)
             and ship it.
             """
             if raised_exc is None:
-                task_obj.status = Status.FINISHED
+                task.status = Status.FINISHED.value
             else:
-                task_obj.status = Status.ERROR
-                task_obj.stderr = str(raised_exc)
+                task.status = Status.ERROR.value
+                task.stderr = str(raised_exc)
 
-            task_obj.ended_at = time()
+            task.ended_at = time()
 
             if task_should_capture_telemetry:
                 # capture telemetry at end
-                task_obj.telemetry_at_end = interceptor.telemetry_capture.capture()
+                task.telemetry_at_end = interceptor.telemetry_capture.capture()
 
             # Only attach outputs if we actually finished successfully
             if raised_exc is None:
-                _attach_outputs(task_obj, result)
+                _attach_outputs(task, result)
 
-            # Send to interceptor
-            interceptor.intercept(task_obj.to_dict())
+            interceptor.intercept_record(task)
 
         # --- build either sync or async wrapper -----------------------------
 
@@ -268,8 +346,24 @@ def flowcept_task(func=None, **decorator_kwargs):
                 # Fast path: instrumentation disabled
                 if not INSTRUMENTATION_ENABLED:
                     return await func(*args, **kwargs)
+                if aggregate:
+                    t0, result, failed = perf_counter(), None, True
+                    try:
+                        result = await func(*args, **kwargs)
+                        failed = False
+                        return result
+                    finally:
+                        _aggregate(t0, result, failed, kwargs.get("workflow_id"))
+                if sampler is not None and not sampler.should_record():
+                    t0, failed = perf_counter(), True
+                    try:
+                        result = await func(*args, **kwargs)
+                        failed = False
+                        return result
+                    finally:
+                        sampler.record(perf_counter() - t0, failed)
 
-                task_obj = _common_prep(*args, **kwargs)
+                task = _common_prep(*args, **kwargs)
 
                 result = None
                 raised_exc = None
@@ -279,7 +373,7 @@ def flowcept_task(func=None, **decorator_kwargs):
                     raised_exc = exc
                     logger.exception(exc)
 
-                _common_post(task_obj, result, raised_exc)
+                _common_post(task, result, raised_exc)
 
                 if raised_exc is not None:
                     # propagate error to caller
@@ -295,8 +389,24 @@ def flowcept_task(func=None, **decorator_kwargs):
                 # Fast path: instrumentation disabled
                 if not INSTRUMENTATION_ENABLED:
                     return func(*args, **kwargs)
+                if aggregate:
+                    t0, result, failed = perf_counter(), None, True
+                    try:
+                        result = func(*args, **kwargs)
+                        failed = False
+                        return result
+                    finally:
+                        _aggregate(t0, result, failed, kwargs.get("workflow_id"))
+                if sampler is not None and not sampler.should_record():
+                    t0, failed = perf_counter(), True
+                    try:
+                        result = func(*args, **kwargs)
+                        failed = False
+                        return result
+                    finally:
+                        sampler.record(perf_counter() - t0, failed)
 
-                task_obj = _common_prep(*args, **kwargs)
+                task = _common_prep(*args, **kwargs)
 
                 result = None
                 raised_exc = None
@@ -306,7 +416,7 @@ def flowcept_task(func=None, **decorator_kwargs):
                     raised_exc = exc
                     logger.exception(exc)
 
-                _common_post(task_obj, result, raised_exc)
+                _common_post(task, result, raised_exc)
 
                 if raised_exc is not None:
                     # propagate error to caller
@@ -1,12 +1,12 @@
 """Flowcept's module for Pytorch instrumentation."""
 
-from time import time
+from time import perf_counter_ns, time
 from types import MethodType
 
 import numpy as np
 
 from flowcept.commons.utils import replace_non_serializable
-from typing import Dict, Union, Sized, Iterator
+from typing import Dict, List, Tuple, Union, Sized, Iterator
 import uuid
 
 import torch
@@ -30,6 +30,146 @@ from flowcept.instrumentation.flowcept_task import get_current_context_task_id
 TORCH_CONFIG = INSTRUMENTATION.get("torch", {})
 
 REGISTER_WORKFLOW = TORCH_CONFIG.get("register_workflow", True)
+TENSOR_INSPECTION_CONFIG = TORCH_CONFIG.get("tensor_inspection", None) or {}
+
+BATCHED_CHILDREN_MODES = {"batched", "batched_tensor_inspection"}
+
+DENSITY_EXACT = "exact"
+DENSITY_SAMPLED = "sampled"
+
+
+class TensorInspector:
+    """
+    Tensor inspection used by the ``tensor_inspection`` modes of :func:`flowcept_torch`.
+
+    An inspection holds the tensor's ``id``, ``shape``, ``device``, ``dtype``, ``nbytes`` and
+    ``numel``, plus values computed on the tensor's device:
+
+    - ``density``, the fraction of nonzero elements, with ``torch.count_nonzero`` (``exact``)
+      or over ``sample_size`` elements drawn at random (``sampled``), or left out (``None``);
+    - with ``stats``, ``min``, ``max``, ``mean`` and ``std`` of floating-point tensors.
+
+    The computed values are stacked and copied to the host in one transfer. With
+    ``async_copy``, the copy of a CUDA tensor's values does not block: the inspection gets
+    them on :meth:`resolve`, which the parent forward calls once, after all its layers ran.
+    With ``cache_by_shape``, the shape-derived fields are computed once per layer and shape.
+    """
+
+    _MAX_CACHE_SIZE = 4096
+
+    def __init__(
+        self,
+        density: str = DENSITY_EXACT,
+        sample_size: int = 65_536,
+        stats: bool = False,
+        async_copy: bool = True,
+        cache_by_shape: bool = True,
+    ):
+        if density not in (DENSITY_EXACT, DENSITY_SAMPLED, None):
+            raise ValueError(f"Unknown density method '{density}'. Use exact, sampled, or ~.")
+        self.density = density
+        self.sample_size = sample_size
+        self.stats = stats
+        self.async_copy = async_copy
+        self.cache_by_shape = cache_by_shape
+        self._static_cache: Dict[Tuple, Dict] = {}
+        self._sample_indices: Dict[Tuple, torch.Tensor] = {}
+        self._pending: List[Tuple[Dict, List[str], torch.Tensor, "torch.cuda.Event"]] = []
+
+    @staticmethod
+    def from_settings() -> "TensorInspector":
+        """Build an inspector from ``instrumentation.torch.tensor_inspection``."""
+        return TensorInspector(**TENSOR_INSPECTION_CONFIG)
+
+    def inspect(self, tensor, key=None) -> Dict:
+        """
+        Inspect a tensor.
+
+        Parameters
+        ----------
+        tensor : torch.Tensor
+            The tensor to inspect. Other values only get their ``type``.
+        key : hashable, optional
+            Identifies where the tensor comes from (e.g., a layer's input), for the shape cache.
+
+        Returns
+        -------
+        dict
+            The inspection. With ``async_copy``, the device-computed values are None until
+            :meth:`resolve` is called.
+        """
+        if not isinstance(tensor, torch.Tensor):
+            return {"type": type(tensor).__name__}
+        inspection = {"id": id(tensor)}
+        inspection.update(self._static_fields(tensor, key))
+        numel = inspection["numel"]
+        if not numel:
+            return inspection
+        names, values = [], []
+        with torch.no_grad():
+            if self.density is not None:
+                if tensor.is_sparse:
+                    inspection["density"] = tensor._nnz() / numel
+                else:
+                    names.append("density")
+                    values.append(self._density(tensor, numel))
+            if self.stats and tensor.is_floating_point() and not tensor.is_sparse:
+                minimum, maximum = torch.aminmax(tensor)
+                std, mean = torch.std_mean(tensor, correction=0)
+                names.extend(("min", "max", "mean", "std"))
+                values.extend((minimum, maximum, mean, std))
+            if names:
+                stacked = torch.stack([v.float() for v in values])
+                if self.async_copy and stacked.is_cuda:
+                    event = torch.cuda.Event()
+                    host = stacked.to("cpu", non_blocking=True)
+                    event.record()
+                    inspection.update(dict.fromkeys(names))
+                    self._pending.append((inspection, names, host, event))
+                else:
+                    inspection.update(zip(names, stacked.tolist()))
+        return inspection
+
+    def resolve(self):
+        """Wait for the pending asynchronous copies and fill in their inspections."""
+        pending, self._pending = self._pending, []
+        for inspection, names, host, event in pending:
+            event.synchronize()
+            inspection.update(zip(names, host.tolist()))
+
+    def _static_fields(self, tensor: torch.Tensor, key) -> Dict:
+        if not self.cache_by_shape:
+            return self._compute_static_fields(tensor)
+        cache_key = (key, tensor.shape, tensor.dtype, tensor.device, tensor.is_sparse)
+        fields = self._static_cache.get(cache_key)
+        if fields is None:
+            if len(self._static_cache) >= TensorInspector._MAX_CACHE_SIZE:
+                self._static_cache.clear()
+            fields = self._static_cache[cache_key] = self._compute_static_fields(tensor)
+        return fields
+
+    @staticmethod
+    def _compute_static_fields(tensor: torch.Tensor) -> Dict:
+        return {
+            "is_sparse": tensor.is_sparse,
+            "shape": list(tensor.shape),
+            "device": str(tensor.device),
+            "dtype": str(tensor.dtype),
+            "nbytes": tensor.nbytes,
+            "numel": tensor.numel(),
+        }
+
+    def _density(self, tensor: torch.Tensor, numel: int) -> torch.Tensor:
+        if self.density == DENSITY_SAMPLED and numel > self.sample_size:
+            cache_key = (numel, tensor.device)
+            indices = self._sample_indices.get(cache_key)
+            if indices is None:
+                if len(self._sample_indices) >= TensorInspector._MAX_CACHE_SIZE:
+                    self._sample_indices.clear()
+                indices = torch.randint(numel, (self.sample_size,), device=tensor.device)
+                self._sample_indices[cache_key] = indices
+            return torch.count_nonzero(tensor.reshape(-1)[indices]) / self.sample_size
+        return torch.count_nonzero(tensor) / numel
 
 
 def _inspect_inner_modules(model, modules_dict=None, in_named=None, first_level_child=True):
@@ -171,6 +311,7 @@ def flowcept_torch(cls):
             self._children_mode = None
             self._should_update_children_forward = False
             self._children_tensor_inspection_enabled = False
+            self._batched_children = False
             if self._children_enabled:
                 self._children_mode = TORCH_CONFIG.get("children_mode", None)
                 self._children_tensor_inspection_enabled = "inspection" in self._children_mode
@@ -178,12 +319,27 @@ def flowcept_torch(cls):
                     raise Exception("You enabled children mode, but did not specify which mode.")
 
                 self._child_forward_func = _get_our_child_forward_func(self._children_mode)
+                self._batched_children = self._children_mode in BATCHED_CHILDREN_MODES
+                self._layer_names = []
+                self._layer_types = []
                 for name, child in self.named_children():
                     child.__dict__["_parent_module"] = self
+                    child.__dict__["_layer_index"] = len(self._layer_names)
+                    self._layer_names.append(name)
+                    self._layer_types.append(child.__class__.__name__)
                     TorchModuleWrapper._original_children_forward_functions[child.__class__] = child.__class__.forward
                     child.forward = MethodType(self._child_forward_func, child)
 
             TorchModuleWrapper._interceptor = InstrumentationInterceptor.get_instance()
+            self._tensor_inspector = TensorInspector.from_settings()
+            # Child tasks of the running parent forward, intercepted with it at its end.
+            self._in_forward = False
+            self._pending_child_tasks = []
+            if self._batched_children:
+                # Layer calls of the running parent forward: layer index, start and end perf_counter_ns.
+                self._layer_calls = np.empty((max(2 * len(self._layer_names), 1), 3), dtype=np.int64)
+                self._n_layer_calls = 0
+                self._layer_inspections = []
             self._current_epoch = -1
 
             self._module_name = cls.__name__
@@ -205,13 +361,15 @@ def flowcept_torch(cls):
                 return super(TorchModuleWrapper, self).forward(*args, **kwargs)
 
             started_at = time()
+            started_ns = perf_counter_ns()
             self._current_forward_task_id = str(started_at)
             custom_metadata = {}
             if hasattr(self, "training"):
                 custom_metadata["is_training"] = self.training
             used = {}
+            inspector = self._tensor_inspector
             if self._current_epoch < 1:
-                used["tensor"] = _inspect_torch_tensor(args[0])
+                used["tensor"] = inspector.inspect(args[0], "used")
 
             forward_task = {
                 "task_id": self._current_forward_task_id,
@@ -229,20 +387,73 @@ def flowcept_torch(cls):
                 forward_task["used"].update(kwargs)
 
             self._enable_children_forward()
-            y = super(TorchModuleWrapper, self).forward(*args, **kwargs)
+            self._in_forward = True
+            try:
+                y = super(TorchModuleWrapper, self).forward(*args, **kwargs)
+            except BaseException:
+                self._in_forward = False
+                if self._batched_children:
+                    self._n_layer_calls = 0
+                    self._layer_inspections = []
+                self._intercept_tasks([])
+                raise
+            self._in_forward = False
             self._disable_children_forward()
 
             if self._current_epoch < 1:
-                forward_task["generated"] = {"tensor": _inspect_torch_tensor(y)}
+                forward_task["generated"] = {"tensor": inspector.inspect(y, "generated")}
+
+            if self._batched_children:
+                custom_metadata["layers"] = self._layer_table(started_ns)
 
             if TELEMETRY_ENABLED:
                 tel = TorchModuleWrapper._interceptor.telemetry_capture.capture()
                 forward_task["telemetry_at_end"] = tel.to_dict()
 
-            TorchModuleWrapper._interceptor.intercept(forward_task)
+            self._intercept_tasks([forward_task])
 
             return y
 
+        def _record_layer_call(self, layer_index: int, started_ns: int, ended_ns: int, inspections=None):
+            n = self._n_layer_calls
+            if n == len(self._layer_calls):
+                self._layer_calls = np.concatenate((self._layer_calls, np.empty_like(self._layer_calls)))
+            self._layer_calls[n] = (layer_index, started_ns, ended_ns)
+            self._n_layer_calls = n + 1
+            if inspections is not None:
+                self._layer_inspections.append(inspections)
+
+        def _layer_table(self, started_ns: int) -> Dict:
+            """Return the layer calls of the forward as columns, and reset them."""
+            calls = self._layer_calls[: self._n_layer_calls]
+            self._n_layer_calls = 0
+            indices = calls[:, 0].tolist()
+            table = {
+                "layer": [self._layer_names[i] for i in indices],
+                "type": [self._layer_types[i] for i in indices],
+                "start_offset_ns": (calls[:, 1] - started_ns).tolist(),
+                "duration_ns": (calls[:, 2] - calls[:, 1]).tolist(),
+            }
+            if self._layer_inspections:
+                table["used"] = [used for used, _ in self._layer_inspections]
+                table["generated"] = [generated for _, generated in self._layer_inspections]
+                self._layer_inspections = []
+            return table
+
+        def _intercept_child_task(self, task: Dict):
+            if self._in_forward:
+                self._pending_child_tasks.append(task)
+            else:
+                self._intercept_tasks([task])
+
+        def _intercept_tasks(self, tasks: List[Dict]):
+            """Intercept the pending child tasks and then ``tasks``, once their inspections are resolved."""
+            self._tensor_inspector.resolve()
+            tasks = self._pending_child_tasks + tasks
+            self._pending_child_tasks = []
+            if tasks:
+                TorchModuleWrapper._interceptor.intercept_many(tasks)
+
         def _enable_children_forward(self):
             if "children" in TORCH_CONFIG.get("what", "parent_only") and "telemetry" in TORCH_CONFIG["children_mode"]:
                 if self._epochs_at_every > 1 and self._should_update_children_forward:
@@ -272,6 +483,9 @@ def flowcept_torch(cls):
                 self._update_children_with_original_forward()
                 # If we get to the original children forwards here, we should stick with them.
                 self._should_update_children_forward = False
+            elif self._children_mode == "batched_tensor_inspection":
+                self._child_forward_func = _get_our_child_forward_func(mode="batched")
+                self._update_children_with_our_forward()
             elif self._children_mode == "telemetry_and_tensor_inspection":
                 self._child_forward_func = _get_our_child_forward_func(mode="telemetry")
                 if self._epochs_at_every == 1:
@@ -340,35 +554,59 @@ def flowcept_torch(cls):
             return _our_forward_telemetry
         elif mode == "telemetry_and_tensor_inspection":
             return _our_forward_telemetry_tensor_inspection
+        elif mode == "batched":
+            return _our_forward_batched
+        elif mode == "batched_tensor_inspection":
+            return _our_forward_batched_tensor_inspection
         else:
             raise NotImplementedError(f"There is no torch instrumentation mode {mode}")
 
     # TODO: move these functions to inside the wrapper class
-    def _inspect_torch_tensor(tensor: torch.Tensor):
-        _id = id(tensor)
-        tensor_inspection = {"id": _id}
-        tensor_inspection["is_sparse"] = tensor.is_sparse
-        tensor_inspection["shape"] = list(tensor.shape)
-        tensor_inspection["device"] = str(tensor.device)
-        tensor_inspection["nbytes"] = tensor.nbytes
-        tensor_inspection["numel"] = tensor.numel()
-        tensor_inspection["density"] = torch.nonzero(tensor).size(0) / tensor.numel()
-        return tensor_inspection
-
     def _get_forward_used_args(module, tensor):
-        used = {"tensor": _inspect_torch_tensor(tensor)}
+        inspector = module._parent_module._tensor_inspector
+        module_id = id(module)
+        used = {"tensor": inspector.inspect(tensor, (module_id, "used"))}
         for k, v in vars(module).items():
             if not k.startswith("_"):
                 if k == "forward" or callable(v):
                     continue
                 elif isinstance(v, torch.Tensor):
-                    used[k] = _inspect_torch_tensor(v)
+                    used[k] = inspector.inspect(v, (module_id, k))
                 else:
                     used[k] = v
         return used
 
+    def _inspect_child_output(module, result):
+        return {"tensor": module._parent_module._tensor_inspector.inspect(result, (id(module), "generated"))}
+
     CHILD_FORWARD = "child_forward"
 
+    def _our_forward_batched(self, *args, **kwargs):
+        original_forward = TorchModuleWrapper._original_children_forward_functions[self.__class__]
+        parent = self._parent_module
+        if not parent._in_forward:
+            return original_forward(self, *args, **kwargs)
+        started_ns = perf_counter_ns()
+        result = original_forward(self, *args, **kwargs)
+        parent._record_layer_call(self._layer_index, started_ns, perf_counter_ns())
+        return result
+
+    def _our_forward_batched_tensor_inspection(self, *args, **kwargs):
+        original_forward = TorchModuleWrapper._original_children_forward_functions[self.__class__]
+        parent = self._parent_module
+        if not parent._in_forward:
+            return original_forward(self, *args, **kwargs)
+        started_ns = perf_counter_ns()
+        result = original_forward(self, *args, **kwargs)
+        ended_ns = perf_counter_ns()
+        inspector = parent._tensor_inspector
+        inspections = (
+            inspector.inspect(args[0], (self._layer_index, "used")) if args else None,
+            inspector.inspect(result, (self._layer_index, "generated")),
+        )
+        parent._record_layer_call(self._layer_index, started_ns, ended_ns, inspections)
+        return result
+
     def _our_forward_lightweight(self, *args, **kwargs):
         result = TorchModuleWrapper._original_children_forward_functions[self.__class__](self, *args, **kwargs)
         task_dict = dict(
@@ -378,7 +616,7 @@ def flowcept_torch(cls):
             activity_id=self.__class__.__name__,
             status=Status.FINISHED.value,
         )
-        TorchModuleWrapper._interceptor.intercept(task_dict)
+        self._parent_module._intercept_child_task(task_dict)
         return result
 
     def _our_forward_telemetry(self, *args, **kwargs):
@@ -391,7 +629,7 @@ def flowcept_torch(cls):
             status=Status.FINISHED.value,
             telemetry_at_end=TorchModuleWrapper._interceptor.telemetry_capture.capture().to_dict(),
         )
-        TorchModuleWrapper._interceptor.intercept(task_dict)
+        self._parent_module._intercept_child_task(task_dict)
         return result
 
     def _our_forward_telemetry_tensor_inspection(self, *args, **kwargs):
@@ -404,9 +642,9 @@ def flowcept_torch(cls):
             status=Status.FINISHED.value,
             telemetry_at_end=TorchModuleWrapper._interceptor.telemetry_capture.capture().to_dict(),
             used=_get_forward_used_args(self, args[0]),
-            generated={"tensor": _inspect_torch_tensor(result)},
+            generated=_inspect_child_output(self, result),
         )
-        TorchModuleWrapper._interceptor.intercept(task_dict)
+        self._parent_module._intercept_child_task(task_dict)
         return result
 
     def _our_forward_tensor_inspection(self, *args, **kwargs):
@@ -418,9 +656,9 @@ def flowcept_torch(cls):
             activity_id=self.__class__.__name__,
             status=Status.FINISHED.value,
             used=_get_forward_used_args(self, args[0]),
-            generated={"tensor": _inspect_torch_tensor(result)},
+            generated=_inspect_child_output(self, result),
         )
-        TorchModuleWrapper._interceptor.intercept(task_dict)
+        self._parent_module._intercept_child_task(task_dict)
         return result
 
     return TorchModuleWrapper
@@ -432,6 +670,10 @@ def _get_parent_loop_class(epoch_or_batch):
         from flowcept.instrumentation.flowcept_loop import FlowceptLightweightLoop
 
         parent_class = FlowceptLightweightLoop
+    elif loop_mode == "streaming":
+        from flowcept.instrumentation.flowcept_loop import FlowceptStreamingLoop
+
+        parent_class = FlowceptStreamingLoop
     else:
         from flowcept.instrumentation.flowcept_loop import FlowceptLoop
 
@@ -446,6 +688,8 @@ def _create_epoch_loop_class():
         """Specialization of FlowceptLoop for Epoch Loops."""
 
         ACTIVITY_ID = "epochs_loop"
+        # The model needs the iteration task IDs, which the aggregate capture mode never creates.
+        FOLLOWS_CAPTURE_MODE_SETTING = False
 
         def __init__(
             self,
@@ -514,6 +758,9 @@ def _create_batch_loop_class():
         FlowceptEpochLoop : The parent loop for managing epoch-level iterations.
         """
 
+        # As in FlowceptEpochLoop: the model needs the iteration task IDs.
+        FOLLOWS_CAPTURE_MODE_SETTING = False
+
         def __init__(
             self,
             items: Union[Sized, Iterator, int],
@@ -1,4 +1,4 @@
-from time import time
+from time import perf_counter, time
 from typing import Dict, Any, List
 import os
 import threading
@@ -8,9 +8,16 @@ from flowcept.commons.flowcept_dataclasses.task_object import (
     TaskObject,
 )
 from flowcept.commons.vocabulary import Status
-from flowcept.configs import INSTRUMENTATION_ENABLED, REPLACE_NON_JSON_SERIALIZABLE, TELEMETRY_ENABLED, HOSTNAME
+from flowcept.configs import (
+    INSTRUMENTATION_ENABLED,
+    REPLACE_NON_JSON_SERIALIZABLE,
+    TELEMETRY_ENABLED,
+    HOSTNAME,
+    TASK_CAPTURE_MODE,
+)
 from flowcept.flowcept_api.flowcept_controller import Flowcept
 from flowcept.flowceptor.adapters.instrumentation_interceptor import InstrumentationInterceptor
+from flowcept.flowceptor.adapters.task_aggregator import CAPTURE_MODE_AGGREGATE
 from flowcept.commons.utils import replace_non_serializable
 
 
@@ -61,6 +68,7 @@ class FlowceptTask(object):
         stderr: str = None,
         status: Status = None,
         capture_telemetry: bool | None = None,
+        capture_mode: str = None,
     ):
         """
         Initializes a FlowceptTask and optionally finalizes it.
@@ -102,6 +110,11 @@ class FlowceptTask(object):
             Task completion status. If provided, defaults to Status.FINISHED if unspecified.
         capture_telemetry : bool, optional
             Per-task telemetry override. ``None`` follows the global telemetry setting.
+        capture_mode : str, optional
+            ``"full"`` sends the task. ``"aggregate"`` only adds its duration, status, and
+            numeric ``generated`` values to the interceptor's per-activity aggregates; no
+            telemetry is captured and ``used`` is not serialized. Defaults to
+            ``instrumentation.capture_mode``.
         """
         if not INSTRUMENTATION_ENABLED:
             self._ended = True
@@ -109,6 +122,10 @@ class FlowceptTask(object):
 
         self._task = TaskObject()
         self._interceptor = InstrumentationInterceptor.get_instance()
+        self._aggregate = (capture_mode or TASK_CAPTURE_MODE) == CAPTURE_MODE_AGGREGATE
+        if self._aggregate:
+            self._t0 = perf_counter()
+            capture_telemetry = False
         self._capture_telemetry = TELEMETRY_ENABLED if capture_telemetry is None else capture_telemetry
 
         if self._capture_telemetry:
@@ -122,7 +139,7 @@ class FlowceptTask(object):
         self._task.campaign_id = campaign_id or Flowcept.campaign_id
         self._task.parent_task_id = parent_task_id
 
-        if REPLACE_NON_JSON_SERIALIZABLE:
+        if REPLACE_NON_JSON_SERIALIZABLE and not self._aggregate:
             used = replace_non_serializable(used)
 
         self._task.used = used
@@ -135,7 +152,7 @@ class FlowceptTask(object):
         self._task.hostname = hostname or HOSTNAME
         self._task.custom_metadata = (
             replace_non_serializable(custom_metadata)
-            if (REPLACE_NON_JSON_SERIALIZABLE and custom_metadata is not None)
+            if (REPLACE_NON_JSON_SERIALIZABLE and custom_metadata is not None and not self._aggregate)
             else custom_metadata
         )
 
@@ -245,6 +262,17 @@ class FlowceptTask(object):
         """
         if not INSTRUMENTATION_ENABLED:
             return
+        if self._aggregate:
+            failed = (status or (Status.ERROR if stderr else Status.FINISHED)) == Status.ERROR
+            self._interceptor.task_aggregator.add(
+                self._task.activity_id,
+                perf_counter() - self._t0 if ended_at is None else ended_at - self._task.started_at,
+                failed,
+                None if failed else generated,
+                self._task.workflow_id,
+            )
+            self._ended = True
+            return
         if self._capture_telemetry:
             tel = self._interceptor.telemetry_capture.capture()
             self._task.telemetry_at_end = tel
@@ -282,6 +310,9 @@ class FlowceptTask(object):
         to prevent multiple submissions.
         """
         if not self._ended:
+            if self._aggregate:
+                self.end()
+                return
             if self._interceptor._mq_dao.buffer is None:
                 raise Exception("Did you start Flowcept?")
             self._task.status = Status.FINISHED
@@ -0,0 +1,268 @@
+"""Sampling policies for instrumented tasks."""
+
+import random
+from itertools import count
+from threading import Lock
+from time import monotonic, time
+from typing import Dict, List, Optional, Union
+from uuid import uuid4
+
+from flowcept.commons.flowcept_logger import FlowceptLogger
+from flowcept.commons.vocabulary import Status
+from flowcept.configs import HOSTNAME, TASK_SAMPLING
+
+SAMPLING_SUMMARY_SUBTYPE = "sampling_summary"
+
+
+class SamplingPolicy:
+    """Decide, call by call, whether a task is recorded."""
+
+    def should_record(self) -> bool:
+        """Return True if the current call must be recorded as a task."""
+        raise NotImplementedError()
+
+
+class EveryNthPolicy(SamplingPolicy):
+    """Record the first call and then one call out of every ``n``."""
+
+    def __init__(self, n: int):
+        if n < 1:
+            raise ValueError("n must be >= 1.")
+        self.n = n
+        # next() on a count is atomic, so no lock is needed on this path.
+        self._calls = count()
+
+    def should_record(self) -> bool:
+        """Return True for calls 1, n+1, 2n+1, ..."""
+        return next(self._calls) % self.n == 0
+
+    def __repr__(self):
+        return f"every_nth(n={self.n})"
+
+
+class ProbabilisticPolicy(SamplingPolicy):
+    """Record each call with probability ``rate``."""
+
+    def __init__(self, rate: float):
+        if not 0 <= rate <= 1:
+            raise ValueError("rate must be between 0 and 1.")
+        self.rate = rate
+
+    def should_record(self) -> bool:
+        """Return True with probability ``rate``."""
+        return random.random() < self.rate
+
+    def __repr__(self):
+        return f"probabilistic(rate={self.rate})"
+
+
+class TokenBucketPolicy(SamplingPolicy):
+    """Record at most ``rate`` calls per second on average, with bursts of up to ``burst`` calls."""
+
+    def __init__(self, rate: float, burst: int = None):
+        if rate <= 0:
+            raise ValueError("rate must be > 0.")
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._last = monotonic()
+        self._lock = Lock()
+
+    def should_record(self) -> bool:
+        """Take a token if one is available."""
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def __repr__(self):
+        return f"token_bucket(rate={self.rate}, burst={self.burst})"
+
+
+class FirstKThenEveryNthPolicy(SamplingPolicy):
+    """Record the first ``k`` calls, then one call out of every ``n``."""
+
+    def __init__(self, k: int, n: int):
+        if k < 0 or n < 1:
+            raise ValueError("k must be >= 0 and n must be >= 1.")
+        self.k = k
+        self.n = n
+        self._calls = count()
+
+    def should_record(self) -> bool:
+        """Return True for the first ``k`` calls and then for every ``n``-th call."""
+        calls = next(self._calls)
+        return calls < self.k or (calls - self.k) % self.n == 0
+
+    def __repr__(self):
+        return f"first_k_then_every_nth(k={self.k}, n={self.n})"
+
+
+_POLICIES = {
+    "every_nth": EveryNthPolicy,
+    "probabilistic": ProbabilisticPolicy,
+    "token_bucket": TokenBucketPolicy,
+    "first_k_then_every_nth": FirstKThenEveryNthPolicy,
+}
+
+
+def build_sampling_policy(spec: Union[SamplingPolicy, Dict, None]) -> Optional[SamplingPolicy]:
+    """
+    Build a sampling policy from its specification.
+
+    Parameters
+    ----------
+    spec : SamplingPolicy or dict or None
+        A policy instance, or a dict such as ``{"policy": "every_nth", "n": 100}``,
+        ``{"policy": "probabilistic", "rate": 0.01}``, ``{"policy": "token_bucket", "rate": 10, "burst": 20}``,
+        or ``{"policy": "first_k_then_every_nth", "k": 10, "n": 100}``.
+
+    Returns
+    -------
+    SamplingPolicy or None
+        None if ``spec`` is empty, meaning every call is recorded.
+    """
+    if not spec:
+        return None
+    if isinstance(spec, SamplingPolicy):
+        return spec
+    spec = dict(spec)
+    name = spec.pop("policy", None)
+    if name not in _POLICIES:
+        raise ValueError(f"Unknown sampling policy '{name}'. Use one of {list(_POLICIES)}.")
+    return _POLICIES[name](**spec)
+
+
+class _SamplingWindow:
+    __slots__ = ("start", "deadline", "recorded", "calls", "errors", "total", "min", "max")
+
+    def __init__(self, start: float, interval: float):
+        self.start = start
+        self.deadline = start + interval if interval else float("inf")
+        self.recorded = 0
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+
+class TaskSampler:
+    """
+    Apply a sampling policy to one activity and aggregate the calls that are not recorded.
+
+    The calls that are not recorded only update counters (calls, errors, total/min/max
+    duration). Every ``summary_interval`` seconds, and when Flowcept stops, the counters are
+    sent as one task message with ``subtype="sampling_summary"``, so the number and cost of
+    all calls can still be queried.
+
+    Counters are updated without a lock to keep the unrecorded path cheap; with many
+    threads calling the same function, a few updates racing with each other or with a
+    flush may be lost, so the counts are approximate in that case.
+    """
+
+    _instances: List["TaskSampler"] = []
+    _instances_lock = Lock()
+
+    def __init__(self, activity_id: str, policy: SamplingPolicy, interceptor, summary_interval: float = None):
+        self.activity_id = activity_id
+        self.policy = policy
+        self._interceptor = interceptor
+        self._summary_interval = (
+            TASK_SAMPLING.get("summary_interval_secs", 10) if summary_interval is None else summary_interval
+        )
+        self._flush_lock = Lock()
+        self._window = _SamplingWindow(time(), self._summary_interval)
+        with TaskSampler._instances_lock:
+            TaskSampler._instances.append(self)
+
+    @classmethod
+    def for_activity(cls, activity_id: str, spec=None, interceptor=None) -> Optional["TaskSampler"]:
+        """
+        Return a sampler for ``activity_id``, or None if all its calls must be recorded.
+
+        ``spec`` comes from the decorator; without it, ``instrumentation.sampling.activities``
+        and then ``instrumentation.sampling.default`` in the settings are used.
+        """
+        if spec is None:
+            spec = (TASK_SAMPLING.get("activities") or {}).get(activity_id, TASK_SAMPLING.get("default"))
+        policy = build_sampling_policy(spec)
+        if policy is None:
+            return None
+        return cls(activity_id, policy, interceptor)
+
+    def should_record(self) -> bool:
+        """Return True if the current call must be recorded as a task."""
+        if self.policy.should_record():
+            self._window.recorded += 1
+            return True
+        return False
+
+    def record(self, duration: float, failed: bool = False):
+        """Account for a call that was not recorded."""
+        window = self._window
+        window.calls += 1
+        window.total += duration
+        if failed:
+            window.errors += 1
+        if duration < window.min:
+            window.min = duration
+        if duration > window.max:
+            window.max = duration
+        if time() >= window.deadline:
+            self.flush()
+
+    def flush(self):
+        """Send the aggregated counters of the current window, if any call was left unrecorded."""
+        with self._flush_lock:
+            now = time()
+            window, self._window = self._window, _SamplingWindow(now, self._summary_interval)
+        if not window.calls:
+            return
+        summary = {
+            "calls": window.calls,
+            "errors": window.errors,
+            "recorded_calls": window.recorded,
+            "total_duration": window.total,
+            "min_duration": window.min,
+            "max_duration": window.max,
+            "avg_duration": window.total / window.calls,
+            "policy": repr(self.policy),
+        }
+
+        interceptor = self._interceptor
+        if interceptor is None or not interceptor.started:
+            FlowceptLogger().warning(f"Dropping the sampling summary of {self.activity_id}: Flowcept is not started.")
+            return
+        from flowcept.flowcept_api.flowcept_controller import Flowcept
+
+        interceptor.intercept(
+            {
+                "type": "task",
+                "subtype": SAMPLING_SUMMARY_SUBTYPE,
+                "task_id": str(uuid4()),
+                "activity_id": self.activity_id,
+                "workflow_id": Flowcept.current_workflow_id,
+                "campaign_id": Flowcept.campaign_id,
+                "started_at": window.start,
+                "ended_at": now,
+                "status": Status.FINISHED.value,
+                "hostname": HOSTNAME,
+                "generated": summary,
+            }
+        )
+
+
+def flush_sampling_summaries():
+    """Send the pending counters of every sampler. Called by ``Flowcept.stop``."""
+    with TaskSampler._instances_lock:
+        samplers = list(TaskSampler._instances)
+    for sampler in samplers:
+        try:
+            sampler.flush()
+        except Exception as e:
+            FlowceptLogger().exception(e)
@@ -1,47 +1,77 @@
-"""SSE endpoints streaming new/updated tasks and workflows via incremental DB polling."""
+"""SSE endpoints streaming new/updated tasks and workflows pushed by the shared live feed."""
 
 from __future__ import annotations
 
+import asyncio
 import json
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import anyio
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, Request
 from sse_starlette.sse import EventSourceResponse
 
-from flowcept.configs import WEBSERVER_SSE_MAX_BATCH, WEBSERVER_SSE_POLL_INTERVAL
+from flowcept.configs import WEBSERVER_SSE_MAX_BATCH
 from flowcept.flowcept_api.db_api import DBAPI
 from flowcept.commons.utils import normalize_docs
-from flowcept.webservice.services.streaming import poll_new_docs
+from flowcept.webservice.services.live_feed import FEED_CURSOR_FIELDS, get_live_feed
+from flowcept.webservice.services.streaming import _doc_cursor, poll_new_docs
 
 router = APIRouter(prefix="/stream", tags=["stream"])
 
 
-def _event_stream(
-    request: Request,
-    db: DBAPI,
-    collection: str,
-    base_filter: Dict[str, Any],
-    since: float,
-    poll_interval: float,
-):
-    """Async generator yielding one SSE event per poll that finds new documents."""
+def _resume_cursor(request: Request, since: Optional[float]) -> float:
+    """Resume from the ``Last-Event-ID`` header sent by reconnecting clients, else from ``since``, else now."""
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id:
+        try:
+            return float(last_event_id)
+        except ValueError:
+            pass
+    return time.time() if since is None else since
+
+
+def _event(collection: str, docs: List[Dict[str, Any]], cursor: float, truncated: bool = False) -> Dict[str, Any]:
+    payload = {collection: normalize_docs(docs), "cursor": cursor, "truncated": truncated}
+    return {"event": collection, "id": str(cursor), "data": json.dumps(payload)}
+
+
+def _event_stream(request: Request, db: DBAPI, collection: str, base_filter: Dict[str, Any], since: float):
+    """Async generator yielding the documents after ``since``, then the live feed's batches, as SSE events."""
     payload_key = collection  # "tasks" or "workflows"
+    fields = FEED_CURSOR_FIELDS[collection]
 
     async def generator():
+        feed = await anyio.to_thread.run_sync(get_live_feed)
+        # Subscribe first, so nothing published while catching up is missed.
+        subscription = feed.subscribe(collection, base_filter, asyncio.get_running_loop())
         cursor = since
-        while not await request.is_disconnected():
-            docs, new_cursor, truncated = await anyio.to_thread.run_sync(
-                poll_new_docs, db, collection, base_filter, cursor, WEBSERVER_SSE_MAX_BATCH
-            )
-            if docs:
-                cursor = new_cursor
-                yield {
-                    "event": payload_key,
-                    "data": json.dumps({payload_key: normalize_docs(docs), "cursor": cursor, "truncated": truncated}),
-                }
-            await anyio.sleep(poll_interval)
+        try:
+            replayed = feed.replay(collection, base_filter, cursor)
+            if replayed is None:
+                # Older than the feed's replay buffer: catch up from the DB.
+                truncated = True
+                while truncated:
+                    docs, cursor, truncated = await anyio.to_thread.run_sync(
+                        poll_new_docs, db, collection, base_filter, cursor, WEBSERVER_SSE_MAX_BATCH
+                    )
+                    if docs:
+                        yield _event(payload_key, docs, cursor, truncated)
+                replayed = []
+            pending = replayed
+            while True:
+                for i in range(0, len(pending), WEBSERVER_SSE_MAX_BATCH):
+                    docs = pending[i : i + WEBSERVER_SSE_MAX_BATCH]
+                    cursor = max(cursor, max(_doc_cursor(doc, fields) for doc in docs))
+                    yield _event(payload_key, docs, cursor)
+                pending = await subscription.queue.get()
+                while not subscription.queue.empty() and len(pending) < WEBSERVER_SSE_MAX_BATCH:
+                    pending = pending + subscription.queue.get_nowait()
+                if subscription.dropped or await request.is_disconnected():
+                    # Too slow: end the stream; the client resumes from its last event ID.
+                    break
+        finally:
+            feed.unsubscribe(subscription)
 
     return generator()
 
@@ -53,7 +83,6 @@ def stream_tasks(
     campaign_id: Optional[str] = None,
     agent_id: Optional[str] = None,
     since: Optional[float] = None,
-    poll_interval: float = Query(default=WEBSERVER_SSE_POLL_INTERVAL, ge=0.1, le=60.0),
     db: DBAPI = Depends(DBAPI),
 ) -> EventSourceResponse:
     """Stream new/updated tasks as SSE events, optionally scoped by workflow/campaign/agent."""
@@ -61,8 +90,8 @@ def stream_tasks(
     for key, value in (("workflow_id", workflow_id), ("campaign_id", campaign_id), ("agent_id", agent_id)):
         if value is not None:
             base_filter[key] = value
-    cursor = time.time() if since is None else since
-    return EventSourceResponse(_event_stream(request, db, "tasks", base_filter, cursor, poll_interval), ping=15)
+    cursor = _resume_cursor(request, since)
+    return EventSourceResponse(_event_stream(request, db, "tasks", base_filter, cursor), ping=15)
 
 
 @router.get("/workflows")
@@ -70,12 +99,11 @@ def stream_workflows(
     request: Request,
     campaign_id: Optional[str] = None,
     since: Optional[float] = None,
-    poll_interval: float = Query(default=WEBSERVER_SSE_POLL_INTERVAL, ge=0.1, le=60.0),
     db: DBAPI = Depends(DBAPI),
 ) -> EventSourceResponse:
     """Stream new workflows as SSE events, optionally scoped by campaign."""
     base_filter: Dict[str, Any] = {}
     if campaign_id is not None:
         base_filter["campaign_id"] = campaign_id
-    cursor = time.time() if since is None else since
-    return EventSourceResponse(_event_stream(request, db, "workflows", base_filter, cursor, poll_interval), ping=15)
+    cursor = _resume_cursor(request, since)
+    return EventSourceResponse(_event_stream(request, db, "workflows", base_filter, cursor), ping=15)
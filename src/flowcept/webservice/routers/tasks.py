@@ -8,7 +8,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from flowcept.flowcept_api.db_api import DBAPI
 from flowcept.webservice.schemas.common import ListResponse, QueryRequest
 from flowcept.commons.utils import normalize_docs
-from flowcept.webservice.services.sorting import sort_docs_by_first_date_field
+from flowcept.webservice.services.pagination import list_tasks_page
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
@@ -25,6 +25,15 @@ def _json_filter(filter_json: str | None) -> Dict[str, Any]:
     return parsed
 
 
+def _tasks_page(db: DBAPI, query_filter: Dict[str, Any], limit: int, cursor: str | None) -> ListResponse:
+    try:
+        docs, next_cursor = list_tasks_page(db, query_filter, limit, cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    normalized = normalize_docs(docs)
+    return ListResponse(items=normalized, count=len(normalized), limit=limit, next=next_cursor)
+
+
 @router.get("", response_model=ListResponse)
 def list_tasks(
     limit: int = Query(default=100, ge=1, le=1000),
@@ -34,9 +43,10 @@ def list_tasks(
     task_id: str | None = None,
     status: str | None = None,
     filter_json: str | None = None,
+    cursor: str | None = None,
     db: DBAPI = Depends(DBAPI),
 ) -> ListResponse:
-    """List tasks with optional basic filters."""
+    """List tasks with optional basic filters, newest first; pass ``next`` back as ``cursor`` for the next page."""
     query_filter = _json_filter(filter_json)
     if workflow_id is not None:
         query_filter["workflow_id"] = workflow_id
@@ -49,14 +59,7 @@ def list_tasks(
     if status is not None:
         query_filter["status"] = status
 
-    docs = db.task_query(filter=query_filter, limit=0) or []
-    docs = sort_docs_by_first_date_field(
-        docs,
-        ["started_at", "submitted_at", "registered_at", "ended_at", "utc_timestamp", "timestamp"],
-    )
-    docs = docs[:limit]
-    normalized = normalize_docs(docs)
-    return ListResponse(items=normalized, count=len(normalized), limit=limit)
+    return _tasks_page(db, query_filter, limit, cursor)
 
 
 @router.get("/{task_id}", response_model=Dict[str, Any])
@@ -73,17 +76,11 @@ def get_task(task_id: str, db: DBAPI = Depends(DBAPI)) -> Dict[str, Any]:
 def list_tasks_by_workflow(
     workflow_id: str,
     limit: int = Query(default=100, ge=1, le=1000),
+    cursor: str | None = None,
     db: DBAPI = Depends(DBAPI),
 ) -> ListResponse:
-    """List tasks for a workflow."""
-    docs = db.task_query(filter={"workflow_id": workflow_id}, limit=0) or []
-    docs = sort_docs_by_first_date_field(
-        docs,
-        ["started_at", "submitted_at", "registered_at", "ended_at", "utc_timestamp", "timestamp"],
-    )
-    docs = docs[:limit]
-    normalized = normalize_docs(docs)
-    return ListResponse(items=normalized, count=len(normalized), limit=limit)
+    """List tasks for a workflow, newest first; pass ``next`` back as ``cursor`` for the next page."""
+    return _tasks_page(db, {"workflow_id": workflow_id}, limit, cursor)
 
 
 @router.post("/query", response_model=ListResponse)
@@ -11,7 +11,7 @@ from fastapi.responses import Response
 from flowcept import Flowcept
 from flowcept.flowcept_api.db_api import DBAPI
 from flowcept.webservice.schemas.common import ListResponse, QueryRequest
-from flowcept.webservice.services.dataflow import build_dataflow
+from flowcept.webservice.services.dataflow import MAX_PAGE_TASKS, build_dataflow
 from flowcept.webservice.services.reports import workflow_card_response
 from flowcept.commons.utils import normalize_docs
 from flowcept.webservice.services.sorting import sort_docs_by_first_date_field
@@ -102,10 +102,15 @@ def query_workflows(payload: QueryRequest, db: DBAPI = Depends(DBAPI)) -> ListRe
 @router.get("/{workflow_id}/dataflow", response_model=Dict[str, Any])
 def get_workflow_dataflow(
     workflow_id: str,
+    limit: int = Query(default=MAX_PAGE_TASKS, ge=1, le=1000),
+    cursor: str | None = None,
     db: DBAPI = Depends(DBAPI),
 ) -> Dict[str, Any]:
-    """Get the PROV-style dataflow graph derived from tasks' used/generated fields."""
-    graph = build_dataflow(db, workflow_id)
+    """Get the PROV-style dataflow graph of a page of tasks, oldest first; pass ``next`` back as ``cursor``."""
+    try:
+        graph = build_dataflow(db, workflow_id, limit, cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     if graph is None:
         raise HTTPException(status_code=404, detail=f"No dataflow data for workflow: {workflow_id}")
     return graph
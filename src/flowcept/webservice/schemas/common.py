@@ -42,6 +42,7 @@ class ListResponse(BaseModel):
     items: List[Dict[str, Any]]
     count: int
     limit: int
+    next: str | None = None  # Cursor of the next page, for endpoints with keyset pagination.
 
 
 class ErrorResponse(BaseModel):
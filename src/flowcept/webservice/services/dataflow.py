@@ -7,18 +7,25 @@ Chunks are deduplicated by content, so an output chunk identical to another
 task's input chunk becomes a single shared node (direct lineage). Dashed
 "derived" edges link a producer's output chunk to a consumer's input chunk
 when they share non-trivial (key, value) pairs in temporal order.
+
+The graph is drawn a page of tasks at a time, oldest first; derived edges link the tasks of
+the same page. Lineage queries across the whole workflow walk the lineage index instead (see
+:mod:`flowcept.commons.daos.docdb_dao.lineage_index`).
 """
 
 from __future__ import annotations
 
-import json
 import re
-from typing import Any, Dict, List, Optional, Set
+from hashlib import blake2b
+from typing import Any, Dict, List, Optional, Tuple
 
+from flowcept.commons.daos.docdb_dao.lineage_index import flatten_payload, is_trivial, value_fingerprint
 from flowcept.flowcept_api.db_api import DBAPI
 from flowcept.commons.utils import to_epoch
+from flowcept.webservice.services.pagination import TASK_KEYSET_SORT_ASC, encode_cursor, list_tasks_page
 
-MAX_NODES = 400
+MAX_NODES = 400  # Per page: a page ends before the task that would exceed it.
+MAX_PAGE_TASKS = 200
 _TASK_PROJECTION = [
     "task_id",
     "activity_id",
@@ -33,17 +40,6 @@ _TASK_PROJECTION = [
 ]
 
 
-def _is_trivial(value: Any) -> bool:
-    """Values too common to imply a real producer→consumer link."""
-    if value is None or isinstance(value, bool):
-        return True
-    if isinstance(value, str) and len(value) <= 1:
-        return True
-    if isinstance(value, (int, float)) and value in (0, 1, -1):
-        return True
-    return False
-
-
 def _short(value: Any, max_len: int = 32) -> str:
     text = str(value)
     return text if len(text) <= max_len else text[: max_len - 1] + "…"
@@ -51,21 +47,23 @@ def _short(value: Any, max_len: int = 32) -> str:
 
 def _signature(payload: Dict[str, Any]) -> str:
     """Stable content signature for a used/generated dict."""
-    return json.dumps({k: repr(v) for k, v in sorted(payload.items())}, sort_keys=True)
+    items = sorted((str(k), repr(v)) for k, v in payload.items())
+    return blake2b(repr(items).encode(), digest_size=16).hexdigest()
 
 
 def get_lineage_task_ids(db: DBAPI, workflow_id: str, seed_task_ids: List[str]) -> List[str]:
-    """Return all task_ids reachable (ancestors + descendants) from the seed tasks.
+    """Return the seed tasks and all their ancestors and descendants.
 
-    Traverses the provenance graph derived from tasks' ``used``/``generated``
-    fields. If the workflow has no dataflow data, returns the seeds unchanged.
+    Walks the lineage index of the workflow: ancestors produced values the seeds (or other
+    ancestors) used, descendants used values the seeds (or other descendants) produced. If
+    the workflow has no dataflow data, returns the seeds unchanged.
 
     Parameters
     ----------
     db : DBAPI
         DB API facade.
     workflow_id : str
-        Workflow execution id — scopes the graph traversal.
+        Workflow execution id — scopes the traversal.
     seed_task_ids : list of str
         Task IDs to start the traversal from.
 
@@ -74,31 +72,13 @@ def get_lineage_task_ids(db: DBAPI, workflow_id: str, seed_task_ids: List[str])
     list of str
         All task_ids in the lineage subgraph (includes seeds).
     """
-    graph = build_dataflow(db, workflow_id)
-    if not graph:
-        return seed_task_ids
-
-    fwd: Dict[str, List[str]] = {}
-    bwd: Dict[str, List[str]] = {}
-    for e in graph["edges"]:
-        fwd.setdefault(e["source"], []).append(e["target"])
-        bwd.setdefault(e["target"], []).append(e["source"])
-
-    seeds: Set[str] = {f"task:{tid}" for tid in seed_task_ids}
-    visited: Set[str] = set(seeds)
-    stack = list(seeds)
-    while stack:
-        curr = stack.pop()
-        for adj in fwd.get(curr, []) + bwd.get(curr, []):
-            if adj not in visited:
-                visited.add(adj)
-                stack.append(adj)
+    return db.get_lineage(workflow_id, seed_task_ids, direction="both")
 
-    return [nid[5:] for nid in visited if nid.startswith("task:")]
 
-
-def build_dataflow(db: DBAPI, workflow_id: str) -> Optional[Dict[str, Any]]:
-    """Build the dataflow graph for a workflow.
+def build_dataflow(
+    db: DBAPI, workflow_id: str, limit: int = MAX_PAGE_TASKS, cursor: str | None = None
+) -> Optional[Dict[str, Any]]:
+    """Build one page of the dataflow graph for a workflow.
 
     Parameters
     ----------
@@ -106,19 +86,50 @@ def build_dataflow(db: DBAPI, workflow_id: str) -> Optional[Dict[str, Any]]:
         DB API facade.
     workflow_id : str
         Workflow execution id.
+    limit : int, optional
+        Maximum number of tasks with used/generated data in the page.
+    cursor : str, optional
+        The ``next`` token of the previous page.
 
     Returns
     -------
     dict or None
-        ``{"level", "nodes", "edges", "truncated"}`` or None when the workflow
-        has no tasks with used/generated data.
+        ``{"level", "nodes", "edges", "truncated", "next"}``, where ``next`` resumes the
+        graph after this page (``truncated`` is true when it is set), or None when the
+        workflow has no tasks with used/generated data.
+
+    Raises
+    ------
+    ValueError
+        If ``cursor`` is not a valid token.
     """
-    tasks = db.task_query(filter={"workflow_id": workflow_id}, projection=_TASK_PROJECTION) or []
-    tasks = [t for t in tasks if t.get("used") or t.get("generated")]
+    tasks, more = _dataflow_tasks(db, workflow_id, limit, cursor)
     if not tasks:
-        return None
-    tasks.sort(key=lambda t: to_epoch(t.get("started_at")) or 0)
-    return _coarse(tasks)
+        if cursor is None:
+            return None
+        return {"level": "coarse", "nodes": [], "edges": [], "truncated": False, "next": None}
+    graph = _coarse(tasks)
+    included = sum(1 for node in graph["nodes"] if node["kind"] == "task")
+    more = more or included < len(tasks)
+    graph["truncated"] = more
+    graph["next"] = encode_cursor(tasks[included - 1]) if more else None
+    return graph
+
+
+def _dataflow_tasks(db: DBAPI, workflow_id: str, limit: int, cursor: str | None) -> Tuple[List[Dict[str, Any]], bool]:
+    """Return up to ``limit`` tasks with used/generated data after ``cursor``, oldest first, and if more may follow."""
+    tasks: List[Dict[str, Any]] = []
+    while True:
+        page, cursor = list_tasks_page(
+            db, {"workflow_id": workflow_id}, limit, cursor, sort=TASK_KEYSET_SORT_ASC, projection=_TASK_PROJECTION
+        )
+        for i, task in enumerate(page):
+            if task.get("used") or task.get("generated"):
+                tasks.append(task)
+                if len(tasks) == limit:
+                    return tasks, cursor is not None or i < len(page) - 1
+        if cursor is None:
+            return tasks, False
 
 
 def _task_node(t: Dict[str, Any]) -> Dict[str, Any]:
@@ -141,28 +152,13 @@ def _task_node(t: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _flatten_payload(payload: Any) -> List[tuple[str, Any]]:
-    """Recursively extract flat key-value pairs from a nested structure."""
-    results = []
-    if isinstance(payload, dict):
-        for k, v in payload.items():
-            if isinstance(v, (dict, list)):
-                results.extend(_flatten_payload(v))
-            else:
-                results.append((k, v))
-    elif isinstance(payload, list):
-        for item in payload:
-            results.extend(_flatten_payload(item))
-    return results
-
-
 def _coarse(tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
     nodes: List[Dict[str, Any]] = []
     edges: List[Dict[str, Any]] = []
     chunks: Dict[str, Dict[str, Any]] = {}  # signature -> chunk node
     truncated = False
 
-    def _chunk(payload: Dict[str, Any], role: str) -> str:
+    def _chunk(payload: Dict[str, Any], role: str) -> Dict[str, Any]:
         sig = _signature(payload)
         chunk = chunks.get(sig)
         if chunk is None:
@@ -174,33 +170,36 @@ def _coarse(tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
             }
             chunks[sig] = chunk
         chunk["stats"]["roles"].add(role)
-        return chunk["id"]
+        return chunk
 
-    # Producer index for derived chunk→chunk edges: (key, repr(value)) -> [(task, out_chunk_id)]
-    producers: Dict[tuple, List[tuple]] = {}
+    # Producer index for derived chunk→chunk edges: value fingerprint -> [(task, out_chunk_id)]
+    producers: Dict[str, List[tuple]] = {}
+    input_ids: Dict[str, str] = {}  # task_id -> in_chunk_id
 
-    for t in tasks:
+    for i, t in enumerate(tasks):
         if len(nodes) + len(chunks) > MAX_NODES:
             truncated = True
+            tasks = tasks[:i]
             break
         nodes.append(_task_node(t))
         tid = t["task_id"]
         used, generated = t.get("used") or {}, t.get("generated") or {}
         if used:
-            in_id = _chunk(used, "input")
+            in_id = input_ids[tid] = _chunk(used, "input")["id"]
             edges.append({"source": in_id, "target": f"task:{tid}", "relation": "used"})
         if generated:
-            out_id = _chunk(generated, "output")
-            chunks[_signature(generated)]["stats"]["generated_by"].append(
+            out_chunk = _chunk(generated, "output")
+            out_id = out_chunk["id"]
+            out_chunk["stats"]["generated_by"].append(
                 {
                     "activity": t.get("activity_id") or "task",
                     "task_id": tid,
                 }
             )
             edges.append({"source": f"task:{tid}", "target": out_id, "relation": "generated"})
-            for key, value in _flatten_payload(generated):
-                if not _is_trivial(value):
-                    producers.setdefault((key, repr(value)), []).append((t, out_id))
+            for key, value in flatten_payload(generated):
+                if not is_trivial(value):
+                    producers.setdefault(value_fingerprint(key, value), []).append((t, out_id))
 
     # Derived edges: producer's output chunk → consumer's input chunk on shared values.
     seen_derived = set()
@@ -208,12 +207,12 @@ def _coarse(tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
         used = t.get("used") or {}
         if not used:
             continue
-        in_id = _chunk(used, "input")
+        in_id = input_ids[t["task_id"]]
         t_start = to_epoch(t.get("started_at"))
-        for key, value in _flatten_payload(used):
-            if _is_trivial(value):
+        for key, value in flatten_payload(used):
+            if is_trivial(value):
                 continue
-            for producer, out_id in producers.get((key, repr(value)), ()):
+            for producer, out_id in producers.get(value_fingerprint(key, value), ()):
                 if producer["task_id"] == t["task_id"] or out_id == in_id:
                     continue
                 p_end = to_epoch(producer.get("ended_at"))
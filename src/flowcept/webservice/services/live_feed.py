@@ -0,0 +1,284 @@
+"""Shared push-based feed backing the SSE live-stream endpoints.
+
+One source per webservice process follows the new and updated documents and fans them out
+to every connected SSE client, so the load on the DB and on the MQ does not grow with the
+number of open dashboards. Sources, tried in this order with ``web_server.sse_source: auto``:
+
+- ``change_stream``: MongoDB change streams (needs a replica set); pushes full documents.
+- ``mq``: an in-process subscriber on the MQ channel; pushes task and workflow messages as
+  published, which may be partial (e.g., the end message of a task).
+- ``poll``: a single :func:`poll_new_docs` loop over all the documents.
+
+Each client has its own filter, matched by the feed, and a bounded queue. A client whose
+queue is full is dropped: its stream ends and it resumes from its last event ID, served
+from the feed's replay buffer when recent enough, otherwise from the DB.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from threading import Lock, Thread
+from time import sleep, time
+from typing import Any, Dict, List, Optional
+
+from flowcept.commons.flowcept_logger import FlowceptLogger
+from flowcept.commons.msgpack_ext import decode_ext_storable
+from flowcept.configs import (
+    MQ_ENABLED,
+    MQ_GROUP_ID,
+    MQ_TYPE,
+    WEBSERVER_SSE_CLIENT_QUEUE_SIZE,
+    WEBSERVER_SSE_FLUSH_INTERVAL,
+    WEBSERVER_SSE_MAX_BATCH,
+    WEBSERVER_SSE_POLL_INTERVAL,
+    WEBSERVER_SSE_REPLAY_SIZE,
+    WEBSERVER_SSE_SOURCE,
+)
+from flowcept.flowcept_api.db_api import DBAPI
+from flowcept.flowceptor.consumers.base_consumer import BaseConsumer
+from flowcept.webservice.services.streaming import (
+    TASK_CURSOR_FIELDS,
+    WORKFLOW_CURSOR_FIELDS,
+    _doc_cursor,
+    poll_new_docs,
+)
+
+FEED_CURSOR_FIELDS = {"tasks": TASK_CURSOR_FIELDS, "workflows": WORKFLOW_CURSOR_FIELDS}
+FEED_SOURCES = ("change_stream", "mq", "poll")
+_MQ_MESSAGE_COLLECTIONS = {"task": "tasks", "workflow": "workflows"}
+
+
+def _matches(doc: Dict[str, Any], base_filter: Dict[str, Any]) -> bool:
+    return all(doc.get(key) == value for key, value in base_filter.items())
+
+
+class FeedSubscription:
+    """An SSE client of the live feed: its collection, its filter, and its queue of document batches."""
+
+    def __init__(self, collection: str, base_filter: Dict[str, Any], loop, queue_size: int):
+        self.collection = collection
+        self.base_filter = base_filter
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+        self._loop = loop
+
+    def matches(self, doc: Dict[str, Any]) -> bool:
+        """Return whether ``doc`` matches the client's equality filter."""
+        return _matches(doc, self.base_filter)
+
+    def offer(self, docs: List[Dict[str, Any]]) -> bool:
+        """Queue a batch for the client from any thread; False once the client is dropped."""
+        if self.dropped:
+            return False
+        try:
+            self._loop.call_soon_threadsafe(self._put, docs)
+        except RuntimeError:  # The client's event loop is closed.
+            self.dropped = True
+        return not self.dropped
+
+    def _put(self, docs):
+        try:
+            self.queue.put_nowait(docs)
+        except asyncio.QueueFull:
+            self.dropped = True
+
+
+class LiveFeed:
+    """
+    Fan-out hub between one stream source and the SSE clients.
+
+    Sources call :meth:`publish` from their thread. Every ``flush_interval`` seconds, the
+    documents published since the last flush are matched against each subscription and
+    queued to it in one batch. The last ``replay_size`` documents per collection are kept
+    so that reconnecting clients resume (see :meth:`replay`) without querying the DB.
+    """
+
+    def __init__(
+        self,
+        source: str = WEBSERVER_SSE_SOURCE,
+        flush_interval: float = WEBSERVER_SSE_FLUSH_INTERVAL,
+        queue_size: int = WEBSERVER_SSE_CLIENT_QUEUE_SIZE,
+        replay_size: int = WEBSERVER_SSE_REPLAY_SIZE,
+    ):
+        if source != "auto" and source not in FEED_SOURCES:
+            raise ValueError(f"Unknown SSE source '{source}'. Use auto or one of {', '.join(FEED_SOURCES)}.")
+        self.logger = FlowceptLogger()
+        self.requested_source = source
+        self.source: Optional[str] = None
+        self.flush_interval = flush_interval
+        self.queue_size = max(1, queue_size)
+        self._subscriptions: List[FeedSubscription] = []
+        self._pending: Dict[str, List[Dict]] = {c: [] for c in FEED_CURSOR_FIELDS}
+        self._replay: Dict[str, deque] = {c: deque(maxlen=max(1, replay_size)) for c in FEED_CURSOR_FIELDS}
+        started_at = time()
+        self._replay_from: Dict[str, float] = {c: started_at for c in FEED_CURSOR_FIELDS}
+        self._lock = Lock()
+
+    def start(self) -> "LiveFeed":
+        """Start the first available source and the fan-out thread."""
+        sources = FEED_SOURCES if self.requested_source == "auto" else (self.requested_source, "poll")
+        for source in sources:
+            try:
+                if getattr(self, f"_start_{source}")():
+                    self.source = source
+                    break
+            except Exception as e:
+                self.logger.warning(f"SSE source '{source}' is not available: {e}")
+        self.logger.info(f"SSE streams are fed by the '{self.source}' source.")
+        Thread(target=self._dispatch_loop, name="flowcept-sse-dispatch", daemon=True).start()
+        return self
+
+    def subscribe(self, collection: str, base_filter: Dict[str, Any], loop) -> FeedSubscription:
+        """Register a client; batches are queued to it on ``loop``."""
+        subscription = FeedSubscription(collection, base_filter, loop, self.queue_size)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: FeedSubscription):
+        """Remove a client."""
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def publish(self, collection: str, docs: List[Dict[str, Any]]):
+        """Add new or updated documents to the feed (called by the sources)."""
+        fields = FEED_CURSOR_FIELDS[collection]
+        replay = self._replay[collection]
+        with self._lock:
+            for doc in docs:
+                if len(replay) == replay.maxlen:
+                    self._replay_from[collection] = max(self._replay_from[collection], replay[0][0])
+                replay.append((_doc_cursor(doc, fields), doc))
+            self._pending[collection].extend(docs)
+
+    def replay(self, collection: str, base_filter: Dict[str, Any], since: float) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return the buffered documents matching ``base_filter`` beyond the cursor ``since``.
+
+        Returns
+        -------
+        list of dict or None
+            The documents in cursor order, or None if ``since`` is older than the buffer, in
+            which case the client has to catch up from the DB.
+        """
+        with self._lock:
+            if since < self._replay_from[collection]:
+                return None
+            docs = [(cursor, doc) for cursor, doc in self._replay[collection] if cursor > since]
+        docs.sort(key=lambda item: item[0])
+        return [doc for _, doc in docs if _matches(doc, base_filter)]
+
+    def _flush(self):
+        """Queue the documents published since the last flush to the matching clients."""
+        with self._lock:
+            pending = self._pending
+            self._pending = {c: [] for c in FEED_CURSOR_FIELDS}
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.dropped:
+                self.logger.warning("Dropped a slow SSE client; it will resume from its last event.")
+                self.unsubscribe(subscription)
+                continue
+            docs = [doc for doc in pending[subscription.collection] if subscription.matches(doc)]
+            if docs:
+                subscription.offer(docs)
+
+    def _dispatch_loop(self):
+        while True:
+            sleep(self.flush_interval)
+            try:
+                self._flush()
+            except Exception as e:
+                self.logger.exception(e)
+
+    def _start_change_stream(self) -> bool:
+        dao = DBAPI.get_dao_instance()
+        if not hasattr(dao, "watch"):
+            return False
+        stream = dao.watch(list(FEED_CURSOR_FIELDS))  # Fails right away without a replica set.
+        Thread(target=self._follow_change_stream, args=(dao, stream), name="flowcept-sse-source", daemon=True).start()
+        return True
+
+    def _follow_change_stream(self, dao, stream):
+        resume_token = None
+        while True:
+            try:
+                with stream:
+                    for change in stream:
+                        resume_token = change["_id"]
+                        doc = change.get("fullDocument")
+                        if doc is not None:
+                            doc.pop("_id", None)
+                            self.publish(change["ns"]["coll"], [doc])
+            except Exception as e:
+                self.logger.exception(e)
+                sleep(1)
+            try:
+                stream = dao.watch(list(FEED_CURSOR_FIELDS), resume_after=resume_token)
+            except Exception as e:
+                self.logger.exception(e)
+                sleep(1)
+
+    def _start_mq(self) -> bool:
+        if not MQ_ENABLED:
+            return False
+        if MQ_TYPE == "kafka" and MQ_GROUP_ID and MQ_GROUP_ID != "auto":
+            # Sharing the consumers' group would take messages away from them.
+            self.logger.warning("The mq SSE source needs mq.group_id: auto with Kafka.")
+            return False
+        _MQTap(self).start(daemon=True)
+        return True
+
+    def _start_poll(self) -> bool:
+        Thread(target=self._poll_loop, name="flowcept-sse-source", daemon=True).start()
+        return True
+
+    def _poll_loop(self):
+        db = DBAPI()
+        cursors = {collection: time() for collection in FEED_CURSOR_FIELDS}
+        while True:
+            truncated = False
+            for collection in FEED_CURSOR_FIELDS:
+                try:
+                    docs, cursors[collection], more = poll_new_docs(
+                        db, collection, {}, cursors[collection], WEBSERVER_SSE_MAX_BATCH
+                    )
+                except Exception as e:
+                    self.logger.exception(e)
+                    continue
+                if docs:
+                    self.publish(collection, docs)
+                truncated = truncated or more
+            if not truncated:
+                sleep(WEBSERVER_SSE_POLL_INTERVAL)
+
+
+class _MQTap(BaseConsumer):
+    """Subscriber receiving every task and workflow message of the MQ channel for the live feed."""
+
+    def __init__(self, feed: LiveFeed):
+        super().__init__()
+        self._feed = feed
+        self._mq_dao.ext_hook = decode_ext_storable
+
+    def message_handler(self, msg_obj: Dict) -> bool:
+        """Publish task and workflow messages; never stops listening."""
+        collection = _MQ_MESSAGE_COLLECTIONS.get(msg_obj.get("type"))
+        if collection is not None:
+            self._feed.publish(collection, [msg_obj])
+        return True
+
+
+_live_feed: Optional[LiveFeed] = None
+_live_feed_lock = Lock()
+
+
+def get_live_feed() -> LiveFeed:
+    """Return the process-wide live feed, starting it on first use."""
+    global _live_feed
+    with _live_feed_lock:
+        if _live_feed is None:
+            _live_feed = LiveFeed().start()
+    return _live_feed
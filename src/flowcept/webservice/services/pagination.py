@@ -0,0 +1,120 @@
+"""Keyset (cursor) pagination helpers for webservice list endpoints."""
+
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from flowcept.commons.utils import to_epoch
+from flowcept.configs import MONGO_ENABLED
+from flowcept.flowcept_api.db_api import DBAPI
+
+# Tasks are listed newest first; task_id breaks ties between tasks started at the same time.
+# Tasks without started_at come last. Both database backends have an index for this order.
+TASK_KEYSET_SORT = [("started_at", -1), ("task_id", -1)]
+# The same order reversed (oldest first, tasks without started_at first), e.g. to draw graphs.
+TASK_KEYSET_SORT_ASC = [("started_at", 1), ("task_id", 1)]
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """Return the opaque token resuming a listing right after ``doc``.
+
+    A ``started_at`` stored as a datetime (MongoDB) is encoded as epoch seconds.
+    """
+    started_at, task_id = (doc.get(field) for field, _ in TASK_KEYSET_SORT)
+    if isinstance(started_at, datetime):
+        started_at = to_epoch(started_at)
+    raw = json.dumps([started_at, task_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[Any, Any]:
+    """Return the ``(started_at, task_id)`` position encoded in a token.
+
+    Raises
+    ------
+    ValueError
+        If the token was not produced by :func:`encode_cursor`.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        started_at, task_id = json.loads(raw)
+    except Exception as exc:
+        raise ValueError(f"Invalid cursor: {token}") from exc
+    if not isinstance(task_id, str) or not (started_at is None or isinstance(started_at, (int, float, str))):
+        raise ValueError(f"Invalid cursor: {token}")
+    return started_at, task_id
+
+
+def keyset_filter(
+    query_filter: Dict[str, Any], started_at: Any, task_id: str, sort: List = TASK_KEYSET_SORT
+) -> Dict[str, Any]:
+    """Restrict ``query_filter`` to the tasks sorted after ``(started_at, task_id)`` in ``sort``.
+
+    ``sort`` is ``TASK_KEYSET_SORT`` or ``TASK_KEYSET_SORT_ASC``.
+    """
+    started_at = _stored_started_at(started_at)
+    if sort[0][1] < 0:
+        if started_at is None:
+            after = {"started_at": None, "task_id": {"$lt": task_id}}
+        else:
+            # The started_at=None clause goes first: it cannot use an index, so LMDB stops planning
+            # the $or there instead of collecting the (large) started_at range first.
+            after = {
+                "$or": [
+                    {"started_at": None},
+                    {"started_at": {"$lt": started_at}},
+                    {"started_at": started_at, "task_id": {"$lt": task_id}},
+                ]
+            }
+    elif started_at is None:
+        after = {"$or": [{"started_at": {"$ne": None}}, {"started_at": None, "task_id": {"$gt": task_id}}]}
+    else:
+        after = {
+            "$or": [
+                {"started_at": {"$gt": started_at}},
+                {"started_at": started_at, "task_id": {"$gt": task_id}},
+            ]
+        }
+    return {"$and": [query_filter, after]} if query_filter else after
+
+
+def _stored_started_at(started_at: Any) -> Any:
+    """Return a cursor's ``started_at`` as the backend stores it, for the bound to compare with it.
+
+    MongoDB stores the task times as (UTC) dates, which it never orders against numbers; naive
+    datetimes are taken as UTC and compare with the ones it returns. LMDB stores them as given.
+    """
+    if MONGO_ENABLED and isinstance(started_at, (int, float)):
+        return datetime.fromtimestamp(started_at, timezone.utc).replace(tzinfo=None)
+    return started_at
+
+
+def list_tasks_page(
+    db: DBAPI,
+    query_filter: Dict[str, Any],
+    limit: int,
+    cursor: str | None = None,
+    sort: List = TASK_KEYSET_SORT,
+    projection: List[str] | None = None,
+) -> Tuple[List[Dict[str, Any]], str | None]:
+    """Return one page of tasks in ``sort`` order and the token of the next page, if any.
+
+    The sort and the limit are pushed down to the database, which reads one row past the page
+    to know whether there is a next one. A ``projection`` must keep ``started_at`` and
+    ``task_id``, which the token is made of.
+
+    Raises
+    ------
+    ValueError
+        If ``cursor`` is not a valid token.
+    """
+    if cursor:
+        query_filter = keyset_filter(query_filter, *decode_cursor(cursor), sort=sort)
+    docs = db.task_query(filter=query_filter, projection=projection, limit=limit + 1, sort=sort) or []
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1])
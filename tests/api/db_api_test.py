@@ -629,6 +629,88 @@ class DBAPITest(unittest.TestCase):
         }
         Flowcept.db._dao().get_tasks_recursive("e9a3b567-cb56-4884-ba14-f137c0260191", mapping=mapping)
 
+    def test_tasks_recursive_tree(self):
+        wf_id = str(uuid4())
+        tasks = [{"task_id": f"{wf_id}-root", "workflow_id": wf_id, "activity_id": "root"}]
+        for i in range(3):
+            child_id = f"{wf_id}-{i}"
+            tasks.append({"task_id": child_id, "parent_task_id": f"{wf_id}-root", "activity_id": "child"})
+            for j in range(2):
+                tasks.append({"task_id": f"{child_id}-{j}", "parent_task_id": child_id, "activity_id": "leaf"})
+        for task in tasks:
+            task.setdefault("workflow_id", wf_id)
+            task["status"] = Status.FINISHED.value
+        dao = Flowcept.db._dao()
+        dao.insert_and_update_many_tasks(tasks, "task_id")
+
+        result = Flowcept.db.get_tasks_recursive(wf_id)
+        assert [t["depth"] for t in result] == [0, 1, 1, 1, 2, 2, 2, 2, 2, 2]
+        leaf = result[-1]
+        assert leaf["ancestor_ids"] == [{"root": f"{wf_id}-root"}, {"child": leaf["parent_task_id"]}]
+        assert len(Flowcept.db.get_tasks_recursive(wf_id, max_depth=1)) == 4
+
+        mapping = {"activity_id": {"leaf": {"root_id": "primogenitor['task_id']"}}, "subtype": {}}
+        leaves = [t for t in Flowcept.db.get_tasks_recursive(wf_id, mapping=mapping) if t["depth"] == 2]
+        assert all(t["custom_characterization"] == {"root_id": f"{wf_id}-root"} for t in leaves)
+
+        import json
+        import os
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, "tasks.jsonl")
+            Flowcept.db.dump_tasks_to_file_recursive(wf_id, output_file=output_file)
+            with open(output_file) as f:
+                assert [json.loads(line)["depth"] for line in f] == [0, 1, 1, 1, 2, 2, 2, 2, 2, 2]
+        dao.delete_task_keys("task_id", [t["task_id"] for t in tasks])
+
+    def test_lineage_index(self):
+        wf_id = str(uuid4())
+        load = {"task_id": f"{wf_id}-load", "started_at": 1.0, "ended_at": 2.0, "generated": {"path": "/d/x.csv"}}
+        train = {"task_id": f"{wf_id}-train", "started_at": 3.0, "used": {"path": "/d/x.csv"}}
+        train_end = {"task_id": f"{wf_id}-train", "ended_at": 4.0, "generated": {"model": "m-1"}}
+        evaluate = {"task_id": f"{wf_id}-eval", "started_at": 5.0, "ended_at": 6.0, "used": {"model": "m-1"}}
+        early = {"task_id": f"{wf_id}-early", "started_at": 0.5, "ended_at": 0.6, "used": {"model": "m-1"}}
+        dao = Flowcept.db._dao()
+        for batch in ([evaluate, early], [train], [load, train_end]):  # In any order, split across flushes.
+            for task in batch:
+                task["workflow_id"] = wf_id
+            dao.insert_and_update_many_tasks(batch, "task_id")
+            dao.update_lineage_index(batch)
+
+        assert Flowcept.db.get_lineage(wf_id, [f"{wf_id}-train"]) == [
+            f"{wf_id}-train",
+            f"{wf_id}-load",
+            f"{wf_id}-eval",
+        ]
+        assert Flowcept.db.get_lineage(wf_id, [f"{wf_id}-eval"], "upstream", max_depth=1) == [
+            f"{wf_id}-eval",
+            f"{wf_id}-train",
+        ]
+        assert Flowcept.db.get_lineage(wf_id, [f"{wf_id}-early"]) == [f"{wf_id}-early"]  # Started before m-1 existed.
+        Flowcept.db.rebuild_lineage_index(wf_id)
+        assert Flowcept.db.get_lineage(wf_id, [f"{wf_id}-load"], "downstream") == [
+            f"{wf_id}-load",
+            f"{wf_id}-train",
+            f"{wf_id}-eval",
+        ]
+        dao._delete_lineage_index(wf_id)
+        dao.delete_task_keys("task_id", [f"{wf_id}-{name}" for name in ("load", "train", "eval", "early")])
+
+    def test_lineage_of_a_workflow_not_indexed_yet(self):
+        wf_id = str(uuid4())
+        load = {"task_id": f"{wf_id}-load", "started_at": 1.0, "ended_at": 2.0, "generated": {"path": "/d/y.csv"}}
+        train = {"task_id": f"{wf_id}-train", "started_at": 3.0, "ended_at": 4.0, "used": {"path": "/d/y.csv"}}
+        dao = Flowcept.db._dao()
+        for task in (load, train):
+            task["workflow_id"] = wf_id
+        dao.insert_and_update_many_tasks([load, train], "task_id")  # Stored without the index.
+
+        assert Flowcept.db.get_lineage(wf_id, [f"{wf_id}-train"]) == [f"{wf_id}-train", f"{wf_id}-load"]
+        assert dao._has_lineage_postings(wf_id)
+        dao._delete_lineage_index(wf_id)
+        dao.delete_task_keys("task_id", [f"{wf_id}-load", f"{wf_id}-train"])
+
     @unittest.skipIf(not MONGO_ENABLED, "MongoDB is disabled")
     def test_dump(self):
         wf_id = str(uuid4())
@@ -694,6 +776,227 @@ class DBAPITest(unittest.TestCase):
             assert dao.get_dashboard(dashboard_id) is None
             dao.close()
 
+    def test_lmdb_indexed_task_query(self):
+        """LMDB index-backed queries match full-scan filtering and honor projection/sort/limit."""
+        import tempfile
+        import pytest
+
+        if not LMDB_ENABLED:
+            pytest.skip("LMDB not enabled.")
+        from flowcept.commons.daos.docdb_dao.lmdb_dao import LMDBDAO
+        from flowcept.configs import LMDB_SETTINGS
+
+        docs = [
+            {
+                "task_id": f"t{i:04d}",
+                "workflow_id": f"wf{i % 5}",
+                "activity_id": f"act{i % 3}",
+                "status": "FINISHED" if i % 2 else "RUNNING",
+                "started_at": float(i),
+                "used": {"x": i},
+            }
+            for i in range(300)
+        ]
+        filters = [
+            {"workflow_id": "wf1"},
+            {"task_id": {"$in": ["t0001", "t0002", "missing"]}},
+            {"workflow_id": "wf2", "status": "RUNNING"},
+            {"started_at": {"$gt": 10, "$lte": 40}},
+            {"$or": [{"workflow_id": "wf3"}, {"activity_id": "act1"}]},
+            {"$and": [{"workflow_id": "wf4"}, {"started_at": {"$lt": 100}}]},
+            {"status": {"$in": ["RUNNING"]}, "used": {"$ne": None}},
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir, patch.dict(LMDB_SETTINGS, {"path": tmp_dir}):
+            dao = LMDBDAO()
+            try:
+                assert dao.insert_and_update_many_tasks(docs, "task_id")
+                for _filter in filters:
+                    expected = sorted(d["task_id"] for d in docs if LMDBDAO._match_filter(d, _filter))
+                    assert sorted(d["task_id"] for d in dao.task_query(filter=_filter)) == expected
+
+                rs = dao.task_query(
+                    filter={"workflow_id": "wf1"}, projection=["task_id", "used.x"], sort=[("started_at", -1)], limit=2
+                )
+                assert rs == [{"task_id": "t0296", "used": {"x": 296}}, {"task_id": "t0291", "used": {"x": 291}}]
+
+                # Updating an indexed field moves the task between index entries.
+                assert dao.insert_and_update_many_tasks([{"task_id": "t0001", "workflow_id": "wf_new"}], "task_id")
+                assert [d["task_id"] for d in dao.task_query(filter={"workflow_id": "wf_new"})] == ["t0001"]
+                assert "t0001" not in {d["task_id"] for d in dao.task_query(filter={"workflow_id": "wf1"})}
+
+                assert dao.delete_task_keys("workflow_id", ["wf_new"])
+                assert dao.task_query(filter={"workflow_id": "wf_new"}) == []
+            finally:
+                dao.close()
+
+    def test_lmdb_task_upsert_merges_across_batches(self):
+        """LMDB merges a task's messages from separate flushes and keeps finished statuses."""
+        import tempfile
+        import pytest
+
+        if not LMDB_ENABLED:
+            pytest.skip("LMDB not enabled.")
+        from flowcept.commons.daos.docdb_dao.lmdb_dao import LMDBDAO
+        from flowcept.configs import LMDB_SETTINGS
+
+        running = {
+            "task_id": "t1",
+            "workflow_id": "wf1",
+            "status": Status.RUNNING.value,
+            "started_at": 1.0,
+            "used": {"x": 1},
+            "telemetry_at_start": {"cpu": {"percent_all": 10}},
+        }
+        finished = {
+            "task_id": "t1",
+            "status": Status.FINISHED.value,
+            "ended_at": 2.0,
+            "used": {"y": 2},
+            "generated": {"z": 3},
+        }
+        with tempfile.TemporaryDirectory() as tmp_dir, patch.dict(LMDB_SETTINGS, {"path": tmp_dir}):
+            dao = LMDBDAO()
+            try:
+                assert dao.insert_and_update_many_tasks([running], "task_id")
+                assert dao.insert_and_update_many_tasks([finished], "task_id")
+                doc = dao.task_query(filter={"task_id": "t1"})[0]
+                assert doc["status"] == Status.FINISHED.value
+                assert doc["used"] == {"x": 1, "y": 2}
+                assert doc["generated"] == {"z": 3}
+                assert doc["telemetry_at_start"] == {"cpu": {"percent_all": 10}}
+                assert doc["started_at"] == 1.0 and doc["ended_at"] == 2.0
+                assert [d["task_id"] for d in dao.task_query(filter={"workflow_id": "wf1"})] == ["t1"]
+
+                # A late RUNNING message must not downgrade the finished task.
+                assert dao.insert_and_update_many_tasks([dict(running, task_id="t2")], "task_id")
+                assert dao.insert_and_update_many_tasks([dict(finished, task_id="t2")], "task_id")
+                assert dao.insert_and_update_many_tasks([dict(running, task_id="t2")], "task_id")
+                doc = dao.task_query(filter={"task_id": "t2"})[0]
+                assert doc["status"] == Status.FINISHED.value
+                assert dao.task_query(filter={"status": Status.RUNNING.value}) == []
+            finally:
+                dao.close()
+
+    def test_lmdb_value_codecs_and_migration(self):
+        """LMDB reads legacy JSON and binary values, and migrates stored values between codecs."""
+        import json
+        import tempfile
+        import pytest
+
+        if not LMDB_ENABLED:
+            pytest.skip("LMDB not enabled.")
+        from flowcept.commons.daos.docdb_dao.lmdb_codec import LMDBValueCodec
+        from flowcept.commons.daos.docdb_dao.lmdb_dao import LMDBDAO
+        from flowcept.configs import LMDB_SETTINGS
+
+        doc = {"task_id": "t1", "workflow_id": "wf1", "started_at": 1.5, "used": {"x": [1, 2], "nan": float("nan")}}
+        for name in ("json", "orjson", "msgpack"):
+            decoded = LMDBValueCodec.decode(LMDBValueCodec(name).encode(doc))
+            assert decoded["used"]["x"] == [1, 2] and decoded["started_at"] == 1.5
+        # Values the binary codec cannot represent fall back to plain JSON.
+        assert LMDBValueCodec.codec_name(LMDBValueCodec("msgpack").encode({"big": 2**70})) == "json"
+        with pytest.raises(ValueError):
+            LMDBValueCodec("pickle")
+
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            patch.dict(LMDB_SETTINGS, {"path": tmp_dir}),
+            patch("flowcept.commons.daos.docdb_dao.lmdb_dao.LMDB_VALUE_CODEC", "json"),
+        ):
+            dao = LMDBDAO()
+            try:
+                # The json codec writes legacy header-less JSON values.
+                assert dao.insert_and_update_many_tasks([dict(doc, task_id=f"t{i}") for i in range(25)], "task_id")
+                with dao._env.begin(db=dao._tasks_db) as txn:
+                    assert json.loads(txn.get(b"t1").decode())["task_id"] == "t1"
+                assert dao.insert_or_update_workflow(WorkflowObject(workflow_id="wf1"))
+
+                migrated = dao.migrate_value_codec("msgpack", batch_size=10)
+                assert migrated["tasks"] == 25 and migrated["workflows"] == 1
+                assert dao.migrate_value_codec("msgpack")["tasks"] == 0
+                with dao._env.begin(db=dao._tasks_db) as txn:
+                    assert all(LMDBValueCodec.codec_name(v) == "msgpack" for _, v in txn.cursor())
+                assert len(dao.task_query(filter={"workflow_id": "wf1"})) == 25
+                assert dao.workflow_query(filter={"workflow_id": "wf1"})[0]["workflow_id"] == "wf1"
+            finally:
+                dao.close()
+
+    def test_lmdb_columnar_aggregations(self):
+        """LMDB aggregations give the same results with in-process and parallel scans."""
+        import tempfile
+        import pytest
+
+        if not LMDB_ENABLED:
+            pytest.skip("LMDB not enabled.")
+        from flowcept.commons.daos.docdb_dao.lmdb_dao import LMDBDAO
+        from flowcept.configs import LMDB_SETTINGS
+
+        docs = []
+        for i in range(40):
+            docs.append(
+                {
+                    "task_id": f"t{i:02d}",
+                    "workflow_id": "wf1",
+                    "campaign_id": "c1",
+                    "activity_id": "train" if i % 2 else "eval",
+                    "status": "ERROR" if i % 10 == 0 else "FINISHED",
+                    "agent_id": "a1" if i < 10 else None,
+                    "started_at": 1000.0 + i,
+                    "ended_at": 1000.0 + 2 * i,
+                    "generated": {"loss": float(i)},
+                }
+            )
+        docs.append({"task_id": "t99", "workflow_id": "wf2", "activity_id": "eval", "status": "RUNNING"})
+        cards = [
+            {"group_by": "activity_id", "metrics": [{"agg": "count"}, {"field": "generated.loss", "agg": "max"}]},
+            {"metrics": [{"field": "elapsed", "agg": "avg"}], "filter": {"workflow_id": "wf1"}},
+            {"group_by": "status", "metrics": [{"field": "started_at", "agg": "min"}]},
+        ]
+
+        with tempfile.TemporaryDirectory() as tmp_dir, patch.dict(LMDB_SETTINGS, {"path": tmp_dir}):
+            dao = LMDBDAO()
+            try:
+                assert dao.insert_and_update_many_tasks(docs, "task_id")
+                wf = WorkflowObject(workflow_id="wf1")
+                wf.campaign_id, wf.utc_timestamp = "c1", 900.0
+                assert dao.insert_or_update_workflow(wf)
+                assert dao.insert_or_update_agent(AgentObject(agent_id="a1", name="agent"))
+
+                def _run():
+                    return (
+                        dao.task_summary({"workflow_id": {"$in": ["wf1", "wf2"]}}),
+                        dao.derive_campaigns(),
+                        dao.derive_agents(),
+                        dao.telemetry_timeseries({"activity_id": "train"}, fields=["generated.loss"], limit=5),
+                        [dao.resolve_chart_data(card) for card in cards],
+                    )
+
+                summary, campaigns, agents, series, charts = _run()
+                assert summary["count"] == 41
+                assert summary["status_counts"] == {"FINISHED": 36, "ERROR": 4, "RUNNING": 1}
+                eval_stats = next(a for a in summary["activity_stats"] if a["activity_id"] == "eval")
+                assert eval_stats["count"] == 21
+                assert eval_stats["min_duration"] == 0 and eval_stats["max_duration"] == 38
+                assert summary["time_range"] == {"min_started_at": 1000.0, "max_ended_at": 1078.0}
+                assert campaigns[0]["campaign_id"] == "c1"
+                assert campaigns[0]["task_count"] == 40 and campaigns[0]["workflow_count"] == 1
+                assert (campaigns[0]["first_ts"], campaigns[0]["last_ts"]) == (900.0, 1078.0)
+                assert agents[0]["task_count"] == 10 and agents[0]["activities"] == ["eval", "train"]
+                assert [r["task_id"] for r in series] == ["t01", "t03", "t05", "t07", "t09"]
+                assert series[0]["generated.loss"] == 1.0
+                rows = {r["activity_id"]: r for r in charts[0]["rows"]}
+                assert rows["train"] == {"activity_id": "train", "count": 20, "max_generated.loss": 39.0}
+                assert rows["eval"]["count"] == 21
+                assert charts[1]["rows"] == [{"group": None, "avg_elapsed": 19.5}]
+
+                with (
+                    patch("flowcept.commons.daos.docdb_dao.lmdb_dao.LMDB_SCAN_WORKERS", 2),
+                    patch("flowcept.commons.daos.docdb_dao.lmdb_dao.LMDB_PARALLEL_SCAN_MIN_RECORDS", 1),
+                ):
+                    assert _run() == (summary, campaigns, agents, series, charts)
+            finally:
+                dao.close()
+
     def test_dbapi_analytics_methods(self):
         """DBAPI exposes task_summary, derive_campaigns, derive_agents, telemetry_timeseries."""
         if not Flowcept.services_alive():
@@ -2,10 +2,15 @@ import unittest
 from types import SimpleNamespace
 from uuid import uuid4
 
+import numpy as np
+import pytest
 
+from flowcept import Flowcept
 from flowcept.commons.daos.docdb_dao.mongodb_dao import MongoDBDAO
-from flowcept.configs import MONGO_ENABLED
+from flowcept.commons.daos.mq_dao.mq_dao_base import MQDao
+from flowcept.configs import LMDB_ENABLED, MONGO_ENABLED
 from flowcept.flowceptor.consumers.document_inserter import DocumentInserter
+from flowcept.flowceptor.consumers.sharded_document_inserter import ShardedDocumentInserter
 
 
 class DummyLogger:
@@ -33,6 +38,57 @@ def test_task_message_without_campaign_id_does_not_require_kv_dao():
     assert "campaign_id" not in buffered, "campaign_id must not be injected when kv_dao is None"
 
 
+def test_sharded_inserter_routes_each_task_to_one_shard():
+    class ListQueue(list):
+        def put(self, item, timeout=None):
+            self.append(item)
+
+    inserter = ShardedDocumentInserter.__new__(ShardedDocumentInserter)
+    inserter._n_shards = 4
+    inserter._round_robin = iter(range(100))
+    inserter._queues = [ListQueue() for _ in range(4)]
+
+    inserter._route([{"type": "task", "task_id": f"t{i % 10}", "seq": i} for i in range(100)])
+    inserter._route([{"type": "workflow", "workflow_id": "wf"}, {"type": "task", "activity_id": "no_id"}])
+
+    shard_of_task = {}
+    for shard, queue in enumerate(inserter._queues):
+        for batch in queue:
+            for msg in batch:
+                if "seq" in msg:
+                    assert shard_of_task.setdefault(msg["task_id"], shard) == shard
+    assert len(shard_of_task) == 10
+    for task_id in shard_of_task:
+        seqs = [m["seq"] for b in inserter._queues[shard_of_task[task_id]] for m in b if m.get("task_id") == task_id]
+        assert seqs == sorted(seqs) and len(seqs) == 10
+    assert sum(len(b) for q in inserter._queues for b in q) == 102
+
+
+@unittest.skipIf(not (MONGO_ENABLED or LMDB_ENABLED), "All DocDBs are disabled")
+def test_sharded_inserter_stores_decoded_ext_values():
+    if not Flowcept.services_alive():
+        pytest.skip("Flowcept services are not alive (MQ/KVDB/DocDB).")
+    task_id = str(uuid4())
+    inserter = ShardedDocumentInserter(check_safe_stops=False, shards=2).start()
+    try:
+        MQDao.build().send_message(
+            {
+                "type": "task",
+                "task_id": task_id,
+                "workflow_id": str(uuid4()),
+                "status": "FINISHED",
+                "used": {"weights": np.arange(6, dtype=np.float32).reshape(2, 3)},
+            }
+        )
+    finally:
+        inserter.stop()
+
+    docs = Flowcept.db.task_query(filter={"task_id": task_id})
+    Flowcept.db._dao().delete_task_keys("task_id", [task_id])
+    assert len(docs) == 1
+    assert docs[0]["used"]["weights"] == [[0.0, 1.0, 2.0], [3.0, 4.0, 5.0]]
+
+
 @unittest.skipIf(not MONGO_ENABLED, "MongoDB is disabled")
 class TestMongoDBInserter(unittest.TestCase):
     def __init__(self, *args, **kwargs):
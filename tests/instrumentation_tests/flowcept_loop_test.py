@@ -3,10 +3,12 @@ import random
 from time import sleep
 
 import unittest
+from unittest.mock import patch
 
 from flowcept.commons.vocabulary import Status
 from flowcept import FlowceptLoop, Flowcept
-from flowcept.instrumentation.flowcept_loop import FlowceptLightweightLoop
+from flowcept.configs import INSTRUMENTATION_ENABLED
+from flowcept.instrumentation.flowcept_loop import FlowceptLightweightLoop, FlowceptStreamingLoop
 
 TIME_TO_SLEEP = 0.001
 
@@ -153,3 +155,48 @@ class LoopTests(unittest.TestCase):
             assert t["used"]["i"] == i
             assert t["used"]["epoch"] == i
             assert t["status"] == Status.FINISHED.value
+
+
+class FakeInterceptor:
+    def __init__(self):
+        self.batches = []
+
+    def intercept_many(self, messages):
+        self.batches.append(messages)
+
+
+@unittest.skipIf(not INSTRUMENTATION_ENABLED, "Instrumentation is disabled")
+class StreamingLoopTests(unittest.TestCase):
+    def setUp(self):
+        self.fake = FakeInterceptor()
+        patcher = patch.object(FlowceptStreamingLoop, "_interceptor", self.fake)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unbounded_generator_in_batches(self):
+        def numbers():
+            i = 0
+            while True:
+                yield np.full(3, i)
+                i += 1
+
+        loop = FlowceptStreamingLoop(numbers(), loop_name="stream", batch_size=4, item_capture="summary")
+        for i, _ in enumerate(loop):
+            loop.end_iter({"i2": i * 2})
+            if i == 9:
+                break
+        assert [len(b) for b in self.fake.batches] == [4, 4]
+        loop.close()
+        tasks = [t for b in self.fake.batches for t in b]
+        assert [t["used"]["i"] for t in tasks] == list(range(10))
+        assert tasks[9]["generated"] == {"i2": 18} and tasks[9]["activity_id"] == "stream_iteration"
+        assert tasks[0]["used"]["item"] == {"type": "ndarray", "shape": [3], "dtype": "int64"}
+        assert all(t["ended_at"] >= t["started_at"] for t in tasks)
+        assert len({t["task_id"] for t in tasks}) == 10
+
+    def test_exhausted_iterator_sends_last_batch(self):
+        loop = FlowceptStreamingLoop(iter(["a", "b", "c"]), item_name="letter", batch_size=2, item_capture="repr")
+        assert list(loop) == ["a", "b", "c"]
+        tasks = [t for b in self.fake.batches for t in b]
+        assert [t["used"]["letter"] for t in tasks] == ["a", "b", "c"]
+        assert "generated" not in tasks[0]
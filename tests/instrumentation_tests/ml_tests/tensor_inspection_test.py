@@ -0,0 +1,33 @@
+import unittest
+
+import pytest
+
+pytest.importorskip("torch")
+
+import torch
+
+from flowcept.instrumentation.flowcept_torch import TensorInspector
+
+
+class TestTensorInspector(unittest.TestCase):
+    def test_exact_density_and_stats(self):
+        tensor = torch.tensor([[0.0, 1.0], [0.0, 3.0]])
+        inspection = TensorInspector(stats=True).inspect(tensor, "x")
+        assert inspection["shape"] == [2, 2] and inspection["numel"] == 4
+        assert inspection["density"] == pytest.approx(0.5)
+        assert inspection["min"] == 0.0 and inspection["max"] == 3.0
+        assert inspection["mean"] == pytest.approx(1.0)
+
+    def test_sampled_density(self):
+        tensor = (torch.rand(1_000_000) < 0.25).float()
+        inspector = TensorInspector(density="sampled", sample_size=50_000)
+        assert inspector.inspect(tensor)["density"] == pytest.approx(0.25, abs=0.02)
+        assert "density" not in TensorInspector(density=None).inspect(tensor)
+
+    def test_shape_cache_and_other_values(self):
+        inspector = TensorInspector()
+        first = inspector.inspect(torch.ones(3, 4), "layer")
+        second = inspector.inspect(torch.zeros(3, 4), "layer")
+        assert first["shape"] is second["shape"] and second["density"] == 0.0
+        assert inspector.inspect((1, 2)) == {"type": "tuple"}
+        assert "density" not in inspector.inspect(torch.ones(0))
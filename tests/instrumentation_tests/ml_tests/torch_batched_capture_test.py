@@ -0,0 +1,62 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+pytest.importorskip("torch")
+
+import torch
+from torch import nn
+
+from flowcept.instrumentation import flowcept_torch
+from flowcept.instrumentation.flowcept_torch import flowcept_torch as torch_task
+
+
+@torch_task
+class TinyNet(nn.Module):
+    def __init__(self, **kwargs):
+        super().__init__()
+        self.fc1 = nn.Linear(4, 8)
+        self.act = nn.ReLU()
+        self.fc2 = nn.Linear(8, 2)
+
+    def forward(self, x):
+        return self.fc2(self.act(self.fc1(x)))
+
+
+class TestTorchBatchedCapture(unittest.TestCase):
+    def _run(self, children_mode, n_forwards=3):
+        interceptor = MagicMock()
+        config = {"what": "parent_and_children", "children_mode": children_mode}
+        with (
+            patch.dict(flowcept_torch.TORCH_CONFIG, config),
+            patch.object(flowcept_torch, "INSTRUMENTATION_ENABLED", True),
+            patch.object(flowcept_torch, "TELEMETRY_ENABLED", True),
+            patch.object(flowcept_torch.InstrumentationInterceptor, "get_instance", return_value=interceptor),
+        ):
+            model = TinyNet()
+            for _ in range(n_forwards):
+                model(torch.rand(5, 4))
+        tasks = [task for call in interceptor.intercept_many.call_args_list for task in call.args[0]]
+        return tasks, interceptor
+
+    def test_one_parent_task_per_forward_with_a_layer_table(self):
+        for mode, columns in (
+            ("batched", {"layer", "type", "start_offset_ns", "duration_ns"}),
+            ("batched_tensor_inspection", {"layer", "type", "start_offset_ns", "duration_ns", "used", "generated"}),
+        ):
+            with self.subTest(mode=mode):
+                tasks, interceptor = self._run(mode)
+                assert len(tasks) == 3
+                assert all(task["subtype"] == "parent_forward" for task in tasks)
+                for task in tasks:
+                    layers = task["custom_metadata"]["layers"]
+                    assert set(layers) == columns
+                    # One row per layer call, in call order.
+                    assert layers["layer"] == ["fc1", "act", "fc2"]
+                    assert layers["type"] == ["Linear", "ReLU", "Linear"]
+                    assert all(len(column) == 3 for column in layers.values())
+                    assert all(duration >= 0 for duration in layers["duration_ns"])
+                    assert "telemetry_at_end" in task
+                # Telemetry is captured once per forward pass, not per layer.
+                assert interceptor.telemetry_capture.capture.call_count == 3
@@ -0,0 +1,121 @@
+import random
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+from flowcept import FlowceptLoop, FlowceptTask, flowcept_task
+from flowcept.configs import INSTRUMENTATION_ENABLED
+from flowcept.flowceptor.adapters.instrumentation_interceptor import InstrumentationInterceptor
+from flowcept.flowceptor.adapters.task_aggregator import (
+    ACTIVITY_AGGREGATE_SUBTYPE,
+    DurationSketch,
+    TaskAggregator,
+)
+
+
+class FakeInterceptor:
+    started = True
+
+    def __init__(self):
+        self.messages = []
+
+    def intercept_many(self, messages):
+        self.messages.extend(messages)
+
+
+class TestTaskAggregation(unittest.TestCase):
+    def test_sketch_quantiles(self):
+        values = [random.lognormvariate(-6, 1.5) for _ in range(20_000)]
+        sketch = DurationSketch(relative_accuracy=0.01)
+        for v in values:
+            sketch.add(v)
+        values.sort()
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+        assert sum(count for _, count in sketch.histogram()) == len(values)
+
+    def test_aggregator_summaries(self):
+        interceptor = FakeInterceptor()
+        aggregator = TaskAggregator(interceptor, interval=0)
+        for i in range(10):
+            aggregator.add("train", 0.1 * (i + 1), failed=(i == 9), generated={"loss": i, "tag": "x"}, workflow_id="w")
+        aggregator.add("eval", 0.5, workflow_id="w")
+        aggregator.flush()
+        aggregator.flush()
+
+        by_activity = {m["activity_id"]: m for m in interceptor.messages}
+        assert len(interceptor.messages) == 2
+        train = by_activity["train"]
+        assert train["subtype"] == ACTIVITY_AGGREGATE_SUBTYPE and train["workflow_id"] == "w"
+        summary = train["generated"]
+        assert summary["count"] == 10 and summary["errors"] == 1
+        assert summary["duration"]["min"] == pytest.approx(0.1) and summary["duration"]["max"] == pytest.approx(1.0)
+        assert summary["duration"]["p50"] == pytest.approx(0.5, rel=0.03)
+        assert summary["fields"] == {"loss": {"count": 10, "min": 0, "max": 9, "mean": 4.5}}
+        assert by_activity["eval"]["generated"]["fields"] == {}
+
+
+@unittest.skipIf(not INSTRUMENTATION_ENABLED, "Instrumentation is disabled")
+class TestAggregateCaptureMode(unittest.TestCase):
+    def setUp(self):
+        self.interceptor = InstrumentationInterceptor.get_instance()
+        self.original_aggregator = self.interceptor.task_aggregator
+        self.fake = FakeInterceptor()
+        self.interceptor.task_aggregator = TaskAggregator(self.fake, interval=0)
+
+    def tearDown(self):
+        self.interceptor.task_aggregator = self.original_aggregator
+
+    def test_decorator_loop_and_context_manager(self):
+        @flowcept_task(capture_mode="aggregate", output_names="y")
+        def square(x):
+            if x < 0:
+                raise ValueError("negative")
+            return x * x
+
+        for i in range(100):
+            square(i)
+        with self.assertRaises(ValueError):
+            square(-1)
+
+        loop = FlowceptLoop((i for i in range(50)), loop_name="epochs", capture_mode="aggregate")
+        for i in loop:
+            loop.end_iter({"loss": 1 / (i + 1)})
+
+        for _ in range(3):
+            with FlowceptTask(activity_id="step", capture_mode="aggregate", used={"big": object()}) as t:
+                t.end(generated={"acc": 0.5})
+
+        self.interceptor.task_aggregator.flush()
+        by_activity = {m["activity_id"]: m["generated"] for m in self.fake.messages}
+
+        assert by_activity["square"]["count"] == 101 and by_activity["square"]["errors"] == 1
+        assert by_activity["square"]["fields"]["y"]["max"] == 99 * 99
+        assert by_activity["epochs_iteration"]["count"] == 50
+        assert by_activity["epochs_iteration"]["fields"]["loss"]["max"] == 1.0
+        assert by_activity["step"]["count"] == 3 and by_activity["step"]["fields"]["acc"]["mean"] == 0.5
+
+    def test_loops_hooked_into_iteration_tasks_ignore_the_aggregate_setting(self):
+        iteration_ids = []
+
+        class HookedLoop(FlowceptLoop):
+            FOLLOWS_CAPTURE_MODE_SETTING = False
+
+            def _capture_iteration_bounds(self):
+                super()._capture_iteration_bounds()
+                iteration_ids.append(self.get_current_iteration_id())
+
+        sent = []
+        with (
+            patch("flowcept.instrumentation.flowcept_loop.TASK_CAPTURE_MODE", "aggregate"),
+            patch.object(self.interceptor, "intercept", sent.append),
+        ):
+            assert list(FlowceptLoop(range(3), loop_name="plain")) == [0, 1, 2]
+            assert list(HookedLoop(range(3), loop_name="hooked")) == [0, 1, 2]
+
+        self.interceptor.task_aggregator.flush()
+        assert [m["activity_id"] for m in self.fake.messages] == ["plain_iteration"]
+        assert [task["activity_id"] for task in sent] == ["hooked_iteration"] * 3
+        assert len(iteration_ids) == 4 and None not in iteration_ids[:3]
@@ -0,0 +1,160 @@
+import unittest
+from threading import Thread
+from time import perf_counter_ns
+
+import numpy as np
+
+from flowcept import flowcept_task
+from flowcept.commons.autoflush_buffer import AutoflushBuffer
+from flowcept.commons.flowcept_dataclasses.task_record import (
+    TaskRecord,
+    materialize_messages,
+    new_task_id,
+    snapshot_value,
+)
+from flowcept.commons.flowcept_logger import FlowceptLogger
+from flowcept.configs import INSTRUMENTATION_ENABLED
+from flowcept.flowceptor.adapters.instrumentation_interceptor import InstrumentationInterceptor
+
+
+def _ns_per_call(fn, n):
+    t0 = perf_counter_ns()
+    for i in range(n):
+        fn(i, y=2)
+    return (perf_counter_ns() - t0) / n
+
+
+class TestTaskIds(unittest.TestCase):
+    def test_ids_are_unique_across_threads(self):
+        ids = []
+
+        def worker():
+            ids.extend(new_task_id() for _ in range(10_000))
+
+        threads = [Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(set(ids)) == len(ids) == 80_000
+
+
+class TestCopyOnCapture(unittest.TestCase):
+    def test_snapshot_semantics(self):
+        nested = {"a": [1, 2]}
+        shallow = snapshot_value(nested, "shallow", 10)
+        deep = snapshot_value(nested, "deep", 10)
+        nested["b"] = 3
+        nested["a"].append(3)
+        assert shallow == {"a": [1, 2, 3]} and deep == {"a": [1, 2]}
+
+        big = list(range(11))
+        assert snapshot_value(big, "shallow", 10) is big
+        assert snapshot_value(nested, "none", 10) is nested
+        array = np.zeros(4)
+        copied = snapshot_value(array, "shallow", 10)
+        array[0] = 1
+        assert copied[0] == 0
+        t = (1, [2])
+        assert snapshot_value(t, "deep", 10) is t
+
+
+class _Unserializable:
+    def to_dict(self):
+        raise RuntimeError("cannot serialize")
+
+    def __str__(self):
+        return "unserializable"
+
+
+class _Unprintable:
+    to_dict = _Unserializable.to_dict
+
+    def __str__(self):
+        raise RuntimeError("cannot print")
+
+
+def _record(task_id, value):
+    record = TaskRecord()
+    record.task_id, record.activity_id, record.workflow_id, record.campaign_id = task_id, "f", "wf", None
+    record.used, record.started_at, record.hostname, record.sanitize = {"x": value}, 1.0, None, True
+    return record
+
+
+class TestMaterializeMessages(unittest.TestCase):
+    def test_a_failing_record_does_not_lose_its_batch(self):
+        records = [_record("good-1", 1), _record("bad", _Unserializable()), _record("good-2", [2])]
+        messages = materialize_messages(records + [_record("dropped", _Unprintable()), {"type": "workflow"}])
+        assert [msg.get("task_id") for msg in messages] == ["good-1", "bad", "good-2", None]
+        assert [msg["used"] for msg in messages[:3]] == [{"x": 1}, {"x": "unserializable"}, {"x": [2]}]
+
+
+@unittest.skipIf(not INSTRUMENTATION_ENABLED, "Instrumentation is disabled")
+class TestTaskCaptureOverhead(unittest.TestCase):
+    def setUp(self):
+        self.interceptor = InstrumentationInterceptor.get_instance()
+        self.original_buffer = self.interceptor._mq_dao.buffer
+        self.flushed = []
+        self.buffer = AutoflushBuffer(
+            flush_function=self.flushed.extend, max_size=10_000, prepare_function=materialize_messages
+        )
+        self.interceptor.set_buffer(self.buffer)
+
+    def tearDown(self):
+        self.buffer.stop()
+        self.interceptor.set_buffer(self.original_buffer)
+
+    def test_deferred_serialization(self):
+        @flowcept_task(output_names="out")
+        def f(x, y=1, *, z=None):
+            return object()
+
+        marker = object()
+        f(1, z=marker)
+        self.buffer.stop()
+        [task] = self.flushed
+        assert task["used"] == {"x": 1, "y": 1, "z": f"object_instance_id_{id(marker)}"}
+        assert task["generated"]["out"].startswith("object_instance_id_")
+
+    def test_background_serializer(self):
+        @flowcept_task
+        def f(items):
+            return {"n": len(items), "o": object()}
+
+        self.interceptor._serializer = AutoflushBuffer(
+            flush_function=self.interceptor._serialize_records, max_size=10, flush_interval=0.1, flush_workers=2
+        )
+        try:
+            items = [1, 2]
+            for _ in range(25):
+                f(items)
+            items.append(3)
+        finally:
+            self.interceptor._serializer.stop()
+            self.interceptor._serializer = None
+        self.buffer.stop()
+        assert len(self.flushed) == 25
+        assert all(type(task) is dict and task["used"] == {"items": [1, 2]} for task in self.flushed)
+        assert all(task["generated"]["o"].startswith("object_instance_id_") for task in self.flushed)
+
+    def test_per_call_overhead(self):
+        logger = FlowceptLogger()
+        n = 20_000
+
+        def plain(x, y=1):
+            return x + y
+
+        results = {"undecorated": _ns_per_call(plain, n)}
+        modes = {"without telemetry": False}
+        if self.interceptor.telemetry_capture is not None:
+            modes["with telemetry"] = True
+        for label, telemetry in modes.items():
+            decorated = flowcept_task(capture_telemetry=telemetry)(plain)
+            results[label] = _ns_per_call(decorated, n if not telemetry else n // 20)
+        for label, ns in results.items():
+            overhead = ns - results["undecorated"]
+            logger.info(f"@flowcept_task {label}: {ns:,.0f} ns/call ({overhead:,.0f} ns overhead)")
+        # Loose ceiling that only catches pathological regressions on slow CI machines.
+        assert results["without telemetry"] - results["undecorated"] < 100_000
+        self.buffer.stop()
+        assert len(self.flushed) == sum(n if label == "without telemetry" else n // 20 for label in modes)
@@ -0,0 +1,87 @@
+import unittest
+
+import pytest
+
+from flowcept import flowcept_task
+from flowcept.configs import INSTRUMENTATION_ENABLED
+from flowcept.instrumentation.task_sampling import (
+    SAMPLING_SUMMARY_SUBTYPE,
+    FirstKThenEveryNthPolicy,
+    SamplingPolicy,
+    TaskSampler,
+    TokenBucketPolicy,
+    build_sampling_policy,
+)
+
+
+class FakeInterceptor:
+    started = True
+
+    def __init__(self):
+        self.messages = []
+
+    def intercept(self, msg):
+        self.messages.append(msg)
+
+
+class NeverRecord(SamplingPolicy):
+    def should_record(self):
+        return False
+
+
+class TestTaskSampling(unittest.TestCase):
+    def test_policies(self):
+        every_nth = build_sampling_policy({"policy": "every_nth", "n": 10})
+        assert [every_nth.should_record() for _ in range(30)].count(True) == 3
+
+        first_k = FirstKThenEveryNthPolicy(k=5, n=10)
+        decisions = [first_k.should_record() for _ in range(35)]
+        assert [i for i, d in enumerate(decisions) if d] == [0, 1, 2, 3, 4, 5, 15, 25]
+
+        assert not any(build_sampling_policy({"policy": "probabilistic", "rate": 0}).should_record() for _ in range(50))
+
+        bucket = TokenBucketPolicy(rate=0.001, burst=3)
+        assert [bucket.should_record() for _ in range(5)] == [True, True, True, False, False]
+
+        assert build_sampling_policy(None) is None
+        with self.assertRaises(ValueError):
+            build_sampling_policy({"policy": "sometimes"})
+
+    def test_sampler_summary(self):
+        interceptor = FakeInterceptor()
+        sampler = TaskSampler("f", NeverRecord(), interceptor, summary_interval=0)
+        for duration in (0.1, 0.3, 0.2):
+            assert not sampler.should_record()
+            sampler.record(duration)
+        sampler.record(0.4, failed=True)
+        sampler.flush()
+        sampler.flush()  # Nothing new: no message.
+
+        assert len(interceptor.messages) == 1
+        msg = interceptor.messages[0]
+        assert msg["subtype"] == SAMPLING_SUMMARY_SUBTYPE and msg["activity_id"] == "f"
+        summary = msg["generated"]
+        assert summary["calls"] == 4 and summary["errors"] == 1 and summary["recorded_calls"] == 0
+        assert summary["min_duration"] == 0.1 and summary["max_duration"] == 0.4
+        assert summary["total_duration"] == pytest.approx(1.0)
+
+    @unittest.skipIf(not INSTRUMENTATION_ENABLED, "Instrumentation is disabled")
+    def test_unrecorded_calls_skip_capture(self):
+        @flowcept_task(sampling=NeverRecord())
+        def hot(x, fail=False):
+            if fail:
+                raise ValueError("boom")
+            return x + 1
+
+        sampler = TaskSampler._instances[-1]
+        assert sampler.activity_id == "hot"
+        sampler._interceptor = interceptor = FakeInterceptor()
+        sampler._summary_interval = 0
+
+        assert [hot(i) for i in range(10)] == list(range(1, 11))
+        with self.assertRaises(ValueError):
+            hot(1, fail=True)
+        sampler.flush()
+        assert len(interceptor.messages) == 1
+        assert interceptor.messages[0]["generated"]["calls"] == 11
+        assert interceptor.messages[0]["generated"]["errors"] == 1
@@ -0,0 +1,94 @@
+import tempfile
+import unittest
+from threading import Event, Lock, Thread
+from time import sleep
+
+from flowcept.commons.autoflush_buffer import AutoflushBuffer
+
+
+class TestAutoflushBuffer(unittest.TestCase):
+    def test_concurrent_producers_lose_nothing(self):
+        flushed = []
+        buffer = AutoflushBuffer(flushed.extend, max_size=100, flush_interval=0.05, capacity=500)
+        producers = [Thread(target=lambda p=p: [buffer.append((p, i)) for i in range(5_000)]) for p in range(8)]
+        for producer in producers:
+            producer.start()
+        for producer in producers:
+            producer.join()
+        buffer.stop()
+
+        assert len(flushed) == 40_000
+        assert len(set(flushed)) == 40_000
+        for p in range(8):
+            assert [i for q, i in flushed if q == p] == list(range(5_000))
+        stats = buffer.stats()
+        assert stats["flushed_items"] == 40_000 and stats["dropped"] == 0 and stats["pending"] == 0
+        assert stats["flush_latency_max"] >= stats["flush_latency_avg"] > 0
+
+    def test_drop_oldest_counts_drops(self):
+        release = Event()
+        flushed = []
+
+        def slow_flush(batch):
+            release.wait()
+            flushed.extend(batch)
+
+        buffer = AutoflushBuffer(slow_flush, max_size=1, capacity=10, overflow_policy="drop_oldest")
+        buffer.append(-1)  # Keeps the flush thread busy until released.
+        while buffer.current_buffer:
+            pass
+        buffer.extend(range(25))
+        assert list(buffer.current_buffer) == list(range(15, 25))
+        release.set()
+        buffer.stop()
+        assert flushed == [-1] + list(range(15, 25))
+        assert buffer.stats()["dropped"] == 15
+
+    def test_spill_to_disk_keeps_order(self):
+        release = Event()
+        flushed = []
+
+        def slow_flush(batch):
+            release.wait()
+            flushed.extend(batch)
+
+        with tempfile.TemporaryDirectory() as spill_dir:
+            buffer = AutoflushBuffer(slow_flush, max_size=1, capacity=10, overflow_policy="spill", spill_dir=spill_dir)
+            buffer.append({"i": -1})
+            while buffer.current_buffer:
+                pass
+            buffer.extend({"i": i} for i in range(100))
+            assert len(buffer.current_buffer) == 10
+            release.set()
+            buffer.stop()
+        assert [m["i"] for m in flushed] == list(range(-1, 100))
+        assert buffer.stats()["spilled"] == 90
+
+    def test_flush_workers_keep_per_key_order(self):
+        lock = Lock()
+        flushed, running, overlap = [], [0], [0]
+
+        def slow_flush(batch):
+            with lock:
+                running[0] += 1
+                overlap[0] = max(overlap[0], running[0])
+            sleep(0.01)
+            with lock:
+                running[0] -= 1
+                flushed.extend(batch)
+
+        buffer = AutoflushBuffer(slow_flush, max_size=20, flush_workers=4, max_in_flight=4, ordering_key="task_id")
+        for i in range(2_000):
+            buffer.append({"task_id": f"t{i % 7}", "seq": i})
+        buffer.stop()
+
+        assert len(flushed) == 2_000
+        for key in range(7):
+            seqs = [m["seq"] for m in flushed if m["task_id"] == f"t{key}"]
+            assert seqs == sorted(seqs)
+        assert overlap[0] > 1
+        assert buffer.stats()["in_flight"] == 0
+
+    def test_unknown_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            AutoflushBuffer(list, overflow_policy="grow")
@@ -0,0 +1,67 @@
+import copy
+import unittest
+from datetime import datetime
+from time import perf_counter
+
+from flowcept.commons.flowcept_logger import FlowceptLogger
+from flowcept.flowceptor.consumers.consumer_utils import UTC_TZ, curate_dict_task_messages
+
+
+def _task_messages(n):
+    docs = []
+    for i in range(n // 2):
+        docs.append(
+            {
+                "task_id": f"t{i}",
+                "activity_id": "train",
+                "status": "RUNNING",
+                "started_at": 1_700_000_000.0 + i,
+                "used": {"lr": 0.01, "epoch": i, "config": {"layers": [64, 64]}},
+                "telemetry_at_start": {"cpu": {"percent_all": 10.0}},
+            }
+        )
+        docs.append(
+            {
+                "task_id": f"t{i}",
+                "status": "FINISHED",
+                "ended_at": 1_700_000_001.0 + i,
+                "generated": {"loss": 0.5},
+                "telemetry_at_end": {"cpu": {"percent_all": 12.0}},
+            }
+        )
+    return docs
+
+
+class TestCurateDictTaskMessages(unittest.TestCase):
+    def test_merges_messages_of_a_task(self):
+        docs = [
+            {"task_id": "t1", "status": "RUNNING", "started_at": 10.0, "used": {"x": 1, 2: {}}},
+            {"task_id": "t1"},
+            {"task_id": "t1", "status": "FINISHED", "ended_at": 12.0, "used": {"y": 2}, "generated": [3, {4: 5}]},
+            {"task_id": "t2", "used": {"workflow_id": "wf", "a": 1}, "generated": 7},
+        ]
+        original = copy.deepcopy(docs)
+        curated = curate_dict_task_messages(docs, "task_id", utc_time_at_insertion=1.0)
+
+        assert docs == original, "The input messages must not be modified."
+        t1, t2 = curated["t1"], curated["t2"]
+        assert t1["used"] == {"x": 1, "y": 2}
+        assert t1["generated"] == {"arg0": 3, "arg1": {"4": 5}}
+        assert t1["status"] == "FINISHED" and t1["running"] and t1["finished"]
+        assert t1["started_at"] == datetime.fromtimestamp(10.0, UTC_TZ)
+        assert t1["registered_at"] == t2["registered_at"]
+        assert t2["workflow_id"] == "wf" and t2["used"] == {"a": 1}
+        assert t2["generated"] == {"arg0": 7}
+
+    def test_curation_throughput(self):
+        logger = FlowceptLogger()
+        for n in (10_000, 100_000):
+            docs = _task_messages(n)
+            t0 = perf_counter()
+            curated = curate_dict_task_messages(docs, "task_id", convert_times=True)
+            elapsed = perf_counter() - t0
+            assert len(curated) == n // 2
+            docs_per_sec = n / elapsed
+            logger.info(f"curate_dict_task_messages: {n} docs in {elapsed:.3f}s ({docs_per_sec:,.0f} docs/s)")
+            # Loose floor that only catches pathological regressions on slow CI machines.
+            assert docs_per_sec > 5_000
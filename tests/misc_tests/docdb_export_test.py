@@ -0,0 +1,62 @@
+import json
+import os
+import tempfile
+import unittest
+import zipfile
+from datetime import datetime
+
+import pandas as pd
+
+from flowcept.commons.daos.docdb_dao.docdb_export import export_documents, export_format_from_path
+
+
+def _docs(n=25):
+    for i in range(n):
+        doc = {"task_id": str(i), "n": i, "used": {"x": i}}
+        if i > 5:
+            doc["started_at"] = float(i)  # Column appearing after the first batches.
+        if i == 3:
+            doc["n"] = 2.5
+        if i == 10:
+            doc["mixed"] = 5
+        if i == 11:
+            doc["mixed"] = "five"
+        if i == 12:
+            doc["when"] = datetime(2024, 1, 1)
+        yield doc
+
+
+class TestDocDBExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_parquet_schema_evolution(self):
+        path = export_documents(_docs(), self._path("tasks.parquet"), "parquet", batch_size=4)
+        df = pd.read_parquet(path)
+        assert list(df.columns) == ["task_id", "n", "used", "started_at", "mixed", "when"]
+        assert len(df) == 25 and df["n"].dtype == "float64" and df["started_at"].isna().sum() == 6
+        assert df["mixed"].tolist()[10:12] == ["5", "five"]
+        assert json.loads(df["used"][7]) == {"x": 7} and df["when"][12] == "2024-01-01T00:00:00"
+        assert os.listdir(self.tmp.name) == ["tasks.parquet"]
+
+    def test_json_jsonl_csv_and_zip(self):
+        export_documents(_docs(), self._path("a.json"), "json")
+        assert len(json.load(open(self._path("a.json")))) == 25
+        export_documents(_docs(), self._path("a.jsonl"), "jsonl")
+        assert json.loads(open(self._path("a.jsonl")).readlines()[12])["when"] == "2024-01-01T00:00:00"
+        export_documents(_docs(), self._path("a.csv"), "csv", batch_size=4)
+        df = pd.read_csv(self._path("a.csv"))
+        assert df.shape == (25, 6) and df["mixed"].dropna().tolist() == ["5", "five"]
+
+        zip_path = export_documents(_docs(), self._path("b.csv"), "csv", should_zip=True)
+        assert zip_path.endswith("b.csv.zip") and zipfile.ZipFile(zip_path).namelist() == ["b.csv"]
+        assert not os.path.exists(self._path("b.csv"))
+        assert export_format_from_path("x.jsonl") == "jsonl" and export_format_from_path("x") == "parquet"
+        with self.assertRaises(ValueError):
+            export_documents(_docs(), self._path("c.xml"), "xml")
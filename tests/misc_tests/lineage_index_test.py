@@ -0,0 +1,43 @@
+import unittest
+
+from flowcept.commons.daos.docdb_dao.lineage_index import (
+    CONSUMED,
+    PRODUCED,
+    match_postings,
+    postings_by_workflow,
+    task_postings,
+    value_fingerprint,
+)
+
+
+class TestLineageIndex(unittest.TestCase):
+    def test_task_postings_skip_trivial_values_and_flatten(self):
+        task = {
+            "task_id": "t1",
+            "started_at": 10.0,
+            "ended_at": 12.0,
+            "used": {"lr": 0.01, "flag": True, "epochs": 1, "cfg": {"path": "/data/a.csv"}},
+            "generated": {"loss": 0.5, "metrics": [{"acc": 0.25}]},
+        }
+        postings = set(task_postings(task))
+        assert postings == {
+            (value_fingerprint("lr", 0.01), CONSUMED, "t1", 10.0),
+            (value_fingerprint("path", "/data/a.csv"), CONSUMED, "t1", 10.0),
+            (value_fingerprint("loss", 0.5), PRODUCED, "t1", 12.0),
+            (value_fingerprint("acc", 0.25), PRODUCED, "t1", 12.0),
+        }
+        assert value_fingerprint("a", 1) != value_fingerprint("a", "1")
+        assert task_postings({"used": {"x": 5}}) == []
+        assert list(postings_by_workflow([{"task_id": "t2", "used": {"x": 5}}])) == []
+
+    def test_match_postings_follows_time_order_and_only_reports_new_edges(self):
+        fp = value_fingerprint("model", "m-1")
+        producer = (fp, PRODUCED, "train", 5.0)
+        late, early, unknown = (fp, CONSUMED, "eval", 6.0), (fp, CONSUMED, "warmup", 1.0), (fp, CONSUMED, "x", None)
+        stored = [late, early, unknown, (fp, CONSUMED, "train", 2.0)]
+        assert match_postings([producer], stored) == {("train", "eval"), ("train", "x")}
+
+        other = (fp, CONSUMED, "report", 7.0)
+        assert match_postings([other], stored + [producer, other]) == {("train", "report")}
+        # A producer's end time missing from a later message does not erase the known one.
+        assert match_postings([(fp, PRODUCED, "train", None)], [producer, early]) == set()
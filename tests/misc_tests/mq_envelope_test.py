@@ -0,0 +1,30 @@
+import unittest
+from unittest.mock import patch
+
+import msgpack
+
+from flowcept.commons.daos.mq_dao.mq_dao_base import MQDao
+
+
+class TestMQBatchEnvelope(unittest.TestCase):
+    def test_envelope_roundtrip(self):
+        messages = [{"type": "task", "task_id": str(i), "used": {"x": i, "b": b"\x00"}} for i in range(1_000)]
+        payload = MQDao.pack_envelope(messages + [{"bad": object()}])
+        assert payload.startswith(MQDao.ENVELOPE_MAGIC)
+        assert MQDao.unpack_messages(payload) == messages
+
+    def test_plain_messages_still_decode(self):
+        message = {"type": "flowcept_control", "info": "mq_dao_thread_stopped"}
+        assert MQDao.unpack_messages(msgpack.dumps(message)) == [message]
+
+    def test_bulk_publish_sends_one_envelope_per_chunk(self):
+        published = []
+        dao = MQDao.__new__(MQDao)
+        dao._bulk_publish = lambda buffer, serializer=msgpack.dumps: published.extend(serializer(m) for m in buffer)
+        with (
+            patch("flowcept.commons.daos.mq_dao.mq_dao_base.MQ_BATCH_ENVELOPE", True),
+            patch("flowcept.commons.daos.mq_dao.mq_dao_base.MQ_CHUNK_SIZE", 40),
+        ):
+            dao.bulk_publish([{"task_id": str(i)} for i in range(100)])
+        assert len(published) == 3
+        assert [m["task_id"] for p in published for m in MQDao.unpack_messages(p)] == [str(i) for i in range(100)]
@@ -0,0 +1,83 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from flowcept.commons.daos.mq_dao.mq_dao_redis_streams import MQDaoRedisStreams  # noqa: E402
+
+
+class TestMQRedisStreams(unittest.TestCase):
+    def setUp(self):
+        server = fakeredis.FakeServer()
+        patches = [
+            patch("flowcept.commons.daos.mq_dao.mq_dao_base.KVDB_ENABLED", False),
+            patch("flowcept.commons.daos.mq_dao.mq_dao_redis.MQ_SETTINGS", {}),
+            patch(
+                "flowcept.commons.daos.mq_dao.mq_dao_redis.RedisConn.build_redis_conn_pool",
+                lambda **_: fakeredis.FakeRedis(server=server),
+            ),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.producer = self._dao()
+
+    @staticmethod
+    def _dao(group=None):
+        dao = MQDaoRedisStreams()
+        dao.consumer_group = group
+        dao._block_ms = 50
+        return dao
+
+    @staticmethod
+    def _listen(dao, received):
+        def handler(msg):
+            if msg.get("type") == "flowcept_control":
+                return False
+            received.append(msg["task_id"])
+            return True
+
+        thread = threading.Thread(target=dao.message_listener, args=(handler,), daemon=True)
+        thread.start()
+        return thread
+
+    def _pending(self, group):
+        return self.producer._producer.xpending(self.producer._stream, group)["pending"]
+
+    def test_shared_and_private_groups_and_stop(self):
+        shared = [self._dao("inserters") for _ in range(2)]
+        private = self._dao()
+        for dao in shared + [private]:
+            dao.subscribe()
+        received = {dao: [] for dao in shared + [private]}
+        threads = [self._listen(dao, received[dao]) for dao in received]
+
+        self.producer._bulk_publish([{"type": "task", "task_id": str(i)} for i in range(200)])
+        self.producer.send_message({"type": "flowcept_control", "info": "stop"})
+        for thread in threads:
+            thread.join(10)
+            assert not thread.is_alive(), "The control stream's stop message must end message_listener."
+
+        # The shared group splits the messages, the private group sees them all; all are acked.
+        shared_ids = received[shared[0]] + received[shared[1]]
+        assert sorted(shared_ids, key=int) == [str(i) for i in range(200)]
+        assert received[private] == [str(i) for i in range(200)]
+        assert self._pending("inserters") == 0 and self._pending(private._group) == 0
+
+    def test_reclaims_entries_pending_on_a_dead_consumer(self):
+        dead, survivor = self._dao("inserters"), self._dao("inserters")
+        dead.subscribe()
+        survivor.subscribe()
+        self.producer._bulk_publish([{"type": "task", "task_id": str(i)} for i in range(10)])
+        # The dead consumer read the entries but never acknowledged them.
+        dead._producer.xreadgroup("inserters", dead._consumer_name, {dead._stream: ">"}, count=10)
+        assert self._pending("inserters") == 10
+
+        received = []
+        survivor._reclaim_idle_ms = 0
+        assert survivor._reclaim(lambda msg: received.append(msg["task_id"]) or True)
+        assert received == [str(i) for i in range(10)]
+        assert self._pending("inserters") == 0
@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import orjson
+import pandas as pd
+
+from flowcept.commons.daos.mq_dao.mq_dao_base import MQDao
+from flowcept.commons.msgpack_ext import (
+    decode_ext,
+    decode_ext_storable,
+    decode_json_ext,
+    encode_ext,
+    json_default,
+    packb,
+    unpackb,
+)
+from flowcept.commons.utils import replace_non_serializable
+
+
+class TestMsgpackExt(unittest.TestCase):
+    def test_arrays_roundtrip_exactly(self):
+        for array in (
+            np.arange(12, dtype=np.float32).reshape(3, 4),
+            np.asfortranarray(np.random.rand(5, 3)),
+            np.array([True, False]),
+            np.array(7, dtype=np.int16),
+            np.zeros((0, 3), dtype=np.uint8),
+            np.array(["2024-01-01"], dtype="datetime64[D]"),
+        ):
+            decoded = unpackb(packb({"a": array}))["a"]
+            assert isinstance(decoded, np.ndarray) and not decoded.flags.writeable
+            assert decoded.dtype == array.dtype and decoded.shape == array.shape
+            np.testing.assert_array_equal(decoded, array)
+
+        assert unpackb(packb([np.array([1, "x"], dtype=object), np.float64(0.5)])) == [[1, "x"], 0.5]
+        with self.assertRaises(TypeError):
+            packb({"x": object()})
+
+    def test_compression(self):
+        array = np.zeros(100_000)
+        ext = encode_ext(array, compression="zlib", compression_min_bytes=1024)
+        assert len(ext.data) < array.nbytes // 10
+        np.testing.assert_array_equal(decode_ext(ext.code, ext.data), array)
+        assert len(encode_ext(np.zeros(10), compression="zlib", compression_min_bytes=1024).data) > 80
+
+    def test_pandas_roundtrip_and_storable_values(self):
+        series = pd.Series([1.5, 2.5], index=["x", "y"], name="s")
+        df = pd.DataFrame({"a": [1, 2], "b": [0.5, 1.5]})
+        decoded = unpackb(packb([series, df]))
+        pd.testing.assert_series_equal(decoded[0], series)
+        pd.testing.assert_frame_equal(decoded[1], df)
+
+        storable = unpackb(packb([series, df, np.eye(2)]), decode_ext_storable)
+        assert storable == [{"x": 1.5, "y": 2.5}, {"a": {"0": 1, "1": 2}, "b": {"0": 0.5, "1": 1.5}}, [[1, 0], [0, 1]]]
+
+    def test_envelope_and_json_buffer(self):
+        message = {"type": "task", "task_id": "1", "generated": {"w": np.arange(4, dtype=np.int64)}}
+        payload = MQDao.pack_envelope([message])
+        np.testing.assert_array_equal(MQDao.unpack_messages(payload)[0]["generated"]["w"], np.arange(4))
+        assert MQDao.unpack_messages(payload, decode_ext_storable)[0]["generated"]["w"] == [0, 1, 2, 3]
+
+        loaded = decode_json_ext(orjson.loads(orjson.dumps(message, default=json_default)))
+        np.testing.assert_array_equal(loaded["generated"]["w"], np.arange(4))
+
+    def test_replace_non_serializable_keeps_arrays_when_enabled(self):
+        array = np.ones(3)
+        assert isinstance(replace_non_serializable({"a": array})["a"], str)
+        with patch("flowcept.commons.utils.NATIVE_ARRAYS_ENABLED", True):
+            assert replace_non_serializable({"a": array})["a"] is array
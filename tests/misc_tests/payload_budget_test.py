@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import patch
+
+import msgpack
+import numpy as np
+
+from flowcept.commons.flowcept_dataclasses.task_record import TaskRecord
+from flowcept.commons.payload_budget import PAYLOAD_OBJECT_TYPE, PayloadBudget, approx_size
+
+
+class TestPayloadBudget(unittest.TestCase):
+    def test_small_messages_are_untouched(self):
+        budget = PayloadBudget(max_field_bytes=1000, max_items=10)
+        msg = {"type": "task", "task_id": "t", "used": {"x": 1, "cfg": {"a": [1, 2]}}, "generated": {"y": "ok"}}
+        assert budget.apply_to_message(msg) is msg
+
+    def test_limits(self):
+        budget = PayloadBudget(max_field_bytes=2000, max_items=100)
+        array = np.arange(1000, dtype=np.float32)
+        used = {"x": 1, "array": array, "items": list(range(500)), "nested": {"small": [1], "big": list(range(200))}}
+        generated = {"text": "a" * 5000, "ok": [1, 2, 3]}
+        msg = {"type": "task", "task_id": "t", "used": used, "generated": generated}
+        limited = budget.apply_to_message(msg)
+
+        assert limited is not msg and msg["used"] is used and used["items"] == list(range(500))
+        summary = limited["used"]["array"]
+        assert summary["truncated"] and summary["type"] == "ndarray"
+        assert summary["shape"] == [1000] and summary["dtype"] == "float32"
+        assert summary["min"] == 0 and summary["max"] == 999 and summary["mean"] == 499.5
+        assert summary["hash"] == budget.apply({"a": array.copy()}, "used")["a"]["hash"]
+        assert limited["used"]["items"] == {"truncated": True, "type": "list", "length": 500, "head": list(range(100))}
+        assert limited["used"]["nested"]["small"] == [1] and limited["used"]["nested"]["big"]["length"] == 200
+        assert limited["generated"]["text"] == {"truncated": True, "type": "str", "approx_bytes": 5005}
+        assert limited["generated"]["ok"] is generated["ok"]
+        for field in ("used", "generated"):
+            assert approx_size(limited[field]) < 5 * 2000
+        msgpack.dumps(limited)
+
+    def test_offload_keeps_the_object_id(self):
+        budget = PayloadBudget(max_field_bytes=100, max_items=10, offload=True)
+
+        def fake_insert(self, blob_obj, object, pickle=False, **kwargs):
+            blob_obj.object_id = f"obj-{len(saved)}"
+            saved.append((blob_obj, object, pickle))
+            return blob_obj
+
+        saved = []
+        with patch("flowcept.flowcept_api.db_api.DBAPI._insert_or_update_object", fake_insert):
+            limited = budget.apply({"values": list(range(50))}, "generated", task_id="t", workflow_id="w")
+        assert limited["values"]["object_id"] == "obj-0"
+        blob, value, pickled = saved[0]
+        assert value == list(range(50)) and pickled
+        assert blob.object_type == PAYLOAD_OBJECT_TYPE and blob.task_id == "t" and blob.workflow_id == "w"
+        assert blob.custom_metadata == {"field": "generated.values"}
+
+    def test_offload_stores_nested_values_once(self):
+        budget = PayloadBudget(max_field_bytes=1000, max_items=10, offload=True)
+        array = np.arange(1000)
+
+        def fake_insert(self, blob_obj, object, pickle=False, **kwargs):
+            blob_obj.object_id = f"obj-{len(saved)}"
+            saved.append((blob_obj, object))
+            return blob_obj
+
+        saved = []
+        with patch("flowcept.flowcept_api.db_api.DBAPI._insert_or_update_object", fake_insert):
+            limited = budget.apply(
+                {"outer": [array] + list(range(20)), "inner": [array, 1]}, "used", task_id="t", workflow_id="w"
+            )
+        assert [blob.custom_metadata["field"] for blob, _ in saved] == ["used.outer", "used.inner[0]"]
+        assert saved[0][1][0] is array and saved[1][1] is array
+        outer = limited["outer"]
+        assert outer["object_id"] == "obj-0" and outer["length"] == 21
+        assert outer["head"][0]["truncated"] and "object_id" not in outer["head"][0]
+        assert limited["inner"][0]["object_id"] == "obj-1"
+
+    def test_task_record_summarizes_arrays_before_sanitizing(self):
+        record = TaskRecord()
+        record.task_id, record.activity_id, record.started_at, record.status = "t", "f", 1.0, "FINISHED"
+        record.workflow_id = record.campaign_id = record.hostname = None
+        record.used = {"array": np.ones((100, 100))}
+        record.sanitize = True
+        with patch(
+            "flowcept.commons.flowcept_dataclasses.task_record._PAYLOAD_BUDGET",
+            PayloadBudget(max_field_bytes=1000, max_items=100),
+        ):
+            msg = record.to_dict()
+        assert msg["used"]["array"]["shape"] == [100, 100] and msg["used"]["array"]["mean"] == 1.0
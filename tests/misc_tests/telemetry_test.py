@@ -1,7 +1,28 @@
 import unittest
+from time import sleep
 
 from flowcept.commons.flowcept_logger import FlowceptLogger
 from flowcept.flowceptor.telemetry_capture import TelemetryCapture
+from flowcept.flowceptor.telemetry_sampler import TELEMETRY_SNAPSHOT_SUBTYPE, TelemetrySampler
+
+
+class FakeInterceptor:
+    started = True
+
+    def __init__(self):
+        self.messages = []
+
+    def intercept_many(self, messages):
+        self.messages.extend(messages)
+
+
+class CountingCapture:
+    def __init__(self):
+        self.calls = 0
+
+    def capture(self):
+        self.calls += 1
+        return None
 
 
 class TestTelemetry(unittest.TestCase):
@@ -15,3 +36,20 @@ class TestTelemetry(unittest.TestCase):
             self.skipTest("Telemetry capture disabled.")
         assert telemetry.to_dict()
         tele_capture.shutdown_gpu_telemetry()
+
+    def test_sampler(self):
+        interceptor, capture = FakeInterceptor(), CountingCapture()
+        sampler = TelemetrySampler(interceptor, capture, interval=0.01, ring_size=3, ship_batch_size=1000)
+        sampler.start()
+        refs = [sampler.capture() for _ in range(1000)]
+        sleep(0.1)
+        sampler.stop()
+        assert capture.calls < 100 and set(refs[0].to_dict()) == {"snapshot_id", "sampled_at"}
+        assert len(sampler._ring) == 3
+
+        messages = interceptor.messages
+        assert len(messages) == capture.calls and not sampler._unshipped
+        assert all(m["subtype"] == TELEMETRY_SNAPSHOT_SUBTYPE for m in messages)
+        assert messages[0]["task_id"] == refs[0].snapshot_id
+        last = messages[-1]
+        assert sampler.nearest(last["started_at"] + 100)["snapshot_id"] == last["task_id"]
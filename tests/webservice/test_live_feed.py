@@ -0,0 +1,50 @@
+"""Tests for the shared live feed behind the SSE endpoints."""
+
+import asyncio
+
+from flowcept.webservice.services.live_feed import LiveFeed
+
+
+def _task(task_id, workflow_id, t):
+    return {"task_id": task_id, "workflow_id": workflow_id, "started_at": t}
+
+
+def test_fan_out_matches_client_filters_and_drops_slow_clients():
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        feed = LiveFeed(source="poll", queue_size=2)
+        wf1 = feed.subscribe("tasks", {"workflow_id": "wf1"}, loop)
+        everything = feed.subscribe("tasks", {}, loop)
+        workflows = feed.subscribe("workflows", {}, loop)
+
+        feed.publish("tasks", [_task("a", "wf1", 1.0), _task("b", "wf2", 2.0)])
+        feed._flush()
+        await asyncio.sleep(0)
+        assert [d["task_id"] for d in wf1.queue.get_nowait()] == ["a"]
+        assert [d["task_id"] for d in everything.queue.get_nowait()] == ["a", "b"]
+        assert workflows.queue.empty()
+
+        # wf1 stops reading: it is dropped once its queue overflows, the others keep their feed.
+        for i in range(3):
+            feed.publish("tasks", [_task(f"c{i}", "wf1", 3.0 + i)])
+            feed._flush()
+            await asyncio.sleep(0)
+            everything.queue.get_nowait()
+        assert wf1.dropped and not everything.dropped
+        feed._flush()
+        assert wf1 not in feed._subscriptions and everything in feed._subscriptions
+
+    asyncio.run(scenario())
+
+
+def test_replay_resumes_within_the_buffer_only():
+    feed = LiveFeed(source="poll", replay_size=3)
+    start = feed._replay_from["tasks"]
+    feed.publish("tasks", [_task("a", "wf1", start + 1), _task("b", "wf2", start + 2)])
+    assert [d["task_id"] for d in feed.replay("tasks", {}, start)] == ["a", "b"]
+    assert [d["task_id"] for d in feed.replay("tasks", {"workflow_id": "wf2"}, start)] == ["b"]
+    assert feed.replay("tasks", {}, start - 10) is None
+
+    feed.publish("tasks", [_task(f"c{i}", "wf1", start + 3 + i) for i in range(3)])
+    assert feed.replay("tasks", {}, start + 1) is None  # "a" and "b" were evicted.
+    assert [d["task_id"] for d in feed.replay("tasks", {}, start + 3)] == ["c1", "c2"]
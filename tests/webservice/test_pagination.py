@@ -0,0 +1,118 @@
+"""Tests for webservice keyset pagination helpers."""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from flowcept.commons.daos.docdb_dao.lmdb_dao import LMDBDAO
+from flowcept.webservice.services.dataflow import build_dataflow
+from flowcept.webservice.services.pagination import (
+    TASK_KEYSET_SORT,
+    TASK_KEYSET_SORT_ASC,
+    decode_cursor,
+    encode_cursor,
+    list_tasks_page,
+)
+
+
+class _InMemoryTasks:
+    """Stand-in for DBAPI applying Mongo-style filters, sort, and limit to a list of tasks."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def task_query(self, filter, limit, sort, projection=None):
+        docs = [doc for doc in self.docs if LMDBDAO._match_filter(doc, filter)]
+        return LMDBDAO._sort_docs(docs, sort)[:limit]
+
+
+def test_cursor_round_trip_and_invalid_tokens():
+    token = encode_cursor({"started_at": 12.5, "task_id": "t-1", "other": 1})
+    assert decode_cursor(token) == (12.5, "t-1")
+    assert decode_cursor(encode_cursor({"task_id": "t-2"})) == (None, "t-2")
+    for bad in ("not-a-cursor", encode_cursor({"started_at": 1.0})):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+
+def test_pages_follow_started_at_then_task_id_with_nulls_last():
+    docs = [{"task_id": f"t{i:02d}", "workflow_id": "wf", "started_at": float(i // 3)} for i in range(10)]
+    docs += [{"task_id": "n1", "workflow_id": "wf"}, {"task_id": "n2", "workflow_id": "wf", "started_at": None}]
+    docs.append({"task_id": "other", "workflow_id": "other-wf", "started_at": 100.0})
+    db = _InMemoryTasks(docs)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = list_tasks_page(db, {"workflow_id": "wf"}, 4, cursor)
+        seen += [doc["task_id"] for doc in page]
+        pages += 1
+        if cursor is None:
+            break
+
+    assert seen == ["t09", "t08", "t07", "t06", "t05", "t04", "t03", "t02", "t01", "t00", "n2", "n1"]
+    assert pages == 3
+
+
+def test_ascending_pages_start_with_tasks_without_started_at():
+    docs = [{"task_id": f"t{i}", "started_at": float(i % 2)} for i in range(4)] + [{"task_id": "n1"}, {"task_id": "n0"}]
+    db = _InMemoryTasks(docs)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = list_tasks_page(db, {}, 2, cursor, sort=TASK_KEYSET_SORT_ASC)
+        seen += [doc["task_id"] for doc in page]
+        if cursor is None:
+            break
+
+    assert seen == ["n0", "n1", "t0", "t2", "t1", "t3"]
+
+
+def test_pages_over_datetime_started_at_as_stored_by_mongodb():
+    # MongoDB returns the stored UTC dates as naive datetimes with millisecond precision.
+    start = datetime(2026, 1, 1, 12, 0, 0, 123000)
+    docs = [{"task_id": f"t{i:02d}", "started_at": start + timedelta(milliseconds=i // 2)} for i in range(7)]
+    docs.append({"task_id": "n1"})
+    db = _InMemoryTasks(docs)
+
+    for sort, expected in (
+        (TASK_KEYSET_SORT, ["t06", "t05", "t04", "t03", "t02", "t01", "t00", "n1"]),
+        (TASK_KEYSET_SORT_ASC, ["n1", "t00", "t01", "t02", "t03", "t04", "t05", "t06"]),
+    ):
+        seen, cursor = [], None
+        with patch("flowcept.webservice.services.pagination.MONGO_ENABLED", True):
+            while True:
+                page, cursor = list_tasks_page(db, {}, 3, cursor, sort=sort)
+                seen += [doc["task_id"] for doc in page]
+                if cursor is None:
+                    break
+        assert seen == expected
+
+
+def test_dataflow_pages_over_datetime_started_at():
+    start = datetime(2026, 1, 1, 12, 0, 0)
+    docs = [
+        {
+            "task_id": f"t{i}",
+            "workflow_id": "wf",
+            "started_at": start + timedelta(seconds=i),
+            "ended_at": start + timedelta(seconds=i, milliseconds=500),
+            "used": {"x": i},
+            "generated": {"y": i + 10},
+        }
+        for i in range(5)
+    ]
+    db = _InMemoryTasks(docs)
+
+    seen, cursor, pages = [], None, 0
+    with patch("flowcept.webservice.services.pagination.MONGO_ENABLED", True):
+        while True:
+            graph = build_dataflow(db, "wf", limit=2, cursor=cursor)
+            seen += [node["stats"]["task_id"] for node in graph["nodes"] if node["kind"] == "task"]
+            pages += 1
+            cursor = graph["next"]
+            if cursor is None:
+                break
+
+    assert seen == ["t0", "t1", "t2", "t3", "t4"]
+    assert pages == 3
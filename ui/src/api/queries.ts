@@ -182,6 +182,7 @@ export interface DataflowGraph {
   nodes: DataflowNode[];
   edges: { source: string; target: string; relation: "used" | "generated" | "derived"; key?: string }[];
   truncated: boolean;
+  next: string | null;
 }
 
 export function useDataflow(workflowId: string) {